@@ -1,6 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
+from typing import Dict, List, Optional
 
 # Load environment variables from .env file in the backend directory
 dotenv_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
@@ -11,7 +12,56 @@ class Settings(BaseSettings):
     Application settings loaded from environment variables.
     """
     DATABASE_URL: str = "sqlite:///./default.db" # Default fallback
+    ASYNC_DATABASE_URL: Optional[str] = None # Async-driver URL for the API; derived from DATABASE_URL if unset (sqlite -> aiosqlite, postgresql -> asyncpg)
+
+    # SQLite profile (applied to every connection when DATABASE_URL is SQLite)
+    SQLITE_JOURNAL_MODE: str = "WAL" # WAL lets readers run alongside a writer ('DELETE' = SQLite's rollback journal)
+    SQLITE_SYNCHRONOUS: str = "NORMAL" # With WAL, NORMAL can lose the last commits on power loss but never corrupts
+    SQLITE_BUSY_TIMEOUT_MS: int = 30000 # How long a writer waits for the write lock before "database is locked"
+    SQLITE_MMAP_SIZE_BYTES: int = 256 * 1024 * 1024 # Memory-mapped reads (0 = disabled)
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024 # Page cache per connection
+    SQLITE_SERIALIZE_WRITES: bool = True # Write transactions take the write lock up front (BEGIN IMMEDIATE), queued per process
+
+    # Connection pool for server databases (PostgreSQL, MySQL); ignored for SQLite
+    DB_POOL_SIZE: int = 10 # Connections kept open per engine (the API has a sync and an async engine)
+    DB_MAX_OVERFLOW: int = 20 # Extra connections opened under load
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0 # Wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # Reopen connections older than this (server/proxy idle timeouts)
+    DB_POOL_PRE_PING: bool = True # Check a connection is alive before handing it out
+
     UPLOAD_DIR: str = "uploads" # Directory to store uploaded audio files relative to backend root
+    MAX_UPLOAD_BYTES: int = 2 * 1024 * 1024 * 1024 # Largest accepted recording (2 GiB)
+    UPLOAD_SESSION_TTL_SECONDS: int = 24 * 3600 # Incomplete resumable uploads idle longer than this are discarded
+    DECODED_AUDIO_DTYPE: str = "int16" # Sample format of the decoded 16 kHz PCM cache: 'int16' (half the size) or 'float32'
+    AUDIO_ARCHIVE_CODEC: str = "" # Re-encode originals once processed, for cold storage: '' (keep), 'opus' or 'flac'
+    AUDIO_ARCHIVE_OPUS_BITRATE: str = "32k" # Opus bitrate (speech stays intelligible well below this)
+
+    # Startup mode: API_ONLY serves the HTTP API without embedded workers and never imports torch/whisper
+    API_ONLY: bool = False
+
+    # Whisper ASR settings
+    ASR_ENGINE: str = "whisper" # 'whisper' (openai-whisper: fp16 on GPU, fp32 on CPU) or 'faster-whisper' (CTranslate2: int8 on CPU)
+    ASR_COMPUTE_TYPE: str = "" # faster-whisper weight/compute type, e.g. 'int8', 'int8_float32', 'float32' ('' = int8 on CPU, float16 on GPU)
+    WHISPER_MODEL: str = "base" # 'tiny', 'base', 'small', 'medium', 'large'
+    WHISPER_LANGUAGE_MODELS: Dict[str, str] = {} # Per-language models as JSON, e.g. {"en": "small.en", "zh": "medium"}; others use WHISPER_MODEL
+    WHISPER_DETECT_MODEL: str = "" # Multilingual model for language pre-detection ('' = WHISPER_MODEL)
+    ASR_LANGUAGE_DETECT_SECONDS: float = 30.0 # Audio from the start used to detect the language (Whisper's window is 30 s)
+    ASR_LANGUAGE_MIN_PROBABILITY: float = 0.5 # Below this, the language isn't fixed and Whisper detects it while transcribing
+    ASR_ADAPTIVE_TIERING: bool = False # Pick the model size per job from the backlog, audio length and SLO (see services/asr_tiering.py)
+    ASR_MODEL_TIERS: List[str] = ["tiny", "base", "small", "medium"] # Model sizes the policy may use, smallest first
+    ASR_MODEL_RTF: Dict[str, float] = {"tiny": 0.05, "base": 0.1, "small": 0.3, "medium": 0.8, "large": 1.5} # Estimated processing seconds per audio second (replaced by measurements)
+    ASR_TURNAROUND_SLO_SECONDS: float = 1800.0 # Target time from upload to transcript
+    ASR_UPGRADE_ENABLED: bool = True # Re-transcribe downgraded meetings with their target model when workers are idle
+    ASR_UPGRADE_MAX_RUNNING: int = 1 # Quality upgrade jobs running at once (across all workers)
+    ASR_MODEL_CACHE_SIZE: int = 2 # Whisper models kept loaded per process (and per ASR pool process); least recently used are evicted
+    ASR_BATCHED_INFERENCE: bool = False # Decode 30 s windows of concurrent recordings in shared batches (see services/inference_scheduler.py; 'whisper' engine only)
+    ASR_BATCH_SIZE: int = 8 # Windows per batched forward pass
+    ASR_BATCH_MAX_WAIT_MS: float = 200.0 # How long a window waits for the batch to fill before it runs part-full
+    ASR_WORKERS: int = 0 # Processes for chunked transcription (0 = one per CPU core, 1 = disable chunking)
+    ASR_CHUNKED_MIN_SECONDS: float = 600.0 # Recordings shorter than this are transcribed in one pass
+    ASR_CHUNK_SECONDS: float = 300.0 # Target chunk length
+    ASR_CHUNK_OVERLAP_SECONDS: float = 2.0 # Audio shared by neighbouring chunks
+    ASR_CHUNK_SEARCH_SECONDS: float = 30.0 # How far from the target a cut may move to land on silence
 
     # NeMo ASR settings
     NEMO_ASR_MODEL: str = "QuartzNet15x5Base-En" # Example pre-trained NeMo model
@@ -19,6 +69,48 @@ class Settings(BaseSettings):
     # Ollama settings
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "gemma3:1b" # Changed default model
+    OLLAMA_MAX_CONCURRENCY: int = 2 # Generations in flight per process (match the server's OLLAMA_NUM_PARALLEL)
+    OLLAMA_MAX_CONNECTIONS: int = 10 # Pooled HTTP connections to the server
+    OLLAMA_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    OLLAMA_REQUEST_TIMEOUT_SECONDS: float = 300.0 # Per attempt, excluding time queued for a concurrency slot
+    OLLAMA_MAX_RETRIES: int = 3 # Retries on connection errors, timeouts and 429/5xx responses
+    OLLAMA_RETRY_BACKOFF_SECONDS: float = 1.0 # Delay before the first retry (doubles per retry)
+
+    # Summarization settings (token counts are estimates, see services/text_chunking.py)
+    SUMMARY_SINGLE_CALL_MAX_TOKENS: int = 3000 # Longer transcripts are summarized map-reduce; keep below the model's context window
+    SUMMARY_CHUNK_TOKENS: int = 2000 # Size of each map-step chunk (and each reduce-step group of notes)
+    SUMMARY_MAP_CONCURRENCY: int = 4 # Parallel LLM calls during map and reduce steps
+
+    # Translation settings (summaries and action items, see services/translation.py)
+    TRANSLATION_MODEL: str = "" # Ollama model for translation ('' = OLLAMA_MODEL)
+    TRANSLATION_BATCH_MAX_TOKENS: int = 2000 # Texts per request are capped at this estimated size
+
+    # LLM result cache settings
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 5000 # Least-recently-used entries are evicted beyond this
+    LLM_CACHE_MAX_BYTES: int = 200 * 1024 * 1024 # ...or beyond this total response size
+
+    # Processing job queue settings
+    JOB_LEASE_SECONDS: int = 300 # How long a claimed job stays leased without a heartbeat
+    JOB_HEARTBEAT_SECONDS: int = 30 # How often a running worker extends its lease
+    JOB_MAX_ATTEMPTS: int = 3 # Attempts before a job (and its meeting) is marked FAILED
+    JOB_RETRY_BACKOFF_SECONDS: int = 30 # Base delay before a failed job is retried (doubles per attempt)
+    WORKER_POLL_INTERVAL_SECONDS: float = 2.0 # Idle delay between queue polls
+    EMBEDDED_WORKERS: int = 1 # Worker threads started inside the API process (0 = run `python -m app.worker` separately)
+
+    # Progress streaming settings
+    EVENT_BROKER: str = "memory" # Pub/sub backend for progress events
+    SSE_KEEPALIVE_SECONDS: float = 15.0 # Idle interval between keepalives (and status re-checks) on event streams
+
+    # Search settings
+    SEARCH_TOKENIZER: str = "unicode61" # 'unicode61' (word-based) or 'trigram' (substring matching, CJK-friendly)
+
+    # PDF export settings
+    PDF_RENDER_WORKERS: int = 2 # Processes rendering PDFs (xhtml2pdf is CPU-bound)
+    PDF_PRERENDER: bool = True # Render the PDF when a meeting completes, so downloads hit the cache
+    BULK_EXPORT_MAX_MEETINGS: int = 1000 # Largest selection a single bulk export accepts
+    BULK_EXPORT_MAX_IN_FLIGHT: int = 4 # PDF renders a bulk export keeps queued at once
+    BULK_REPROCESS_MAX_MEETINGS: int = 1000 # Largest selection a single bulk reprocess accepts
 
     # Add other settings if needed
 
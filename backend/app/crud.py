@@ -1,9 +1,16 @@
+import base64
+import binascii
 import os 
 import logging 
 import json # Import json for serialization
+import datetime
+from sqlalchemy import or_, func, text, cast, Text, insert, bindparam, literal, tuple_, Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from . import models, schemas
-from typing import List, Optional
+from . import models, schemas, search_index
+from .services import decoded_audio
+from .database import serialized_write
+from typing import List, Optional, Tuple
 
 # Configure logging for this module
 logger = logging.getLogger(__name__)
@@ -21,14 +28,77 @@ def get_meeting(db: Session, meeting_id: int) -> Optional[models.Meeting]:
     return db_meeting
 
 
-def get_meetings(db: Session, skip: int = 0, limit: int = 100) -> List[models.Meeting]:
+def get_meeting_status(db: Session, meeting_id: int) -> Optional[models.MeetingStatus]:
     """
-    Retrieve a list of meetings with pagination. TypeDecorator handles JSON parsing.
+    Retrieve only the status of a meeting, without loading transcript or summaries.
     """
-    db_meetings = db.query(models.Meeting).offset(skip).limit(limit).all()
-    # No need to call _parse_action_items
-    return db_meetings
+    row = db.query(models.Meeting.status).filter(models.Meeting.id == meeting_id).first()
+    return row[0] if row else None
+
+
+# Columns shown in meeting lists; transcript, summaries and action items are never loaded
+MEETING_SUMMARY_COLUMNS = (
+    models.Meeting.id,
+    models.Meeting.filename,
+    models.Meeting.upload_time,
+    models.Meeting.status,
+    models.Meeting.detected_language,
+    models.Meeting.duration,
+    models.Meeting.error_message,
+)
+
+def encode_meeting_cursor(upload_time: datetime.datetime, meeting_id: int) -> str:
+    """
+    Opaque keyset cursor for the meeting list: the (upload_time, id) of the last row of a page.
+    """
+    raw = f"{upload_time.isoformat()}|{meeting_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_meeting_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """
+    Inverse of encode_meeting_cursor. Raises ValueError for a malformed cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        upload_time, meeting_id = raw.rsplit("|", 1)
+        return datetime.datetime.fromisoformat(upload_time), int(meeting_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Invalid cursor")
 
+def get_meetings(db: Session, limit: int = 100, cursor: Optional[Tuple[datetime.datetime, int]] = None,
+                 status: Optional[models.MeetingStatus] = None, language: Optional[str] = None) -> List[Row]:
+    """
+    Retrieve a page of meetings for list views, newest first, as rows of MEETING_SUMMARY_COLUMNS.
+    Pages with keyset pagination on (upload_time, id): pass the last row's values as `cursor`.
+    Each page is one range scan of a composite index (see models.Meeting), however deep it is.
+    """
+    query = db.query(*MEETING_SUMMARY_COLUMNS)
+    if status is not None:
+        query = query.filter(models.Meeting.status == status)
+    if language is not None:
+        query = query.filter(models.Meeting.detected_language == language)
+    if cursor is not None:
+        query = query.filter(tuple_(models.Meeting.upload_time, models.Meeting.id) < tuple_(*cursor))
+    return query.order_by(models.Meeting.upload_time.desc(), models.Meeting.id.desc()).limit(limit).all()
+
+def get_meeting_ids_matching(db: Session, meeting_filter: schemas.MeetingFilter, limit: int) -> List[int]:
+    """
+    Return the IDs of the meetings matching a bulk-operation filter, oldest first.
+    Only IDs are loaded, so the selection stays small however many meetings match.
+    """
+    query = db.query(models.Meeting.id)
+    if meeting_filter.meeting_ids is not None:
+        query = query.filter(models.Meeting.id.in_(meeting_filter.meeting_ids))
+    if meeting_filter.uploaded_from is not None:
+        query = query.filter(models.Meeting.upload_time >= meeting_filter.uploaded_from)
+    if meeting_filter.uploaded_to is not None:
+        query = query.filter(models.Meeting.upload_time < meeting_filter.uploaded_to)
+    if meeting_filter.status is not None:
+        query = query.filter(models.Meeting.status == meeting_filter.status)
+    rows = query.order_by(models.Meeting.upload_time, models.Meeting.id).limit(limit).all()
+    return [row.id for row in rows]
+
+@serialized_write
 def create_meeting(db: Session, meeting: schemas.MeetingCreate) -> models.Meeting:
     """
     Create a new meeting record in the database.
@@ -44,9 +114,11 @@ def create_meeting(db: Session, meeting: schemas.MeetingCreate) -> models.Meetin
     return db_meeting
 
 
+@serialized_write
 def delete_meeting(db: Session, meeting_id: int) -> bool:
     """
     Deletes a meeting record from the database and its associated audio file.
+    Audio shared with other meetings (same content hash) is only removed with its last reference.
     Returns True if deletion was successful, False otherwise.
     """
     db_meeting = get_meeting(db, meeting_id=meeting_id)
@@ -54,14 +126,32 @@ def delete_meeting(db: Session, meeting_id: int) -> bool:
         return False # Meeting not found
 
     audio_path = db_meeting.audio_file_path
+    content_hash = db_meeting.content_hash
 
     try:
-        # Delete the database record first
+        # Delete the database record first (queued jobs and transcript segments go with it)
+        db.query(models.ProcessingJob)\
+          .filter(models.ProcessingJob.meeting_id == meeting_id)\
+          .delete(synchronize_session=False)
+        db.query(models.TranscriptSegment)\
+          .filter(models.TranscriptSegment.meeting_id == meeting_id)\
+          .delete(synchronize_session=False)
+        db.query(models.MeetingStage)\
+          .filter(models.MeetingStage.meeting_id == meeting_id)\
+          .delete(synchronize_session=False)
+        db.query(models.UploadSession)\
+          .filter(models.UploadSession.meeting_id == meeting_id)\
+          .delete(synchronize_session=False)
         db.delete(db_meeting)
+        if content_hash:
+            # Shared blob: only delete the file once no meeting references it
+            audio_path = _release_audio_blob(db, content_hash)
         db.commit()
         logger.info(f"Deleted meeting record {meeting_id} from database.")
 
-        # If DB deletion is successful, attempt to delete the audio file
+        # If DB deletion is successful, attempt to delete the audio file (and its decoded PCM)
+        if audio_path:
+            decoded_audio.remove(audio_path)
         if audio_path and os.path.exists(audio_path):
             try:
                 os.remove(audio_path)
@@ -79,6 +169,7 @@ def delete_meeting(db: Session, meeting_id: int) -> bool:
         logger.error(f"Error deleting meeting {meeting_id} from database: {e}", exc_info=True)
         return False
 
+@serialized_write
 def update_meeting(db: Session, meeting_id: int, meeting_update: schemas.MeetingUpdate) -> Optional[models.Meeting]:
     """
     Update an existing meeting record.
@@ -98,6 +189,7 @@ def update_meeting(db: Session, meeting_id: int, meeting_update: schemas.Meeting
         db.refresh(db_meeting)
     return db_meeting
 
+@serialized_write
 def update_meeting_status(db: Session, meeting_id: int, status: models.MeetingStatus, error_message: Optional[str] = None) -> Optional[models.Meeting]:
     """
     Helper function to specifically update the status and optional error message of a meeting,
@@ -126,17 +218,704 @@ def update_meeting_status(db: Session, meeting_id: int, status: models.MeetingSt
         logger.error(f"Error updating meeting status for ID {meeting_id}: {e}", exc_info=True)
         return None
 
-# --- Search Functionality (Basic Example) ---
-
-def search_transcripts(db: Session, query: str, limit: int = 10) -> List[models.Meeting]:
+def find_completed_meeting_by_hash(db: Session, content_hash: str, exclude_meeting_id: int) -> Optional[models.Meeting]:
     """
-    Basic search within the transcript field using SQL LIKE.
-    Returns meetings where the transcript contains the query string.
-    Note: This is case-sensitive by default in SQLite unless configured otherwise.
-          For more advanced search, consider full-text search extensions or dedicated search engines.
+    Find the most recent COMPLETED meeting with the same audio content hash (other than
+    `exclude_meeting_id`) whose results can be reused.
     """
-    search_pattern = f"%{query}%"
     return db.query(models.Meeting)\
-             .filter(models.Meeting.transcript.like(search_pattern))\
-             .limit(limit)\
+             .filter(models.Meeting.content_hash == content_hash,
+                     models.Meeting.id != exclude_meeting_id,
+                     models.Meeting.status == models.MeetingStatus.COMPLETED,
+                     models.Meeting.transcript.isnot(None))\
+             .order_by(models.Meeting.upload_time.desc())\
+             .first()
+
+# --- Content-addressed Audio Blobs ---
+
+def get_audio_blob(db: Session, content_hash: str) -> Optional[models.AudioBlob]:
+    """
+    Retrieve the stored audio blob for a content hash.
+    """
+    return db.query(models.AudioBlob).filter(models.AudioBlob.content_hash == content_hash).first()
+
+@serialized_write
+def move_audio_blob(db: Session, content_hash: str, file_path: str, size_bytes: int):
+    """
+    Point a blob, and every meeting using it, at a new file (e.g. a re-encoded archive copy).
+    """
+    db.query(models.AudioBlob)\
+      .filter(models.AudioBlob.content_hash == content_hash)\
+      .update({"file_path": file_path, "size_bytes": size_bytes}, synchronize_session=False)
+    db.query(models.Meeting)\
+      .filter(models.Meeting.content_hash == content_hash)\
+      .update({"audio_file_path": file_path}, synchronize_session=False)
+    db.commit()
+
+def _release_audio_blob(db: Session, content_hash: str) -> Optional[str]:
+    """
+    Drop one reference on a blob without committing: part of the caller's write (delete_meeting).
+    Returns the file path to delete if this was the last reference, otherwise None.
+    """
+    db.query(models.AudioBlob)\
+      .filter(models.AudioBlob.content_hash == content_hash)\
+      .update({"ref_count": models.AudioBlob.ref_count - 1}, synchronize_session=False)
+    db_blob = get_audio_blob(db, content_hash)
+    if db_blob is None or db_blob.ref_count > 0:
+        return None
+    file_path = db_blob.file_path
+    db.delete(db_blob)
+    return file_path
+
+# --- Resumable Upload Sessions ---
+
+@serialized_write
+def create_upload_session(db: Session, session_id: str, filename: str, content_type: Optional[str],
+                          total_size: int, file_path: str, ttl_seconds: int) -> models.UploadSession:
+    """
+    Register a new resumable upload (offset 0).
+    """
+    now = datetime.datetime.utcnow()
+    db_upload = models.UploadSession(
+        id=session_id, filename=filename, content_type=content_type, total_size=total_size,
+        offset=0, file_path=file_path, created_at=now, updated_at=now,
+        expires_at=now + datetime.timedelta(seconds=ttl_seconds)
+    )
+    db.add(db_upload)
+    db.commit()
+    db.refresh(db_upload)
+    return db_upload
+
+def get_upload_session(db: Session, session_id: str) -> Optional[models.UploadSession]:
+    return db.query(models.UploadSession).filter(models.UploadSession.id == session_id).first()
+
+@serialized_write
+def advance_upload_offset(db: Session, session_id: str, expected_offset: int, new_offset: int, ttl_seconds: int) -> bool:
+    """
+    Move an upload's offset forward, only if it is still at `expected_offset` (guards against
+    two clients appending to the same upload). Also extends the upload's expiry.
+    """
+    now = datetime.datetime.utcnow()
+    updated = db.query(models.UploadSession)\
+                .filter(models.UploadSession.id == session_id,
+                        models.UploadSession.offset == expected_offset)\
+                .update({
+                    models.UploadSession.offset: new_offset,
+                    models.UploadSession.updated_at: now,
+                    models.UploadSession.expires_at: now + datetime.timedelta(seconds=ttl_seconds),
+                }, synchronize_session=False)
+    db.commit()
+    return updated == 1
+
+@serialized_write
+def complete_upload_session(db: Session, session_id: str, meeting_id: int):
+    db.query(models.UploadSession)\
+      .filter(models.UploadSession.id == session_id)\
+      .update({models.UploadSession.meeting_id: meeting_id}, synchronize_session=False)
+    db.commit()
+
+@serialized_write
+def delete_upload_session(db: Session, session_id: str):
+    db.query(models.UploadSession)\
+      .filter(models.UploadSession.id == session_id)\
+      .delete(synchronize_session=False)
+    db.commit()
+
+@serialized_write
+def create_uploaded_meeting(db: Session, session_id: Optional[str], filename: str, file_path: str, content_hash: str,
+                            size_bytes: int, duration: Optional[float], max_attempts: int) -> models.Meeting:
+    """
+    Finish an upload in one transaction: take a reference on the audio blob (registering it, or
+    pointing it at `file_path` if it was stored elsewhere), create the meeting with its audio,
+    link the resumable upload session to it (if any) and queue its processing job.
+    """
+    for _ in range(2):
+        try:
+            incremented = db.query(models.AudioBlob)\
+                            .filter(models.AudioBlob.content_hash == content_hash)\
+                            .update({"ref_count": models.AudioBlob.ref_count + 1, "file_path": file_path},
+                                    synchronize_session=False)
+            if incremented:
+                db.query(models.Meeting)\
+                  .filter(models.Meeting.content_hash == content_hash, models.Meeting.audio_file_path != file_path)\
+                  .update({"audio_file_path": file_path}, synchronize_session=False)
+            else:
+                db.add(models.AudioBlob(content_hash=content_hash, file_path=file_path, size_bytes=size_bytes, ref_count=1))
+            db_meeting = models.Meeting(filename=filename, status=models.MeetingStatus.PENDING,
+                                        audio_file_path=file_path, content_hash=content_hash, duration=duration)
+            db.add(db_meeting)
+            db.flush() # Assigns the meeting ID
+            if session_id is not None:
+                db.query(models.UploadSession)\
+                  .filter(models.UploadSession.id == session_id)\
+                  .update({models.UploadSession.meeting_id: db_meeting.id}, synchronize_session=False)
+            db.add(_new_processing_job(db_meeting.id, max_attempts))
+            db.commit()
+            db.refresh(db_meeting)
+            return db_meeting
+        except IntegrityError:
+            # Another upload registered the same content first; take a reference on theirs
+            db.rollback()
+    raise RuntimeError(f"Could not register audio blob {content_hash}")
+
+@serialized_write
+def pop_expired_upload_sessions(db: Session) -> List[Tuple[str, Optional[str]]]:
+    """
+    Delete uploads past their expiry. Returns (upload ID, partial file path) pairs; the path,
+    to be removed, is None for uploads that were completed.
+    """
+    expired = db.query(models.UploadSession.id, models.UploadSession.file_path, models.UploadSession.meeting_id)\
+                .filter(models.UploadSession.expires_at < datetime.datetime.utcnow())\
+                .all()
+    if not expired:
+        return []
+    db.query(models.UploadSession)\
+      .filter(models.UploadSession.id.in_([row.id for row in expired]))\
+      .delete(synchronize_session=False)
+    db.commit()
+    return [(row.id, row.file_path if row.meeting_id is None else None) for row in expired]
+
+# --- Transcript Segments ---
+
+def _segment_rows(meeting_id: int, segments: List[dict]) -> List[dict]:
+    return [
+        {
+            "meeting_id": meeting_id,
+            "segment_index": index,
+            "start_time": float(segment["start"]),
+            "end_time": float(segment["end"]),
+            "text": segment["text"],
+            "speaker": segment.get("speaker"),
+        }
+        for index, segment in enumerate(segments)
+    ]
+
+@serialized_write
+def replace_transcript_segments(db: Session, meeting_id: int, segments: List[dict]) -> int:
+    """
+    Store a meeting's timestamped segments, replacing any previous ones.
+    `segments` are dicts with 'start', 'end', 'text' (and optionally 'speaker').
+    All rows go in with one executemany INSERT in a single transaction.
+    Returns the number of stored segments.
+    """
+    rows = _segment_rows(meeting_id, segments)
+    try:
+        db.query(models.TranscriptSegment)\
+          .filter(models.TranscriptSegment.meeting_id == meeting_id)\
+          .delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(models.TranscriptSegment), rows)
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+
+@serialized_write
+def apply_transcript_upgrade(db: Session, meeting_id: int, replaced_asr_model: Optional[str], segments: List[dict],
+                             meeting_update: schemas.MeetingUpdate) -> bool:
+    """
+    Swap in a re-transcription's segments, transcript and notes in one transaction, provided the
+    meeting is still COMPLETED with the transcript of `replaced_asr_model`.
+    Returns False (and changes nothing) if the meeting changed in the meantime.
+    """
+    db_meeting = get_meeting(db, meeting_id)
+    if db_meeting is None or db_meeting.status != models.MeetingStatus.COMPLETED or db_meeting.asr_model != replaced_asr_model:
+        return False
+    db.query(models.TranscriptSegment)\
+      .filter(models.TranscriptSegment.meeting_id == meeting_id)\
+      .delete(synchronize_session=False)
+    rows = _segment_rows(meeting_id, segments)
+    if rows:
+        db.execute(insert(models.TranscriptSegment), rows)
+    for key, value in meeting_update.model_dump(exclude_unset=True).items():
+        setattr(db_meeting, key, value)
+    db.commit()
+    return True
+
+def get_transcript_segments(db: Session, meeting_id: int, start: Optional[float] = None, end: Optional[float] = None,
+                            after_index: Optional[int] = None, limit: int = 200) -> List[models.TranscriptSegment]:
+    """
+    Retrieve a meeting's segments overlapping the [start, end) time window, in transcript order.
+    Pages with keyset pagination: pass the last returned segment_index as `after_index`.
+    """
+    query = db.query(models.TranscriptSegment)\
+              .filter(models.TranscriptSegment.meeting_id == meeting_id)
+    if start is not None:
+        query = query.filter(models.TranscriptSegment.end_time > start)
+    if end is not None:
+        query = query.filter(models.TranscriptSegment.start_time < end)
+    if after_index is not None:
+        query = query.filter(models.TranscriptSegment.segment_index > after_index)
+    return query.order_by(models.TranscriptSegment.segment_index).limit(limit).all()
+
+@serialized_write
+def copy_transcript_segments(db: Session, source_meeting_id: int, target_meeting_id: int) -> int:
+    """
+    Copy all segments of one meeting to another with a single INSERT ... SELECT.
+    Returns the number of copied segments.
+    """
+    segment = models.TranscriptSegment
+    columns = [segment.meeting_id, segment.segment_index, segment.start_time, segment.end_time, segment.text, segment.speaker]
+    source = db.query(
+        literal(target_meeting_id), segment.segment_index, segment.start_time, segment.end_time, segment.text, segment.speaker
+    ).filter(segment.meeting_id == source_meeting_id)
+    try:
+        db.query(segment).filter(segment.meeting_id == target_meeting_id).delete(synchronize_session=False)
+        result = db.execute(insert(segment).from_select(columns, source.statement))
+        db.commit()
+        return result.rowcount
+    except Exception:
+        db.rollback()
+        raise
+
+# --- Search Functionality ---
+
+def search_transcripts(db: Session, query: str, limit: int = 10, offset: int = 0) -> Tuple[int, List[dict]]:
+    """
+    Full-text search over transcripts, summaries and action items.
+    Uses the SQLite FTS5 index (BM25-ranked, with highlighted snippets) when available,
+    and a case-insensitive LIKE scan otherwise (non-SQLite databases, or queries the
+    trigram tokenizer can't answer).
+    Returns (total_hits, hits) where each hit is a dict matching schemas.SearchHit.
+    """
+    if search_index.is_enabled() and search_index.can_match(query):
+        total, hits = _search_fts(db, query, limit, offset)
+        segment_matches = _first_matching_segments_fts(db, query, [hit["meeting_id"] for hit in hits])
+    else:
+        total, hits = _search_like(db, query, limit, offset)
+        segment_matches = _first_matching_segments_like(db, query, [hit["meeting_id"] for hit in hits])
+
+    # Resolve each hit to the first transcript segment that contains the query
+    for hit in hits:
+        segment = segment_matches.get(hit["meeting_id"])
+        hit["segment_id"] = segment["id"] if segment else None
+        hit["segment_start"] = segment["start_time"] if segment else None
+        hit["segment_end"] = segment["end_time"] if segment else None
+    return total, hits
+
+def _first_matching_segments_fts(db: Session, query: str, meeting_ids: List[int]) -> dict:
+    if not meeting_ids:
+        return {}
+    fts = search_index.SEGMENTS_FTS_TABLE
+    # SQLite returns the bare columns of the row holding MIN(start_time) in each group
+    rows = db.execute(text(
+        f"SELECT s.meeting_id, s.id, MIN(s.start_time) AS start_time, s.end_time "
+        f"FROM {fts} JOIN transcript_segments s ON s.id = {fts}.rowid "
+        f"WHERE {fts} MATCH :match AND {fts}.meeting_id IN :meeting_ids "
+        f"GROUP BY s.meeting_id"
+    ).bindparams(bindparam("meeting_ids", expanding=True)),
+        {"match": search_index.build_match_expression(query), "meeting_ids": meeting_ids}).all()
+    return {row.meeting_id: {"id": row.id, "start_time": row.start_time, "end_time": row.end_time} for row in rows}
+
+def _first_matching_segments_like(db: Session, query: str, meeting_ids: List[int]) -> dict:
+    if not meeting_ids:
+        return {}
+    conditions = [models.TranscriptSegment.text.ilike(f"%{term}%") for term in search_index.query_terms(query) or [query]]
+    segments = db.query(models.TranscriptSegment)\
+                 .filter(models.TranscriptSegment.meeting_id.in_(meeting_ids), or_(*conditions))\
+                 .order_by(models.TranscriptSegment.meeting_id, models.TranscriptSegment.start_time)\
+                 .all()
+    matches = {}
+    for segment in segments:
+        matches.setdefault(segment.meeting_id, {"id": segment.id, "start_time": segment.start_time, "end_time": segment.end_time})
+    return matches
+
+def _search_fts(db: Session, query: str, limit: int, offset: int) -> Tuple[int, List[dict]]:
+    match = search_index.build_match_expression(query)
+    fts = search_index.FTS_TABLE
+    total = db.execute(
+        text(f"SELECT count(*) FROM {fts} WHERE {fts} MATCH :match"), {"match": match}
+    ).scalar()
+    rows = db.execute(text(
+        f"SELECT m.id, m.filename, m.upload_time, m.status, m.detected_language, "
+        f"{search_index.bm25_sql()} AS rank, {search_index.snippet_sql()} AS snippet "
+        f"FROM {fts} JOIN meetings m ON m.id = {fts}.rowid "
+        f"WHERE {fts} MATCH :match ORDER BY rank LIMIT :limit OFFSET :offset"
+    ), {"match": match, "limit": limit, "offset": offset}).all()
+
+    hits = [{
+        "meeting_id": row.id,
+        "filename": row.filename,
+        "upload_time": row.upload_time,
+        "status": row.status,
+        "detected_language": row.detected_language,
+        "score": -row.rank, # bm25() is lower-is-better; expose higher-is-better
+        "snippet": search_index.render_snippet(row.snippet),
+    } for row in rows]
+    return total, hits
+
+def _search_like(db: Session, query: str, limit: int, offset: int) -> Tuple[int, List[dict]]:
+    conditions = []
+    for term in search_index.query_terms(query) or [query]:
+        pattern = f"%{term}%"
+        conditions.append(or_(
+            models.Meeting.transcript.ilike(pattern),
+            models.Meeting.summary_en.ilike(pattern),
+            models.Meeting.summary_zh.ilike(pattern),
+            # Compare the stored JSON text, not the decoded list
+            cast(models.Meeting.action_items_en, Text).ilike(pattern),
+            cast(models.Meeting.action_items_zh, Text).ilike(pattern),
+        ))
+    base_query = db.query(models.Meeting).filter(*conditions)
+    total = base_query.count()
+    meetings = base_query.order_by(models.Meeting.upload_time.desc()).offset(offset).limit(limit).all()
+
+    hits = []
+    for meeting in meetings:
+        content = next(
+            (value for value in (meeting.transcript, meeting.summary_en, meeting.summary_zh)
+             if value and any(term.lower() in value.lower() for term in search_index.query_terms(query))),
+            meeting.transcript or ""
+        )
+        hits.append({
+            "meeting_id": meeting.id,
+            "filename": meeting.filename,
+            "upload_time": meeting.upload_time,
+            "status": meeting.status,
+            "detected_language": meeting.detected_language,
+            "score": 0.0,
+            "snippet": search_index.make_snippet(content, query),
+        })
+    return total, hits
+
+# --- Processing Job Queue ---
+
+def _new_processing_job(meeting_id: int, max_attempts: int, from_stage: Optional[models.PipelineStage] = None,
+                        priority: int = 0, asr_model: Optional[str] = None) -> models.ProcessingJob:
+    return models.ProcessingJob(
+        meeting_id=meeting_id,
+        status=models.JobStatus.QUEUED,
+        max_attempts=max_attempts,
+        available_at=datetime.datetime.utcnow(),
+        from_stage=from_stage.value if from_stage is not None else None,
+        priority=priority,
+        asr_model=asr_model
+    )
+
+@serialized_write
+def enqueue_processing_job(db: Session, meeting_id: int, max_attempts: int = 3,
+                           from_stage: Optional[models.PipelineStage] = None, priority: int = 0,
+                           asr_model: Optional[str] = None) -> models.ProcessingJob:
+    """
+    Add a QUEUED processing job for a meeting. Any worker process polling the same
+    database can claim it. `from_stage` marks a reprocess job (see services/stages.py);
+    `priority` and `asr_model` are used by quality upgrade jobs (see services/asr_tiering.py).
+    """
+    db_job = _new_processing_job(meeting_id, max_attempts, from_stage, priority, asr_model)
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def has_active_job(db: Session, meeting_id: int) -> bool:
+    """
+    Whether a meeting has a processing job that is queued or running.
+    """
+    return db.query(models.ProcessingJob.id)\
+             .filter(models.ProcessingJob.meeting_id == meeting_id,
+                     models.ProcessingJob.status.in_([models.JobStatus.QUEUED, models.JobStatus.RUNNING]))\
+             .first() is not None
+
+def blob_has_active_job(db: Session, content_hash: str, exclude_meeting_id: Optional[int] = None) -> bool:
+    """
+    Whether a meeting using the audio blob for `content_hash` (other than `exclude_meeting_id`)
+    has a processing job that is queued or running.
+    """
+    query = db.query(models.ProcessingJob.id)\
+              .join(models.Meeting, models.Meeting.id == models.ProcessingJob.meeting_id)\
+              .filter(models.Meeting.content_hash == content_hash,
+                      models.ProcessingJob.status.in_([models.JobStatus.QUEUED, models.JobStatus.RUNNING]))
+    if exclude_meeting_id is not None:
+        query = query.filter(models.Meeting.id != exclude_meeting_id)
+    return query.first() is not None
+
+def get_processing_job(db: Session, job_id: int) -> Optional[models.ProcessingJob]:
+    """
+    Retrieve a single processing job by its ID.
+    """
+    return db.query(models.ProcessingJob).filter(models.ProcessingJob.id == job_id).first()
+
+@serialized_write
+def claim_next_job(db: Session, worker_id: str, lease_seconds: int,
+                   max_running_low_priority: Optional[int] = None) -> Optional[models.ProcessingJob]:
+    """
+    Atomically claim the highest-priority, then oldest, claimable job for this worker.
+    The claim is a conditional UPDATE that only succeeds while the job is still QUEUED,
+    so concurrent workers (threads, processes or nodes) never run the same job twice.
+    Jobs with a negative priority are only claimed while fewer than `max_running_low_priority`
+    of them run, so background work never occupies every worker.
+    Returns the claimed job, or None if the queue is empty.
+    """
+    now = datetime.datetime.utcnow()
+    priority = func.coalesce(models.ProcessingJob.priority, 0)
+    query = db.query(models.ProcessingJob.id)\
+              .filter(models.ProcessingJob.status == models.JobStatus.QUEUED,
+                      models.ProcessingJob.available_at <= now)
+    if max_running_low_priority is not None:
+        running_low_priority = db.query(func.count(models.ProcessingJob.id))\
+                                 .filter(models.ProcessingJob.status == models.JobStatus.RUNNING, priority < 0)\
+                                 .scalar()
+        if running_low_priority >= max_running_low_priority:
+            query = query.filter(priority >= 0)
+    candidate_ids = query.order_by(priority.desc(), models.ProcessingJob.available_at, models.ProcessingJob.id)\
+                         .limit(5)\
+                         .all()
+
+    for (job_id,) in candidate_ids:
+        claimed = db.query(models.ProcessingJob)\
+                    .filter(models.ProcessingJob.id == job_id,
+                            models.ProcessingJob.status == models.JobStatus.QUEUED)\
+                    .update({
+                        "status": models.JobStatus.RUNNING,
+                        "lease_owner": worker_id,
+                        "lease_expires_at": now + datetime.timedelta(seconds=lease_seconds),
+                        "heartbeat_at": now,
+                        "attempts": models.ProcessingJob.attempts + 1,
+                        "updated_at": now,
+                    }, synchronize_session=False)
+        db.commit()
+        if claimed:
+            return get_processing_job(db, job_id)
+        # Another worker won the race for this job, try the next candidate
+    return None
+
+@serialized_write
+def heartbeat_job(db: Session, job_id: int, worker_id: str, lease_seconds: int) -> bool:
+    """
+    Extend the lease of a running job. Returns False if the worker no longer owns the lease
+    (e.g. it expired and the job was recovered by another worker).
+    """
+    now = datetime.datetime.utcnow()
+    extended = db.query(models.ProcessingJob)\
+                 .filter(models.ProcessingJob.id == job_id,
+                         models.ProcessingJob.status == models.JobStatus.RUNNING,
+                         models.ProcessingJob.lease_owner == worker_id)\
+                 .update({
+                     "lease_expires_at": now + datetime.timedelta(seconds=lease_seconds),
+                     "heartbeat_at": now,
+                     "updated_at": now,
+                 }, synchronize_session=False)
+    db.commit()
+    return extended > 0
+
+@serialized_write
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """
+    Mark a running job as SUCCEEDED. Only the lease owner can complete a job.
+    """
+    now = datetime.datetime.utcnow()
+    completed = db.query(models.ProcessingJob)\
+                  .filter(models.ProcessingJob.id == job_id,
+                          models.ProcessingJob.status == models.JobStatus.RUNNING,
+                          models.ProcessingJob.lease_owner == worker_id)\
+                  .update({
+                      "status": models.JobStatus.SUCCEEDED,
+                      "lease_owner": None,
+                      "lease_expires_at": None,
+                      "updated_at": now,
+                  }, synchronize_session=False)
+    db.commit()
+    return completed > 0
+
+@serialized_write
+def fail_job(db: Session, job_id: int, worker_id: str, error: str, retry_backoff_seconds: int) -> Optional[models.JobStatus]:
+    """
+    Record a failed attempt. The job is re-queued with exponential backoff while it has
+    attempts left, otherwise it is marked FAILED.
+    Returns the resulting job status, or None if the worker no longer owns the lease.
+    """
+    db_job = get_processing_job(db, job_id)
+    if not db_job or db_job.status != models.JobStatus.RUNNING or db_job.lease_owner != worker_id:
+        return None
+
+    now = datetime.datetime.utcnow()
+    if db_job.attempts < db_job.max_attempts:
+        backoff = retry_backoff_seconds * (2 ** max(db_job.attempts - 1, 0))
+        new_status = models.JobStatus.QUEUED
+        available_at = now + datetime.timedelta(seconds=backoff)
+    else:
+        new_status = models.JobStatus.FAILED
+        available_at = db_job.available_at
+
+    db.query(models.ProcessingJob)\
+      .filter(models.ProcessingJob.id == job_id,
+              models.ProcessingJob.lease_owner == worker_id)\
+      .update({
+          "status": new_status,
+          "available_at": available_at,
+          "lease_owner": None,
+          "lease_expires_at": None,
+          "last_error": error,
+          "updated_at": now,
+      }, synchronize_session=False)
+    db.commit()
+    return new_status
+
+@serialized_write
+def recover_expired_jobs(db: Session) -> int:
+    """
+    Stuck-job recovery: RUNNING jobs whose lease expired (the worker crashed or was killed)
+    are re-queued, or marked FAILED together with their meeting once they are out of attempts.
+    Returns the number of recovered jobs.
+    """
+    now = datetime.datetime.utcnow()
+    expired_jobs = db.query(models.ProcessingJob)\
+                     .filter(models.ProcessingJob.status == models.JobStatus.RUNNING,
+                             or_(models.ProcessingJob.lease_expires_at == None, # noqa: E711
+                                 models.ProcessingJob.lease_expires_at < now))\
+                     .all()
+
+    recovered = 0
+    for db_job in expired_jobs:
+        out_of_attempts = db_job.attempts >= db_job.max_attempts
+        new_status = models.JobStatus.FAILED if out_of_attempts else models.JobStatus.QUEUED
+        # Guard against a heartbeat that landed after we read the row
+        updated = db.query(models.ProcessingJob)\
+                    .filter(models.ProcessingJob.id == db_job.id,
+                            models.ProcessingJob.status == models.JobStatus.RUNNING,
+                            models.ProcessingJob.lease_owner == db_job.lease_owner,
+                            or_(models.ProcessingJob.lease_expires_at == None, # noqa: E711
+                                models.ProcessingJob.lease_expires_at < now))\
+                    .update({
+                        "status": new_status,
+                        "available_at": now,
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "last_error": f"Lease expired (worker {db_job.lease_owner} stopped heartbeating)",
+                        "updated_at": now,
+                    }, synchronize_session=False)
+        db.commit()
+        if not updated:
+            continue
+        recovered += 1
+        if out_of_attempts:
+            logger.error(f"Job {db_job.id} for meeting {db_job.meeting_id} exceeded {db_job.max_attempts} attempts after lease expiry.")
+            update_meeting_status(db, db_job.meeting_id, models.MeetingStatus.FAILED,
+                                  error_message="Processing worker stopped responding too many times.")
+        else:
+            logger.warning(f"Recovered expired job {db_job.id} for meeting {db_job.meeting_id}; re-queued.")
+            update_meeting_status(db, db_job.meeting_id, models.MeetingStatus.PENDING)
+    return recovered
+
+def get_asr_backlog(db: Session, exclude_meeting_id: int) -> Tuple[float, int, int]:
+    """
+    Audio waiting for ASR ahead of the tiering decision for a meeting, from regular (priority >= 0) jobs:
+    returns (queued seconds of known duration, queued jobs of unknown duration, running jobs).
+    """
+    priority = func.coalesce(models.ProcessingJob.priority, 0)
+    queued_seconds, unknown = db.query(
+        func.coalesce(func.sum(models.Meeting.duration), 0.0),
+        func.count(models.ProcessingJob.id) - func.count(models.Meeting.duration)
+    ).select_from(models.ProcessingJob)\
+     .join(models.Meeting, models.Meeting.id == models.ProcessingJob.meeting_id)\
+     .filter(models.ProcessingJob.status == models.JobStatus.QUEUED, priority >= 0,
+             models.ProcessingJob.meeting_id != exclude_meeting_id)\
+     .one()
+    running = db.query(func.count(models.ProcessingJob.id))\
+                .filter(models.ProcessingJob.status == models.JobStatus.RUNNING, priority >= 0)\
+                .scalar()
+    return float(queued_seconds), int(unknown), int(running)
+
+def count_transcripts_by_asr_model(db: Session) -> dict:
+    """
+    Number of transcribed meetings per ASR model (None: transcribed before models were recorded).
+    """
+    rows = db.query(models.Meeting.asr_model, func.count(models.Meeting.id))\
+             .filter(models.Meeting.transcript.isnot(None))\
+             .group_by(models.Meeting.asr_model)\
+             .all()
+    return {str(model): count for model, count in rows}
+
+def count_jobs_by_status(db: Session) -> dict:
+    """
+    Return the number of processing jobs per status (useful for monitoring queue depth).
+    """
+    rows = db.query(models.ProcessingJob.status, func.count(models.ProcessingJob.id))\
+             .group_by(models.ProcessingJob.status)\
              .all()
+    counts = {status.value: 0 for status in models.JobStatus}
+    for status, count in rows:
+        counts[status.value] = count
+    return counts
+
+
+# --- Pipeline Stage Checkpoints ---
+
+def get_meeting_stages(db: Session, meeting_id: int) -> List[models.MeetingStage]:
+    """
+    Retrieve a meeting's stage checkpoints (in no particular order).
+    """
+    return db.query(models.MeetingStage).filter(models.MeetingStage.meeting_id == meeting_id).all()
+
+@serialized_write
+def set_stage_status(db: Session, meeting_id: int, stage: models.PipelineStage, status: models.StageStatus,
+                     error_message: Optional[str] = None) -> models.MeetingStage:
+    """
+    Record a stage checkpoint. RUNNING starts an attempt; COMPLETED, SKIPPED and FAILED finish it.
+    """
+    now = datetime.datetime.utcnow()
+    db_stage = db.query(models.MeetingStage)\
+                 .filter(models.MeetingStage.meeting_id == meeting_id, models.MeetingStage.stage == stage)\
+                 .first()
+    if db_stage is None:
+        db_stage = models.MeetingStage(meeting_id=meeting_id, stage=stage, attempts=0)
+        db.add(db_stage)
+    db_stage.status = status
+    db_stage.error_message = error_message
+    if status == models.StageStatus.RUNNING:
+        db_stage.attempts = (db_stage.attempts or 0) + 1
+        db_stage.started_at = now
+        db_stage.completed_at = None
+    else:
+        db_stage.completed_at = now
+    db.commit()
+    db.refresh(db_stage)
+    return db_stage
+
+def _reset_stages(db: Session, meeting_id: int, completed: List[models.PipelineStage],
+                  cleared: List[models.PipelineStage]) -> None:
+    now = datetime.datetime.utcnow()
+    existing = {db_stage.stage: db_stage for db_stage in get_meeting_stages(db, meeting_id)}
+    for stage in completed:
+        db_stage = existing.get(stage)
+        if db_stage is None:
+            db.add(models.MeetingStage(meeting_id=meeting_id, stage=stage, status=models.StageStatus.COMPLETED,
+                                       attempts=0, completed_at=now))
+        elif db_stage.status not in (models.StageStatus.COMPLETED, models.StageStatus.SKIPPED):
+            db_stage.status = models.StageStatus.COMPLETED
+            db_stage.error_message = None
+            db_stage.completed_at = now
+    if cleared:
+        db.query(models.MeetingStage)\
+          .filter(models.MeetingStage.meeting_id == meeting_id, models.MeetingStage.stage.in_(cleared))\
+          .delete(synchronize_session=False)
+
+@serialized_write
+def reset_meeting_stages(db: Session, meeting_id: int, completed: List[models.PipelineStage],
+                         cleared: List[models.PipelineStage]) -> None:
+    """
+    Rewrite a meeting's checkpoints before reprocessing: `completed` stages are recorded as
+    COMPLETED unless already done (a FAILED or RUNNING checkpoint is overwritten), and the
+    checkpoints of `cleared` stages are removed.
+    """
+    _reset_stages(db, meeting_id, completed, cleared)
+    db.commit()
+
+@serialized_write
+def queue_reprocess_job(db: Session, meeting_id: int, from_stage: models.PipelineStage,
+                        completed: List[models.PipelineStage], cleared: List[models.PipelineStage],
+                        max_attempts: int) -> models.ProcessingJob:
+    """
+    Queue a reprocess job in one transaction: rewrite the meeting's checkpoints (as
+    reset_meeting_stages does), set it back to PENDING and add the job from `from_stage`.
+    """
+    _reset_stages(db, meeting_id, completed, cleared)
+    db_meeting = get_meeting(db, meeting_id)
+    db_meeting.status = models.MeetingStatus.PENDING
+    db_meeting.error_message = None
+    db_job = _new_processing_job(meeting_id, max_attempts, from_stage)
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
@@ -1,21 +1,190 @@
-from sqlalchemy import create_engine
+import asyncio
+import functools
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Iterator
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.util import await_only
 from .config import settings
 
+# --- Engine Configuration ---
+# SQLite gets a tuned profile on every connection (WAL, synchronous, busy timeout, mmap, cache).
+# Transactions are begun explicitly: plain reads with BEGIN (deferred), and writes on the writer
+# path (see write_transaction) with BEGIN IMMEDIATE, so a writer holds SQLite's write lock from its
+# first statement instead of upgrading a read snapshot later, which fails outright under WAL when
+# another connection committed in between. Server databases (PostgreSQL) get a tuned pool instead.
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    Keyword arguments for create_engine/create_async_engine for this database URL.
+    """
+    if _is_sqlite(url):
+        # Connections are shared by FastAPI's threadpool and worker threads (aiosqlite handles this itself)
+        return {} if is_async else {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def _configure_sqlite(sync_engine, url: str):
+    """
+    Apply the SQLite profile to every new connection and take over transaction begins.
+    """
+    in_memory = make_url(url).database in (None, "", ":memory:")
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_sqlite_profile(dbapi_connection, connection_record):
+        # Stop the driver from beginning transactions implicitly; begin_transaction() does it
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            if not in_memory: # In-memory databases can't use WAL
+                cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE_BYTES)}")
+            cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}") # Negative = KiB
+        finally:
+            cursor.close()
+
+    @event.listens_for(sync_engine, "begin")
+    def begin_transaction(conn):
+        conn.exec_driver_sql(f"BEGIN {conn.get_execution_options().get('sqlite_begin', 'DEFERRED')}")
+
 # Create the SQLAlchemy engine
-# For SQLite, connect_args is needed to allow usage in multiple threads (FastAPI runs requests in threads)
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} # Only needed for SQLite
-)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+if _is_sqlite(settings.DATABASE_URL):
+    _configure_sqlite(engine, settings.DATABASE_URL)
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# --- Async Engine (API endpoints) ---
+# Endpoints run on the event loop, so they use an async driver instead of blocking it on every
+# query. The crud functions stay synchronous and are shared with the workers (which use the sync
+# engine above, in their own threads/processes): endpoints call them through
+# `await db.run_sync(crud.some_function, ...)`, which runs them against the async connection.
+
+# Async drivers for the sync URLs DATABASE_URL usually holds
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+def _async_database_url(url: str) -> str:
+    """
+    The async-driver form of a database URL (URLs that already name an async driver are kept).
+    """
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False) if driver else url
+
+_async_url = settings.ASYNC_DATABASE_URL or _async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **_engine_options(_async_url, is_async=True))
+if _is_sqlite(_async_url):
+    _configure_sqlite(async_engine.sync_engine, _async_url)
+
+# expire_on_commit=False: returned ORM objects are serialized after the request's last commit,
+# and an expired attribute can't be lazy-loaded outside run_sync
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 # Create a base class for declarative class definitions
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+# --- Writer Path ---
+# SQLite allows one writer at a time. Functions that write (see crud) run inside write_transaction:
+# their transaction starts with BEGIN IMMEDIATE, and writers in this process queue on a lock
+# instead of sleeping in SQLite's busy handler. Sync-engine writers (workers, pipeline status
+# updates) share a thread lock. Async sessions run on the event loop thread and must not block it,
+# so API writers queue on an asyncio lock, awaited through SQLAlchemy's greenlet bridge. The two
+# groups (and other processes) are arbitrated by SQLite's write lock and the busy timeout.
+_write_lock = threading.RLock()
+_async_write_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+def _acquire_write_lock(db: Session) -> Callable[[], None]:
+    """
+    Wait for this process's writer lock for the session's engine; returns the release function.
+    """
+    if db.get_bind() is async_engine.sync_engine:
+        # Only called inside AsyncSession.run_sync, i.e. on the running loop in a greenlet
+        loop = asyncio.get_running_loop()
+        lock = _async_write_locks.get(loop)
+        if lock is None:
+            lock = _async_write_locks[loop] = asyncio.Lock()
+        await_only(lock.acquire())
+        return lock.release
+    _write_lock.acquire()
+    return _write_lock.release
+
+@contextmanager
+def write_transaction(db: Session) -> Iterator[None]:
+    """
+    Run a unit of writes on the single writer path. A no-op for server databases and when
+    SQLITE_SERIALIZE_WRITES is off; reentrant for writes nested on the same session.
+    """
+    bind = db.get_bind()
+    if not settings.SQLITE_SERIALIZE_WRITES or bind.dialect.name != "sqlite":
+        yield
+        return
+    if db.info.get("writing"):
+        # Nested in a write on this session, which may have committed its transaction already
+        if not db.in_transaction():
+            db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+        yield
+        return
+
+    release = _acquire_write_lock(db)
+    db.info["writing"] = True
+    try:
+        if db.in_transaction():
+            if db.new or db.dirty or db.deleted:
+                # Flushing them here would upgrade the open read snapshot to a write, which fails
+                # with SQLITE_BUSY_SNAPSHOT under WAL if another writer committed since it began
+                raise RuntimeError("write_transaction entered with unflushed changes on an open read transaction; "
+                                   "make the changes inside the write instead")
+            db.commit() # End the read snapshot left open by earlier reads; writes start from a fresh one
+        if not db.in_transaction():
+            db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+        yield
+        if db.in_transaction():
+            # A write that found nothing to change may return without committing; its open
+            # transaction would keep SQLite's write lock after this process's lock is released
+            db.commit()
+    except Exception:
+        if db.in_transaction():
+            db.rollback() # Never leave the write lock held by a failed write
+        raise
+    finally:
+        db.info.pop("writing", None)
+        release()
+
+def serialized_write(fn):
+    """
+    Decorator for data-access functions that write: runs `fn(db, ...)` inside write_transaction(db).
+    """
+    @functools.wraps(fn)
+    def wrapper(db: Session, *args, **kwargs):
+        with write_transaction(db):
+            return fn(db, *args, **kwargs)
+    return wrapper
+
 # Dependency to get DB session
 def get_db():
     """
@@ -28,12 +197,43 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI dependency that provides an async database session (see the Async Engine notes above).
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Function to create database tables (call this on startup if needed)
 # We might call this manually or use Alembic for migrations later
 def create_database_tables():
     """
-    Creates all database tables defined by models inheriting from Base.
+    Creates all database tables defined by models inheriting from Base,
+    then adds columns and indexes introduced after an existing table was created.
     """
     # Import models here to ensure they are registered with Base
-    # from . import models # Uncomment when models.py exists
+    from . import models # noqa: F401
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+
+def _add_missing_columns():
+    """
+    Minimal forward-only migration: create_all() never alters existing tables, so add any
+    model column missing from the database (as a nullable column) and create missing indexes.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                logger.info(f"Added missing column {table.name}.{column.name}")
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
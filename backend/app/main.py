@@ -1,16 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import create_database_tables, engine # Import engine if needed elsewhere, and the create function
+from .database import create_database_tables, engine, async_engine # Import engine if needed elsewhere, and the create function
 from . import models # Import models to ensure they are registered with Base before creating tables
+from .config import settings
+from . import worker, search_index
+from .services import llm_client, pdf_cache
+import logging
 
-# Import the meetings router
-from .routers import meetings
+# Configure logging once for the API process; modules only create their loggers
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Import the routers
+from .routers import meetings, system, uploads
 
 # Create database tables on startup
 # Note: For production, Alembic migrations are recommended.
 # This approach is simpler for local development/MVP.
-models.Base.metadata.create_all(bind=engine)
-# Alternatively, call the function: create_database_tables()
+create_database_tables() # Also adds columns introduced since the tables were created
+search_index.ensure_search_index(engine) # Full-text index and its sync triggers (SQLite)
 
 
 app = FastAPI(
@@ -32,6 +40,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser read the resumable upload and caching headers
+    expose_headers=["Location", "Upload-Offset", "Upload-Length", "Tus-Resumable", "Meeting-Id", "ETag"],
 )
 
 @app.get("/", tags=["Root"])
@@ -42,10 +52,30 @@ async def read_root():
     return {"message": "Welcome to the Fluent Office Notes API!"}
 
 # Include the meetings router
+app.include_router(uploads.router, prefix="/api") # Before meetings, whose /meetings/{id} routes would shadow it
 app.include_router(meetings.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Start embedded processing workers, if configured.
+    With EMBEDDED_WORKERS=0 or API_ONLY=true the API only enqueues jobs and separate
+    `python -m app.worker` processes drain the queue. Models load lazily on the first job.
+    """
+    if settings.API_ONLY:
+        logger.info("API-only mode: no embedded workers, ASR/LLM models will not be loaded.")
+    elif settings.EMBEDDED_WORKERS > 0:
+        worker.start_embedded_workers(settings.EMBEDDED_WORKERS)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stop embedded workers. Jobs they were running are retried by other workers after their lease expires.
+    """
+    worker.stop_embedded_workers(timeout=5)
+    llm_client.close()
+    pdf_cache.shutdown()
+    await async_engine.dispose()
 
-# Add other app configurations or startup events if needed
-# Example startup event:
-# @app.on_event("startup")
-# async def startup_event():
-#     create_database_tables() # Call table creation here instead if preferred
+# Add other app configurations if needed
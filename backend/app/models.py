@@ -1,6 +1,7 @@
 import datetime
 import json # Import json
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, TypeDecorator
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, TypeDecorator, ForeignKey, Index, Float
+from sqlalchemy.orm import relationship
 from sqlalchemy.types import TEXT # Use TEXT explicitly for SQLite compatibility
 from .database import Base
 import enum
@@ -14,6 +15,34 @@ class MeetingStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
+class JobStatus(str, enum.Enum):
+    """
+    Enum for the status of a queued processing job.
+    """
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+class PipelineStage(str, enum.Enum):
+    """
+    Processing stages of a meeting, in pipeline order (see services/stages.py).
+    """
+    DECODE = "decode"
+    ASR = "asr"
+    SUMMARIZE = "summarize"
+    TRANSLATE = "translate"
+    RENDER = "render"
+
+class StageStatus(str, enum.Enum):
+    """
+    Enum for the checkpoint status of a pipeline stage.
+    """
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    SKIPPED = "SKIPPED" # Disabled by configuration; counts as done
+
 # Custom TypeDecorator for JSON-encoded lists
 class JsonEncodedList(TypeDecorator):
     """Stores and retrieves Python lists as JSON strings in the database."""
@@ -71,23 +100,156 @@ class Meeting(Base):
 
     error_message = Column(String, nullable=True) # Store error if processing fails
 
+    # SHA-256 of the uploaded audio; meetings with the same hash share one AudioBlob on disk
+    content_hash = Column(String(64), nullable=True, index=True)
+
     # Remove old generic fields if replaced
     # summary = Column(Text, nullable=True) 
     # action_items = Column(Text, nullable=True) 
 
-    # Add other fields if needed, e.g.:
-    # duration = Column(Float, nullable=True)
-
-# If we need more granular transcript data later, we could add:
-# class TranscriptSegment(Base):
-#     __tablename__ = "transcript_segments"
-#     id = Column(Integer, primary_key=True, index=True)
-#     meeting_id = Column(Integer, ForeignKey("meetings.id"))
-#     start_time = Column(Float)
-#     end_time = Column(Float)
-#     text = Column(Text)
-#     speaker = Column(String, nullable=True) # Optional speaker label
-#     meeting = relationship("Meeting", back_populates="segments")
-
-# If using TranscriptSegment, add relationship to Meeting:
-# Meeting.segments = relationship("TranscriptSegment", back_populates="meeting", cascade="all, delete-orphan")
+    duration = Column(Float, nullable=True) # Recording length in seconds (read from the audio header at upload, exact after decoding)
+    asr_model = Column(String(64), nullable=True) # Whisper model that produced the transcript
+    loudness_dbfs = Column(Float, nullable=True) # RMS level of the decoded audio (dBFS)
+    peak_dbfs = Column(Float, nullable=True) # Peak level of the decoded audio (dBFS)
+
+    # Add other fields if needed
+
+    # Keyset pagination of the meeting list (newest first), optionally filtered by status or language
+    __table_args__ = (
+        Index("ix_meetings_upload_time_id", "upload_time", "id"),
+        Index("ix_meetings_status_upload_time_id", "status", "upload_time", "id"),
+        Index("ix_meetings_language_upload_time_id", "detected_language", "upload_time", "id"),
+    )
+
+class AudioBlob(Base):
+    """
+    SQLAlchemy model for a content-addressed audio file.
+    Identical uploads are stored once; `ref_count` tracks how many meetings use the file,
+    and the file is only removed when the last one is deleted.
+    """
+    __tablename__ = "audio_blobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, nullable=False) # SHA-256 hex digest of the file bytes
+    file_path = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+class UploadSession(Base):
+    """
+    SQLAlchemy model for a resumable (tus-style) upload in progress.
+    Chunks are appended to `file_path` at `offset`; when `offset` reaches `total_size` the file
+    is moved into the blob store and the meeting is created (`meeting_id`).
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True) # Random hex ID, part of the upload URL
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=True)
+    total_size = Column(Integer, nullable=False) # Upload-Length declared by the client
+    offset = Column(Integer, default=0, nullable=False) # Bytes received and written so far
+    file_path = Column(String, nullable=False) # Partial file being written
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="SET NULL"), nullable=True) # Set once complete
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True) # Incomplete uploads are discarded after this
+
+class LLMCacheEntry(Base):
+    """
+    SQLAlchemy model for a cached LLM response.
+    The key hashes the namespace, the model/prompt fingerprint and the input, so a changed
+    prompt template or model never hits old entries. Evicted least-recently-used first.
+    """
+    __tablename__ = "llm_cache_entries"
+
+    key = Column(String(64), primary_key=True) # SHA-256 of namespace + fingerprint + input
+    namespace = Column(String, nullable=False) # Kind of call, e.g. 'summary'
+    fingerprint = Column(String(64), nullable=False) # SHA-256 of model name + prompt template
+    value = Column(Text, nullable=False) # Raw LLM response
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    last_accessed_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_llm_cache_entries_namespace_fingerprint", "namespace", "fingerprint"),
+    )
+
+class ProcessingJob(Base):
+    """
+    SQLAlchemy model for a durable, lease-based processing job.
+    Workers claim QUEUED jobs by taking a time-limited lease, extend it with heartbeats
+    while they run, and jobs whose lease expires are recovered and retried.
+    """
+    __tablename__ = "processing_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False) # Number of times a worker has claimed the job
+    max_attempts = Column(Integer, default=3, nullable=False)
+    available_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False) # Not claimable before this time (retry backoff)
+    lease_owner = Column(String, nullable=True) # Worker ID currently holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    from_stage = Column(String(16), nullable=True) # Reprocess jobs: PipelineStage value to resume from (None = first incomplete)
+    priority = Column(Integer, default=0, nullable=True) # Higher is claimed first; quality upgrades queue below 0
+    asr_model = Column(String(64), nullable=True) # Pins the ASR model instead of the tiering policy (quality upgrade jobs)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Workers poll for the oldest claimable job and scan for expired leases
+        Index("ix_processing_jobs_status_available", "status", "available_at"),
+        Index("ix_processing_jobs_status_lease", "status", "lease_expires_at"),
+    )
+
+class MeetingStage(Base):
+    """
+    SQLAlchemy model for a pipeline stage checkpoint. A stage stores its outputs on the meeting
+    (or its segments) before it is marked COMPLETED, so processing resumes after the last completed
+    stage instead of starting over.
+    """
+    __tablename__ = "meeting_stages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    stage = Column(Enum(PipelineStage), nullable=False)
+    status = Column(Enum(StageStatus), nullable=False)
+    attempts = Column(Integer, default=0, nullable=False) # Times the stage has been started
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_meeting_stages_meeting_stage", "meeting_id", "stage", unique=True),
+    )
+
+class TranscriptSegment(Base):
+    """
+    SQLAlchemy model for a timestamped transcript segment (one Whisper segment).
+    Lets clients page through long transcripts by time instead of downloading Meeting.transcript.
+    """
+    __tablename__ = "transcript_segments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id", ondelete="CASCADE"), nullable=False)
+    segment_index = Column(Integer, nullable=False) # Position within the meeting's transcript
+    start_time = Column(Float, nullable=False) # Seconds from the start of the recording
+    end_time = Column(Float, nullable=False)
+    text = Column(Text, nullable=False)
+    speaker = Column(String, nullable=True) # Optional speaker label
+
+    meeting = relationship("Meeting", back_populates="segments")
+
+    __table_args__ = (
+        Index("ix_transcript_segments_meeting_index", "meeting_id", "segment_index", unique=True),
+        Index("ix_transcript_segments_meeting_start", "meeting_id", "start_time"),
+    )
+
+# Segments are bulk-deleted by crud.delete_meeting, so the ORM never loads them just to delete them
+Meeting.segments = relationship(
+    "TranscriptSegment", back_populates="meeting", order_by=TranscriptSegment.segment_index,
+    passive_deletes=True
+)
@@ -1,19 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, BackgroundTasks
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Header, Response
+from fastapi.responses import StreamingResponse, FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
 import os
-import shutil
-import io
+import json
+import asyncio
+import datetime
 import logging
 
 from .. import crud, models, schemas
-from ..database import get_db
+from ..database import get_async_db, AsyncSessionLocal
 from ..config import settings
-from ..services import asr, summarizer, pdf_generator # Import the services
+from ..services import bulk_export, pdf_cache, events, stages, storage, uploads # Import the services
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
@@ -22,140 +22,213 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# --- Helper Function for Background Processing ---
-def process_meeting_audio(db_session_factory, meeting_id: int):
-    """
-    Background task to run ASR and Summarization.
-    Uses a session factory to create a new session for the background task.
-    """
-    db = db_session_factory() # Create a new session
-    try:
-        logger.info(f"Background task started for meeting {meeting_id}")
-        # 1. Transcribe (now returns transcript and language)
-        transcription_result = asr.transcribe_audio(db, meeting_id)
-
-        if transcription_result is None:
-            logger.error(f"Transcription failed for meeting {meeting_id}. Aborting further processing.")
-            # Status is already set to FAILED by transcribe_audio
-            return
-        
-        transcript, detected_language = transcription_result # Unpack the result
-
-        # 2. Summarize (only if transcription succeeded, pass language)
-        summarization_result = summarizer.summarize_transcript(db, meeting_id, transcript, detected_language)
-
-        if summarization_result is None:
-            logger.error(f"Summarization failed for meeting {meeting_id}.")
-            # Status is already set to FAILED by summarize_transcript
-            return
-
-        logger.info(f"Background processing complete for meeting {meeting_id}")
-        # Final status (COMPLETED) should be set by summarize_transcript
-
-    except Exception as e:
-        logger.error(f"Unhandled exception in background task for meeting {meeting_id}: {e}", exc_info=True)
-        # Ensure status is marked as FAILED if an unexpected error occurs
-        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message=f"Background task error: {e}")
-    finally:
-        db.close() # Ensure the session is closed
-
 # --- API Endpoints ---
 
-@router.get("/", response_model=List[schemas.Meeting])
+@router.get("/", response_model=schemas.MeetingPage)
 async def read_meetings(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    status: Optional[models.MeetingStatus] = Query(None),
+    language: Optional[str] = Query(None, description="Detected language code, e.g. 'en'"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieve a list of meetings.
+    Retrieve a page of meetings, newest first, without transcripts, summaries or action items
+    (use GET /meetings/{id} for those). Optionally filtered by status and detected language.
     """
-    meetings = crud.get_meetings(db, skip=skip, limit=limit)
-    return meetings
+    try:
+        after = crud.decode_meeting_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    rows = await db.run_sync(crud.get_meetings, limit=limit, cursor=after, status=status, language=language)
+    next_cursor = None
+    if len(rows) == limit and rows[-1].upload_time is not None:
+        next_cursor = crud.encode_meeting_cursor(rows[-1].upload_time, rows[-1].id)
+    return schemas.MeetingPage(items=[schemas.MeetingSummary.model_validate(row) for row in rows], next_cursor=next_cursor)
 
 @router.get("/{meeting_id}", response_model=schemas.Meeting)
-async def read_meeting(meeting_id: int, db: Session = Depends(get_db)):
+async def read_meeting(meeting_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve details of a specific meeting by its ID.
     """
-    db_meeting = crud.get_meeting(db, meeting_id=meeting_id)
+    db_meeting = await db.run_sync(crud.get_meeting, meeting_id)
     if db_meeting is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
     return db_meeting
 
 @router.post("/upload", response_model=schemas.UploadResponse)
 async def upload_audio_meeting(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Handle audio file upload.
-    Saves the file, creates a meeting record, and triggers background processing.
+    Handle audio file upload (single request; large recordings should use the resumable
+    /meetings/uploads protocol instead).
+    Saves the file, then creates the meeting record and enqueues a processing job for the workers.
     """
     # Basic validation
     if not file.content_type or not file.content_type.startswith("audio/"):
         return schemas.UploadResponse(success=False, error="File must be an audio file")
 
     # Ensure upload directory exists (relative to backend root)
-    upload_dir = settings.UPLOAD_DIR
-    os.makedirs(upload_dir, exist_ok=True)
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
-    db_meeting = None # Initialize to handle potential errors before creation
     try:
-        # 1. Create initial meeting record to get an ID
-        meeting_create = schemas.MeetingCreate(filename=file.filename)
-        db_meeting = crud.create_meeting(db=db, meeting=meeting_create)
-        meeting_id = db_meeting.id
-
-        # 2. Define safe filename and path
-        # Use meeting ID to ensure uniqueness and avoid path traversal issues
-        base_filename, file_extension = os.path.splitext(file.filename)
-        safe_filename = f"meeting_{meeting_id}{file_extension}"
-        file_path = os.path.join(upload_dir, safe_filename)
-
-        # 3. Save the uploaded file
+        # 1. Save the uploaded file, hashing it while it streams to disk
+        file_extension = os.path.splitext(file.filename)[1]
         try:
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            logger.info(f"Audio file saved for meeting {meeting_id} at {file_path}")
+            # The copy runs in the threadpool so a large upload doesn't stall other requests
+            tmp_path, content_hash, size_bytes = await run_in_threadpool(
+                storage.save_stream_hashed, file.file, suffix=file_extension, max_bytes=settings.MAX_UPLOAD_BYTES
+            )
+        except storage.UploadTooLargeError as e:
+             return schemas.UploadResponse(success=False, error=str(e))
         except Exception as e:
-             logger.error(f"Failed to save uploaded file for meeting {meeting_id}: {e}", exc_info=True)
-             crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message=f"Failed to save file: {e}")
+             logger.error(f"Failed to save uploaded file {file.filename}: {e}", exc_info=True)
              return schemas.UploadResponse(success=False, error="Failed to save uploaded file.")
         finally:
             file.file.close() # Ensure file handle is closed
 
-        # 4. Update meeting record with the file path and initialize action items to None
-        crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(
-            audio_file_path=file_path,
-            action_items_en=None, # Explicitly set to None initially
-            action_items_zh=None  # Explicitly set to None initially
-        ))
-
-        # 5. Add background task for processing
-        # Pass the session factory, not the session itself
-        from ..database import SessionLocal
-        background_tasks.add_task(process_meeting_audio, SessionLocal, meeting_id)
-        logger.info(f"Background processing task added for meeting {meeting_id}")
+        # 2. Store it content-addressed (identical audio is kept on disk only once), then create the
+        # meeting and enqueue its durable processing job, all in one transaction as for resumable uploads
+        duration = await run_in_threadpool(storage.probe_duration, tmp_path)
+        meeting_id = await db.run_sync(uploads.register_uploaded_file, tmp_path, file.filename, content_hash,
+                                       size_bytes, duration)
+        logger.info(f"Audio file saved for meeting {meeting_id} (sha256 {content_hash[:12]})")
 
         # Return success response immediately
         return schemas.UploadResponse(success=True, meetingId=str(meeting_id))
 
     except Exception as e:
+        # Nothing was recorded: the blob reference, meeting and job are written together or not at all
         logger.error(f"Error during upload endpoint processing: {e}", exc_info=True)
-        # If meeting record was created, mark it as failed
-        if db_meeting:
-            crud.update_meeting_status(db, db_meeting.id, models.MeetingStatus.FAILED, error_message=f"Upload endpoint error: {e}")
         return schemas.UploadResponse(success=False, error=f"An unexpected error occurred during upload: {e}")
 
 
-@router.get("/{meeting_id}/export/pdf", response_class=StreamingResponse)
-async def export_meeting_pdf(meeting_id: int, db: Session = Depends(get_db)):
+@router.get("/{meeting_id}/segments", response_model=schemas.TranscriptSegmentPage)
+async def read_meeting_segments(
+    meeting_id: int,
+    start: Optional[float] = Query(None, alias="from", ge=0, description="Window start (seconds)"),
+    end: Optional[float] = Query(None, alias="to", ge=0, description="Window end (seconds)"),
+    after: Optional[int] = Query(None, ge=-1, description="Return segments after this segment_index"),
+    limit: int = Query(200, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieve the timestamped transcript segments of a meeting that overlap [from, to),
+    so clients can lazily load the part of a long transcript they are viewing.
+    """
+    if await db.run_sync(crud.get_meeting_status, meeting_id) is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+
+    segments = await db.run_sync(crud.get_transcript_segments, meeting_id, start=start, end=end, after_index=after, limit=limit)
+    next_after = segments[-1].segment_index if len(segments) == limit else None
+    return schemas.TranscriptSegmentPage(meeting_id=meeting_id, segments=segments, next_after=next_after)
+
+
+def _format_sse(event: dict) -> str:
+    """
+    Format an event as a server-sent-events message.
+    """
+    return f"data: {json.dumps(event)}\n\n"
+
+async def _read_meeting_status(meeting_id: int) -> Optional[models.MeetingStatus]:
+    # Short-lived session: an event stream can stay open for the whole processing time
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(crud.get_meeting_status, meeting_id)
+
+def _processing_state(db, meeting_id: int) -> Optional[Tuple[models.MeetingStatus, bool]]:
+    """
+    A meeting's status and whether its processing has finished. A FAILED meeting whose job still
+    has attempts left (queued or running) has not: the worker sets it back to PENDING for the retry.
+    """
+    status = crud.get_meeting_status(db, meeting_id)
+    if status is None:
+        return None
+    if status == models.MeetingStatus.FAILED:
+        return status, not crud.has_active_job(db, meeting_id)
+    return status, status == models.MeetingStatus.COMPLETED
+
+async def _read_processing_state(meeting_id: int) -> Optional[Tuple[models.MeetingStatus, bool]]:
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(_processing_state, meeting_id)
+
+@router.get("/{meeting_id}/events")
+async def stream_meeting_events(meeting_id: int):
+    """
+    Server-sent events stream of processing progress for a meeting.
+    Sends the current status first, then stage transitions and partial progress
+    (e.g. "ASR 40%", "transcript_ready", "summary_ready") until processing finishes.
+    Replaces polling GET /meetings/{id} while a meeting is processing.
+    """
+    status = await _read_meeting_status(meeting_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+
+    def status_event(current: models.MeetingStatus, finished: bool) -> dict:
+        stage = {
+            models.MeetingStatus.COMPLETED: events.STAGE_COMPLETED,
+            models.MeetingStatus.FAILED: events.STAGE_FAILED,
+        }.get(current, "status") if finished else "status"
+        return {"meeting_id": meeting_id, "stage": stage, "status": current.value,
+                "progress": None, "message": None, "timestamp": None}
+
+    async def event_stream():
+        # Subscribe before reading the snapshot so no transition is missed in between
+        async with events.get_event_broker().subscribe(meeting_id) as subscription:
+            state = await _read_processing_state(meeting_id)
+            if state is None:
+                return
+            yield _format_sse(status_event(*state))
+            if state[1]:
+                return
+
+            while True:
+                try:
+                    event = await subscription.get(timeout=settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Workers in other processes don't publish here; re-check the status column
+                    state = await _read_processing_state(meeting_id)
+                    if state is None or state[1]:
+                        if state is not None:
+                            yield _format_sse(status_event(*state))
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield _format_sse(event)
+                if event["stage"] in events.TERMINAL_STAGES:
+                    return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"} # Disable proxy buffering
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
     """
-    Endpoint to generate and stream a PDF export for a meeting.
+    Whether an If-None-Match header matches the ETag (weak comparison, as for GET).
     """
-    db_meeting = crud.get_meeting(db, meeting_id=meeting_id)
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+@router.get("/{meeting_id}/export/pdf", response_class=FileResponse)
+async def export_meeting_pdf(
+    meeting_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint to download the PDF export for a meeting.
+    PDFs are cached per content version (also the ETag): unchanged meetings are answered with
+    304 Not Modified when the client sends If-None-Match, or streamed from the cached file.
+    """
+    db_meeting = await db.run_sync(crud.get_meeting, meeting_id)
     if db_meeting is None:
         raise HTTPException(status_code=404, detail="Meeting not found")
 
@@ -164,51 +237,142 @@ async def export_meeting_pdf(meeting_id: int, db: Session = Depends(get_db)):
          logger.warning(f"Exporting PDF for meeting {meeting_id} which is not in COMPLETED state (status: {db_meeting.status.value})")
          # raise HTTPException(status_code=400, detail=f"Meeting processing not complete (status: {db_meeting.status.value}). Cannot export PDF yet.")
 
-    pdf_bytes = pdf_generator.generate_meeting_pdf(db_meeting)
-    
-    # Check if PDF generation failed (returned empty bytes)
-    if not pdf_bytes:
-        logger.error(f"PDF generation returned empty bytes for meeting {meeting_id}.")
+    context, version = pdf_cache.prepare(db_meeting)
+    etag = f'"{version}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"} # Revalidate on every use
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    try:
+        # Rendered in the PDF process pool on a cache miss; the event loop is not blocked
+        pdf_path = await pdf_cache.ensure_pdf(context, version)
+    except Exception as e:
+        logger.error(f"PDF generation failed for meeting {meeting_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="PDF generation failed internally.")
 
+    # Streamed from disk in chunks, never loaded into memory as a whole
+    return FileResponse(
+        pdf_path,
+        media_type="application/pdf",
+        filename=f"meeting_{meeting_id}_notes.pdf",
+        headers=cache_headers,
+    )
+
+
+@router.post("/export/bulk", response_class=StreamingResponse)
+async def bulk_export_meetings(export: schemas.BulkExportRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Stream a ZIP archive of reports for every meeting matching the filter
+    (PDF and/or JSON/Markdown per meeting, plus a manifest.json). PDFs are rendered in parallel
+    in the PDF process pool and written to the archive as each finishes.
+    """
+    meeting_ids = await db.run_sync(crud.get_meeting_ids_matching, export, limit=settings.BULK_EXPORT_MAX_MEETINGS + 1)
+    if not meeting_ids:
+        raise HTTPException(status_code=404, detail="No meetings match the export filter.")
+    if len(meeting_ids) > settings.BULK_EXPORT_MAX_MEETINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {settings.BULK_EXPORT_MAX_MEETINGS} meetings match; narrow the filter (e.g. by date range)."
+        )
+
+    logger.info(f"Bulk export of {len(meeting_ids)} meetings as {', '.join(export.formats)}")
+    timestamp = datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    # A sync generator: Starlette iterates it in a worker thread, so waiting on renders doesn't block the loop
+    return StreamingResponse(
+        bulk_export.stream_export(meeting_ids, export.formats),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=meetings_export_{timestamp}.zip"}
+    )
+
+
+# --- Stage Checkpoints and Reprocessing ---
+@router.get("/{meeting_id}/stages", response_model=List[schemas.MeetingStage])
+async def read_meeting_stages(meeting_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Checkpoints of the meeting's pipeline stages, in pipeline order (stages not yet run are absent).
+    """
+    if await db.run_sync(crud.get_meeting, meeting_id) is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    db_stages = await db.run_sync(crud.get_meeting_stages, meeting_id)
+    return sorted(db_stages, key=lambda db_stage: stages.STAGE_ORDER.index(db_stage.stage))
+
+@router.post("/{meeting_id}/reprocess", response_model=schemas.ReprocessResponse, status_code=202)
+async def reprocess_meeting(
+    meeting_id: int,
+    from_stage: Optional[models.PipelineStage] = Query(None, description="Stage to rerun from (default: first incomplete stage)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue the meeting for reprocessing from `from_stage`, or from its first incomplete stage.
+    Completed stages before it are not rerun (e.g. a failed summary is retried without a new ASR pass);
+    if an earlier stage is incomplete, processing resumes there instead.
+    """
+    if await db.run_sync(crud.get_meeting, meeting_id) is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
     try:
-        # Create a streaming response
-        return StreamingResponse(
-            io.BytesIO(pdf_bytes),
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=meeting_{meeting_id}_notes.pdf"}
+        db_job = await db.run_sync(stages.schedule_reprocess, meeting_id, from_stage)
+    except stages.ReprocessConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return schemas.ReprocessResponse(meeting_id=meeting_id, job_id=db_job.id, from_stage=db_job.from_stage)
+
+@router.post("/reprocess", response_model=schemas.BulkReprocessResponse, status_code=202)
+async def bulk_reprocess_meetings(request: schemas.BulkReprocessRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Queue every meeting matching the filter for reprocessing from `from_stage` (default: summarize),
+    e.g. to regenerate summaries after a prompt or model change without repeating ASR.
+    Meetings that are busy, or whose stages before `from_stage` are incomplete, are skipped.
+    """
+    meeting_ids = await db.run_sync(crud.get_meeting_ids_matching, request, limit=settings.BULK_REPROCESS_MAX_MEETINGS + 1)
+    if not meeting_ids:
+        raise HTTPException(status_code=404, detail="No meetings match the filter.")
+    if len(meeting_ids) > settings.BULK_REPROCESS_MAX_MEETINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"More than {settings.BULK_REPROCESS_MAX_MEETINGS} meetings match; narrow the filter (e.g. by date range)."
         )
-    except Exception as e:
-        logger.error(f"Error preparing PDF stream for meeting {meeting_id}: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to generate or stream PDF: {e}")
+
+    queued, skipped = [], []
+    for meeting_id in meeting_ids:
+        try:
+            db_job = await db.run_sync(stages.schedule_reprocess, meeting_id, request.from_stage, True)
+        except stages.ReprocessConflict as e:
+            skipped.append(schemas.ReprocessSkipped(meeting_id=meeting_id, reason=str(e)))
+            continue
+        queued.append(schemas.ReprocessResponse(meeting_id=meeting_id, job_id=db_job.id, from_stage=db_job.from_stage))
+    logger.info(f"Bulk reprocess from '{request.from_stage.value}': {len(queued)} queued, {len(skipped)} skipped")
+    return schemas.BulkReprocessResponse(queued=queued, skipped=skipped)
 
 
-@router.get("/search/", response_model=List[schemas.Meeting])
+@router.get("/search/", response_model=schemas.SearchResults)
 async def search_meeting_transcripts(
     query: str = Query(..., min_length=1, description="Search query string"),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Search for meetings based on keywords in their transcripts.
+    Search meetings by keywords in their transcripts, summaries and action items.
+    Returns BM25-ranked hits with highlighted snippets, paginated with limit/offset.
     """
-    if not query:
+    if not query.strip():
         raise HTTPException(status_code=400, detail="Search query cannot be empty")
 
-    results = crud.search_transcripts(db=db, query=query)
-    return results # Returns empty list if no results
+    total, hits = await db.run_sync(crud.search_transcripts, query=query, limit=limit, offset=offset)
+    return schemas.SearchResults(query=query, total=total, limit=limit, offset=offset, hits=hits) # Empty hits if no results
 
 
 @router.delete("/{meeting_id}", status_code=204) # Use 204 No Content for successful deletion
-async def delete_meeting_endpoint(meeting_id: int, db: Session = Depends(get_db)):
+async def delete_meeting_endpoint(meeting_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Endpoint to delete a meeting by its ID.
     Also handles deletion of the associated audio file.
     """
     logger.info(f"Received request to delete meeting {meeting_id}")
-    success = crud.delete_meeting(db=db, meeting_id=meeting_id)
+    success = await db.run_sync(crud.delete_meeting, meeting_id)
     if not success:
         logger.error(f"Failed to delete meeting {meeting_id} (not found or error during deletion)")
         raise HTTPException(status_code=404, detail="Meeting not found or failed to delete associated file.")
+    pdf_cache.invalidate(meeting_id)
     
     logger.info(f"Successfully deleted meeting {meeting_id}")
     # No content needs to be returned, status code 204 indicates success
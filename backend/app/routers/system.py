@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from .. import crud
+from ..database import get_async_db
+from ..services import asr, asr_tiering, llm_cache, llm_client
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/system",
+    tags=["System"],
+)
+
+# --- API Endpoints ---
+
+@router.get("/stats")
+async def read_stats(db: AsyncSession = Depends(get_async_db)):
+    """
+    Operational counters: LLM cache hits/misses/evictions, Ollama client load, ASR tiering
+    decisions and ASR batching (this process), processing jobs by status and transcripts by ASR model.
+    """
+    return {
+        "llm_cache": llm_cache.stats(),
+        "llm_client": llm_client.stats(),
+        "asr_tiering": asr_tiering.stats(),
+        "asr_batching": asr.batch_stats(),
+        "jobs": await db.run_sync(crud.count_jobs_by_status),
+        "transcripts_by_asr_model": await db.run_sync(crud.count_transcripts_by_asr_model),
+    }
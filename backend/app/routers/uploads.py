@@ -0,0 +1,183 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional
+import asyncio
+import base64
+import binascii
+import logging
+import uuid
+import weakref
+
+from .. import crud
+from ..database import get_async_db
+from ..config import settings
+from ..services import storage, uploads
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/meetings/uploads",
+    tags=["Uploads"],
+    responses={404: {"description": "Not found"}},
+)
+
+# --- Resumable Uploads (tus 1.0 core protocol + creation/termination extensions) ---
+# 1. POST   /meetings/uploads       Upload-Length + Upload-Metadata (filename, filetype) -> 201, Location
+# 2. PATCH  /meetings/uploads/{id}  Upload-Offset + body (application/offset+octet-stream) -> 204, new Upload-Offset
+# 3. HEAD   /meetings/uploads/{id}  -> Upload-Offset to resume from after a dropped connection
+# The response to the PATCH completing the upload (and later HEADs) carries a Meeting-Id header.
+
+TUS_VERSION = "1.0.0"
+TUS_HEADERS = {"Tus-Resumable": TUS_VERSION}
+
+# One PATCH at a time per upload in this process (entries vanish once no request holds them)
+_upload_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _tus_error(status_code: int, detail: str) -> HTTPException:
+    return HTTPException(status_code=status_code, detail=detail, headers=TUS_HEADERS)
+
+def _parse_metadata(header: Optional[str]) -> Dict[str, str]:
+    """
+    Decode an Upload-Metadata header: comma-separated `key base64value` pairs.
+    """
+    metadata = {}
+    for pair in (header or "").split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            metadata[parts[0]] = base64.b64decode(parts[1]).decode("utf-8") if len(parts) > 1 else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise _tus_error(400, f"Invalid Upload-Metadata value for '{parts[0]}'")
+    return metadata
+
+def _upload_headers(db_upload) -> Dict[str, str]:
+    headers = {
+        **TUS_HEADERS,
+        "Upload-Offset": str(db_upload.offset),
+        "Upload-Length": str(db_upload.total_size),
+        "Cache-Control": "no-store",
+    }
+    if db_upload.meeting_id is not None:
+        headers["Meeting-Id"] = str(db_upload.meeting_id)
+    return headers
+
+async def _get_upload_or_404(db: AsyncSession, upload_id: str):
+    db_upload = await db.run_sync(crud.get_upload_session, upload_id)
+    if db_upload is None:
+        raise _tus_error(404, "Upload not found (it may have expired)")
+    return db_upload
+
+
+@router.options("")
+async def upload_options():
+    """
+    tus discovery: supported version, extensions and maximum size.
+    """
+    return Response(status_code=204, headers={
+        **TUS_HEADERS,
+        "Tus-Version": TUS_VERSION,
+        "Tus-Extension": "creation,termination",
+        "Tus-Max-Size": str(settings.MAX_UPLOAD_BYTES),
+    })
+
+@router.post("", status_code=201)
+async def create_upload(
+    request: Request,
+    upload_length: Optional[int] = Header(None),
+    upload_metadata: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start a resumable upload. Requires Upload-Length; Upload-Metadata must include the filename
+    and may include the filetype (MIME type, must be audio/*).
+    """
+    if upload_length is None or upload_length <= 0:
+        raise _tus_error(400, "Upload-Length header is required")
+    if upload_length > settings.MAX_UPLOAD_BYTES:
+        raise _tus_error(413, f"Upload exceeds the maximum size of {settings.MAX_UPLOAD_BYTES} bytes")
+
+    metadata = _parse_metadata(upload_metadata)
+    filename = metadata.get("filename")
+    if not filename:
+        raise _tus_error(400, "Upload-Metadata must include a filename")
+    content_type = metadata.get("filetype")
+    if content_type and not content_type.startswith("audio/"):
+        raise _tus_error(415, "File must be an audio file")
+
+    upload_id = uuid.uuid4().hex
+    db_upload = await db.run_sync(uploads.start_upload, upload_id, filename, content_type, upload_length)
+    logger.info(f"Resumable upload {upload_id} started for '{filename}' ({upload_length} bytes)")
+    return Response(status_code=201, headers={
+        **_upload_headers(db_upload),
+        "Location": f"{request.url.path.rstrip('/')}/{upload_id}",
+    })
+
+@router.head("/{upload_id}")
+async def get_upload_offset(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Report how many bytes the server has, so an interrupted client can resume from there.
+    """
+    db_upload = await _get_upload_or_404(db, upload_id)
+    return Response(status_code=200, headers=_upload_headers(db_upload))
+
+@router.patch("/{upload_id}")
+async def append_to_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: Optional[int] = Header(None),
+    content_type: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Append the request body at Upload-Offset, which must equal the server's offset.
+    Completing the upload creates the meeting and queues it for processing.
+    """
+    if content_type != "application/offset+octet-stream":
+        raise _tus_error(415, "Content-Type must be application/offset+octet-stream")
+    if upload_offset is None:
+        raise _tus_error(400, "Upload-Offset header is required")
+
+    lock = _upload_locks.get(upload_id)
+    if lock is None:
+        lock = _upload_locks.setdefault(upload_id, asyncio.Lock())
+    if lock.locked():
+        raise _tus_error(409, "Another request is appending to this upload")
+
+    async with lock:
+        db_upload = await _get_upload_or_404(db, upload_id)
+        if db_upload.meeting_id is not None:
+            raise _tus_error(409, "Upload is already complete")
+        if upload_offset != db_upload.offset:
+            raise _tus_error(409, f"Upload-Offset {upload_offset} does not match the server offset {db_upload.offset}")
+
+        try:
+            new_offset = await uploads.append_chunk(db, db_upload, request.stream())
+        except storage.UploadTooLargeError as e:
+            raise _tus_error(413, str(e))
+        except Exception as e:
+            logger.error(f"Failed to write chunk of upload {upload_id}: {e}", exc_info=True)
+            raise _tus_error(500, "Failed to store upload chunk")
+
+        await db.refresh(db_upload)
+        if new_offset == db_upload.total_size:
+            try:
+                await uploads.finish_upload(db, db_upload)
+            except Exception as e:
+                logger.error(f"Failed to finish upload {upload_id}: {e}", exc_info=True)
+                raise _tus_error(500, "Failed to finish upload")
+            await db.refresh(db_upload)
+        return Response(status_code=204, headers=_upload_headers(db_upload))
+
+@router.delete("/{upload_id}", status_code=204)
+async def terminate_upload(upload_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Abandon an upload and delete the bytes received so far.
+    """
+    db_upload = await _get_upload_or_404(db, upload_id)
+    lock = _upload_locks.get(upload_id)
+    if lock is not None and lock.locked():
+        raise _tus_error(409, "Upload is in progress")
+    await db.run_sync(uploads.abort_upload, db_upload)
+    return Response(status_code=204, headers=TUS_HEADERS)
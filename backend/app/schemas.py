@@ -1,7 +1,7 @@
 import datetime
 from pydantic import BaseModel, ConfigDict, Field # Import Field
-from typing import Optional, List
-from .models import MeetingStatus # Import the enum from models
+from typing import Optional, List, Literal
+from .models import MeetingStatus, PipelineStage, StageStatus # Import the enums from models
 
 # --- Meeting Schemas ---
 
@@ -22,6 +22,11 @@ class MeetingBase(BaseModel):
     
     status: MeetingStatus = MeetingStatus.PENDING
     error_message: Optional[str] = None
+    content_hash: Optional[str] = None # SHA-256 of the uploaded audio
+    duration: Optional[float] = None # Recording length in seconds
+    asr_model: Optional[str] = None # Whisper model that produced the transcript
+    loudness_dbfs: Optional[float] = None # RMS level of the decoded audio
+    peak_dbfs: Optional[float] = None # Peak level of the decoded audio
     
     # Remove old generic fields if replaced by language-specific ones
     # summary: Optional[str] = None 
@@ -54,6 +59,52 @@ class Meeting(MeetingBase):
         from_attributes=True # Enable ORM mode to map SQLAlchemy models
     )
 
+class MeetingSummary(BaseModel):
+    """
+    Lightweight meeting representation for list views: no transcript, summaries or action items.
+    """
+    id: int
+    filename: Optional[str] = None
+    upload_time: Optional[datetime.datetime] = None
+    status: MeetingStatus
+    detected_language: Optional[str] = None
+    duration: Optional[float] = None
+    error_message: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class MeetingPage(BaseModel):
+    """
+    A page of meetings, newest first. Pass `next_cursor` as `cursor` to fetch the next page;
+    it is None on the last page.
+    """
+    items: List[MeetingSummary]
+    next_cursor: Optional[str] = None
+
+# --- Transcript Segment Schemas ---
+
+class TranscriptSegment(BaseModel):
+    """
+    Schema for a timestamped transcript segment.
+    """
+    id: int
+    segment_index: int
+    start_time: float
+    end_time: float
+    text: str
+    speaker: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TranscriptSegmentPage(BaseModel):
+    """
+    A page of transcript segments. Pass `next_after` as `after` to fetch the next page;
+    it is None when there are no more segments in the requested window.
+    """
+    meeting_id: int
+    segments: List[TranscriptSegment]
+    next_after: Optional[int] = None
+
 # --- Upload Response Schema ---
 
 class UploadResponse(BaseModel):
@@ -65,11 +116,90 @@ class UploadResponse(BaseModel):
     meetingId: Optional[str] = None # Use str to match frontend mock
     error: Optional[str] = None
 
-# --- Search Schema (Optional - for future use) ---
-# class SearchQuery(BaseModel):
-#     query: str
+# --- Bulk Export Schemas ---
+
+class MeetingFilter(BaseModel):
+    """
+    Selects meetings for a bulk operation. All given filters must match;
+    with no filters, every meeting is selected (up to the operation's maximum).
+    """
+    meeting_ids: Optional[List[int]] = None
+    uploaded_from: Optional[datetime.datetime] = None # Inclusive
+    uploaded_to: Optional[datetime.datetime] = None # Exclusive
+    status: Optional[MeetingStatus] = None
+
+class BulkExportRequest(MeetingFilter):
+    """
+    Selects the meetings for a bulk export and the files to include.
+    """
+    # Files per meeting: "pdf" report, "json" (the Meeting schema) and/or "markdown"
+    formats: List[Literal["pdf", "json", "markdown"]] = Field(default_factory=lambda: ["pdf"], min_length=1)
+
+# --- Pipeline Stage Schemas ---
+
+class MeetingStage(BaseModel):
+    """
+    Checkpoint of one pipeline stage of a meeting.
+    """
+    stage: PipelineStage
+    status: StageStatus
+    attempts: int
+    started_at: Optional[datetime.datetime] = None
+    completed_at: Optional[datetime.datetime] = None
+    error_message: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ReprocessResponse(BaseModel):
+    """
+    A queued reprocess job and the stage it resumes from.
+    """
+    meeting_id: int
+    job_id: int
+    from_stage: PipelineStage
+
+class BulkReprocessRequest(MeetingFilter):
+    """
+    Selects meetings to reprocess from a stage, e.g. re-summarize after a prompt or model change.
+    Meetings whose earlier stages are not complete are skipped rather than reprocessed from further back.
+    """
+    from_stage: PipelineStage = PipelineStage.SUMMARIZE
+
+class ReprocessSkipped(BaseModel):
+    meeting_id: int
+    reason: str
+
+class BulkReprocessResponse(BaseModel):
+    """
+    Jobs queued by a bulk reprocess, and the matching meetings that were skipped.
+    """
+    queued: List[ReprocessResponse]
+    skipped: List[ReprocessSkipped]
+
+# --- Search Schemas ---
 
-# class SearchResult(BaseModel):
-#     meeting_id: int
-#     filename: str
-#     context: str # Snippet of text where the keyword was found
+class SearchHit(BaseModel):
+    """
+    A single ranked search hit. `snippet` is HTML-escaped text with matches wrapped in <mark> tags.
+    """
+    meeting_id: int
+    filename: Optional[str] = None
+    upload_time: Optional[datetime.datetime] = None
+    status: MeetingStatus
+    detected_language: Optional[str] = None
+    score: float # Higher is more relevant (negated BM25)
+    snippet: str
+    # First transcript segment containing the query (None if it only matched summaries/action items)
+    segment_id: Optional[int] = None
+    segment_start: Optional[float] = None # Seconds from the start of the recording
+    segment_end: Optional[float] = None
+
+class SearchResults(BaseModel):
+    """
+    A page of search hits, ordered by relevance.
+    """
+    query: str
+    total: int
+    limit: int
+    offset: int
+    hits: List[SearchHit]
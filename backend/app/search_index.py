@@ -0,0 +1,201 @@
+import html
+import logging
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+# Configure logging for this module
+logger = logging.getLogger(__name__)
+
+# --- SQLite FTS5 indexes over meeting content ---
+# `meetings_fts` and `transcript_segments_fts` are external-content FTS5 tables: they store only the
+# index, the text stays in the content table. Triggers keep them in sync on every insert, delete
+# and update of an indexed column.
+
+FTS_TABLE = "meetings_fts"
+FTS_COLUMNS = ["transcript", "summary_en", "summary_zh", "action_items_en", "action_items_zh"]
+# Segment index: used to resolve a meeting hit to the timestamp where it occurs
+SEGMENTS_FTS_TABLE = "transcript_segments_fts"
+SEGMENTS_FTS_COLUMNS = ["text"]
+SEGMENTS_FTS_UNINDEXED = ["meeting_id"] # Stored for filtering, not tokenized
+# BM25 column weights (same order as FTS_COLUMNS): summaries and action items are denser than the transcript
+FTS_WEIGHTS = [1.0, 2.0, 2.0, 1.5, 1.5]
+
+# Tokenizers offered via settings.SEARCH_TOKENIZER:
+#   unicode61 - word tokens, diacritics folded; best for space-separated languages
+#   trigram   - substring matching on character trigrams; works for CJK text without word boundaries
+TOKENIZERS = {
+    "unicode61": "unicode61 remove_diacritics 2",
+    "trigram": "trigram",
+}
+
+# Snippet highlight markers. Control characters can't appear in transcripts, so the snippet can be
+# HTML-escaped first and the markers turned into <mark> tags afterwards.
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_END = "\x03"
+
+# Han, Hiragana/Katakana and Hangul: scripts written without spaces between words
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+_fts_enabled = False
+
+
+def is_enabled() -> bool:
+    """
+    True once the FTS index exists (SQLite with FTS5 support).
+    """
+    return _fts_enabled
+
+
+def _tokenizer_clause() -> str:
+    tokenizer = TOKENIZERS.get(settings.SEARCH_TOKENIZER)
+    if tokenizer is None:
+        raise ValueError(f"Unknown SEARCH_TOKENIZER '{settings.SEARCH_TOKENIZER}'. Available: {', '.join(TOKENIZERS)}")
+    return tokenizer
+
+
+def _ensure_fts_table(conn, table: str, content_table: str, columns: List[str], unindexed: List[str], tokenizer: str) -> bool:
+    """
+    Create (or re-create, if its definition changed) one external-content FTS5 table with its
+    sync triggers, and rebuild its index. Returns False if FTS5 is not available.
+    """
+    all_columns = columns + unindexed
+    column_list = ", ".join(all_columns)
+    column_defs = ", ".join(columns + [f"{c} UNINDEXED" for c in unindexed])
+    new_columns = ", ".join(f"new.{c}" for c in all_columns)
+    old_columns = ", ".join(f"old.{c}" for c in all_columns)
+    create_sql = (
+        f"CREATE VIRTUAL TABLE {table} USING fts5({column_defs}, "
+        f"content='{content_table}', content_rowid='id', tokenize='{tokenizer}')"
+    )
+
+    existing = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table}
+    ).scalar()
+    if existing == create_sql:
+        return True
+
+    try:
+        if existing is not None:
+            logger.info(f"Definition of '{table}' changed (tokenizer '{settings.SEARCH_TOKENIZER}'); rebuilding the index.")
+            conn.execute(text(f"DROP TABLE {table}"))
+        conn.execute(text(create_sql))
+    except Exception as e:
+        logger.error(f"SQLite FTS5 unavailable, search falls back to LIKE: {e}")
+        return False
+
+    for trigger in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_{trigger}"))
+    conn.execute(text(
+        f"CREATE TRIGGER {table}_ai AFTER INSERT ON {content_table} BEGIN "
+        f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_columns}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER {table}_ad AFTER DELETE ON {content_table} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_columns}); END"
+    ))
+    # Only re-index when indexed content changes, not on status updates
+    conn.execute(text(
+        f"CREATE TRIGGER {table}_au AFTER UPDATE OF {', '.join(columns)} ON {content_table} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_columns}); "
+        f"INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_columns}); END"
+    ))
+    conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+    logger.info(f"Full-text index '{table}' built with tokenizer '{settings.SEARCH_TOKENIZER}'.")
+    return True
+
+
+def ensure_search_index(engine: Engine):
+    """
+    Create the FTS5 tables and sync triggers if needed, rebuilding an index when it is new
+    or the configured tokenizer changed. No-op for non-SQLite databases or SQLite builds without FTS5.
+    """
+    global _fts_enabled
+    if engine.dialect.name != "sqlite":
+        logger.info("Full-text index is only available on SQLite; search falls back to ILIKE.")
+        return
+
+    tokenizer = _tokenizer_clause()
+    with engine.begin() as conn:
+        _fts_enabled = (
+            _ensure_fts_table(conn, FTS_TABLE, "meetings", FTS_COLUMNS, [], tokenizer)
+            and _ensure_fts_table(conn, SEGMENTS_FTS_TABLE, "transcript_segments",
+                                  SEGMENTS_FTS_COLUMNS, SEGMENTS_FTS_UNINDEXED, tokenizer)
+        )
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Split a user query into terms (whitespace separated, quotes removed).
+    """
+    return [term for term in re.split(r"\s+", query.replace('"', " ")) if term]
+
+
+def build_match_expression(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression: every term is quoted
+    (so FTS5 operators and punctuation in user input are literal) and all terms must match.
+    """
+    return " ".join(f'"{term}"' for term in query_terms(query))
+
+
+def can_match(query: str) -> bool:
+    """
+    Whether the FTS index can answer the query. The trigram tokenizer can't match terms shorter
+    than three characters (common for two-character CJK words), and unicode61 indexes a whole run
+    of CJK characters as one token, so it can't find words inside it; those queries fall back to LIKE.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return False
+    if settings.SEARCH_TOKENIZER == "trigram":
+        return all(len(term) >= 3 for term in terms)
+    return not any(_CJK_PATTERN.search(term) for term in terms)
+
+
+def snippet_sql(tokens: int = 16) -> str:
+    """
+    SQL expression for the best-matching snippet of a hit (column -1 lets FTS5 pick the column).
+    """
+    return f"snippet({FTS_TABLE}, -1, '{_HIGHLIGHT_START}', '{_HIGHLIGHT_END}', '…', {tokens})"
+
+
+def bm25_sql() -> str:
+    """
+    SQL expression for the weighted BM25 rank of a hit (lower is better).
+    """
+    return f"bm25({FTS_TABLE}, {', '.join(str(w) for w in FTS_WEIGHTS)})"
+
+
+def render_snippet(raw_snippet: str) -> str:
+    """
+    HTML-escape a snippet and turn the highlight markers into <mark> tags.
+    """
+    escaped = html.escape(raw_snippet or "")
+    return escaped.replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_END, "</mark>")
+
+
+def make_snippet(content: str, query: str, context_chars: int = 80) -> str:
+    """
+    Build a highlighted snippet in Python (used when the FTS index can't serve the query).
+    """
+    if not content:
+        return ""
+    terms = query_terms(query)
+    lowered = content.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [p for p in positions if p >= 0]
+    if not positions:
+        return html.escape(content[:2 * context_chars])
+    start = max(min(positions) - context_chars, 0)
+    end = min(min(positions) + context_chars, len(content))
+    window = content[start:end]
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    marked = pattern.sub(lambda m: f"{_HIGHLIGHT_START}{m.group(0)}{_HIGHLIGHT_END}", window)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(content) else ""
+    return render_snippet(prefix + marked + suffix)
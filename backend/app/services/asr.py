@@ -1,59 +1,329 @@
 import os
 import logging
-from typing import Optional, Tuple # Import Tuple
+import threading
+import time
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional, Tuple # Import Tuple
+
 from sqlalchemy.orm import Session
-import torch # Whisper uses torch, keep the check
 
-# Import Whisper
-try:
-    import whisper
-except ImportError:
-    whisper = None
-    logging.getLogger(__name__).error("OpenAI Whisper library not installed. Please install it: pip install openai-whisper")
+# The ASR libraries are imported lazily by the engine (services/asr_engines.py) when a model is
+# first loaded, so importing this module (e.g. from the API process) does not pull in the ML stack.
 
 from .. import models, schemas, crud
 from ..config import settings # Keep settings if needed for model name or other configs
+from . import asr_engines, asr_tiering, audio_chunking, decoded_audio, inference_scheduler
+from .model_cache import ModelCache
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# --- Whisper Model Loading ---
-whisper_model = None
-if whisper:
-    try:
-        # Check for GPU availability
-        if torch.cuda.is_available():
-            device = 'cuda'
-            logger.info("CUDA GPU detected. Whisper will run on GPU.")
-        else:
-            device = 'cpu'
-            logger.warning("CUDA GPU not detected. Whisper will run on CPU.")
-
-        # Load the Whisper model (e.g., 'tiny', 'base', 'small', 'medium', 'large')
-        # Consider making the model name configurable via settings
-        model_name = getattr(settings, 'WHISPER_MODEL', 'base') # Default to 'base' if not in settings
-        logger.info(f"Loading Whisper ASR model: {model_name}...")
-        whisper_model = whisper.load_model(model_name, device=device)
-        logger.info(f"Whisper ASR model '{model_name}' loaded successfully.")
+# --- Whisper Model Loading (lazy) ---
+# Models are loaded by the ASR engine selected by ASR_ENGINE (services/asr_engines.py) and held in a
+# bounded LRU cache (ASR_MODEL_CACHE_SIZE per process), since recordings are routed to per-language
+# models (WHISPER_LANGUAGE_MODELS) and loading them all would not fit.
+_model_lock = threading.Lock()
+_model_cache: Optional[ModelCache] = None
 
+def _load_model(model_name: str):
+    """
+    Load a model with the configured engine, on the GPU if there is one, otherwise on the CPU.
+    """
+    engine = asr_engines.get_asr_engine()
+    try:
+        return engine.load_model(model_name)
+    except RuntimeError:
+        raise
     except Exception as e:
-        logger.error(f"Failed to load Whisper ASR model '{model_name}': {e}", exc_info=True)
-        whisper_model = None
-else:
-    logger.error("OpenAI Whisper library not found.")
+        raise RuntimeError(f"Failed to load {engine.name} ASR model '{model_name}': {e}")
+
+def _release_model_memory(model_name: str):
+    # The evicted model itself is freed once no transcription holds it any more
+    asr_engines.get_asr_engine().release_memory()
+
+def _get_model_cache() -> ModelCache:
+    global _model_cache
+    with _model_lock:
+        if _model_cache is None:
+            _model_cache = ModelCache(_load_model, settings.ASR_MODEL_CACHE_SIZE, unloader=_release_model_memory)
+        return _model_cache
+
+def get_whisper_model(model_name: Optional[str] = None):
+    """
+    Return a Whisper model (default: WHISPER_MODEL) of the configured engine from the model cache, loading it on first use.
+    Raises RuntimeError if the model cannot be loaded or the process runs in API-only mode.
+    """
+    if settings.API_ONLY:
+        raise RuntimeError("ASR is disabled in API-only mode (API_ONLY=true)")
+    return _get_model_cache().get(model_name or settings.WHISPER_MODEL)
+
+def check_asr_available():
+    """
+    Raise RuntimeError if this process can't run ASR (API-only mode, unknown engine or missing
+    library), without loading a model: the model to use is only known once the language is detected.
+    """
+    if settings.API_ONLY:
+        raise RuntimeError("ASR is disabled in API-only mode (API_ONLY=true)")
+    try:
+        engine = asr_engines.get_asr_engine()
+    except ValueError as e:
+        raise RuntimeError(str(e))
+    engine.check_available()
+
+def warm_up():
+    """
+    Load the default Whisper model ahead of the first job (called by worker processes on start).
+    """
+    get_whisper_model()
+
+
+# --- Language Pre-detection and Model Routing ---
+# The language is detected on the first ASR_LANGUAGE_DETECT_SECONDS of audio (one encoder pass),
+# then the recording is transcribed by the model configured for that language with the language
+# fixed, so Whisper doesn't detect it again (per chunk, for chunked transcription).
+
+def _is_english_only(model_name: str) -> bool:
+    return model_name.endswith(".en")
+
+def model_for_language(language: Optional[str]) -> str:
+    """
+    Name of the Whisper model that transcribes `language` (WHISPER_MODEL if none is configured).
+    English-only models are never used for other languages.
+    """
+    model_name = settings.WHISPER_LANGUAGE_MODELS.get(language or "", settings.WHISPER_MODEL)
+    if _is_english_only(model_name) and language != "en":
+        return settings.WHISPER_MODEL
+    return model_name
+
+def detect_language(audio) -> Tuple[Optional[str], float]:
+    """
+    Detect the spoken language from the start of the recording.
+    Returns (language code, probability), or (None, 0.0) for empty audio.
+    """
+    detect_model_name = settings.WHISPER_DETECT_MODEL or settings.WHISPER_MODEL
+    if _is_english_only(detect_model_name):
+        return "en", 1.0 # English-only models can't detect; assume English
+    if len(audio) == 0:
+        return None, 0.0
+
+    model = get_whisper_model(detect_model_name)
+    clip = decoded_audio.to_float32(audio[:int(settings.ASR_LANGUAGE_DETECT_SECONDS * audio_chunking.SAMPLE_RATE)])
+    return asr_engines.get_asr_engine().detect_language(model, clip)
+
+
+# --- Chunked Parallel Transcription ---
+# Long recordings are split at silences and the chunks are transcribed in a process pool.
+# Each pool process loads its own CPU copy of a model on first use and keeps it for later jobs.
+_chunk_pool = None
+_chunk_pool_workers = 0
+_chunk_pool_lock = threading.Lock()
+_pool_models: Optional[ModelCache] = None # Model cache inside a pool process
+
+def _asr_worker_count() -> int:
+    """
+    Number of processes to use for chunked transcription (ASR_WORKERS=0 means one per CPU core).
+    """
+    if settings.ASR_WORKERS > 0:
+        return settings.ASR_WORKERS
+    return os.cpu_count() or 1
+
+def _init_chunk_worker(engine_name: str, cpu_threads: int, cache_size: int):
+    """
+    Pool process initializer: set up the process's model cache. Models are loaded by the first
+    chunk that needs them, since each job picks its own (language routing, tiering).
+    """
+    global _pool_models
+    engine = asr_engines.get_asr_engine(engine_name)
+    # Split the cores between pool processes instead of letting each one use all of them
+    _pool_models = ModelCache(lambda name: engine.load_model(name, device="cpu", threads=cpu_threads), cache_size,
+                              unloader=lambda name: engine.release_memory())
+
+def _transcribe_chunk(engine_name: str, model_name: str, pcm_path: str, start: int, end: int, language: Optional[str]) -> dict:
+    """
+    Transcribe samples [start, end) of the decoded recording inside a pool process.
+    The process maps the PCM file itself, so no audio is pickled across. Timestamps are relative to the chunk start.
+    """
+    audio = decoded_audio.read_slice(pcm_path, start, end)
+    return asr_engines.get_asr_engine(engine_name).transcribe(_pool_models.get(model_name), audio, language)
+
+def _get_chunk_pool(workers: int) -> ProcessPoolExecutor:
+    global _chunk_pool, _chunk_pool_workers
+    with _chunk_pool_lock:
+        if _chunk_pool is None or _chunk_pool_workers != workers:
+            if _chunk_pool is not None:
+                _chunk_pool.shutdown(wait=False)
+            cpu_threads = max((os.cpu_count() or 1) // workers, 1)
+            # 'spawn' avoids forking a process that already runs torch and worker threads
+            _chunk_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunk_worker,
+                initargs=(settings.ASR_ENGINE, cpu_threads, settings.ASR_MODEL_CACHE_SIZE),
+            )
+            _chunk_pool_workers = workers
+        return _chunk_pool
+
+def _transcribe_single(whisper_model, audio, language: Optional[str] = None) -> dict:
+    """
+    Transcribe the whole recording in one pass with a cached model (`language` None = let Whisper detect it).
+    """
+    return asr_engines.get_asr_engine().transcribe(whisper_model, decoded_audio.to_float32(audio), language)
+
+def _transcribe_chunked(audio, pcm_path: str, workers: int, progress_callback: Optional[Callable[[float], None]] = None,
+                        model_name: Optional[str] = None, language: Optional[str] = None) -> dict:
+    """
+    Split the recording at silences into overlapping chunks, transcribe them in parallel
+    and stitch the segments back together with global timestamps.
+    `progress_callback` receives the fraction of audio transcribed as chunks finish.
+    """
+    sample_rate = audio_chunking.SAMPLE_RATE
+    duration = len(audio) / sample_rate
+    silences = audio_chunking.find_silence_points(audio, sample_rate)
+    chunks = audio_chunking.plan_chunks(
+        duration, silences,
+        chunk_seconds=settings.ASR_CHUNK_SECONDS,
+        overlap_seconds=settings.ASR_CHUNK_OVERLAP_SECONDS,
+        search_seconds=settings.ASR_CHUNK_SEARCH_SECONDS,
+    )
+    logger.info(f"Transcribing {duration:.0f}s of audio as {len(chunks)} chunks on {workers} processes.")
+
+    pool = _get_chunk_pool(workers)
+    futures = {
+        pool.submit(_transcribe_chunk, settings.ASR_ENGINE, model_name or settings.WHISPER_MODEL, pcm_path,
+                    int(chunk.start * sample_rate), int(chunk.end * sample_rate), language): chunk
+        for chunk in chunks
+    }
+    results_by_index = {}
+    transcribed_seconds = 0.0
+    for future in as_completed(futures):
+        chunk = futures[future]
+        results_by_index[chunk.index] = future.result()
+        transcribed_seconds += chunk.keep_end - chunk.keep_start
+        if progress_callback:
+            progress_callback(min(transcribed_seconds / duration, 1.0))
+    return _merge_chunk_results(chunks, [results_by_index[chunk.index] for chunk in chunks])
+
+def _merge_chunk_results(chunks, results) -> dict:
+    """
+    Combine per-chunk results into one: stitched segments with global timestamps and the language.
+    """
+    # Without a fixed language chunks detect it independently; go with the language covering most audio
+    votes = Counter()
+    for chunk, result in zip(chunks, results):
+        votes[result["language"]] += chunk.keep_end - chunk.keep_start
+    detected_language = votes.most_common(1)[0][0] if votes else "unknown"
+
+    segments = audio_chunking.stitch_segments(chunks, [result["segments"] for result in results])
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "language": detected_language,
+        "segments": segments,
+    }
+
 
+# --- Cross-Meeting Batched Transcription ---
+# With ASR_BATCHED_INFERENCE on, every transcription in the process goes through one
+# inference scheduler (services/inference_scheduler.py), which decodes 30 s windows of
+# concurrent recordings together instead of running a transcribe() call per recording.
+_batch_scheduler: Optional[inference_scheduler.InferenceScheduler] = None
+
+def _get_batch_scheduler() -> inference_scheduler.InferenceScheduler:
+    global _batch_scheduler
+    with _model_lock:
+        if _batch_scheduler is None:
+            _batch_scheduler = inference_scheduler.InferenceScheduler(
+                get_whisper_model, settings.ASR_BATCH_SIZE, settings.ASR_BATCH_MAX_WAIT_MS / 1000.0)
+        return _batch_scheduler
+
+def _transcribe_batched(audio, progress_callback: Optional[Callable[[float], None]] = None,
+                        model_name: Optional[str] = None, language: Optional[str] = None) -> dict:
+    """
+    Cut the recording into windows, queue them on the batch scheduler and stitch the results.
+    `progress_callback` receives the fraction of audio transcribed as windows finish.
+    """
+    sample_rate = audio_chunking.SAMPLE_RATE
+    duration = len(audio) / sample_rate
+    windows = inference_scheduler.plan_windows(audio)
+    futures = _get_batch_scheduler().submit(
+        model_name or settings.WHISPER_MODEL, language,
+        [audio[int(window.start * sample_rate):int(window.end * sample_rate)] for window in windows],
+    )
+    logger.info(f"Queued {duration:.0f}s of audio as {len(windows)} windows for batched transcription.")
+
+    chunk_by_future = dict(zip(futures, windows))
+    transcribed_seconds = 0.0
+    for future in as_completed(futures):
+        window = chunk_by_future[future]
+        transcribed_seconds += window.keep_end - window.keep_start
+        if progress_callback:
+            progress_callback(min(transcribed_seconds / duration, 1.0))
+    return _merge_chunk_results(windows, [future.result() for future in futures])
+
+def batch_stats() -> dict:
+    """
+    Counters of this process's batch scheduler (empty if batching hasn't been used).
+    """
+    return _batch_scheduler.stats() if _batch_scheduler is not None else {}
+
+def run_transcription(audio_path: str, progress_callback: Optional[Callable[[float], None]] = None,
+                      choose_model: Optional[Callable[[str, float], str]] = None) -> dict:
+    """
+    Transcribe an audio file: detect the language on its first seconds, then transcribe it with the
+    model routed for that language: batched with other recordings (ASR_BATCHED_INFERENCE), otherwise
+    with chunked parallel transcription for long recordings on CPU.
+    `choose_model(routed model, audio seconds)`, if given, picks the model instead (e.g. the tiering policy).
+    Returns a dict with 'text', 'language', 'segments', 'model', 'audio_seconds' and 'asr_seconds'.
+    """
+    audio = decoded_audio.load(audio_path) # Memory-mapped 16 kHz PCM, decoded once by the decode stage
+    duration = len(audio) / audio_chunking.SAMPLE_RATE
+    workers = _asr_worker_count()
+
+    language, probability = detect_language(audio)
+    if language is not None and probability < settings.ASR_LANGUAGE_MIN_PROBABILITY:
+        logger.info(f"Language detection is unsure ('{language}', p={probability:.2f}); Whisper will detect it while transcribing.")
+        language = None
+    model_name = model_for_language(language)
+    if choose_model is not None:
+        model_name = choose_model(model_name, duration)
+    logger.info(f"Detected language '{language}' (p={probability:.2f}); transcribing with Whisper model '{model_name}'.")
+
+    engine = asr_engines.get_asr_engine()
+    if settings.ASR_BATCHED_INFERENCE and engine.supports_batching:
+        started = time.perf_counter()
+        result = _transcribe_batched(audio, progress_callback, model_name=model_name, language=language)
+    # On GPU a single pass is already fast and a second model copy would not fit
+    elif engine.device() == 'cuda' or workers < 2 or duration < settings.ASR_CHUNKED_MIN_SECONDS:
+        whisper_model = get_whisper_model(model_name)
+        started = time.perf_counter()
+        result = _transcribe_single(whisper_model, audio, language)
+        if progress_callback:
+            progress_callback(1.0) # Whisper has no progress hook for a single pass
+    else:
+        started = time.perf_counter()
+        result = _transcribe_chunked(audio, decoded_audio.decoded_path(audio_path), workers, progress_callback,
+                                     model_name=model_name, language=language)
+    result["asr_seconds"] = time.perf_counter() - started
+    result["audio_seconds"] = duration
+    result["model"] = model_name
+    return result
 
 # --- Main Transcription Function ---
-def transcribe_audio(db: Session, meeting_id: int) -> Optional[Tuple[str, str]]:
+def transcribe_audio(db: Session, meeting_id: int,
+                     progress_callback: Optional[Callable[[float], None]] = None,
+                     model_name: Optional[str] = None) -> Optional[Tuple[str, str]]:
     """
     Transcribes the audio file associated with the meeting ID using OpenAI Whisper.
     Updates the meeting record with the transcript, detected language, or error status.
+    `progress_callback`, if given, is called with the fraction of audio transcribed so far.
+    The model is picked by the tiering policy (services/asr_tiering.py) unless `model_name` pins it.
     Returns a tuple (transcript_text, detected_language) if successful, otherwise None.
     """
-    if whisper_model is None:
-        logger.error("Whisper ASR model is not loaded. Cannot transcribe.")
-        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="ASR model not loaded")
+    try:
+        check_asr_available() # Fail early if ASR can't run in this process
+    except RuntimeError as e:
+        logger.error(f"Whisper ASR is not available. Cannot transcribe: {e}")
+        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="ASR not available")
         return None
 
     db_meeting = crud.get_meeting(db, meeting_id)
@@ -69,19 +339,29 @@ def transcribe_audio(db: Session, meeting_id: int) -> Optional[Tuple[str, str]]:
     crud.update_meeting_status(db, meeting_id, models.MeetingStatus.PROCESSING)
 
     try:
-        # Perform transcription using Whisper
         # Perform transcription using Whisper
         # result is a dictionary containing the transcript and other info, including language
-        result = whisper_model.transcribe(db_meeting.audio_file_path, fp16=torch.cuda.is_available()) 
+        def choose_model(target_model: str, audio_seconds: float) -> str:
+            if model_name:
+                return asr_tiering.pinned(model_name, audio_seconds).model
+            return asr_tiering.choose_model(db, meeting_id, target_model, audio_seconds).model
+
+        result = run_transcription(db_meeting.audio_file_path, progress_callback, choose_model=choose_model)
+        asr_tiering.record_run(result["model"], result["audio_seconds"], result["asr_seconds"])
         transcript_text = result.get("text", "")
         detected_language = result.get("language", "unknown") # Get detected language, default to 'unknown'
 
         logger.info(f"Whisper transcription complete for meeting {meeting_id}. Detected language: {detected_language}")
 
+        # Store the timestamped segments (one batched insert) before the flat transcript
+        segment_count = crud.replace_transcript_segments(db, meeting_id, result.get("segments", []))
+        logger.info(f"Stored {segment_count} transcript segments for meeting {meeting_id}.")
+
         # Update the meeting record with transcript and language
         meeting_update = schemas.MeetingUpdate(
             transcript=transcript_text,
-            detected_language=detected_language
+            detected_language=detected_language,
+            asr_model=result["model"] # Which model produced this transcript
         )
         crud.update_meeting(db, meeting_id, meeting_update)
         # Don't set status to COMPLETED here, summarization step will do that
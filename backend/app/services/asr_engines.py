@@ -0,0 +1,199 @@
+import abc
+import gc
+import importlib.util
+import logging
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- ASR Engines ---
+# services/asr.py handles routing, caching, chunking and storage; an engine only loads models and
+# runs them. Engines take Whisper model names ('tiny' ... 'large', English-only '.en' variants) and
+# return results as {'text', 'language', 'segments': [{'start', 'end', 'text'}]} with times in seconds.
+# Selected by settings.ASR_ENGINE:
+#   whisper        - openai-whisper on torch: fp16 on GPU, fp32 on CPU;
+#   faster-whisper - the same models converted for CTranslate2, int8 on CPU (float16 on GPU).
+#                    Several times faster on CPU at a fraction of the memory. pip install faster-whisper
+
+
+class ASREngine(abc.ABC):
+    """
+    Interface of a speech recognition backend. Libraries are imported on first use,
+    so selecting an engine doesn't load the ML stack in API-only processes.
+    """
+    name = ""
+    supports_batching = False # Windows can be decoded by the cross-meeting batch scheduler
+    required_modules: Tuple[str, ...] = () # Libraries load_model imports
+
+    def check_available(self):
+        """
+        Raise RuntimeError if a library the engine needs is not installed. Imports and loads nothing.
+        """
+        missing = [module for module in self.required_modules if importlib.util.find_spec(module) is None]
+        if missing:
+            raise RuntimeError(f"{self.name} ASR engine unavailable: {', '.join(missing)} not installed")
+
+    @abc.abstractmethod
+    def device(self) -> str:
+        """
+        'cuda' if models run on a GPU, otherwise 'cpu'.
+        """
+        ...
+
+    @abc.abstractmethod
+    def load_model(self, model_name: str, device: Optional[str] = None, threads: int = 0):
+        """
+        Load a model on `device` (default: the engine's device). `threads` > 0 limits CPU threads.
+        """
+        ...
+
+    def release_memory(self):
+        """
+        Return memory freed by an unloaded model to the system (e.g. cached GPU memory).
+        """
+        gc.collect()
+
+    @abc.abstractmethod
+    def detect_language(self, model, audio: np.ndarray) -> Tuple[str, float]:
+        """
+        Most likely language of float32 audio (at most 30 s are used) and its probability.
+        """
+        ...
+
+    @abc.abstractmethod
+    def transcribe(self, model, audio: np.ndarray, language: Optional[str] = None) -> dict:
+        """
+        Transcribe float32 16 kHz audio (`language` None = detect it).
+        """
+        ...
+
+
+class WhisperEngine(ASREngine):
+    """
+    openai-whisper (PyTorch).
+    """
+    name = "whisper"
+    supports_batching = True
+    required_modules = ("torch", "whisper")
+
+    def __init__(self):
+        self._device = None
+
+    def device(self) -> str:
+        if self._device is None:
+            import torch
+            if torch.cuda.is_available():
+                self._device = "cuda"
+                logger.info("CUDA GPU detected. Whisper will run on GPU.")
+            else:
+                self._device = "cpu"
+                logger.warning("CUDA GPU not detected. Whisper will run on CPU.")
+        return self._device
+
+    def load_model(self, model_name: str, device: Optional[str] = None, threads: int = 0):
+        try:
+            import torch
+            import whisper
+        except ImportError as e:
+            raise RuntimeError(f"OpenAI Whisper library not installed. Please install it: pip install openai-whisper ({e})")
+        if threads > 0:
+            torch.set_num_threads(threads)
+        return whisper.load_model(model_name, device=device or self.device())
+
+    def release_memory(self):
+        gc.collect()
+        if self._device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+
+    def detect_language(self, model, audio: np.ndarray) -> Tuple[str, float]:
+        import whisper
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(np.array(audio)), n_mels=model.dims.n_mels).to(model.device)
+        _, probabilities = model.detect_language(mel)
+        language = max(probabilities, key=probabilities.get)
+        return language, float(probabilities[language])
+
+    def transcribe(self, model, audio: np.ndarray, language: Optional[str] = None) -> dict:
+        result = model.transcribe(audio, fp16=model.device.type == "cuda", language=language)
+        segments = [
+            {"start": float(seg.get("start", 0.0)), "end": float(seg.get("end", 0.0)), "text": (seg.get("text") or "").strip()}
+            for seg in result.get("segments") or []
+        ]
+        return {
+            "text": (result.get("text") or "").strip(),
+            "language": result.get("language", "unknown"),
+            "segments": segments,
+        }
+
+
+class FasterWhisperEngine(ASREngine):
+    """
+    faster-whisper (CTranslate2) with int8 weights on CPU. Decodes like openai-whisper's transcribe():
+    greedy with temperature fallback, conditioned on the previous text.
+    """
+    name = "faster-whisper"
+    required_modules = ("faster_whisper",)
+
+    def __init__(self):
+        self._device = None
+
+    def device(self) -> str:
+        if self._device is None:
+            import ctranslate2
+            self._device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+            logger.info(f"faster-whisper will run on {self._device.upper()}.")
+        return self._device
+
+    def load_model(self, model_name: str, device: Optional[str] = None, threads: int = 0):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(f"faster-whisper library not installed. Please install it: pip install faster-whisper ({e})")
+        device = device or self.device()
+        compute_type = settings.ASR_COMPUTE_TYPE or ("float16" if device == "cuda" else "int8")
+        logger.info(f"Loading faster-whisper model '{model_name}' ({compute_type} on {device}).")
+        return WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=threads)
+
+    def detect_language(self, model, audio: np.ndarray) -> Tuple[str, float]:
+        # Detection runs when transcribe() is called; the segments generator is never consumed
+        _, info = model.transcribe(np.asarray(audio, dtype=np.float32), language=None, beam_size=1)
+        return info.language, float(info.language_probability)
+
+    def transcribe(self, model, audio: np.ndarray, language: Optional[str] = None) -> dict:
+        segments_iter, info = model.transcribe(np.asarray(audio, dtype=np.float32), language=language, beam_size=1)
+        segments = [
+            {"start": float(seg.start), "end": float(seg.end), "text": (seg.text or "").strip()}
+            for seg in segments_iter
+        ]
+        return {
+            "text": " ".join(segment["text"] for segment in segments if segment["text"]),
+            "language": info.language or "unknown",
+            "segments": segments,
+        }
+
+
+# --- Engine Selection ---
+_ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+_engines = {} # Name -> instance (one per process)
+_engines_lock = threading.Lock()
+
+def get_asr_engine(name: Optional[str] = None) -> ASREngine:
+    """
+    Return the process-wide engine `name` (default: settings.ASR_ENGINE).
+    """
+    name = name or settings.ASR_ENGINE
+    with _engines_lock:
+        if name not in _engines:
+            engine_cls = _ENGINES.get(name)
+            if engine_cls is None:
+                raise ValueError(f"Unknown ASR_ENGINE '{name}'. Available: {', '.join(_ENGINES)}")
+            _engines[name] = engine_cls()
+        return _engines[name]
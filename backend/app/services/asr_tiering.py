@@ -0,0 +1,180 @@
+import datetime
+import logging
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from ..config import settings
+from ..database import write_transaction
+
+logger = logging.getLogger(__name__)
+
+# --- Adaptive ASR Model Tiering ---
+# With ASR_ADAPTIVE_TIERING on, each transcription picks the largest model of ASR_MODEL_TIERS (up to
+# the model routed for the recording's language) whose predicted turnaround fits the SLO:
+#   predicted = (own audio + queued audio / running jobs) * real-time factor of the model
+#   budget    = ASR_TURNAROUND_SLO_SECONDS - time since upload
+# The backlog is assumed to be transcribed with the same model, so the estimate errs towards smaller
+# models while the queue is long. Real-time factors start from ASR_MODEL_RTF and follow the measured
+# speed of each model in this process. A meeting transcribed below its target model gets a quality
+# upgrade job (from the ASR stage, model pinned) queued at low priority once it completes; workers
+# only claim it when no regular job is waiting, and at most ASR_UPGRADE_MAX_RUNNING at a time.
+
+UPGRADE_PRIORITY = -1
+RTF_SMOOTHING = 0.3 # Weight of the newest measurement in the running real-time factor
+UNKNOWN_DURATION_SECONDS = 1800.0 # Assumed length of queued recordings whose duration isn't known
+
+_stats = Counter()
+_observed_rtf = {} # Model size -> measured real-time factor (exponential moving average)
+_last_decision: Optional[dict] = None
+_stats_lock = threading.Lock()
+
+
+@dataclass
+class TierDecision:
+    """
+    The model chosen for one transcription and the figures it was based on.
+    """
+    model: str
+    target_model: str
+    reason: str
+    audio_seconds: float = 0.0
+    backlog_seconds: float = 0.0
+    running_jobs: int = 0
+    budget_seconds: Optional[float] = None
+    predicted_seconds: Optional[float] = None
+
+
+def _split(model_name: str):
+    # 'small.en' -> ('small', '.en'); sizes index ASR_MODEL_TIERS and ASR_MODEL_RTF
+    size, dot, variant = model_name.partition(".")
+    return size, dot + variant
+
+def _rank(size: str) -> int:
+    return settings.ASR_MODEL_TIERS.index(size) if size in settings.ASR_MODEL_TIERS else len(settings.ASR_MODEL_TIERS)
+
+def candidate_models(target_model: str) -> List[str]:
+    """
+    Models the policy may use for a recording routed to `target_model`, smallest first:
+    the smaller tiers (in the target's variant, e.g. English-only) and the target itself.
+    """
+    size, variant = _split(target_model)
+    smaller = [tier + variant for tier in settings.ASR_MODEL_TIERS[:_rank(size)]]
+    return smaller + [target_model]
+
+def real_time_factor(model_name: str) -> float:
+    """
+    Seconds of processing per second of audio: measured in this process, else the configured estimate.
+    """
+    size, _ = _split(model_name)
+    with _stats_lock:
+        if size in _observed_rtf:
+            return _observed_rtf[size]
+    return settings.ASR_MODEL_RTF.get(size, max(settings.ASR_MODEL_RTF.values(), default=1.0))
+
+def _record_decision(decision: TierDecision):
+    global _last_decision
+    with _stats_lock:
+        _stats[f"decisions.{decision.model}"] += 1
+        _stats[f"reasons.{decision.reason}"] += 1
+        if decision.model != decision.target_model:
+            _stats["downgrades"] += 1
+        _last_decision = asdict(decision)
+
+
+# --- Policy ---
+def choose_model(db: Session, meeting_id: int, target_model: str, audio_seconds: float) -> TierDecision:
+    """
+    Pick the ASR model for a meeting's transcription (see the policy above).
+    """
+    if not settings.ASR_ADAPTIVE_TIERING:
+        return TierDecision(model=target_model, target_model=target_model, reason="disabled", audio_seconds=audio_seconds)
+
+    queued_seconds, unknown_jobs, running_jobs = crud.get_asr_backlog(db, exclude_meeting_id=meeting_id)
+    backlog_seconds = queued_seconds + unknown_jobs * UNKNOWN_DURATION_SECONDS
+    db_meeting = crud.get_meeting(db, meeting_id)
+    waited = (datetime.datetime.utcnow() - db_meeting.upload_time).total_seconds() if db_meeting and db_meeting.upload_time else 0.0
+    budget = settings.ASR_TURNAROUND_SLO_SECONDS - waited
+    workload = audio_seconds + backlog_seconds / max(running_jobs, 1) # This job counts among the running ones
+
+    candidates = candidate_models(target_model)
+    decision = None
+    for model_name in reversed(candidates):
+        predicted = workload * real_time_factor(model_name)
+        if predicted <= budget:
+            reason = "within_slo" if model_name == target_model else "backlog"
+            decision = TierDecision(model_name, target_model, reason, audio_seconds, backlog_seconds, running_jobs, budget, predicted)
+            break
+    if decision is None:
+        # Nothing fits: the smallest model misses the SLO by the least
+        decision = TierDecision(candidates[0], target_model, "slo_miss", audio_seconds, backlog_seconds, running_jobs,
+                                budget, workload * real_time_factor(candidates[0]))
+
+    _record_decision(decision)
+    logger.info(f"ASR tier for meeting {meeting_id}: '{decision.model}' (target '{target_model}', {decision.reason}; "
+                f"{audio_seconds:.0f}s audio, {backlog_seconds:.0f}s queued over {running_jobs} running jobs, "
+                f"predicted {decision.predicted_seconds:.0f}s of {budget:.0f}s budget)")
+    return decision
+
+def pinned(model_name: str, audio_seconds: float) -> TierDecision:
+    """
+    Decision for a job that names its model (a quality upgrade).
+    """
+    decision = TierDecision(model=model_name, target_model=model_name, reason="upgrade", audio_seconds=audio_seconds)
+    _record_decision(decision)
+    return decision
+
+def record_run(model_name: str, audio_seconds: float, elapsed_seconds: float):
+    """
+    Fold a finished transcription's speed into the model's real-time factor.
+    """
+    if audio_seconds <= 0:
+        return
+    size, _ = _split(model_name)
+    measured = elapsed_seconds / audio_seconds
+    with _stats_lock:
+        previous = _observed_rtf.get(size)
+        _observed_rtf[size] = measured if previous is None else (1 - RTF_SMOOTHING) * previous + RTF_SMOOTHING * measured
+
+
+# --- Quality Upgrades ---
+def schedule_upgrade(db: Session, meeting_id: int, target_model: str) -> Optional[models.ProcessingJob]:
+    """
+    Queue a low-priority job that re-transcribes a completed meeting with its target model
+    (and redoes its notes from the new transcript), if it was transcribed with a smaller one.
+    The meeting keeps its current results until the upgrade has fully succeeded.
+    """
+    if not (settings.ASR_ADAPTIVE_TIERING and settings.ASR_UPGRADE_ENABLED):
+        return None
+    # Checked and queued in one write transaction, so a reprocess request can't queue a job in between
+    with write_transaction(db):
+        db_meeting = crud.get_meeting(db, meeting_id)
+        if db_meeting is None or db_meeting.status != models.MeetingStatus.COMPLETED:
+            return None
+        current_model = db_meeting.asr_model
+        if not current_model or current_model == target_model or crud.has_active_job(db, meeting_id):
+            return None
+        db_job = crud.enqueue_processing_job(db, meeting_id, max_attempts=settings.JOB_MAX_ATTEMPTS,
+                                             from_stage=models.PipelineStage.ASR, priority=UPGRADE_PRIORITY,
+                                             asr_model=target_model)
+    with _stats_lock:
+        _stats["upgrades_queued"] += 1
+    logger.info(f"Quality upgrade job {db_job.id} queued for meeting {meeting_id}: '{current_model}' -> '{target_model}'")
+    return db_job
+
+
+def stats() -> dict:
+    """
+    In-process tiering counters: decisions per model and reason, downgrades, upgrades queued,
+    current real-time factors and the last decision.
+    """
+    with _stats_lock:
+        counters = dict(_stats)
+        counters["observed_rtf"] = {size: round(rtf, 4) for size, rtf in _observed_rtf.items()}
+        counters["last_decision"] = _last_decision
+    counters["enabled"] = settings.ASR_ADAPTIVE_TIERING
+    return counters
@@ -0,0 +1,130 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000 # Whisper's native sample rate
+
+@dataclass
+class AudioChunk:
+    """
+    A slice of a recording to transcribe independently.
+    The chunk audio spans [start, end) seconds and includes the overlap with its neighbours;
+    only segments inside [keep_start, keep_end) are kept when stitching.
+    """
+    index: int
+    start: float
+    end: float
+    keep_start: float
+    keep_end: float
+
+# --- Energy-based Voice Activity Detection ---
+ENERGY_BLOCK_SECONDS = 60 # Frames measured per pass, bounding the float32 working copy for long recordings
+
+def frame_energies_db(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30) -> np.ndarray:
+    """
+    Return the RMS energy (dBFS) of consecutive non-overlapping frames.
+    Measured about a minute of frames at a time, so only one block is ever copied and squared.
+    """
+    frame_len = max(int(sample_rate * frame_ms / 1000), 1)
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    block_frames = max(int(ENERGY_BLOCK_SECONDS * sample_rate) // frame_len, 1)
+    energies = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, block_frames):
+        last = min(first + block_frames, n_frames)
+        frames = audio[first * frame_len:last * frame_len].reshape(last - first, frame_len).astype(np.float32, copy=False)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        energies[first:last] = 20.0 * np.log10(np.maximum(rms, 1e-10))
+    return energies
+
+def find_silence_points(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30,
+                        min_silence_ms: int = 300, threshold_db: float = 12.0) -> List[float]:
+    """
+    Find the midpoints (in seconds) of silent stretches.
+    A frame counts as silent when it is `threshold_db` below the recording's median frame energy,
+    which adapts to the recording level without a fixed absolute threshold.
+    """
+    energies = frame_energies_db(audio, sample_rate, frame_ms)
+    if len(energies) == 0:
+        return []
+    silent = energies < (np.median(energies) - threshold_db)
+
+    min_frames = max(int(min_silence_ms / frame_ms), 1)
+    frame_seconds = frame_ms / 1000.0
+    points = []
+    run_start = None
+    for i, is_silent in enumerate(np.append(silent, False)): # Sentinel closes a trailing run
+        if is_silent and run_start is None:
+            run_start = i
+        elif not is_silent and run_start is not None:
+            if i - run_start >= min_frames:
+                points.append((run_start + i) / 2.0 * frame_seconds)
+            run_start = None
+    return points
+
+# --- Chunk Planning ---
+def plan_chunks(duration: float, silence_points: Sequence[float], chunk_seconds: float,
+                overlap_seconds: float, search_seconds: float) -> List[AudioChunk]:
+    """
+    Split a recording of `duration` seconds into chunks of about `chunk_seconds`.
+    Each cut is placed at the silence point closest to the target position (within
+    `search_seconds`), falling back to a hard cut if there is no silence nearby.
+    Chunks are extended by `overlap_seconds` on both sides so no word is lost at a cut.
+    """
+    if duration <= chunk_seconds:
+        return [AudioChunk(index=0, start=0.0, end=duration, keep_start=0.0, keep_end=duration)]
+
+    silences = np.asarray(sorted(silence_points), dtype=np.float64)
+    cuts = [0.0]
+    while duration - cuts[-1] > chunk_seconds:
+        target = cuts[-1] + chunk_seconds
+        cut = target
+        if len(silences):
+            nearby = silences[(silences > cuts[-1] + chunk_seconds / 2) & (np.abs(silences - target) <= search_seconds)]
+            if len(nearby):
+                cut = float(nearby[np.argmin(np.abs(nearby - target))])
+        cuts.append(cut)
+    cuts.append(duration)
+
+    chunks = []
+    for i in range(len(cuts) - 1):
+        keep_start, keep_end = cuts[i], cuts[i + 1]
+        chunks.append(AudioChunk(
+            index=i,
+            start=max(keep_start - overlap_seconds, 0.0),
+            end=min(keep_end + overlap_seconds, duration),
+            keep_start=keep_start,
+            keep_end=keep_end,
+        ))
+    return chunks
+
+# --- Stitching ---
+def stitch_segments(chunks: Sequence[AudioChunk], chunk_segments: Sequence[Sequence[dict]]) -> List[dict]:
+    """
+    Merge per-chunk Whisper segments (timestamps relative to the chunk start) into one
+    timeline with global timestamps. A segment belongs to the chunk whose kept region
+    contains its midpoint, so speech in an overlap is emitted exactly once.
+    """
+    stitched = []
+    for chunk, segments in zip(chunks, chunk_segments):
+        for segment in segments:
+            start = float(segment.get("start", 0.0)) + chunk.start
+            end = float(segment.get("end", 0.0)) + chunk.start
+            midpoint = (start + end) / 2.0
+            is_last = chunk.index == len(chunks) - 1
+            if midpoint < chunk.keep_start or (midpoint >= chunk.keep_end and not is_last):
+                continue
+            text = (segment.get("text") or "").strip()
+            if not text:
+                continue
+            # Whisper can emit the same words on both sides of a cut with slightly shifted timing
+            if stitched and stitched[-1]["text"] == text and start - stitched[-1]["end"] < 1.0:
+                stitched[-1]["end"] = max(stitched[-1]["end"], end)
+                continue
+            stitched.append({"start": start, "end": end, "text": text})
+    return stitched
@@ -0,0 +1,158 @@
+import datetime
+import io
+import json
+import logging
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Dict, Iterator, List
+
+from .. import crud, schemas
+from ..config import settings
+from ..database import SessionLocal
+from . import pdf_cache
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+# --- Streaming ZIP Export ---
+# The archive is written to an unseekable in-memory sink that is drained after every write, so
+# the response streams while it is being built. zipfile then uses data descriptors instead of
+# seeking back to patch headers. Memory is bounded by the copy chunk size and the PDF renders in
+# flight (BULK_EXPORT_MAX_IN_FLIGHT), not by the number of meetings: rendered PDFs go to the
+# on-disk PDF cache and are copied into the archive from there.
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    Write-only, unseekable buffer; `drain()` hands out what was written since the last call.
+    """
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def render_markdown(meeting: schemas.Meeting) -> str:
+    """
+    Markdown version of a meeting report (same language selection as the PDF).
+    """
+    use_zh = meeting.detected_language == "zh"
+    summary = meeting.summary_zh if use_zh else meeting.summary_en
+    action_items = (meeting.action_items_zh if use_zh else meeting.action_items_en) or []
+    upload_time = meeting.upload_time.strftime("%Y-%m-%d %H:%M:%S UTC") if meeting.upload_time else "N/A"
+
+    lines = [
+        f"# {meeting.filename or f'Meeting {meeting.id}'}",
+        "",
+        f"- Uploaded: {upload_time}",
+        f"- Status: {meeting.status.value}",
+        f"- Language: {meeting.detected_language or 'N/A'}",
+        "",
+        "## Summary",
+        "",
+        summary or "No summary generated.",
+        "",
+        "## Action Items",
+        "",
+    ]
+    lines += [f"- {item}" for item in action_items] or ["No action items."]
+    if meeting.transcript:
+        lines += ["", "## Transcript", "", meeting.transcript]
+    return "\n".join(lines) + "\n"
+
+
+def _copy_file_into(archive: zipfile.ZipFile, sink: _ZipSink, path: str, arcname: str) -> Iterator[bytes]:
+    """
+    Copy a file into the archive chunk by chunk, yielding the compressed output as it is produced.
+    """
+    with open(path, "rb") as src, archive.open(arcname, "w") as dest:
+        while True:
+            chunk = src.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            dest.write(chunk)
+            data = sink.drain()
+            if data:
+                yield data
+
+
+def stream_export(meeting_ids: List[int], formats: List[str]) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive with the requested files for each meeting, plus a manifest.json listing
+    what was exported and what failed. PDFs are rendered in the PDF process pool and added to the
+    archive in completion order. Meant to be iterated in a worker thread (it blocks on renders).
+    """
+    sink = _ZipSink()
+    manifest = {"exported_at": datetime.datetime.utcnow().isoformat(), "formats": formats, "meetings": [], "failed": []}
+    pending: Dict[Future, int] = {}
+    db = SessionLocal()
+
+    def pdf_name(meeting_id: int) -> str:
+        return f"meeting_{meeting_id}/meeting_{meeting_id}_notes.pdf"
+
+    def add_rendered(done) -> Iterator[bytes]:
+        for future in done:
+            meeting_id = pending.pop(future)
+            try:
+                yield from _copy_file_into(archive, sink, future.result(), pdf_name(meeting_id))
+            except Exception as e:
+                logger.error(f"Bulk export: PDF for meeting {meeting_id} failed: {e}")
+                manifest["failed"].append({"meeting_id": meeting_id, "file": "pdf", "error": str(e)})
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for meeting_id in meeting_ids:
+                db_meeting = crud.get_meeting(db, meeting_id)
+                if db_meeting is None:
+                    manifest["failed"].append({"meeting_id": meeting_id, "file": None, "error": "Meeting not found"})
+                    continue
+                meeting = schemas.Meeting.model_validate(db_meeting)
+                manifest["meetings"].append({"meeting_id": meeting.id, "filename": meeting.filename, "status": meeting.status.value})
+
+                if "json" in formats:
+                    archive.writestr(f"meeting_{meeting.id}/meeting_{meeting.id}.json", meeting.model_dump_json(indent=2))
+                if "markdown" in formats:
+                    archive.writestr(f"meeting_{meeting.id}/meeting_{meeting.id}.md", render_markdown(meeting))
+                if "pdf" in formats:
+                    context, version = pdf_cache.prepare(db_meeting)
+                    cached_path = pdf_cache.get_cached(meeting.id, version)
+                    if cached_path:
+                        try:
+                            yield from _copy_file_into(archive, sink, cached_path, pdf_name(meeting.id))
+                        except OSError:
+                            # Replaced by a newer render meanwhile; render this version again
+                            cached_path = None
+                    if not cached_path:
+                        pending[pdf_cache.submit_render(context, version)] = meeting.id
+                        # Bound the renders (and their contexts) held at once
+                        while len(pending) >= max(settings.BULK_EXPORT_MAX_IN_FLIGHT, 1):
+                            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                            yield from add_rendered(done)
+
+                db.expunge_all() # Don't keep every loaded meeting in the session's identity map
+                data = sink.drain()
+                if data:
+                    yield data
+
+            while pending:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                yield from add_rendered(done)
+
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2, ensure_ascii=False))
+        # Closing the archive writes the central directory
+        yield sink.drain()
+        logger.info(f"Bulk export finished: {len(manifest['meetings'])} meetings, {len(manifest['failed'])} failures.")
+    finally:
+        db.close()
@@ -0,0 +1,161 @@
+import glob
+import logging
+import os
+import subprocess
+import tempfile
+import wave
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from ..config import settings
+from .audio_chunking import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# --- Decoded Audio Cache ---
+# Each recording is decoded once (by the pipeline's decode stage) to 16 kHz mono PCM, stored as
+# raw samples next to the source: blobs/<sha256>.16k_s16.pcm (int16) or .16k_f32.pcm (float32).
+# Raw files have no header, so ffmpeg's output is streamed straight to disk and consumers open
+# them with np.memmap: language detection, chunked ASR (each pool process maps the file itself
+# and reads only its slice), retries and reprocessing all skip the ffmpeg decode.
+# int16 yields exactly the samples whisper.load_audio produces at half the size of float32;
+# float32 makes slices zero-copy for Whisper at twice the disk space.
+# Source blobs are content-addressed, so meetings sharing audio share its decoded copy too.
+
+DTYPES = {
+    "int16": (np.int16, "s16", "pcm_s16le"),
+    "float32": (np.float32, "f32", "pcm_f32le"),
+}
+READ_BLOCK_SAMPLES = SAMPLE_RATE * 60 # Audio is converted and measured a minute at a time
+
+
+@dataclass
+class AudioStats:
+    """
+    Duration and loudness of a decoded recording (dBFS: 0 = full scale).
+    RMS level is a plain average over the whole file, not a perceptual (LUFS) loudness.
+    """
+    duration: float
+    rms_dbfs: Optional[float]
+    peak_dbfs: Optional[float]
+
+
+def _dtype_settings():
+    if settings.DECODED_AUDIO_DTYPE not in DTYPES:
+        raise ValueError(f"DECODED_AUDIO_DTYPE must be one of {', '.join(DTYPES)}")
+    return DTYPES[settings.DECODED_AUDIO_DTYPE]
+
+def decoded_path(audio_path: str) -> str:
+    """
+    Path of the decoded PCM for a source file (in the configured sample format).
+    """
+    _, suffix, _ = _dtype_settings()
+    return f"{os.path.splitext(audio_path)[0]}.16k_{suffix}.pcm"
+
+def _decode_with_ffmpeg(audio_path: str, out, codec: str, fmt: str):
+    # Same conversion as whisper.load_audio, written to a file instead of held in memory
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0", "-i", audio_path,
+           "-f", fmt, "-ac", "1", "-acodec", codec, "-ar", str(SAMPLE_RATE), "-"]
+    result = subprocess.run(cmd, stdout=out, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode {audio_path}: {result.stderr.decode(errors='replace')[-500:]}")
+
+def _decode_wav(audio_path: str, out, dtype):
+    """
+    Fallback without ffmpeg: 16-bit WAV already at 16 kHz (channels are averaged). Anything else needs ffmpeg.
+    """
+    with wave.open(audio_path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getframerate() != SAMPLE_RATE:
+            raise RuntimeError(f"ffmpeg is required to decode {audio_path} (not 16-bit PCM at {SAMPLE_RATE} Hz)")
+        channels = wav.getnchannels()
+        while True:
+            frames = wav.readframes(READ_BLOCK_SAMPLES)
+            if not frames:
+                break
+            samples = np.frombuffer(frames, dtype="<i2").reshape(-1, channels)
+            mono = samples[:, 0] if channels == 1 else samples.mean(axis=1)
+            if dtype == np.float32:
+                out.write((mono.astype(np.float32) / 32768.0).astype("<f4").tobytes())
+            else:
+                out.write(np.round(mono).astype("<i2").tobytes())
+
+def ensure_decoded(audio_path: str) -> str:
+    """
+    Decode a recording to the PCM cache unless it's already there. Returns the PCM path.
+    Written to a temporary file and renamed, so readers never see a partial decode.
+    """
+    path = decoded_path(audio_path)
+    if os.path.exists(path):
+        return path
+    dtype, suffix, codec = _dtype_settings()
+    fmt = f"{suffix}le"
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".pcm.tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            try:
+                _decode_with_ffmpeg(audio_path, out, codec, fmt)
+            except FileNotFoundError:
+                out.seek(0)
+                out.truncate()
+                _decode_wav(audio_path, out, dtype)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info(f"Decoded {audio_path} to {path} ({os.path.getsize(path)} bytes)")
+    return path
+
+def load(audio_path: str) -> np.ndarray:
+    """
+    Memory-map a recording's decoded PCM (decoding it first if needed).
+    Copy-on-write: callers may modify the array without touching the file.
+    """
+    path = ensure_decoded(audio_path)
+    dtype, _, _ = _dtype_settings()
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="c")
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """
+    Samples as float32 in [-1, 1], Whisper's input format (no copy if already float32).
+    """
+    if samples.dtype == np.float32:
+        return samples
+    return samples.astype(np.float32) / 32768.0
+
+def read_slice(pcm_path: str, start: int, end: int) -> np.ndarray:
+    """
+    Float32 samples [start, end) of a decoded file, reading only that range (used by ASR pool processes).
+    """
+    dtype = np.float32 if pcm_path.endswith("_f32.pcm") else np.int16
+    return to_float32(np.memmap(pcm_path, dtype=dtype, mode="c")[start:end])
+
+def measure(samples: np.ndarray) -> AudioStats:
+    """
+    Duration, RMS level and peak level of decoded audio, read block by block.
+    """
+    scale = 1.0 if samples.dtype == np.float32 else 32768.0
+    total_squares, peak = 0.0, 0.0
+    for start in range(0, len(samples), READ_BLOCK_SAMPLES):
+        block = samples[start:start + READ_BLOCK_SAMPLES].astype(np.float64) / scale
+        total_squares += float(np.dot(block, block))
+        peak = max(peak, float(np.max(np.abs(block))))
+    to_db = lambda value: round(20.0 * float(np.log10(value)), 2) if value > 0 else None
+    rms = (total_squares / len(samples)) ** 0.5 if len(samples) else 0.0
+    return AudioStats(duration=len(samples) / SAMPLE_RATE, rms_dbfs=to_db(rms), peak_dbfs=to_db(peak))
+
+def remove(audio_path: str):
+    """
+    Delete every decoded copy of a recording (any sample format).
+    """
+    for path in glob.glob(f"{glob.escape(os.path.splitext(audio_path)[0])}.16k_*.pcm"):
+        try:
+            os.remove(path)
+            logger.info(f"Deleted decoded audio {path}")
+        except OSError as e:
+            logger.warning(f"Could not remove decoded audio {path}: {e}")
@@ -0,0 +1,156 @@
+import abc
+import asyncio
+import datetime
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stage names published while a meeting is processed
+STAGE_QUEUED = "queued"
+STAGE_ASR = "asr"
+STAGE_TRANSCRIPT_READY = "transcript_ready"
+STAGE_SUMMARIZING = "summarizing"
+STAGE_SUMMARY_READY = "summary_ready"
+STAGE_COMPLETED = "completed"
+STAGE_FAILED = "failed"
+
+TERMINAL_STAGES = {STAGE_COMPLETED, STAGE_FAILED}
+
+
+class Subscription:
+    """
+    A subscriber's view of one meeting's events, consumed from the event loop it was created on.
+    Use as an async context manager so it is always unregistered.
+    """
+    def __init__(self, broker: "EventBroker", meeting_id: int, max_queued: int = 100):
+        self.broker = broker
+        self.meeting_id = meeting_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+
+    def _deliver(self, event: dict):
+        # Runs on the subscriber's loop. Progress events are lossy: drop the oldest if the client is slow.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> dict:
+        """
+        Wait for the next event. Raises asyncio.TimeoutError if none arrives within `timeout`.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    async def __aenter__(self):
+        self.broker._register(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.broker._unregister(self)
+        return False
+
+
+class EventBroker(abc.ABC):
+    """
+    Pub/sub interface for meeting progress events.
+    `publish` may be called from any thread (workers run in threads); subscribers are async.
+    A cross-process implementation (e.g. Redis or Postgres LISTEN/NOTIFY) only needs to
+    deliver published events to `_register`ed subscriptions in every API process.
+    """
+    @abc.abstractmethod
+    def publish(self, meeting_id: int, event: dict):
+        ...
+
+    def subscribe(self, meeting_id: int) -> Subscription:
+        return Subscription(self, meeting_id)
+
+    @abc.abstractmethod
+    def _register(self, subscription: Subscription):
+        ...
+
+    @abc.abstractmethod
+    def _unregister(self, subscription: Subscription):
+        ...
+
+
+class InMemoryEventBroker(EventBroker):
+    """
+    Delivers events to subscribers in the same process (API with embedded workers).
+    """
+    def __init__(self):
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, meeting_id: int, event: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(meeting_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, event)
+            except RuntimeError:
+                # The subscriber's loop has been closed; it will never unregister itself
+                self._unregister(subscription)
+
+    def _register(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions[subscription.meeting_id].add(subscription)
+
+    def _unregister(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.meeting_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.meeting_id]
+
+
+# --- Broker Selection ---
+_BROKERS = {
+    "memory": InMemoryEventBroker,
+}
+_broker: Optional[EventBroker] = None
+_broker_lock = threading.Lock()
+
+def get_event_broker() -> EventBroker:
+    """
+    Return the process-wide broker selected by settings.EVENT_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_cls = _BROKERS.get(settings.EVENT_BROKER)
+                if broker_cls is None:
+                    raise ValueError(f"Unknown EVENT_BROKER '{settings.EVENT_BROKER}'. Available: {', '.join(_BROKERS)}")
+                _broker = broker_cls()
+    return _broker
+
+def set_event_broker(broker: EventBroker):
+    """
+    Replace the process-wide broker (e.g. with a cross-process implementation).
+    """
+    global _broker
+    with _broker_lock:
+        _broker = broker
+
+def publish_progress(meeting_id: int, stage: str, status: Optional[str] = None,
+                     progress: Optional[float] = None, message: Optional[str] = None):
+    """
+    Publish a progress event for a meeting. Never raises: progress reporting must not break processing.
+    """
+    event = {
+        "meeting_id": meeting_id,
+        "stage": stage,
+        "status": status,
+        "progress": progress,
+        "message": message,
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+    }
+    try:
+        get_event_broker().publish(meeting_id, event)
+    except Exception as e:
+        logger.error(f"Failed to publish progress event for meeting {meeting_id}: {e}", exc_info=True)
@@ -0,0 +1,254 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import audio_chunking, decoded_audio
+
+logger = logging.getLogger(__name__)
+
+# --- Cross-Meeting Batched Inference ---
+# Worker threads transcribing at the same time used to run their own whisper transcribe() calls on
+# the shared model: the calls competed for the same cores and each ran batch-size-one forward passes.
+# With ASR_BATCHED_INFERENCE on, a recording is instead cut (at silences) into windows that fit
+# Whisper's 30 s input, and the windows are queued here. One scheduler thread per process owns the
+# models and decodes windows of the same model and language together: encoder and decoder run once
+# per batch of up to ASR_BATCH_SIZE windows. A batch is started once full, or ASR_BATCH_MAX_WAIT_MS
+# after its oldest window was queued; windows are taken from the queued recordings in turn, so a long
+# recording doesn't hold back a short one queued after it. Results are returned through futures.
+#
+# Decoding follows whisper.transcribe's settings per window: greedy at temperature 0, falling back to
+# higher temperatures (again batched) when the output looks repetitive or unlikely, and dropping
+# windows judged silent. Unlike transcribe(), windows don't condition on the previous window's text.
+
+WINDOW_SECONDS = 30.0 # Whisper's input length
+CUT_SECONDS = 25.0 # Target window length before overlap; cuts move up to CUT_SEARCH_SECONDS to land on silence
+CUT_SEARCH_SECONDS = 3.0
+OVERLAP_SECONDS = 1.0 # CUT_SECONDS + CUT_SEARCH_SECONDS + 2 * OVERLAP_SECONDS must not exceed WINDOW_SECONDS
+
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0) # Same fallback schedule and thresholds as whisper.transcribe
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+TIME_PRECISION = 0.02 # Seconds per timestamp token
+
+
+def plan_windows(audio: np.ndarray) -> List[audio_chunking.AudioChunk]:
+    """
+    Split decoded audio at silences into overlapping windows no longer than Whisper's 30 s input.
+    """
+    sample_rate = audio_chunking.SAMPLE_RATE
+    return audio_chunking.plan_chunks(
+        len(audio) / sample_rate, audio_chunking.find_silence_points(audio, sample_rate),
+        chunk_seconds=CUT_SECONDS, overlap_seconds=OVERLAP_SECONDS, search_seconds=CUT_SEARCH_SECONDS,
+    )
+
+
+@dataclass
+class _Window:
+    audio: np.ndarray # Samples of the window (a view of the memory-mapped PCM; converted when batched)
+    future: Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Stream:
+    """
+    The queued windows of one transcription, all decoded with the same model and language.
+    """
+    key: Tuple[str, Optional[str]] # (model name, language or None to detect per window)
+    windows: Deque[_Window] = field(default_factory=deque)
+
+
+class InferenceScheduler:
+    """
+    Batches Whisper windows across concurrent transcriptions on one scheduler thread.
+    `get_model(name)` returns a loaded model (e.g. from the process's model cache).
+    """
+    def __init__(self, get_model: Callable[[str], object], batch_size: int, max_wait_seconds: float):
+        self.get_model = get_model
+        self.batch_size = max(batch_size, 1)
+        self.max_wait_seconds = max(max_wait_seconds, 0.0)
+        self._streams: "OrderedDict[int, _Stream]" = OrderedDict() # Served round-robin
+        self._next_stream_id = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = Counter()
+
+    def submit(self, model_name: str, language: Optional[str], windows: List[np.ndarray]) -> List[Future]:
+        """
+        Queue the windows of one recording. Each future resolves to {'language', 'segments'}
+        (segment times relative to the window start) or raises the batch's error.
+        """
+        futures = [Future() for _ in windows]
+        if not windows:
+            return futures
+        with self._condition:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="asr-batch-scheduler", daemon=True)
+                self._thread.start()
+            stream = _Stream(key=(model_name, language))
+            stream.windows.extend(_Window(audio, future) for audio, future in zip(windows, futures))
+            self._streams[self._next_stream_id] = stream
+            self._next_stream_id += 1
+            self._condition.notify()
+        return futures
+
+    def stop(self):
+        """
+        Stop the scheduler thread after the current batch; windows still queued fail.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+            pending = [window for stream in self._streams.values() for window in stream.windows]
+            self._streams.clear()
+        for window in pending:
+            window.future.set_exception(RuntimeError("ASR inference scheduler stopped"))
+
+    def stats(self) -> dict:
+        """
+        Batches and windows decoded so far, the mean batch size and the windows waiting.
+        """
+        with self._condition:
+            counters = dict(self._stats)
+            counters["queued_windows"] = sum(len(stream.windows) for stream in self._streams.values())
+            counters["queued_recordings"] = len(self._streams)
+        counters["mean_batch_size"] = round(counters.get("windows", 0) / counters["batches"], 2) if counters.get("batches") else 0.0
+        return counters
+
+    # --- Scheduler Thread ---
+    def _waiting(self, key) -> int:
+        return sum(len(stream.windows) for stream in self._streams.values() if stream.key == key)
+
+    def _next_batch(self) -> Optional[Tuple[Tuple[str, Optional[str]], List[_Window]]]:
+        with self._condition:
+            while not self._streams and not self._stopping:
+                self._condition.wait()
+            if self._stopping:
+                return None
+            # The batch is for the model and language of the oldest queued window
+            oldest = min(self._streams.values(), key=lambda stream: stream.windows[0].queued_at)
+            key = oldest.key
+            deadline = oldest.windows[0].queued_at + self.max_wait_seconds
+            while self._waiting(key) < self.batch_size and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if self._stopping:
+                return None
+
+            # One window from each recording in turn, then move the served recordings to the back
+            batch, served = [], []
+            while len(batch) < self.batch_size:
+                taken = False
+                for stream_id, stream in self._streams.items():
+                    if stream.key != key or not stream.windows or len(batch) >= self.batch_size:
+                        continue
+                    batch.append(stream.windows.popleft())
+                    served.append(stream_id)
+                    taken = True
+                if not taken:
+                    break
+            for stream_id in dict.fromkeys(served):
+                stream = self._streams.pop(stream_id)
+                if stream.windows:
+                    self._streams[stream_id] = stream
+            return key, batch
+
+    def _run(self):
+        while True:
+            next_batch = self._next_batch()
+            if next_batch is None:
+                return
+            (model_name, language), batch = next_batch
+            started = time.perf_counter()
+            try:
+                results = decode_windows(self.get_model(model_name), [window.audio for window in batch], language)
+            except Exception as e:
+                logger.error(f"Batched ASR of {len(batch)} windows with '{model_name}' failed: {e}", exc_info=True)
+                for window in batch:
+                    window.future.set_exception(e)
+                continue
+            with self._condition:
+                self._stats["batches"] += 1
+                self._stats["windows"] += len(batch)
+                self._stats["decode_seconds"] = round(self._stats["decode_seconds"] + time.perf_counter() - started, 3)
+            for window, result in zip(batch, results):
+                window.future.set_result(result)
+
+
+# --- Batched Whisper Decoding ---
+def _segments_from_tokens(tokens: List[int], tokenizer, window_seconds: float) -> List[dict]:
+    """
+    Split decoded tokens at timestamp pairs (<|t0|> text <|t1|><|t1|> text <|t2|>) into segments.
+    """
+    segments = []
+    start, last_timestamp, text_tokens = None, 0.0, []
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+        timestamp = last_timestamp = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+        if start is not None and text_tokens:
+            segments.append((start, timestamp, text_tokens))
+            start, text_tokens = None, []
+        else:
+            start = timestamp
+    if text_tokens: # No closing timestamp: the segment runs to the end of the window
+        segments.append((start if start is not None else last_timestamp, window_seconds, text_tokens))
+    return [
+        {"start": seg_start, "end": min(seg_end, window_seconds), "text": tokenizer.decode(seg_tokens).strip()}
+        for seg_start, seg_end, seg_tokens in segments
+    ]
+
+def decode_windows(model, windows: List[np.ndarray], language: Optional[str] = None) -> List[dict]:
+    """
+    Transcribe up to 30 s windows in one batched encoder/decoder pass (plus fallback passes).
+    Returns per window {'language', 'segments'} with times relative to the window start.
+    """
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(np.array(decoded_audio.to_float32(window)))),
+                                    n_mels=model.dims.n_mels)
+        for window in windows
+    ]).to(model.device)
+    fp16 = model.device.type == "cuda"
+
+    decoded: Dict[int, object] = {}
+    remaining = list(range(len(windows)))
+    for temperature in TEMPERATURES:
+        options = whisper.DecodingOptions(task="transcribe", language=language, temperature=temperature, fp16=fp16)
+        retry = []
+        for index, result in zip(remaining, whisper.decode(model, mel[remaining], options)):
+            decoded[index] = result
+            silent = result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+            if not silent and (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD):
+                retry.append(index)
+        remaining = retry
+        if not remaining:
+            break
+
+    outputs = []
+    for index, window in enumerate(windows):
+        result = decoded[index]
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            outputs.append({"language": result.language, "segments": []})
+            continue
+        tokenizer = get_tokenizer(model.is_multilingual, num_languages=model.num_languages,
+                                  language=result.language, task="transcribe")
+        window_seconds = len(window) / audio_chunking.SAMPLE_RATE
+        outputs.append({"language": result.language,
+                        "segments": _segments_from_tokens(result.tokens, tokenizer, window_seconds)})
+    return outputs
@@ -0,0 +1,267 @@
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import serialized_write
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Persistent LLM Result Cache ---
+# Responses are stored in the `llm_cache_entries` table, keyed on a hash of the call's inputs
+# and a fingerprint of the model + prompt template. Entries written under an older fingerprint
+# are purged the first time a namespace is used with a new one.
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+_purged_fingerprints = set() # (namespace, fingerprint) pairs already checked for stale entries
+
+
+def _count(name: str, namespace: str, amount: int = 1):
+    with _stats_lock:
+        _stats[name] += amount
+        _stats[f"{namespace}.{name}"] += amount
+
+
+def stats() -> dict:
+    """
+    In-process hit/miss/eviction counters (overall and per namespace), with the hit rate.
+    """
+    with _stats_lock:
+        counters = dict(_stats)
+    lookups = counters.get("hits", 0) + counters.get("misses", 0)
+    counters["hit_rate"] = counters.get("hits", 0) / lookups if lookups else 0.0
+    return counters
+
+
+def fingerprint(model: str, prompt_template: str) -> str:
+    """
+    Hash of everything besides the input that determines the LLM output.
+    """
+    return hashlib.sha256(f"{model}\0{prompt_template}".encode("utf-8")).hexdigest()
+
+
+def make_key(namespace: str, fingerprint_hex: str, payload: dict) -> str:
+    """
+    Cache key for a call: the payload is serialized canonically so equal inputs hash equally.
+    """
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{namespace}\0{fingerprint_hex}\0{serialized}".encode("utf-8")).hexdigest()
+
+
+@serialized_write
+def _purge_stale(db: Session, namespace: str, fingerprint_hex: str):
+    """
+    Delete a namespace's entries written with a different model or prompt template.
+    """
+    if (namespace, fingerprint_hex) in _purged_fingerprints:
+        return
+    deleted = db.query(models.LLMCacheEntry)\
+                .filter(models.LLMCacheEntry.namespace == namespace,
+                        models.LLMCacheEntry.fingerprint != fingerprint_hex)\
+                .delete(synchronize_session=False)
+    db.commit()
+    if deleted:
+        logger.info(f"Invalidated {deleted} '{namespace}' cache entries after a prompt or model change.")
+        with _stats_lock:
+            _stats["invalidations"] += deleted
+    _purged_fingerprints.add((namespace, fingerprint_hex))
+
+
+@serialized_write
+def _evict(db: Session):
+    """
+    Evict least-recently-used entries until the cache is within its entry and byte limits.
+    """
+    count, total_bytes = db.query(func.count(models.LLMCacheEntry.key),
+                                  func.coalesce(func.sum(models.LLMCacheEntry.size_bytes), 0)).one()
+    if count <= settings.LLM_CACHE_MAX_ENTRIES and total_bytes <= settings.LLM_CACHE_MAX_BYTES:
+        return
+
+    evicted = 0
+    while count > settings.LLM_CACHE_MAX_ENTRIES or total_bytes > settings.LLM_CACHE_MAX_BYTES:
+        oldest = db.query(models.LLMCacheEntry.key, models.LLMCacheEntry.size_bytes)\
+                   .order_by(models.LLMCacheEntry.last_accessed_at)\
+                   .limit(500)\
+                   .all()
+        if not oldest:
+            break
+        keys = []
+        for key, size_bytes in oldest:
+            if count <= settings.LLM_CACHE_MAX_ENTRIES and total_bytes <= settings.LLM_CACHE_MAX_BYTES:
+                break
+            keys.append(key)
+            count -= 1
+            total_bytes -= size_bytes
+        evicted += db.query(models.LLMCacheEntry)\
+                     .filter(models.LLMCacheEntry.key.in_(keys))\
+                     .delete(synchronize_session=False)
+        db.commit()
+    with _stats_lock:
+        _stats["evictions"] += evicted
+
+
+def get(db: Session, key: str) -> Optional[str]:
+    """
+    Return the cached response for a key (refreshing its LRU position), or None.
+    """
+    value = db.query(models.LLMCacheEntry.value).filter(models.LLMCacheEntry.key == key).scalar()
+    if value is None:
+        return None
+    _touch(db, key)
+    return value
+
+
+@serialized_write
+def _touch(db: Session, key: str):
+    """
+    Mark an entry as just used (only hits write, so lookups stay off the writer path).
+    """
+    db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.key == key)\
+      .update({models.LLMCacheEntry.last_accessed_at: datetime.datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+@serialized_write
+def put(db: Session, key: str, namespace: str, fingerprint_hex: str, value: str):
+    """
+    Store a response, then evict old entries if the cache grew past its limits.
+    """
+    now = datetime.datetime.utcnow()
+    db.merge(models.LLMCacheEntry(
+        key=key, namespace=namespace, fingerprint=fingerprint_hex, value=value,
+        size_bytes=len(value.encode("utf-8")), created_at=now, last_accessed_at=now
+    ))
+    db.commit()
+    _evict(db)
+
+
+def cached_call(db: Session, namespace: str, payload: dict, compute: Callable[[], str],
+                model: str, prompt_template: str, should_cache: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Return the cached LLM response for (namespace, model, prompt template, payload),
+    calling `compute` and storing its result on a miss. `should_cache` can reject responses
+    that are not worth keeping (e.g. ones that could not be parsed).
+    Cache errors never fail the call; they only cost a recomputation.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return compute()
+
+    fingerprint_hex = fingerprint(model, prompt_template)
+    key = make_key(namespace, fingerprint_hex, payload)
+    try:
+        _purge_stale(db, namespace, fingerprint_hex)
+        cached = get(db, key)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"LLM cache lookup failed ({namespace}): {e}", exc_info=True)
+        cached = None
+
+    if cached is not None:
+        _count("hits", namespace)
+        return cached
+
+    _count("misses", namespace)
+    value = compute()
+    if should_cache is None or should_cache(value):
+        try:
+            put(db, key, namespace, fingerprint_hex, value)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"LLM cache store failed ({namespace}): {e}", exc_info=True)
+    return value
+
+
+def cached_map(db: Session, namespace: str, payloads: List[dict], compute: Callable[[dict], str],
+               model: str, prompt_template: str, max_workers: int = 1,
+               should_cache: Optional[Callable[[str], bool]] = None) -> List[str]:
+    """
+    `cached_call` for a batch of payloads: cache lookups and stores run on the calling thread
+    (the session is not thread-safe), while the misses are computed concurrently by up to
+    `max_workers` threads. Results are returned in payload order.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            return list(executor.map(compute, payloads))
+
+    fingerprint_hex = fingerprint(model, prompt_template)
+    keys = [make_key(namespace, fingerprint_hex, payload) for payload in payloads]
+    results: List[Optional[str]] = [None] * len(payloads)
+    try:
+        _purge_stale(db, namespace, fingerprint_hex)
+        for i, key in enumerate(keys):
+            results[i] = get(db, key)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"LLM cache lookup failed ({namespace}): {e}", exc_info=True)
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    _count("hits", namespace, len(payloads) - len(missing))
+    _count("misses", namespace, len(missing))
+    if not missing:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max(min(max_workers, len(missing)), 1)) as executor:
+        computed = list(executor.map(compute, [payloads[i] for i in missing]))
+
+    for i, value in zip(missing, computed):
+        results[i] = value
+        if should_cache is None or should_cache(value):
+            try:
+                put(db, keys[i], namespace, fingerprint_hex, value)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"LLM cache store failed ({namespace}): {e}", exc_info=True)
+    return results
+
+
+def cached_batch(db: Session, namespace: str, payloads: List[dict],
+                 compute_batch: Callable[[List[dict]], List[Optional[str]]],
+                 model: str, prompt_template: str) -> List[Optional[str]]:
+    """
+    `cached_call` for payloads that are computed together: all misses are passed to one
+    `compute_batch` call, which returns a result per payload (None if it couldn't produce one;
+    those are not cached). Results are returned in payload order.
+    """
+    if not payloads:
+        return []
+    if not settings.LLM_CACHE_ENABLED:
+        return compute_batch(payloads)
+
+    fingerprint_hex = fingerprint(model, prompt_template)
+    keys = [make_key(namespace, fingerprint_hex, payload) for payload in payloads]
+    results: List[Optional[str]] = [None] * len(payloads)
+    try:
+        _purge_stale(db, namespace, fingerprint_hex)
+        for i, key in enumerate(keys):
+            results[i] = get(db, key)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"LLM cache lookup failed ({namespace}): {e}", exc_info=True)
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    _count("hits", namespace, len(payloads) - len(missing))
+    _count("misses", namespace, len(missing))
+    if not missing:
+        return results
+
+    computed = compute_batch([payloads[i] for i in missing])
+    for i, value in zip(missing, computed):
+        results[i] = value
+        if value is None:
+            continue
+        try:
+            put(db, keys[i], namespace, fingerprint_hex, value)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"LLM cache store failed ({namespace}): {e}", exc_info=True)
+    return results
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+from typing import AsyncIterator, Callable, Optional, Tuple, Union
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO; generations are logged by the summarizer instead
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# --- Async Ollama Client ---
+# All generations in a process go through one client: a shared HTTP connection pool, a semaphore
+# capping how many generations are in flight against the Ollama server, per-call timeouts and
+# retries with exponential backoff. The client lives on a dedicated event loop thread so that
+# synchronous callers (worker threads, the map-step thread pool) share the same pool and cap.
+
+# Status codes worth retrying: the server is overloaded or restarting
+_RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class OllamaError(RuntimeError):
+    """
+    A generation failed (bad response, or retries exhausted).
+    """
+
+class OllamaUnavailableError(OllamaError):
+    """
+    The Ollama server could not be reached (connection refused or timed out) after all retries.
+    """
+
+
+class OllamaClient:
+    """
+    Async client for Ollama's /api/generate. Must be used from a single event loop.
+    """
+    def __init__(self, base_url: str, model: str, max_concurrency: int, max_connections: int,
+                 connect_timeout: float, request_timeout: float, max_retries: int, retry_backoff: float):
+        self.model = model
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.request_timeout = request_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(request_timeout, connect=connect_timeout),
+        )
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "in_flight": 0, "waiting": 0}
+
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    def _payload(self, prompt: str, stream: bool, model: Optional[str], options: Optional[dict],
+                 response_format: Optional[Union[str, dict]] = None) -> dict:
+        payload = {"model": model or self.model, "prompt": prompt, "stream": stream}
+        if options:
+            payload["options"] = options
+        if response_format:
+            payload["format"] = response_format # 'json' or a JSON schema the output must follow
+        return payload
+
+    async def _with_retries(self, attempt_fn, timeout: Optional[float]):
+        """
+        Run `attempt_fn` under the concurrency cap, retrying transient failures with
+        exponential backoff (plus jitter). The cap is released while backing off, and the
+        timeout covers one attempt, not the time spent waiting for a slot.
+        """
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self.retry_backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25)
+                self._stats["retries"] += 1
+                logger.warning(f"Ollama request failed ({last_error!r}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+            self._stats["waiting"] += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._stats["waiting"] -= 1
+            self._stats["in_flight"] += 1
+            self._stats["requests"] += 1
+            try:
+                return await asyncio.wait_for(attempt_fn(), timeout or self.request_timeout)
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                last_error = e
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in _RETRYABLE_STATUS:
+                    self._stats["failures"] += 1
+                    raise OllamaError(f"Ollama returned HTTP {e.response.status_code}: {e.response.text[:200]}") from e
+                last_error = OllamaError(f"HTTP {e.response.status_code}")
+            finally:
+                self._stats["in_flight"] -= 1
+                self._semaphore.release()
+
+        self._stats["failures"] += 1
+        if isinstance(last_error, (httpx.ConnectError, httpx.ConnectTimeout)):
+            raise OllamaUnavailableError(f"Ollama server unreachable at {self._http.base_url}: {last_error}") from last_error
+        raise OllamaError(f"Ollama request failed after {self.max_retries + 1} attempts: {last_error!r}") from last_error
+
+    async def generate(self, prompt: str, model: Optional[str] = None, options: Optional[dict] = None,
+                       timeout: Optional[float] = None,
+                       on_token: Optional[Callable[[str], None]] = None,
+                       response_format: Optional[Union[str, dict]] = None) -> str:
+        """
+        Generate a completion and return the full response text.
+        `response_format` ('json' or a JSON schema) constrains the output to structured JSON.
+        With `on_token`, the response is streamed and each token is passed to the callback as it
+        arrives (a retry after a partial stream starts over, so callbacks may see tokens twice).
+        """
+        if on_token is None:
+            async def attempt():
+                response = await self._http.post("/api/generate", json=self._payload(prompt, False, model, options, response_format))
+                response.raise_for_status()
+                return response.json().get("response", "")
+        else:
+            async def attempt():
+                parts = []
+                async for token in self._stream_once(prompt, model, options, response_format):
+                    parts.append(token)
+                    on_token(token)
+                return "".join(parts)
+        return await self._with_retries(attempt, timeout)
+
+    async def _stream_once(self, prompt: str, model: Optional[str], options: Optional[dict],
+                           response_format: Optional[Union[str, dict]] = None) -> AsyncIterator[str]:
+        async with self._http.stream("POST", "/api/generate", json=self._payload(prompt, True, model, options, response_format)) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(f"Ollama stream error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+
+    async def load_model(self, model: Optional[str] = None):
+        """
+        Ask Ollama to load the model into memory (a generate request without a prompt).
+        """
+        async def attempt():
+            response = await self._http.post("/api/generate", json={"model": model or self.model})
+            response.raise_for_status()
+        await self._with_retries(attempt, None)
+
+
+# --- Shared Client on a Background Event Loop ---
+# The client and its loop are published together as one tuple, so a thread that sees the
+# client always sees its loop too
+_shared: Optional[Tuple[OllamaClient, asyncio.AbstractEventLoop]] = None
+_client_lock = threading.Lock()
+
+def _ensure_client() -> Tuple[OllamaClient, asyncio.AbstractEventLoop]:
+    global _shared
+    shared = _shared
+    if shared is not None:
+        return shared
+    with _client_lock:
+        if _shared is not None:
+            return _shared
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name="ollama-client", daemon=True).start()
+
+        async def create():
+            return OllamaClient(
+                base_url=settings.OLLAMA_BASE_URL,
+                model=settings.OLLAMA_MODEL,
+                max_concurrency=settings.OLLAMA_MAX_CONCURRENCY,
+                max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                connect_timeout=settings.OLLAMA_CONNECT_TIMEOUT_SECONDS,
+                request_timeout=settings.OLLAMA_REQUEST_TIMEOUT_SECONDS,
+                max_retries=settings.OLLAMA_MAX_RETRIES,
+                retry_backoff=settings.OLLAMA_RETRY_BACKOFF_SECONDS,
+            )
+        _shared = (asyncio.run_coroutine_threadsafe(create(), loop).result(), loop)
+        logger.info(f"Ollama client ready: model={settings.OLLAMA_MODEL}, base_url={settings.OLLAMA_BASE_URL}, "
+                    f"max_concurrency={settings.OLLAMA_MAX_CONCURRENCY}")
+        return _shared
+
+def generate(prompt: str, model: Optional[str] = None, options: Optional[dict] = None,
+             timeout: Optional[float] = None, on_token: Optional[Callable[[str], None]] = None,
+             response_format: Optional[Union[str, dict]] = None) -> str:
+    """
+    Blocking generate for synchronous callers; runs on the shared client's event loop.
+    `on_token` is called from the client's loop thread.
+    """
+    client, loop = _ensure_client()
+    future = asyncio.run_coroutine_threadsafe(
+        client.generate(prompt, model=model, options=options, timeout=timeout, on_token=on_token,
+                        response_format=response_format), loop
+    )
+    return future.result()
+
+def load_model(model: Optional[str] = None):
+    """
+    Blocking model preload (used to warm up workers).
+    """
+    client, loop = _ensure_client()
+    asyncio.run_coroutine_threadsafe(client.load_model(model), loop).result()
+
+def stats() -> dict:
+    """
+    Request/retry/failure counters and current in-flight and waiting generations.
+    """
+    shared = _shared
+    if shared is None:
+        return {}
+    return shared[0].stats()
+
+def close():
+    """
+    Close the connection pool and stop the client's loop.
+    """
+    global _shared
+    with _client_lock:
+        if _shared is None:
+            return
+        client, loop = _shared
+        _shared = None
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.error(f"Error closing Ollama client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,99 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT")
+
+# --- Bounded Model Cache ---
+# Keeps at most `max_models` loaded models per process and evicts the least recently used one
+# when another is needed, so routing recordings to several models (per language, per tier)
+# doesn't load every model at once. A model is loaded once even if several threads ask for it
+# together, and a load reserves its slot first, so loads of different models in flight never
+# push the count past max_models. An evicted model still in use by another thread is freed when
+# that thread finishes.
+
+
+class ModelCache(Generic[ModelT]):
+    """
+    Thread-safe LRU cache of loaded models, keyed by model name.
+    `loader(name)` loads a model; `unloader(name)`, if given, runs after a model is evicted and
+    the cache holds no reference to it any more (e.g. to return the freed memory to the system).
+    """
+    def __init__(self, loader: Callable[[Hashable], ModelT], max_models: int,
+                 unloader: Optional[Callable[[Hashable], None]] = None):
+        self.loader = loader
+        self.unloader = unloader
+        self.max_models = max(max_models, 1)
+        self._models: "OrderedDict[Hashable, ModelT]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self._loading: Dict[Hashable, threading.Lock] = {} # One load per name at a time
+        self._reserved = 0 # Slots held by loads in progress
+
+    def get(self, name: Hashable) -> ModelT:
+        """
+        Return the model, loading it (and evicting the least recently used ones) if needed.
+        """
+        with self._lock:
+            if name in self._models:
+                self._models.move_to_end(name)
+                return self._models[name]
+            load_lock = self._loading.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if name in self._models: # Another thread loaded it while we waited
+                    self._models.move_to_end(name)
+                    return self._models[name]
+                # Reserve a slot before loading, so peak memory stays at max_models while it loads,
+                # even with loads of other names in flight; wait if in-flight loads hold every slot
+                evicted = []
+                while len(self._models) + self._reserved >= self.max_models:
+                    if self._models:
+                        evicted.append(self._models.popitem(last=False)[0])
+                    else:
+                        self._slot_freed.wait()
+                self._reserved += 1
+            for evicted_name in evicted:
+                self._unload(evicted_name)
+            logger.info(f"Loading model '{name}'...")
+            try:
+                model = self.loader(name)
+            except Exception:
+                with self._lock:
+                    self._reserved -= 1
+                    self._slot_freed.notify_all()
+                raise
+            with self._lock:
+                self._models[name] = model
+                self._reserved -= 1
+                self._loading.pop(name, None)
+                self._slot_freed.notify_all() # The slot now holds an evictable model
+            logger.info(f"Model '{name}' loaded ({len(self._models)} of {self.max_models} cached).")
+            return model
+
+    def _unload(self, name: Hashable):
+        logger.info(f"Evicted least recently used model '{name}'.")
+        if self.unloader is not None:
+            self.unloader(name)
+
+    def _evict(self, keep: int):
+        while True:
+            with self._lock:
+                if len(self._models) <= keep:
+                    return
+                name = self._models.popitem(last=False)[0]
+            self._unload(name)
+
+    def loaded(self) -> List[Hashable]:
+        """
+        Names of the loaded models, least recently used first.
+        """
+        with self._lock:
+            return list(self._models)
+
+    def clear(self):
+        self._evict(0)
@@ -0,0 +1,159 @@
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from .. import models
+from ..config import settings
+from . import pdf_generator
+
+logger = logging.getLogger(__name__)
+
+# --- Rendered PDF Cache ---
+# PDFs are rendered once per content version and kept in UPLOAD_DIR/pdf_cache as
+# <meeting_id>-<version>.pdf. The version hashes the template context (the meeting fields the
+# template shows) and the template source, so any change to either produces a new file, and the
+# version doubles as the HTTP ETag. Rendering runs in a process pool: xhtml2pdf is CPU-bound and
+# would otherwise block the event loop (or hold the GIL against the API threads).
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+_in_flight: Dict[Tuple[int, str], Future] = {} # Renders in progress, so concurrent requests share one
+_in_flight_lock = threading.Lock()
+
+
+def cache_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "pdf_cache")
+
+def cache_path(meeting_id: int, version: str) -> str:
+    return os.path.join(cache_dir(), f"{meeting_id}-{version}.pdf")
+
+def content_version(context: dict) -> str:
+    """
+    Version of a rendered PDF: hash of the template context and template source.
+    """
+    payload = json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    digest.update(pdf_generator.template_fingerprint().encode("ascii"))
+    return digest.hexdigest()[:32]
+
+def prepare(meeting: models.Meeting) -> Tuple[dict, str]:
+    """
+    Return the template context for a meeting and its content version.
+    """
+    context = pdf_generator.build_pdf_context(meeting)
+    return context, content_version(context)
+
+def get_cached(meeting_id: int, version: str) -> Optional[str]:
+    """
+    Path of the cached PDF for this version, or None if it hasn't been rendered.
+    """
+    path = cache_path(meeting_id, version)
+    return path if os.path.exists(path) else None
+
+
+# --- Rendering (runs in pool processes) ---
+def _render_to_cache(context: dict, version: str) -> str:
+    """
+    Render a PDF into the cache (atomically) and drop older versions of the same meeting.
+    """
+    meeting_id = context["meeting"]["id"]
+    pdf_bytes = pdf_generator.render_pdf(context)
+    if not pdf_bytes:
+        raise RuntimeError(f"PDF generation failed for meeting {meeting_id}")
+
+    os.makedirs(cache_dir(), exist_ok=True)
+    final_path = cache_path(meeting_id, version)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir(), suffix=".pdf.tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(pdf_bytes)
+        os.replace(tmp_path, final_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    for stale_path in glob.glob(os.path.join(cache_dir(), f"{meeting_id}-*.pdf")):
+        if stale_path != final_path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass # Already removed by a concurrent render
+    return final_path
+
+def _get_render_pool(replace_broken: bool = False) -> ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if replace_broken and _render_pool is not None:
+            # A pool process died (e.g. killed for memory); the pool rejects all further work
+            logger.warning("PDF render pool is broken; starting a new one.")
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+        if _render_pool is None:
+            # 'spawn' avoids forking a process that runs the event loop and worker threads
+            _render_pool = ProcessPoolExecutor(
+                max_workers=max(settings.PDF_RENDER_WORKERS, 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _render_pool
+
+def submit_render(context: dict, version: str) -> Future:
+    """
+    Render a PDF in the pool, or join a render of the same version already in progress.
+    The future resolves to the cached file path.
+    """
+    meeting_id = context["meeting"]["id"]
+    key = (meeting_id, version)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        try:
+            future = _get_render_pool().submit(_render_to_cache, context, version)
+        except BrokenProcessPool:
+            future = _get_render_pool(replace_broken=True).submit(_render_to_cache, context, version)
+        _in_flight[key] = future
+
+    def forget(_):
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+    future.add_done_callback(forget)
+    return future
+
+async def ensure_pdf(context: dict, version: str) -> str:
+    """
+    Return the cached PDF path for a version, rendering it off the event loop if needed.
+    """
+    path = get_cached(context["meeting"]["id"], version)
+    if path is not None:
+        return path
+    return await asyncio.wrap_future(submit_render(context, version))
+
+def invalidate(meeting_id: int):
+    """
+    Remove every cached PDF of a meeting (called when the meeting is deleted).
+    """
+    for path in glob.glob(os.path.join(cache_dir(), f"{meeting_id}-*.pdf")):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove cached PDF {path}: {e}")
+
+def shutdown():
+    """
+    Stop the render pool (pending pre-renders are dropped).
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
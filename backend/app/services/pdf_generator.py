@@ -1,14 +1,13 @@
 import logging
 import datetime
+import hashlib
 import io
 import os
 import re
-from xhtml2pdf import pisa # Import pisa
-from jinja2 import Environment, FileSystemLoader, select_autoescape # Import Jinja2
+import threading
+# xhtml2pdf and Jinja2 are imported lazily on first export, they are heavy to import
 from .. import models
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # --- Helper function to clean basic Markdown ---
@@ -36,55 +35,93 @@ def _clean_markdown(text: str) -> str:
     # text = text.replace('\n', '<br />')
     return text
 
-# --- Setup Jinja2 Environment ---
+# --- Setup Jinja2 Environment (lazy) ---
 # Assuming templates are in backend/app/templates
 template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates')
-if not os.path.isdir(template_dir):
-     logger.warning(f"Template directory not found: {template_dir}. PDF generation might fail.")
-     # Optionally create the directory if it's guaranteed to be needed
-     # os.makedirs(template_dir, exist_ok=True)
-
-try:
-    jinja_env = Environment(
-        loader=FileSystemLoader(template_dir),
-        autoescape=select_autoescape(['html', 'xml'])
-    )
-    template = jinja_env.get_template("pdf_template.html")
-    logger.info("Jinja2 environment and PDF template loaded successfully.")
-except Exception as e:
-     logger.error(f"Failed to load Jinja2 environment or template: {e}", exc_info=True)
-     template = None # Set template to None if loading fails
+_template = None
+_template_lock = threading.Lock()
+
+def get_template():
+    """
+    Return the compiled PDF template, creating the Jinja2 environment on first use.
+    Returns None if the template cannot be loaded.
+    """
+    global _template
+    if _template is not None:
+        return _template
+
+    with _template_lock:
+        if _template is not None:
+            return _template
+        if not os.path.isdir(template_dir):
+            logger.warning(f"Template directory not found: {template_dir}. PDF generation might fail.")
+        try:
+            from jinja2 import Environment, FileSystemLoader, select_autoescape # Import Jinja2
+            jinja_env = Environment(
+                loader=FileSystemLoader(template_dir),
+                autoescape=select_autoescape(['html', 'xml'])
+            )
+            _template = jinja_env.get_template("pdf_template.html")
+            logger.info("Jinja2 environment and PDF template loaded successfully.")
+        except Exception as e:
+            logger.error(f"Failed to load Jinja2 environment or template: {e}", exc_info=True)
+            return None
+        return _template
+
+# --- PDF Context ---
+def build_pdf_context(meeting: models.Meeting) -> dict:
+    """
+    Collect everything the PDF template uses from a meeting into a plain, picklable dict,
+    so rendering can run in another process and the context can be hashed as a content version.
+    """
+    upload_time_str = meeting.upload_time.strftime("%Y-%m-%d %H:%M:%S UTC") if meeting.upload_time else "N/A"
+
+    # Determine which language content to use
+    use_zh = meeting.detected_language == 'zh'
+    summary = meeting.summary_zh if use_zh else meeting.summary_en
+    action_items = meeting.action_items_zh if use_zh else meeting.action_items_en
+
+    return {
+        # Only the meeting fields the template reads (Jinja2 resolves meeting.x on dicts too)
+        "meeting": {
+            "id": meeting.id,
+            "filename": meeting.filename,
+            "status": meeting.status.value if meeting.status else None,
+            "detected_language": meeting.detected_language,
+            "transcript": meeting.transcript,
+        },
+        "upload_time_str": upload_time_str,
+        # Pre-process summary text (basic markdown to HTML)
+        "summary_html": _clean_markdown(summary or "No summary generated."),
+        "action_items": list(action_items or []), # Ensure it's a list
+    }
+
+def template_fingerprint() -> str:
+    """
+    Hash of the PDF template source, so cached PDFs are invalidated when the template changes.
+    """
+    try:
+        with open(os.path.join(template_dir, "pdf_template.html"), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
 
 # --- PDF Generation Function using xhtml2pdf ---
-def generate_meeting_pdf(meeting: models.Meeting) -> bytes:
+def render_pdf(context: dict) -> bytes:
     """
-    Generates a PDF report for a meeting using xhtml2pdf from an HTML template.
-    Returns the PDF content as bytes.
+    Render a context from build_pdf_context() to PDF bytes with xhtml2pdf.
+    Returns empty bytes on failure.
     """
-    logger.info(f"Generating PDF for meeting {meeting.id} using xhtml2pdf...")
+    meeting_id = context["meeting"]["id"]
+    logger.info(f"Generating PDF for meeting {meeting_id} using xhtml2pdf...")
 
+    template = get_template()
     if not template:
          logger.error("PDF template not loaded. Cannot generate PDF.")
          return b""
 
     try:
-        # --- Prepare Context Data ---
-        upload_time_str = meeting.upload_time.strftime("%Y-%m-%d %H:%M:%S UTC") if meeting.upload_time else "N/A"
-
-        # Determine which language content to use
-        use_zh = meeting.detected_language == 'zh'
-        summary = meeting.summary_zh if use_zh else meeting.summary_en
-        action_items = meeting.action_items_zh if use_zh else meeting.action_items_en
-
-        # Pre-process summary text (basic markdown to HTML)
-        summary_html = _clean_markdown(summary or "No summary generated.")
-
-        context = {
-            "meeting": meeting,
-            "upload_time_str": upload_time_str,
-            "summary_html": summary_html, # Pass pre-processed HTML
-            "action_items": action_items or [], # Ensure it's a list
-        }
+        from xhtml2pdf import pisa # Import pisa
 
         # --- Render HTML Template ---
         html_content = template.render(context)
@@ -99,16 +136,23 @@ def generate_meeting_pdf(meeting: models.Meeting) -> bytes:
 
         # Check for errors during PDF generation
         if pdf_status.err:
-            logger.error(f"Error generating PDF for meeting {meeting.id}: {pdf_status.err}")
+            logger.error(f"Error generating PDF for meeting {meeting_id}: {pdf_status.err}")
             return b""
 
         # Get PDF bytes from the buffer
         pdf_bytes = result.getvalue()
         result.close()
 
-        logger.info(f"PDF generation complete for meeting {meeting.id} using xhtml2pdf.")
+        logger.info(f"PDF generation complete for meeting {meeting_id} using xhtml2pdf.")
         return pdf_bytes
 
     except Exception as e:
-        logger.error(f"Error generating PDF for meeting {meeting.id}: {e}", exc_info=True)
+        logger.error(f"Error generating PDF for meeting {meeting_id}: {e}", exc_info=True)
         return b""
+
+def generate_meeting_pdf(meeting: models.Meeting) -> bytes:
+    """
+    Generates a PDF report for a meeting using xhtml2pdf from an HTML template.
+    Returns the PDF content as bytes.
+    """
+    return render_pdf(build_pdf_context(meeting))
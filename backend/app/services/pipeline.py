@@ -0,0 +1,308 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from .. import crud, models, schemas
+from ..config import settings
+from . import asr, asr_tiering, decoded_audio, summarizer, events, pdf_cache, stages, storage
+
+logger = logging.getLogger(__name__)
+
+def warm_up():
+    """
+    Load the ASR model and build the LLM chain before the first job arrives,
+    so the first meeting doesn't pay the model load time.
+    """
+    asr.warm_up()
+    summarizer.warm_up()
+
+def reuse_previous_results(db, meeting_id: int) -> bool:
+    """
+    If an earlier COMPLETED meeting has identical audio (same content hash), copy its transcript,
+    segments, language, summaries and action items instead of re-running ASR and the LLM, and the
+    duration and levels the decode stage measured (identical audio measures the same).
+    Returns True if results were reused.
+    """
+    db_meeting = crud.get_meeting(db, meeting_id)
+    if not db_meeting or not db_meeting.content_hash:
+        return False
+    source = crud.find_completed_meeting_by_hash(db, db_meeting.content_hash, exclude_meeting_id=meeting_id)
+    if source is None:
+        return False
+
+    logger.info(f"Meeting {meeting_id} has the same audio as meeting {source.id}; reusing its results.")
+    crud.copy_transcript_segments(db, source.id, meeting_id)
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(
+        transcript=source.transcript,
+        detected_language=source.detected_language,
+        summary_en=source.summary_en,
+        summary_zh=source.summary_zh,
+        action_items_en=source.action_items_en,
+        action_items_zh=source.action_items_zh,
+        asr_model=source.asr_model,
+        duration=source.duration,
+        loudness_dbfs=source.loudness_dbfs,
+        peak_dbfs=source.peak_dbfs,
+        status=models.MeetingStatus.COMPLETED,
+        error_message=None
+    ))
+    return True
+
+# --- Stage Runners ---
+# Each runner stores its outputs on the meeting and returns the stage's checkpoint status
+# (COMPLETED or SKIPPED), or None if it failed (the meeting is then already marked FAILED).
+
+@dataclass
+class RunOptions:
+    """
+    Per-job settings passed to every stage runner.
+    """
+    asr_model: Optional[str] = None # Pinned ASR model (quality upgrade jobs); None = tiering policy
+
+def _run_decode(db, meeting_id: int, options: RunOptions) -> Optional[models.StageStatus]:
+    """
+    Decode the recording once to the 16 kHz PCM cache that every later consumer reads,
+    and store its exact duration and loudness.
+    """
+    db_meeting = crud.get_meeting(db, meeting_id)
+    if not db_meeting.audio_file_path or not os.path.exists(db_meeting.audio_file_path):
+        logger.error(f"Audio file path not found or invalid for meeting ID: {meeting_id}. Path: {db_meeting.audio_file_path}")
+        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="Audio file not found")
+        return None
+    crud.update_meeting_status(db, meeting_id, models.MeetingStatus.PROCESSING)
+    try:
+        stats = decoded_audio.measure(decoded_audio.load(db_meeting.audio_file_path))
+    except Exception as e:
+        logger.error(f"Could not decode the audio of meeting {meeting_id}: {e}", exc_info=True)
+        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message=f"Audio decoding failed: {e}")
+        return None
+    logger.info(f"Decoded meeting {meeting_id}: {stats.duration:.1f}s, RMS {stats.rms_dbfs} dBFS, peak {stats.peak_dbfs} dBFS")
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(
+        duration=stats.duration, loudness_dbfs=stats.rms_dbfs, peak_dbfs=stats.peak_dbfs
+    ))
+    return models.StageStatus.COMPLETED
+
+def _run_asr(db, meeting_id: int, options: RunOptions) -> Optional[models.StageStatus]:
+    processing = models.MeetingStatus.PROCESSING.value
+
+    def report_asr_progress(fraction: float):
+        events.publish_progress(meeting_id, events.STAGE_ASR, status=processing,
+                                progress=fraction, message=f"ASR {int(fraction * 100)}%")
+
+    report_asr_progress(0.0)
+    if asr.transcribe_audio(db, meeting_id, progress_callback=report_asr_progress, model_name=options.asr_model) is None:
+        logger.error(f"Transcription failed for meeting {meeting_id}. Aborting further processing.")
+        # Status is already set to FAILED by transcribe_audio
+        return None
+    events.publish_progress(meeting_id, events.STAGE_TRANSCRIPT_READY, status=processing,
+                            progress=1.0, message="Transcript ready")
+    return models.StageStatus.COMPLETED
+
+def _run_summarize(db, meeting_id: int, options: RunOptions) -> Optional[models.StageStatus]:
+    db_meeting = crud.get_meeting(db, meeting_id)
+    if not db_meeting.transcript:
+        logger.warning(f"Transcript is empty for meeting {meeting_id}. Skipping summarization.")
+        return models.StageStatus.SKIPPED
+
+    processing = models.MeetingStatus.PROCESSING.value
+    crud.update_meeting_status(db, meeting_id, models.MeetingStatus.PROCESSING)
+    events.publish_progress(meeting_id, events.STAGE_SUMMARIZING, status=processing, message="Summarizing")
+    if summarizer.summarize_transcript(db, meeting_id, db_meeting.transcript, db_meeting.detected_language) is None:
+        logger.error(f"Summarization failed for meeting {meeting_id}.")
+        # Status is already set to FAILED by summarize_transcript
+        return None
+    events.publish_progress(meeting_id, events.STAGE_SUMMARY_READY, status=processing, message="Summary ready")
+    return models.StageStatus.COMPLETED
+
+def _run_translate(db, meeting_id: int, options: RunOptions) -> Optional[models.StageStatus]:
+    db_meeting = crud.get_meeting(db, meeting_id)
+    status = models.StageStatus.SKIPPED
+    if db_meeting.summary_en is not None:
+        if summarizer.translate_summary(db, meeting_id) is None:
+            return None
+        status = models.StageStatus.COMPLETED
+    return status
+
+def _run_render(db, meeting_id: int, options: RunOptions) -> Optional[models.StageStatus]:
+    """
+    Render the PDF export into the cache, so the first download doesn't wait for it.
+    """
+    if not settings.PDF_PRERENDER:
+        return models.StageStatus.SKIPPED
+    context, version = pdf_cache.prepare(crud.get_meeting(db, meeting_id))
+    if pdf_cache.get_cached(meeting_id, version) is None:
+        pdf_cache.submit_render(context, version).result()
+    return models.StageStatus.COMPLETED
+
+def _archive_original(db, meeting_id: int):
+    """
+    Re-encode the processed recording for cold storage, if configured. Failures only keep the original.
+    """
+    db_meeting = crud.get_meeting(db, meeting_id)
+    if not settings.AUDIO_ARCHIVE_CODEC or not db_meeting.content_hash:
+        return
+    try:
+        storage.archive_blob(db, db_meeting.content_hash, meeting_id)
+    except Exception as e:
+        logger.error(f"Could not archive the audio of meeting {meeting_id}: {e}", exc_info=True)
+
+STAGE_RUNNERS = {
+    models.PipelineStage.DECODE: _run_decode,
+    models.PipelineStage.ASR: _run_asr,
+    models.PipelineStage.SUMMARIZE: _run_summarize,
+    models.PipelineStage.TRANSLATE: _run_translate,
+    models.PipelineStage.RENDER: _run_render,
+}
+
+def _run_stage(db, meeting_id: int, stage: models.PipelineStage, options: RunOptions) -> bool:
+    """
+    Run one stage and record its checkpoint. Returns False if the stage failed the meeting.
+    """
+    logger.info(f"Meeting {meeting_id}: running stage '{stage.value}'")
+    crud.set_stage_status(db, meeting_id, stage, models.StageStatus.RUNNING)
+    try:
+        result = STAGE_RUNNERS[stage](db, meeting_id, options)
+    except Exception as e:
+        if stage != models.PipelineStage.RENDER:
+            raise
+        logger.error(f"PDF render failed for meeting {meeting_id}: {e}", exc_info=True)
+        crud.set_stage_status(db, meeting_id, stage, models.StageStatus.FAILED, error_message=str(e))
+        return True
+    if result is None:
+        db_meeting = crud.get_meeting(db, meeting_id)
+        crud.set_stage_status(db, meeting_id, stage, models.StageStatus.FAILED,
+                              error_message=db_meeting.error_message if db_meeting else None)
+        return False
+    crud.set_stage_status(db, meeting_id, stage, result)
+    return True
+
+# --- Quality Upgrades ---
+def run_quality_upgrade(db, meeting_id: int, asr_model: str) -> bool:
+    """
+    Re-transcribe a COMPLETED meeting with `asr_model`, then summarize and translate the new
+    transcript, as a side result: the meeting keeps its status, checkpoints and notes while this
+    runs, and gets the new transcript, segments and notes in one write once every step succeeded.
+    Returns False if a step failed; the meeting is then left exactly as it was.
+    """
+    db_meeting = crud.get_meeting(db, meeting_id)
+    if db_meeting.status != models.MeetingStatus.COMPLETED or db_meeting.asr_model == asr_model:
+        logger.info(f"Dropping quality upgrade of meeting {meeting_id} to '{asr_model}': meeting is "
+                    f"{db_meeting.status.value} with model '{db_meeting.asr_model}'.")
+        return True
+    replaced_model = db_meeting.asr_model
+    try:
+        if not db_meeting.audio_file_path or not os.path.exists(db_meeting.audio_file_path):
+            raise FileNotFoundError(f"Audio file not found: {db_meeting.audio_file_path}")
+        logger.info(f"Quality upgrade of meeting {meeting_id}: '{replaced_model}' -> '{asr_model}'")
+        result = asr.run_transcription(
+            db_meeting.audio_file_path,
+            choose_model=lambda target_model, audio_seconds: asr_tiering.pinned(asr_model, audio_seconds).model,
+        )
+        asr_tiering.record_run(result["model"], result["audio_seconds"], result["asr_seconds"])
+        transcript = result.get("text", "")
+        if not transcript:
+            raise RuntimeError("the upgraded transcript is empty")
+        summary_en, action_items_en = summarizer.generate_notes(db, meeting_id, transcript)
+        summary_zh, action_items_zh = summarizer.translate_notes(db, summary_en, action_items_en)
+    except Exception as e:
+        logger.error(f"Quality upgrade of meeting {meeting_id} to '{asr_model}' failed; keeping its "
+                     f"'{replaced_model}' results: {e}", exc_info=True)
+        return False
+
+    applied = crud.apply_transcript_upgrade(db, meeting_id, replaced_model, result.get("segments", []), schemas.MeetingUpdate(
+        transcript=transcript,
+        detected_language=result.get("language", "unknown"),
+        asr_model=result["model"],
+        summary_en=summary_en,
+        action_items_en=action_items_en,
+        summary_zh=summary_zh,
+        action_items_zh=action_items_zh,
+    ))
+    if not applied:
+        logger.info(f"Meeting {meeting_id} changed during its quality upgrade; discarding the upgraded results.")
+        return True
+    try:
+        _run_render(db, meeting_id, RunOptions())
+    except Exception as e:
+        logger.error(f"PDF render after the quality upgrade of meeting {meeting_id} failed: {e}", exc_info=True)
+    logger.info(f"Quality upgrade of meeting {meeting_id} to '{asr_model}' complete.")
+    events.publish_progress(meeting_id, events.STAGE_COMPLETED, status=models.MeetingStatus.COMPLETED.value,
+                            message="Transcript upgraded")
+    return True
+
+def _mark_completed(db, meeting_id: int):
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(status=models.MeetingStatus.COMPLETED, error_message=None))
+
+# --- Meeting Processing Pipeline ---
+def process_meeting_audio(db_session_factory, meeting_id: int,
+                          from_stage: Optional[models.PipelineStage] = None, asr_model: Optional[str] = None) -> bool:
+    """
+    Run the meeting's pipeline stages (decode, ASR, summarize, translate, render), starting at the
+    first stage without a COMPLETED/SKIPPED checkpoint at or after `from_stage` (reprocess jobs).
+    `asr_model` marks a quality upgrade job, run by `run_quality_upgrade` instead of the stages.
+    Uses a session factory to create a new session, so it can run in any worker thread or process.
+    The meeting is COMPLETED once translation is done, then the PDF is pre-rendered once.
+    Returns True if the meeting was processed successfully, False otherwise.
+    A failed render is logged on its checkpoint but doesn't fail the meeting (the PDF is then rendered on download).
+    """
+    db = db_session_factory() # Create a new session
+    stage = None
+    try:
+        logger.info(f"Processing started for meeting {meeting_id}")
+        db_meeting = crud.get_meeting(db, meeting_id)
+        if db_meeting is None:
+            logger.error(f"Meeting not found for ID: {meeting_id}")
+            return False
+
+        if asr_model:
+            # Quality upgrade of a finished meeting: computed on the side, never touching its status or checkpoints
+            return run_quality_upgrade(db, meeting_id, asr_model)
+        options = RunOptions()
+
+        # 0. Identical audio was already processed: skip ASR and summarization entirely
+        if from_stage is None and not crud.get_meeting_stages(db, meeting_id) and reuse_previous_results(db, meeting_id):
+            crud.reset_meeting_stages(db, meeting_id, completed=stages.STAGE_ORDER[:-1], cleared=[])
+            reused = True
+        else:
+            reused = False
+
+        # Reprocess jobs run on the checkpoints schedule_reprocess wrote (it records inferred stages itself)
+        done = stages.completed_stages(db, crud.get_meeting(db, meeting_id), infer=from_stage is None)
+        position = stages.STAGE_ORDER.index(from_stage) if from_stage is not None else 0
+        pending = [stage for stage in stages.STAGE_ORDER[position:] if stage not in done]
+        for stage in pending:
+            if stage in stages.FINISHING_STAGES:
+                continue
+            if not _run_stage(db, meeting_id, stage, options):
+                return False
+
+        # Translation, then the PDF pre-render. The meeting is COMPLETED only once translation
+        # succeeded, so a failed translation fails (and retries) the job, never a finished meeting.
+        # The render comes last, so the PDF shows the translated notes and the final status
+        if models.PipelineStage.TRANSLATE in pending:
+            stage = models.PipelineStage.TRANSLATE
+            if not _run_stage(db, meeting_id, stage, options):
+                return False
+        stage = None
+        _mark_completed(db, meeting_id)
+        if models.PipelineStage.RENDER in pending:
+            stage = models.PipelineStage.RENDER
+            _run_stage(db, meeting_id, stage, options) # A failed render is recorded on its checkpoint
+
+        _archive_original(db, meeting_id)
+        logger.info(f"Processing complete for meeting {meeting_id}")
+        message = "Reused results from an identical recording" if reused else "Processing complete"
+        events.publish_progress(meeting_id, events.STAGE_COMPLETED, status=models.MeetingStatus.COMPLETED.value,
+                                message=message)
+        return True
+
+    except Exception as e:
+        logger.error(f"Unhandled exception while processing meeting {meeting_id}: {e}", exc_info=True)
+        # Ensure status is marked as FAILED if an unexpected error occurs
+        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message=f"Background task error: {e}")
+        if stage is not None:
+            crud.set_stage_status(db, meeting_id, stage, models.StageStatus.FAILED, error_message=str(e))
+        return False
+    finally:
+        db.close() # Ensure the session is closed
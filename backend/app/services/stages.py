@@ -0,0 +1,120 @@
+import logging
+import os
+from typing import List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from ..config import settings
+from ..database import write_transaction
+from . import events
+
+logger = logging.getLogger(__name__)
+
+# --- Pipeline Stages ---
+# A meeting is processed as decode -> asr -> summarize -> translate -> render. Each stage writes
+# its outputs to the meeting before its checkpoint (a meeting_stages row) is marked COMPLETED or
+# SKIPPED, so a retried or reprocessed job resumes at the first stage without one and never
+# repeats finished work (a summarization outage no longer costs another Whisper pass).
+# Kept free of ML imports: the API uses it to schedule reprocessing.
+
+STAGE_ORDER: List[models.PipelineStage] = [
+    models.PipelineStage.DECODE,
+    models.PipelineStage.ASR,
+    models.PipelineStage.SUMMARIZE,
+    models.PipelineStage.TRANSLATE,
+    models.PipelineStage.RENDER,
+]
+# Run after the main stages: translation, then the meeting is COMPLETED, then the PDF is rendered
+FINISHING_STAGES = {models.PipelineStage.TRANSLATE, models.PipelineStage.RENDER}
+DONE_STATUSES = {models.StageStatus.COMPLETED, models.StageStatus.SKIPPED}
+AUDIO_STAGES = {models.PipelineStage.DECODE, models.PipelineStage.ASR} # Stages that need the recording
+
+
+class ReprocessConflict(Exception):
+    """
+    Raised when a meeting can't be reprocessed as requested (the reason is the message).
+    """
+
+
+def _inferred_stages(db_meeting: models.Meeting) -> Set[models.PipelineStage]:
+    """
+    Stages a meeting processed before checkpoints existed has evidently finished, judged by its data.
+    Rendering is never inferred (it is cheap to redo).
+    """
+    done = set()
+    if db_meeting.transcript is not None:
+        done |= {models.PipelineStage.DECODE, models.PipelineStage.ASR}
+        if db_meeting.summary_en is not None:
+            done.add(models.PipelineStage.SUMMARIZE)
+            if db_meeting.summary_zh is not None:
+                done.add(models.PipelineStage.TRANSLATE)
+    return done
+
+def completed_stages(db: Session, db_meeting: models.Meeting, infer: bool = True) -> Set[models.PipelineStage]:
+    """
+    Stages of a meeting that are COMPLETED or SKIPPED (inferred from its data if it has no checkpoints
+    and `infer`; a reprocess from the first stage clears every checkpoint on purpose).
+    """
+    db_stages = crud.get_meeting_stages(db, db_meeting.id)
+    if not db_stages and infer:
+        return _inferred_stages(db_meeting)
+    return {db_stage.stage for db_stage in db_stages if db_stage.status in DONE_STATUSES}
+
+def resume_stage(done: Set[models.PipelineStage],
+                 from_stage: Optional[models.PipelineStage] = None) -> Optional[models.PipelineStage]:
+    """
+    First stage (at or after `from_stage`, if given) that isn't done, or None if all are.
+    """
+    start = STAGE_ORDER.index(from_stage) if from_stage is not None else 0
+    for stage in STAGE_ORDER[start:]:
+        if stage not in done:
+            return stage
+    return None
+
+
+# --- Reprocessing ---
+def _audio_available(db_meeting: models.Meeting) -> bool:
+    return bool(db_meeting.audio_file_path) and os.path.exists(db_meeting.audio_file_path)
+
+def schedule_reprocess(db: Session, meeting_id: int, from_stage: Optional[models.PipelineStage] = None,
+                       strict: bool = False) -> models.ProcessingJob:
+    """
+    Queue a job that reprocesses a meeting from `from_stage`, or from its first incomplete stage.
+    A requested stage that comes after an incomplete one resumes at the incomplete one instead,
+    unless `strict` (bulk reprocessing), which refuses rather than run earlier stages.
+    Checkpoints of the stages being rerun are cleared; earlier stages that were only inferred are
+    recorded. Raises ReprocessConflict if the meeting can't be reprocessed.
+    """
+    # The checks and the writes share one write transaction, so a worker or another request
+    # can't queue a job for the meeting in between
+    with write_transaction(db):
+        db_meeting = crud.get_meeting(db, meeting_id)
+        if db_meeting is None:
+            raise ReprocessConflict("Meeting not found")
+        if crud.has_active_job(db, meeting_id):
+            raise ReprocessConflict("Meeting is already queued or processing")
+
+        done = completed_stages(db, db_meeting)
+        first_incomplete = resume_stage(done)
+        if from_stage is None:
+            if first_incomplete is None:
+                raise ReprocessConflict("Every stage has completed; pass from_stage to rerun one")
+            resume = first_incomplete
+        elif first_incomplete is not None and STAGE_ORDER.index(first_incomplete) < STAGE_ORDER.index(from_stage):
+            if strict:
+                raise ReprocessConflict(f"Stage '{first_incomplete.value}' has not completed")
+            resume = first_incomplete
+        else:
+            resume = from_stage
+
+        if resume in AUDIO_STAGES and not _audio_available(db_meeting):
+            raise ReprocessConflict("The meeting's audio file is no longer available")
+
+        position = STAGE_ORDER.index(resume)
+        db_job = crud.queue_reprocess_job(db, meeting_id, resume, completed=STAGE_ORDER[:position],
+                                          cleared=STAGE_ORDER[position:], max_attempts=settings.JOB_MAX_ATTEMPTS)
+    logger.info(f"Reprocessing job {db_job.id} queued for meeting {meeting_id} from stage '{resume.value}'")
+    events.publish_progress(meeting_id, events.STAGE_QUEUED, status=models.MeetingStatus.PENDING.value,
+                            message=f"Queued for reprocessing from {resume.value}")
+    return db_job
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import subprocess
+import tempfile
+import wave
+from typing import BinaryIO, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..config import settings
+from ..database import write_transaction
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024 # 1 MiB
+
+# --- Content-addressed audio storage ---
+# Uploads are written to UPLOAD_DIR/tmp while their SHA-256 is computed, then moved to
+# UPLOAD_DIR/blobs/<sha256><ext>. Identical bytes are stored once and shared between meetings.
+
+def blob_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "blobs")
+
+def tmp_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "tmp")
+
+def incoming_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, "incoming") # Partial resumable uploads
+
+class UploadTooLargeError(ValueError):
+    """
+    Raised when an upload exceeds settings.MAX_UPLOAD_BYTES.
+    """
+
+def save_stream_hashed(src: BinaryIO, suffix: str = "", max_bytes: Optional[int] = None) -> Tuple[str, str, int]:
+    """
+    Copy a file-like object to a temporary file, hashing it in the same pass.
+    Raises UploadTooLargeError (and removes the partial file) past `max_bytes`.
+    Returns (temp_path, sha256_hex, size_bytes).
+    """
+    os.makedirs(tmp_dir(), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir(), suffix=suffix)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the maximum size of {max_bytes} bytes")
+                hasher.update(chunk)
+                out.write(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, hasher.hexdigest(), size
+
+def blob_path(content_hash: str, extension: str) -> str:
+    return os.path.join(blob_dir(), f"{content_hash}{extension.lower()}")
+
+def stored_blob_path(db: Session, content_hash: str) -> Optional[str]:
+    """
+    Path of the stored file for `content_hash`, or None if it isn't registered or its file is gone.
+    """
+    existing = crud.get_audio_blob(db, content_hash)
+    return existing.file_path if existing and os.path.exists(existing.file_path) else None
+
+def probe_duration(path: str) -> Optional[float]:
+    """
+    Read a recording's duration (seconds) from its container header, without decoding the audio.
+    Tries libsndfile (WAV/FLAC/OGG, MP3 on recent versions), the standard library's WAV reader,
+    then ffprobe (installed with ffmpeg, which Whisper needs anyway). Returns None if none can read the file.
+    """
+    try:
+        import soundfile # Lazy: only needed at upload time
+        return float(soundfile.info(path).duration)
+    except Exception:
+        pass
+    try:
+        with wave.open(path, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except Exception:
+        pass
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", path],
+            capture_output=True, text=True, timeout=30, check=True
+        ).stdout.strip()
+        return float(output)
+    except Exception as e:
+        logger.warning(f"Could not determine the duration of {path}: {e}")
+        return None
+
+
+# --- Cold Storage ---
+# With AUDIO_ARCHIVE_CODEC set, a processed recording's original is re-encoded to a compact mono
+# codec and replaces the blob file (the content hash, and so deduplication, still refers to the
+# uploaded bytes). Later stages read the decoded PCM, and a reprocess from decode decodes the archive.
+ARCHIVE_FORMATS = {
+    "opus": (".opus", "ogg", lambda: ["-c:a", "libopus", "-b:a", settings.AUDIO_ARCHIVE_OPUS_BITRATE, "-application", "voip"]),
+    "flac": (".flac", "flac", lambda: ["-c:a", "flac", "-compression_level", "8"]),
+}
+
+def _archivable(db: Session, content_hash: str, original_path: str, meeting_id: Optional[int]) -> bool:
+    # Only the meeting archiving the blob may use it: another meeting's job could be reading the original
+    blob = crud.get_audio_blob(db, content_hash)
+    return (blob is not None and blob.file_path == original_path and blob.ref_count == 1
+            and not crud.blob_has_active_job(db, content_hash, exclude_meeting_id=meeting_id))
+
+def archive_blob(db: Session, content_hash: str, meeting_id: Optional[int] = None) -> Optional[str]:
+    """
+    Re-encode a stored recording for cold storage (see AUDIO_ARCHIVE_CODEC) and repoint its blob
+    and meetings at the new file. Only a blob referenced by one meeting (`meeting_id`, whose job
+    may be the one running) and used by no other active job is archived; the original is also
+    kept if the archive copy wouldn't be smaller.
+    Returns the blob's file path afterwards, or None if archiving is disabled or the blob is missing.
+    """
+    codec = settings.AUDIO_ARCHIVE_CODEC
+    if not codec:
+        return None
+    if codec not in ARCHIVE_FORMATS:
+        raise ValueError(f"AUDIO_ARCHIVE_CODEC must be one of {', '.join(ARCHIVE_FORMATS)} (or empty)")
+    blob = crud.get_audio_blob(db, content_hash)
+    if blob is None or not os.path.exists(blob.file_path):
+        return None
+    extension, container, codec_args = ARCHIVE_FORMATS[codec]
+    original_path = blob.file_path
+    if original_path.lower().endswith(extension):
+        return original_path # Already archived
+    if not _archivable(db, content_hash, original_path, meeting_id):
+        logger.info(f"Keeping the original of {content_hash[:12]}: it is shared or in use.")
+        return original_path
+
+    fd, tmp_path = tempfile.mkstemp(dir=blob_dir(), suffix=extension)
+    os.close(fd)
+    try:
+        subprocess.run(
+            ["ffmpeg", "-nostdin", "-y", "-i", original_path, "-ac", "1", *codec_args(), "-f", container, tmp_path],
+            capture_output=True, check=True, timeout=3600
+        )
+        archived_size, original_size = os.path.getsize(tmp_path), os.path.getsize(original_path)
+        if archived_size >= original_size:
+            logger.info(f"Keeping the original of {content_hash[:12]}: {codec} would not be smaller.")
+            os.remove(tmp_path)
+            return original_path
+
+        final_path = os.path.join(blob_dir(), f"{content_hash}{extension}")
+        # Checked again and swapped in one write: a reference or job may have appeared while transcoding
+        with write_transaction(db):
+            if not _archivable(db, content_hash, original_path, meeting_id):
+                logger.info(f"Keeping the original of {content_hash[:12]}: it came into use while archiving.")
+                os.remove(tmp_path)
+                return original_path
+            os.replace(tmp_path, final_path)
+            try:
+                crud.move_audio_blob(db, content_hash, final_path, archived_size)
+            except Exception:
+                os.remove(final_path)
+                raise
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.remove(original_path)
+    logger.info(f"Archived {original_path} as {codec}: {original_size} -> {archived_size} bytes")
+    return final_path
@@ -1,33 +1,14 @@
 from sqlalchemy.orm import Session
-from langchain_ollama import OllamaLLM # Corrected import name
-from langchain.prompts import PromptTemplate
-# LLMChain is deprecated, replaced by LCEL below
 import logging
-from typing import Optional, List # Import List
+import threading
+from typing import Optional, List, Tuple # Import List
 
 from .. import models, schemas, crud
 from ..config import settings
+from . import events, llm_cache, llm_client, text_chunking, translation
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Ollama LLM
-try:
-    logger.info(f"Initializing Ollama LLM: model={settings.OLLAMA_MODEL}, base_url={settings.OLLAMA_BASE_URL}")
-    llm = OllamaLLM( # Corrected class name
-        model=settings.OLLAMA_MODEL,
-        base_url=settings.OLLAMA_BASE_URL
-        # Add other parameters like temperature if needed
-        # temperature=0.7
-    )
-    # Simple test invoke to check connection (optional, might slow down startup)
-    # llm.invoke("Hi")
-    logger.info("Ollama LLM initialized successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize Ollama LLM: {e}", exc_info=True)
-    llm = None
-
 # Define the prompt template
 # This template instructs the LLM on the desired output format.
 # Adjust the instructions based on the specific LLM's capabilities.
@@ -48,157 +29,319 @@ Action Items:
 [Output a JSON list of strings representing the action items. Example: ["Action item 1", "Follow up with Jane Doe"]. If no action items are found, output an empty JSON list: []]
 """
 
-prompt = PromptTemplate(template=prompt_template_text, input_variables=["transcript"])
+# Map step: notes for one part of a long transcript, in the same format as the full prompt
+map_prompt_template_text = """
+You are an expert meeting assistant. The following is one part of a longer meeting transcript. Please provide:
+1. A concise summary of the key discussion points and decisions in this part. **Do NOT include action items in the summary section.**
+2. A list of specific action items assigned in this part, including who is responsible if mentioned.
 
-import json # Import json for storing list as string in DB
+Transcript part:
+{transcript}
 
-# Create the summarization chain using LCEL
-if llm:
-    # LangChain Expression Language (LCEL) replaces LLMChain
-    summarization_chain = prompt | llm
-else:
-    summarization_chain = None
-
-# --- Placeholder Translation Function ---
-# In a real application, this would call an external translation API
-def translate_text(text: str, target_language: str) -> str:
-    logger.info(f"Placeholder: Translating text to {target_language}. Returning original.")
-    # Simulate translation by returning original text
-    # Replace with actual translation call, e.g., Google Translate, DeepL, etc.
-    if not text:
-        return ""
-    return text
-
-def translate_action_items(items: List[str], target_language: str) -> List[str]:
-    logger.info(f"Placeholder: Translating action items to {target_language}. Returning original.")
-    # Simulate translation by returning original items
-    # Replace with actual translation call for each item
-    if not items:
-        return []
-    return [translate_text(item, target_language) for item in items]
-# --- End Placeholder ---
+Please format your response clearly with headings:
 
+Summary:
+[Your summary of this part]
 
-def summarize_transcript(db: Session, meeting_id: int, transcript: str, detected_language: str) -> Optional[dict]:
-    """
-    Summarizes the transcript using LangChain and Ollama.
-    Generates English and Mandarin versions (using placeholders for translation).
-    Updates the meeting record with summaries, action items, and COMPLETED status.
-    Returns a dictionary with EN summary and action items if successful, otherwise None.
-    """
-    if not summarization_chain:
-        logger.error("Summarization chain/LLM not initialized. Cannot summarize.")
-        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="Summarization LLM not loaded")
-        return None
+Action Items:
+[Output a JSON list of strings representing the action items. If no action items are found, output an empty JSON list: []]
+"""
 
-    if not transcript:
-        logger.warning(f"Transcript is empty for meeting {meeting_id}. Skipping summarization.")
-        # Update status to completed as there's nothing to summarize
-        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.COMPLETED)
-        return {"summary": "Transcript was empty.", "action_items": "N/A"}
+# Reduce step: merge notes of consecutive parts into notes for the whole meeting
+reduce_prompt_template_text = """
+You are an expert meeting assistant. Below are notes on consecutive parts of one meeting, in order.
+Combine them into notes for the whole meeting:
+1. A concise summary of the key discussion points and decisions made. **Do NOT include specific action items or task assignments in the summary section.**
+2. A single list of the action items, merging duplicates and keeping who is responsible if mentioned.
 
-    logger.info(f"Starting summarization for meeting {meeting_id}...")
-    # Status should already be PROCESSING from ASR step
+Notes:
+{notes}
 
-    try:
-        # Run the summarization chain
-        # For LCEL chains (prompt | llm), the input is passed directly,
-        # and the output is typically the raw string response from the LLM.
-        raw_result = summarization_chain.invoke({"transcript": transcript})
+Please format your response clearly with headings:
 
-        logger.info(f"Raw LLM response received for meeting {meeting_id}.")
+Summary:
+[Your summary here - focus only on discussion points and decisions, not action items]
 
-        # --- Parse the LLM response ---
-        # This parsing logic assumes the LLM follows the prompt's formatting instructions.
-        # It might need adjustments based on actual LLM output.
-        summary_text = "Summary not found in response."
-        action_items_text = "Action items not found in response."
-        action_items_part = None # Initialize to None
+Action Items:
+[Output a JSON list of strings representing the action items. Example: ["Action item 1", "Follow up with Jane Doe"]. If no action items are found, output an empty JSON list: []]
+"""
 
+import json # Import json for storing list as string in DB
+import re
 
-        if "Summary:" in raw_result:
-            parts = raw_result.split("Action Items:", 1)
-            summary_part = parts[0].split("Summary:", 1)[1].strip()
-            summary_text = summary_part
+# --- LLM Calls ---
+# Prompts are sent through the shared Ollama client (services/llm_client.py), which pools
+# connections and caps concurrent generations across all workers in the process.
 
-            if len(parts) > 1:
-                action_items_part = parts[1].strip()
-                action_items_text = action_items_part
-            else:
-                 # Handle case where "Action Items:" heading might be missing but summary is present
-                 logger.warning(f"Could not find 'Action Items:' heading in LLM response for meeting {meeting_id}")
-                 action_items_text = "Action items section missing in LLM response."
+def _invoke(template_text: str, input_variable: str, value: str) -> str:
+    """
+    Fill a prompt template and generate the LLM response.
+    Raises llm_client.OllamaUnavailableError if the server can't be reached.
+    """
+    return llm_client.generate(template_text.format(**{input_variable: value}))
 
+def _is_parseable(response: str) -> bool:
+    # Unparseable responses are not cached so a retry asks the LLM again
+    return "Summary:" in response
+
+def warm_up():
+    """
+    Load the model on the Ollama server ahead of the first job (called by worker processes on start).
+    Failure is not fatal: jobs retry if the server is still unreachable when they run.
+    """
+    try:
+        llm_client.load_model()
+    except Exception as e:
+        logger.warning(f"Could not preload Ollama model {settings.OLLAMA_MODEL}: {e}")
+
+# --- Response Parsing ---
+def parse_summary_response(raw_result: str, meeting_id: int) -> Tuple[str, List[str]]:
+    """
+    Split an LLM response in the "Summary: / Action Items:" format into the summary text
+    and the list of action items.
+    """
+    # This parsing logic assumes the LLM follows the prompt's formatting instructions.
+    # It might need adjustments based on actual LLM output.
+    summary_text = "Summary not found in response."
+    action_items_part = None # Initialize to None
+
+    if "Summary:" in raw_result:
+        parts = raw_result.split("Action Items:", 1)
+        summary_text = parts[0].split("Summary:", 1)[1].strip()
+
+        if len(parts) > 1:
+            action_items_part = parts[1].strip()
         else:
-            # Fallback if the expected headings are missing (Corrected Indentation)
-            logger.warning(f"Could not find 'Summary:' heading in LLM response for meeting {meeting_id}. Using full response as summary.")
-            summary_text = raw_result # Use the whole response as summary if parsing fails
-            action_items_text = "Could not parse action items from response." # Keep this for logging if needed
-
-        # --- Improved Action Item JSON Parsing ---
-        action_items_list = [] # Default to empty list
-        if action_items_part: # Only attempt parsing if we found the section
-            try:
-                # Attempt to find and parse a JSON list within the action items part
-                # This regex looks for patterns like [...] or ['...'] or ["..."]
-                import re
-                match = re.search(r'\[.*?\]', action_items_part, re.DOTALL)
-                if match:
-                    json_str = match.group(0)
-                    parsed_json = json.loads(json_str)
-                    if isinstance(parsed_json, list):
-                        # Ensure all items in the list are strings
-                        action_items_list = [str(item) for item in parsed_json]
-                        logger.info(f"Successfully parsed JSON action items for meeting {meeting_id}.")
-                    else:
-                        logger.warning(f"Parsed JSON for action items is not a list for meeting {meeting_id}. Content: {json_str}")
+            # Handle case where "Action Items:" heading might be missing but summary is present
+            logger.warning(f"Could not find 'Action Items:' heading in LLM response for meeting {meeting_id}")
+
+    else:
+        # Fallback if the expected headings are missing
+        logger.warning(f"Could not find 'Summary:' heading in LLM response for meeting {meeting_id}. Using full response as summary.")
+        summary_text = raw_result # Use the whole response as summary if parsing fails
+
+    # --- Improved Action Item JSON Parsing ---
+    action_items_list = [] # Default to empty list
+    if action_items_part: # Only attempt parsing if we found the section
+        try:
+            # Attempt to find and parse a JSON list within the action items part
+            # This regex looks for patterns like [...] or ['...'] or ["..."]
+            match = re.search(r'\[.*?\]', action_items_part, re.DOTALL)
+            if match:
+                json_str = match.group(0)
+                parsed_json = json.loads(json_str)
+                if isinstance(parsed_json, list):
+                    # Ensure all items in the list are strings
+                    action_items_list = [str(item) for item in parsed_json]
                 else:
-                    logger.warning(f"Could not find JSON list pattern in action items section for meeting {meeting_id}. Content: {action_items_part}")
-            except json.JSONDecodeError:
-                logger.warning(f"Failed to decode JSON from action items section for meeting {meeting_id}. Content: {action_items_part}")
-            except Exception as parse_err:
-                 logger.error(f"Unexpected error parsing action items JSON for meeting {meeting_id}: {parse_err}", exc_info=True)
-        else:
-              logger.info(f"Action items section was empty or not found for meeting {meeting_id}.")
-        # --- End Improved Parsing ---
-
-        # --- Clean up summary text to remove any trailing action items section ---
-        # This ensures the summary field only contains the summary, even if the LLM included action items there.
-        if "Action Items:" in summary_text:
-            summary_text = summary_text.split("Action Items:", 1)[0].strip()
-            logger.info(f"Cleaned 'Action Items:' section from summary text for meeting {meeting_id}.")
-        # --- End Summary Cleanup ---
+                    logger.warning(f"Parsed JSON for action items is not a list for meeting {meeting_id}. Content: {json_str}")
+            else:
+                logger.warning(f"Could not find JSON list pattern in action items section for meeting {meeting_id}. Content: {action_items_part}")
+        except json.JSONDecodeError:
+            logger.warning(f"Failed to decode JSON from action items section for meeting {meeting_id}. Content: {action_items_part}")
+        except Exception as parse_err:
+            logger.error(f"Unexpected error parsing action items JSON for meeting {meeting_id}: {parse_err}", exc_info=True)
+    else:
+        logger.info(f"Action items section was empty or not found for meeting {meeting_id}.")
+    # --- End Improved Parsing ---
+
+    # --- Clean up summary text to remove any trailing action items section ---
+    # This ensures the summary field only contains the summary, even if the LLM included action items there.
+    if "Action Items:" in summary_text:
+        summary_text = summary_text.split("Action Items:", 1)[0].strip()
+
+    return summary_text, action_items_list
+
+def _merge_action_items(item_lists: List[List[str]]) -> List[str]:
+    """
+    Concatenate action item lists in order, dropping case/whitespace-insensitive duplicates.
+    """
+    merged, seen = [], set()
+    for items in item_lists:
+        for item in items:
+            normalized = " ".join(item.lower().split())
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                merged.append(item)
+    return merged
+
+# --- Single-call and Map-Reduce Summarization ---
+def _summarize_single(db: Session, meeting_id: int, transcript: str) -> Tuple[str, List[str]]:
+    """
+    Summarize a transcript that fits the context window with one LLM call.
+    """
+    # Run the summarization chain (or reuse the stored response for an identical transcript)
+    raw_result = llm_cache.cached_call(
+        db, "summary", {"transcript": transcript},
+        lambda: _invoke(prompt_template_text, "transcript", transcript),
+        model=settings.OLLAMA_MODEL, prompt_template=prompt_template_text, should_cache=_is_parseable
+    )
+    logger.info(f"Raw LLM response received for meeting {meeting_id}.")
+    return parse_summary_response(raw_result, meeting_id)
 
+def _format_notes(parts: List[Tuple[str, List[str]]], first_part: int = 1) -> str:
+    return "\n\n".join(
+        f"Part {first_part + i}:\nSummary: {summary}\nAction Items: {json.dumps(items, ensure_ascii=False)}"
+        for i, (summary, items) in enumerate(parts)
+    )
 
-        logger.info(f"Summarization and parsing complete for meeting {meeting_id}. Found {len(action_items_list)} action items.")
+def _summarize_map_reduce(db: Session, meeting_id: int, transcript: str) -> Tuple[str, List[str]]:
+    """
+    Summarize a transcript too long for one prompt:
+    map   - split it into token-bounded chunks and summarize them concurrently
+            (at most SUMMARY_MAP_CONCURRENCY calls in flight);
+    reduce- merge the partial notes, in groups that fit the budget, until one set remains.
+    Chunk boundaries are content-defined, so after a partial edit only the affected chunks
+    miss the cache; the others reuse their stored results.
+    """
+    chunks = text_chunking.chunk_text(transcript, settings.SUMMARY_CHUNK_TOKENS)
+    logger.info(f"Transcript for meeting {meeting_id} is long; summarizing {len(chunks)} parts (map-reduce).")
+
+    completed = 0
+    completed_lock = threading.Lock()
+
+    def summarize_chunk(payload: dict) -> str:
+        nonlocal completed
+        raw = _invoke(map_prompt_template_text, "transcript", payload["transcript"])
+        with completed_lock:
+            completed += 1
+            done = completed
+        events.publish_progress(meeting_id, events.STAGE_SUMMARIZING, status=models.MeetingStatus.PROCESSING.value,
+                                progress=done / (len(chunks) + 1), message=f"Summarized part {done} of {len(chunks)}")
+        return raw
+
+    raw_parts = llm_cache.cached_map(
+        db, "summary_map", [{"transcript": chunk} for chunk in chunks], summarize_chunk,
+        model=settings.OLLAMA_MODEL, prompt_template=map_prompt_template_text,
+        max_workers=settings.SUMMARY_MAP_CONCURRENCY, should_cache=_is_parseable
+    )
+    parts = [parse_summary_response(raw, meeting_id) for raw in raw_parts]
+    chunk_action_items = _merge_action_items([items for _, items in parts])
+
+    def reduce_notes(payload: dict) -> str:
+        return _invoke(reduce_prompt_template_text, "notes", payload["notes"])
+
+    # Hierarchical reduce: merge groups of consecutive notes until everything fits one prompt
+    while True:
+        groups, group, group_tokens = [], [], 0
+        for part in parts:
+            part_tokens = text_chunking.estimate_tokens(_format_notes([part]))
+            if group and group_tokens + part_tokens > settings.SUMMARY_CHUNK_TOKENS:
+                groups.append(group)
+                group, group_tokens = [], 0
+            group.append(part)
+            group_tokens += part_tokens
+        groups.append(group)
+
+        raw_reduced = llm_cache.cached_map(
+            db, "summary_reduce", [{"notes": _format_notes(g)} for g in groups], reduce_notes,
+            model=settings.OLLAMA_MODEL, prompt_template=reduce_prompt_template_text,
+            max_workers=settings.SUMMARY_MAP_CONCURRENCY, should_cache=_is_parseable
+        )
+        reduced = [parse_summary_response(raw, meeting_id) for raw in raw_reduced]
+        # Stop at a single result, or when grouping can no longer shrink the notes
+        if len(reduced) == 1 or len(groups) == len(parts):
+            break
+        parts = reduced
+
+    summary_text = "\n\n".join(summary for summary, _ in reduced)
+    action_items = _merge_action_items([items for _, items in reduced])
+    if not action_items and chunk_action_items:
+        # The reduce step dropped every item (e.g. unparseable list): fall back to the per-part items
+        logger.warning(f"Reduce step returned no action items for meeting {meeting_id}; using the per-part lists.")
+        action_items = chunk_action_items
+    return summary_text, action_items
+
+
+def generate_notes(db: Session, meeting_id: int, transcript: str) -> Tuple[str, List[str]]:
+    """
+    English summary and action items for a transcript, without storing them.
+    Transcripts within SUMMARY_SINGLE_CALL_MAX_TOKENS are summarized in one call, longer ones map-reduce.
+    Raises llm_client.OllamaUnavailableError, or another exception if summarization fails.
+    """
+    # Cached responses are reused before the LLM is needed, so they work while Ollama is down
+    if text_chunking.estimate_tokens(transcript) <= settings.SUMMARY_SINGLE_CALL_MAX_TOKENS:
+        return _summarize_single(db, meeting_id, transcript)
+    return _summarize_map_reduce(db, meeting_id, transcript)
 
-        # --- Generate English and Mandarin Versions (with Placeholder Translation) ---
-        # Assume the LLM primarily outputs English based on the prompt
-        summary_en = summary_text # Use the cleaned summary text
-        action_items_en = action_items_list
+def summarize_transcript(db: Session, meeting_id: int, transcript: str, detected_language: str) -> Optional[dict]:
+    """
+    Summarizes the transcript using Ollama (the pipeline's summarize stage).
+    Updates the meeting record with the English summary and action items; translation is a separate stage.
+    Returns a dictionary with EN summary and action items if successful, otherwise None.
+    """
+    if not transcript:
+        logger.warning(f"Transcript is empty for meeting {meeting_id}. Skipping summarization.")
+        return {"summary": "Transcript was empty.", "action_items": "N/A"}
 
-        # Placeholder: Translate to Mandarin
-        summary_zh = translate_text(summary_en, "zh")
-        action_items_zh = translate_action_items(action_items_en, "zh")
-        # --- End Generation ---
+    logger.info(f"Starting summarization for meeting {meeting_id}...")
+    # Status should already be PROCESSING from ASR step
 
+    try:
+        summary_text, action_items_list = generate_notes(db, meeting_id, transcript)
+        logger.info(f"Summarization and parsing complete for meeting {meeting_id}. Found {len(action_items_list)} action items.")
 
-        # Update the meeting record with language-specific fields
-        # Store action item lists as JSON strings in the database
+        # Assume the LLM primarily outputs English based on the prompt
         meeting_update = schemas.MeetingUpdate(
-            summary_en=summary_en,
-            summary_zh=summary_zh,
-            action_items_en=action_items_en, # Schema expects List[str]
-            action_items_zh=action_items_zh, # Schema expects List[str]
-            status=models.MeetingStatus.COMPLETED # Final status
+            summary_en=summary_text, # Use the cleaned summary text
+            action_items_en=action_items_list # Schema expects List[str]
         )
-        # The crud update function needs to handle converting the list to JSON string before saving
-        crud.update_meeting(db, meeting_id, meeting_update) 
+        crud.update_meeting(db, meeting_id, meeting_update)
 
         # Return the English versions for potential immediate use (though currently unused by caller)
-        return {"summary": summary_en, "action_items": action_items_en}
+        return {"summary": summary_text, "action_items": action_items_list}
 
+    except llm_client.OllamaUnavailableError as e:
+        logger.error(f"Ollama is unreachable. Cannot summarize meeting {meeting_id}: {e}")
+        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="Summarization LLM unavailable")
+        return None
     except Exception as e:
-        logger.error(f"Error during LangChain/Ollama summarization for meeting {meeting_id}: {e}", exc_info=True)
+        logger.error(f"Error during Ollama summarization for meeting {meeting_id}: {e}", exc_info=True)
         crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message=f"Summarization failed: {e}")
         return None
+
+
+def _is_mostly_chinese(text: str) -> bool:
+    """
+    True if at least half of the text's letters are CJK ideographs.
+    """
+    letters = [ch for ch in text if ch.isalpha()]
+    han = sum(1 for ch in letters if "\u4e00" <= ch <= "\u9fff" or "\u3400" <= ch <= "\u4dbf")
+    return bool(letters) and han * 2 >= len(letters)
+
+def translate_notes(db: Session, summary_en: str, action_items_en: List[str]) -> Tuple[str, List[str]]:
+    """
+    Mandarin versions of a summary and its action items, without storing them: one batched, cached
+    LLM request. Notes that are already written in Chinese are returned as they are.
+    Raises llm_client.OllamaUnavailableError, or translation.TranslationError.
+    """
+    texts = [summary_en] + list(action_items_en)
+    written = [text for text in texts if text and text.strip()]
+    if written and all(_is_mostly_chinese(text) for text in written):
+        return summary_en, list(action_items_en)
+    translated = translation.translate_texts(db, texts, "zh")
+    return translated[0], translated[1:]
+
+def translate_summary(db: Session, meeting_id: int) -> Optional[dict]:
+    """
+    Generates the Mandarin summary and action items from the English ones (the pipeline's
+    translate stage). The notes are written in English whatever the meeting's language, so
+    Mandarin meetings are translated too.
+    Returns a dictionary with ZH summary and action items if successful, otherwise None.
+    """
+    db_meeting = crud.get_meeting(db, meeting_id)
+    if db_meeting is None:
+        logger.error(f"Meeting not found for ID: {meeting_id}")
+        return None
+    try:
+        summary_zh, action_items_zh = translate_notes(db, db_meeting.summary_en or "", db_meeting.action_items_en or [])
+        crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(summary_zh=summary_zh, action_items_zh=action_items_zh))
+        return {"summary": summary_zh, "action_items": action_items_zh}
+    except llm_client.OllamaUnavailableError as e:
+        logger.error(f"Ollama is unreachable. Cannot translate meeting {meeting_id}: {e}")
+        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="Translation LLM unavailable")
+        return None
+    except Exception as e:
+        logger.error(f"Error translating the summary of meeting {meeting_id}: {e}", exc_info=True)
+        crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message=f"Translation failed: {e}")
+        return None
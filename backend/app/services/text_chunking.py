@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import re
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Han, Hiragana/Katakana and Hangul characters are roughly one token each
+_CJK_CHAR_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+# Sentence ends (Latin and CJK punctuation) or line breaks
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?。！？])\s+|(?<=[。！？])|\n+")
+
+# --- Token Estimation ---
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for budgeting prompts without loading the model's tokenizer:
+    about four characters per token for alphabetic text, one per CJK character.
+    Deliberately errs on the high side so chunks stay inside the context window.
+    """
+    if not text:
+        return 0
+    cjk_chars = len(_CJK_CHAR_PATTERN.findall(text))
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences (or lines, for transcripts without punctuation).
+    """
+    return [s.strip() for s in _SENTENCE_END_PATTERN.split(text or "") if s and s.strip()]
+
+# --- Content-defined Chunking ---
+def _is_boundary(sentence: str, boundary_modulus: int) -> bool:
+    digest = hashlib.blake2b(sentence.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % boundary_modulus == 0
+
+def chunk_text(text: str, max_tokens: int, boundary_modulus: int = 4) -> List[str]:
+    """
+    Split text into chunks of at most `max_tokens` (estimated) along sentence boundaries.
+
+    Cut points are content-defined: once a chunk holds at least half the budget, it ends after
+    any sentence whose hash is divisible by `boundary_modulus`. An edit therefore only changes
+    the chunk it falls in (and at most its neighbour), and the other chunks stay byte-identical,
+    so their cached LLM results are reused. Chunks are also cut when the budget would overflow.
+    A single sentence longer than the budget is split on whitespace.
+    """
+    min_tokens = max_tokens // 2
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(" ".join(current))
+        current, current_tokens = [], 0
+
+    for sentence in split_sentences(text):
+        pieces = [sentence]
+        if estimate_tokens(sentence) > max_tokens:
+            pieces = _split_long_sentence(sentence, max_tokens)
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > max_tokens:
+                flush()
+            current.append(piece)
+            current_tokens += piece_tokens + 1 # +1 for the joining space
+            if current_tokens >= min_tokens and _is_boundary(piece, boundary_modulus):
+                flush()
+    flush()
+    return chunks
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> List[str]:
+    """
+    Break an over-long sentence into pieces within the budget (words, or characters for CJK).
+    """
+    words = sentence.split()
+    if len(words) <= 1:
+        # No spaces (e.g. unpunctuated CJK): cut by characters
+        step = max(max_tokens, 1)
+        return [sentence[i:i + step] for i in range(0, len(sentence), step)]
+    pieces, current, current_tokens = [], [], 0
+    for word in words:
+        word_tokens = estimate_tokens(word) + 1
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
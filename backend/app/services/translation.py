@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from . import llm_cache, llm_client, text_chunking
+
+logger = logging.getLogger(__name__)
+
+# --- Batched, Cached Translation ---
+# Meeting notes are translated by the local LLM (TRANSLATION_MODEL, default OLLAMA_MODEL) in as few
+# requests as possible: every text of a meeting (the summary and each action item) goes into one
+# prompt, and the model answers with structured JSON, one translation per text. Prompts are split
+# only when the texts exceed TRANSLATION_BATCH_MAX_TOKENS.
+# Each translation is cached under (SHA-256 of the text, target language) in the LLM result cache,
+# so recurring phrases ("Send the minutes to the team") and reprocessed meetings skip the LLM.
+# If a reply doesn't contain one translation per text, the batch's texts are translated one by one.
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "zh": "Simplified Chinese",
+}
+
+translation_prompt_template_text = """
+You are a professional translator of meeting notes. Translate each text in the JSON list below into {language_name}.
+Keep names, numbers, dates and product terms as they are, and keep each text's meaning and tone.
+Reply with a JSON object of the form {{"translations": ["..."]}} holding exactly one translation per text, in the same order.
+
+Texts:
+{texts}
+"""
+
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {"translations": {"type": "array", "items": {"type": "string"}}},
+    "required": ["translations"],
+}
+
+
+class TranslationError(Exception):
+    """
+    Raised when the LLM does not return a usable translation.
+    """
+
+
+def _model() -> str:
+    return settings.TRANSLATION_MODEL or settings.OLLAMA_MODEL
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _request(texts: List[str], target_language: str) -> Optional[List[str]]:
+    """
+    One LLM call translating `texts`. Returns None if the reply doesn't hold one string per text.
+    """
+    prompt = translation_prompt_template_text.format(
+        language_name=LANGUAGE_NAMES.get(target_language, target_language),
+        texts=json.dumps(texts, ensure_ascii=False, indent=1),
+    )
+    raw = llm_client.generate(prompt, model=_model(), response_format=RESPONSE_SCHEMA, options={"temperature": 0})
+    try:
+        translations = json.loads(raw).get("translations")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(translations, list) or len(translations) != len(texts):
+        return None
+    if not all(isinstance(translation, str) and translation.strip() for translation in translations):
+        return None
+    return [translation.strip() for translation in translations]
+
+def _batches(texts: List[str]) -> List[List[str]]:
+    batches, batch, batch_tokens = [], [], 0
+    for text in texts:
+        tokens = text_chunking.estimate_tokens(text)
+        if batch and batch_tokens + tokens > settings.TRANSLATION_BATCH_MAX_TOKENS:
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _translate_uncached(texts: List[str], target_language: str) -> List[str]:
+    """
+    Translate texts with as few LLM calls as the batch budget allows.
+    Raises TranslationError if a text can't be translated even on its own.
+    """
+    translations = []
+    for batch in _batches(texts):
+        result = _request(batch, target_language)
+        if result is None:
+            logger.warning(f"Batched translation of {len(batch)} texts to '{target_language}' returned an unusable "
+                           f"reply; translating them one by one.")
+            result = []
+            for text in batch:
+                single = _request([text], target_language)
+                if single is None:
+                    raise TranslationError(f"No usable translation to '{target_language}' for: {text[:80]!r}")
+                result.extend(single)
+        translations.extend(result)
+    return translations
+
+def translate_texts(db: Session, texts: List[str], target_language: str) -> List[str]:
+    """
+    Translate texts into `target_language`, reusing cached translations.
+    Empty texts are returned as they are and duplicates are translated once.
+    Raises TranslationError, or llm_client.OllamaUnavailableError if the server can't be reached.
+    """
+    unique = list(dict.fromkeys(text for text in texts if text and text.strip()))
+    if not unique:
+        return list(texts)
+    by_hash = {text_hash(text): text for text in unique}
+
+    def translate_batch(payloads: List[dict]) -> List[Optional[str]]:
+        return _translate_uncached([by_hash[payload["text_sha256"]] for payload in payloads], target_language)
+
+    results = llm_cache.cached_batch(
+        db, "translation", [{"text_sha256": text_hash(text), "target": target_language} for text in unique],
+        translate_batch, model=_model(), prompt_template=translation_prompt_template_text,
+    )
+    translated = dict(zip(unique, results))
+    return [translated.get(text, text) for text in texts]
@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import os
+import threading
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from .. import crud, models
+from ..config import settings
+from ..database import write_transaction
+from . import events, storage
+
+logger = logging.getLogger(__name__)
+
+WRITE_BUFFER_SIZE = 1024 * 1024 # Request body is written (and hashed) in 1 MiB batches off the event loop
+
+# --- Resumable Uploads ---
+# Each PATCH appends to UPLOAD_DIR/incoming/<upload id><ext> at the server-side offset. The
+# SHA-256 is updated as bytes arrive; the running hash is kept in memory per upload and
+# rebuilt from the partial file if this process didn't see the previous chunks (restart, or
+# another API process). On the last chunk the file is renamed into the blob store (same
+# filesystem, so no copy), the duration is read from its header, and only then the meeting is
+# created and its processing job queued.
+
+_hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {} # upload id -> (offset hashed up to, hasher)
+_hashers_lock = threading.Lock()
+
+
+def _hasher_at(db_upload: models.UploadSession):
+    """
+    Return a SHA-256 hasher that has consumed exactly the upload's first `offset` bytes.
+    """
+    with _hashers_lock:
+        cached = _hashers.pop(db_upload.id, None)
+    if cached is not None and cached[0] == db_upload.offset:
+        return cached[1]
+
+    hasher = hashlib.sha256()
+    remaining = db_upload.offset
+    with open(db_upload.file_path, "rb") as f:
+        while remaining > 0:
+            chunk = f.read(min(storage.COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError(f"Partial upload {db_upload.id} is shorter than its recorded offset")
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def _write_batch(f, hasher, data: bytes):
+    f.write(data)
+    hasher.update(data)
+
+
+def start_upload(db: Session, upload_id: str, filename: str, content_type: Optional[str], total_size: int) -> models.UploadSession:
+    """
+    Create the partial file and the upload session. Expired incomplete uploads are cleaned up first.
+    """
+    for stale_id, stale_path in crud.pop_expired_upload_sessions(db):
+        with _hashers_lock:
+            _hashers.pop(stale_id, None) # Abandoned uploads never reach finish_upload
+        if stale_path and os.path.exists(stale_path):
+            os.remove(stale_path)
+            logger.info(f"Removed expired partial upload {stale_path}")
+
+    os.makedirs(storage.incoming_dir(), exist_ok=True)
+    extension = os.path.splitext(filename)[1].lower()
+    file_path = os.path.join(storage.incoming_dir(), f"{upload_id}{extension}")
+    open(file_path, "wb").close()
+    return crud.create_upload_session(db, upload_id, filename, content_type, total_size, file_path,
+                                      ttl_seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+async def append_chunk(db: AsyncSession, db_upload: models.UploadSession, body: AsyncIterator[bytes]) -> int:
+    """
+    Write a PATCH body at the upload's current offset and record the new offset.
+    Bytes received before a client disconnect are kept, so the client can resume from there.
+    Raises storage.UploadTooLargeError if the body runs past the declared upload length
+    (the bytes before that point are kept). Returns the new offset.
+    """
+    upload_id, start_offset = db_upload.id, db_upload.offset
+    hasher = await run_in_threadpool(_hasher_at, db_upload)
+    offset = start_offset
+    buffer = bytearray()
+    too_large = False
+
+    f = open(db_upload.file_path, "r+b")
+    try:
+        f.seek(start_offset)
+        f.truncate() # Drop bytes of an earlier, interrupted request that were never committed
+        try:
+            async for chunk in body:
+                if offset + len(buffer) + len(chunk) > db_upload.total_size:
+                    too_large = True
+                    break
+                buffer += chunk
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    await run_in_threadpool(_write_batch, f, hasher, bytes(buffer))
+                    offset += len(buffer)
+                    buffer.clear()
+        except ClientDisconnect:
+            logger.info(f"Client disconnected during upload {upload_id}; keeping {offset + len(buffer) - start_offset} new bytes.")
+        if buffer:
+            await run_in_threadpool(_write_batch, f, hasher, bytes(buffer))
+            offset += len(buffer)
+        await run_in_threadpool(lambda: (f.flush(), os.fsync(f.fileno())))
+    finally:
+        f.close()
+
+    if not await db.run_sync(crud.advance_upload_offset, upload_id, start_offset, offset, settings.UPLOAD_SESSION_TTL_SECONDS):
+        # Another request moved the offset meanwhile; its bytes win, ours are discarded
+        raise RuntimeError(f"Upload {upload_id} was modified concurrently")
+    with _hashers_lock:
+        _hashers[upload_id] = (offset, hasher)
+    if too_large:
+        raise storage.UploadTooLargeError(f"Upload {upload_id} body exceeds its declared length of {db_upload.total_size} bytes")
+    return offset
+
+
+def _publish_queued(meeting_id: int):
+    events.publish_progress(meeting_id, events.STAGE_QUEUED, status=models.MeetingStatus.PENDING.value, message="Queued")
+
+
+def _register_audio(db: Session, source_path: str, filename: str, content_hash: str, size_bytes: int,
+                    duration: Optional[float], upload_id: Optional[str] = None) -> int:
+    """
+    Database part of finishing an upload: store the blob, create the meeting, queue its job.
+    The records are written in one transaction, so a failure leaves neither a meeting without
+    audio nor a blob reference without a meeting, and the file is back at `source_path`.
+    """
+    extension = os.path.splitext(filename)[1]
+    with write_transaction(db): # The blob's row can't change until the meeting is registered
+        stored_path = storage.stored_blob_path(db, content_hash)
+        file_path = stored_path or storage.blob_path(content_hash, extension)
+        if stored_path is None:
+            os.makedirs(storage.blob_dir(), exist_ok=True)
+            os.replace(source_path, file_path)
+        try:
+            db_meeting = crud.create_uploaded_meeting(db, upload_id, filename, file_path, content_hash,
+                                                      size_bytes, duration, settings.JOB_MAX_ATTEMPTS)
+        except Exception:
+            if stored_path is None:
+                os.replace(file_path, source_path)
+            raise
+    if stored_path is not None:
+        os.remove(source_path)
+        logger.info(f"Upload matches stored audio {content_hash[:12]}; reusing {stored_path}")
+    logger.info(f"Processing job queued for meeting {db_meeting.id}")
+    _publish_queued(db_meeting.id)
+    return db_meeting.id
+
+
+def _register_upload(db: Session, db_upload: models.UploadSession, content_hash: str, duration: Optional[float]) -> int:
+    # On failure the partial file is put back, and the upload can be finished again
+    return _register_audio(db, db_upload.file_path, db_upload.filename, content_hash, db_upload.total_size,
+                           duration, upload_id=db_upload.id)
+
+
+def register_uploaded_file(db: Session, tmp_path: str, filename: str, content_hash: str, size_bytes: int,
+                           duration: Optional[float]) -> int:
+    """
+    Store a file received in a single request (hashed into `tmp_path`), create its meeting and
+    queue processing, all or nothing; the temp file is removed if that fails. Returns the meeting ID.
+    """
+    try:
+        return _register_audio(db, tmp_path, filename, content_hash, size_bytes, duration)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+async def finish_upload(db: AsyncSession, db_upload: models.UploadSession) -> int:
+    """
+    Move a complete upload into the blob store, create its meeting and queue processing.
+    Returns the meeting ID.
+    """
+    with _hashers_lock:
+        cached = _hashers.pop(db_upload.id, None)
+    hasher = cached[1] if cached is not None and cached[0] == db_upload.total_size else None
+    if hasher is None:
+        hasher = await run_in_threadpool(_hasher_at, db_upload)
+    content_hash = hasher.hexdigest()
+
+    duration = await run_in_threadpool(storage.probe_duration, db_upload.file_path)
+    meeting_id = await db.run_sync(_register_upload, db_upload, content_hash, duration)
+    logger.info(f"Resumable upload {db_upload.id} complete: meeting {meeting_id}, "
+                f"{db_upload.total_size} bytes, sha256 {content_hash[:12]}, duration {duration}")
+    return meeting_id
+
+
+def abort_upload(db: Session, db_upload: models.UploadSession):
+    """
+    Discard an incomplete upload and its partial file.
+    """
+    with _hashers_lock:
+        _hashers.pop(db_upload.id, None)
+    if db_upload.meeting_id is None and os.path.exists(db_upload.file_path):
+        os.remove(db_upload.file_path)
+    crud.delete_upload_session(db, db_upload.id)
@@ -0,0 +1,237 @@
+"""
+Processing worker for the durable job queue.
+
+Workers poll the `processing_jobs` table, claim a job with a lease, keep the lease alive
+with heartbeats while the meeting is processed, and record success or failure.
+Any number of workers (threads, processes or nodes) can share the same database.
+
+Run standalone workers from the backend directory:
+    python -m app.worker --threads 2
+"""
+import argparse
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import List, Optional
+
+from . import crud, models, search_index
+from .config import settings
+from .database import SessionLocal, engine, create_database_tables
+from .services import events
+
+logger = logging.getLogger(__name__)
+
+
+class _LeaseHeartbeat:
+    """
+    Context manager that extends a job's lease on a background thread while the job runs.
+    """
+    def __init__(self, session_factory, job_id: int, worker_id: str):
+        self.session_factory = session_factory
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-job-{job_id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+            db = self.session_factory()
+            try:
+                if not crud.heartbeat_job(db, self.job_id, self.worker_id, settings.JOB_LEASE_SECONDS):
+                    logger.warning(f"Worker {self.worker_id} lost the lease on job {self.job_id}.")
+                    self.lease_lost.set()
+                    return
+            except Exception as e:
+                # A missed heartbeat is not fatal, the lease still has time left
+                logger.error(f"Heartbeat failed for job {self.job_id}: {e}", exc_info=True)
+            finally:
+                db.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+class Worker:
+    """
+    Pulls processing jobs from the database queue and runs the meeting pipeline.
+    """
+    def __init__(self, session_factory=SessionLocal, worker_id: Optional[str] = None):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stop_event = threading.Event()
+
+    def run_once(self) -> bool:
+        """
+        Recover expired leases, then claim and process at most one job.
+        Returns True if a job was processed, False if the queue was empty.
+        """
+        # Imported here so the pipeline (and its ML dependencies) only loads in processes that run jobs
+        from .services.pipeline import process_meeting_audio
+
+        db = self.session_factory()
+        try:
+            crud.recover_expired_jobs(db)
+            db_job = crud.claim_next_job(db, self.worker_id, settings.JOB_LEASE_SECONDS,
+                                         max_running_low_priority=settings.ASR_UPGRADE_MAX_RUNNING)
+            if db_job is None:
+                return False
+            job_id, meeting_id, attempt = db_job.id, db_job.meeting_id, db_job.attempts
+            from_stage = models.PipelineStage(db_job.from_stage) if db_job.from_stage else None
+            asr_model = db_job.asr_model
+        finally:
+            db.close()
+
+        logger.info(f"Worker {self.worker_id} claimed job {job_id} for meeting {meeting_id} (attempt {attempt}).")
+        with _LeaseHeartbeat(self.session_factory, job_id, self.worker_id) as heartbeat:
+            try:
+                success = process_meeting_audio(self.session_factory, meeting_id, from_stage=from_stage, asr_model=asr_model)
+                error = None if success else ("Quality upgrade failed" if asr_model else "Meeting processing failed")
+            except Exception as e:
+                logger.error(f"Unhandled exception in job {job_id}: {e}", exc_info=True)
+                success, error = False, f"Worker error: {e}"
+
+        if heartbeat.lease_lost.is_set():
+            # Another worker has taken over (or the job was failed by recovery); don't touch it
+            logger.warning(f"Discarding result of job {job_id}: lease no longer held by {self.worker_id}.")
+            return True
+
+        db = self.session_factory()
+        try:
+            if success:
+                crud.complete_job(db, job_id, self.worker_id)
+                self._schedule_quality_upgrade(db, meeting_id)
+                return True
+
+            if asr_model is not None:
+                # A failed quality upgrade left the COMPLETED meeting untouched; only the job records it
+                new_status = crud.fail_job(db, job_id, self.worker_id, error,
+                                           settings.JOB_RETRY_BACKOFF_SECONDS)
+                logger.warning(f"Quality upgrade job {job_id} for meeting {meeting_id} failed on attempt {attempt} "
+                               f"({'will retry' if new_status == models.JobStatus.QUEUED else 'dropped'}).")
+                return True
+
+            db_meeting = crud.get_meeting(db, meeting_id)
+            if db_meeting and db_meeting.error_message:
+                error = db_meeting.error_message
+            new_status = crud.fail_job(db, job_id, self.worker_id, error, settings.JOB_RETRY_BACKOFF_SECONDS)
+            if new_status == models.JobStatus.QUEUED:
+                logger.warning(f"Job {job_id} for meeting {meeting_id} failed on attempt {attempt}; will retry.")
+                crud.update_meeting_status(db, meeting_id, models.MeetingStatus.PENDING)
+                events.publish_progress(meeting_id, events.STAGE_QUEUED, status=models.MeetingStatus.PENDING.value,
+                                        message=f"Retrying after failed attempt {attempt}")
+            else:
+                logger.error(f"Job {job_id} for meeting {meeting_id} failed permanently after {attempt} attempts.")
+                events.publish_progress(meeting_id, events.STAGE_FAILED, status=models.MeetingStatus.FAILED.value,
+                                        message=error)
+        finally:
+            db.close()
+        return True
+
+    def _schedule_quality_upgrade(self, db, meeting_id: int):
+        """
+        Queue a low-priority re-transcription if the tiering policy used a smaller model than the target.
+        """
+        from .services import asr, asr_tiering
+        try:
+            db_meeting = crud.get_meeting(db, meeting_id)
+            if db_meeting is not None and db_meeting.asr_model:
+                asr_tiering.schedule_upgrade(db, meeting_id, asr.model_for_language(db_meeting.detected_language))
+        except Exception as e:
+            logger.error(f"Could not schedule a quality upgrade for meeting {meeting_id}: {e}", exc_info=True)
+
+    def run_forever(self):
+        """
+        Process jobs until `stop()` is called, sleeping between polls while the queue is empty.
+        """
+        logger.info(f"Worker {self.worker_id} started.")
+        while not self.stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} poll failed: {e}", exc_info=True)
+                processed = False
+            if not processed:
+                self.stop_event.wait(settings.WORKER_POLL_INTERVAL_SECONDS)
+        logger.info(f"Worker {self.worker_id} stopped.")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+# --- Embedded Workers (run inside the API process) ---
+_embedded_workers: List[Worker] = []
+_embedded_threads: List[threading.Thread] = []
+
+def start_embedded_workers(count: int):
+    """
+    Start `count` worker threads inside the current process.
+    """
+    for _ in range(count):
+        worker = Worker()
+        thread = threading.Thread(target=worker.run_forever, name=f"worker-{worker.worker_id}", daemon=True)
+        thread.start()
+        _embedded_workers.append(worker)
+        _embedded_threads.append(thread)
+
+def stop_embedded_workers(timeout: Optional[float] = None):
+    """
+    Signal embedded workers to stop and wait for their current job to finish.
+    Unfinished jobs are recovered by other workers once their lease expires.
+    """
+    for worker in _embedded_workers:
+        worker.stop()
+    for thread in _embedded_threads:
+        thread.join(timeout)
+    _embedded_workers.clear()
+    _embedded_threads.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Fluent Office Notes processing workers.")
+    parser.add_argument("--threads", type=int, default=1, help="Number of worker threads in this process")
+    parser.add_argument("--no-warm-up", action="store_true", help="Load models on the first job instead of at startup")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    if settings.API_ONLY:
+        parser.error("API_ONLY is set; workers need the ASR and LLM models. Unset it for worker processes.")
+
+    # Make sure the job table exists when workers start before the API
+    create_database_tables()
+    search_index.ensure_search_index(engine)
+
+    if not args.no_warm_up:
+        from .services.pipeline import warm_up
+        logger.info("Warming up ASR and LLM models...")
+        try:
+            warm_up()
+        except Exception as e:
+            # Jobs will retry the load and fail individually if the models are still unavailable
+            logger.error(f"Model warm-up failed: {e}", exc_info=True)
+
+    workers = [Worker() for _ in range(max(args.threads, 1))]
+    threads = [threading.Thread(target=w.run_forever, name=f"worker-{w.worker_id}") for w in workers]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        logger.info("Shutting down workers after their current jobs...")
+        for worker in workers:
+            worker.stop()
+        for thread in threads:
+            thread.join()
+
+
+if __name__ == "__main__":
+    main()
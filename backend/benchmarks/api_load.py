@@ -0,0 +1,158 @@
+"""
+Load test: API latency under concurrent reads and writes.
+
+Starts the API with uvicorn in-process (temporary SQLite database, no embedded workers), seeds
+`--meetings` meetings with full transcripts, then runs two phases of `--duration` seconds each:
+readers only, and readers alongside writers uploading small recordings (each upload writes the
+file, the meeting, its blob and its job). Readers alternate between GET /api/meetings/{id} and the
+list endpoint. Reports per-operation throughput and p50/p95/p99 latency for each phase.
+
+Usage (from the backend directory):
+    python -m benchmarks.api_load --readers 32 --writers 8 --duration 10 --output api_load.json
+"""
+import argparse
+import asyncio
+import datetime
+import io
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+import wave
+
+
+def make_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(os.urandom(int(16000 * seconds) * 2))
+    return buffer.getvalue()
+
+
+def seed(engine, models, count: int, transcript_chars: int):
+    words = ["budget", "roadmap", "release", "hiring", "customer", "latency", "review", "design"]
+    rng = random.Random(0)
+    transcript = " ".join(rng.choice(words) for _ in range(transcript_chars // 7))
+    start = datetime.datetime(2024, 1, 1)
+    rows = [{
+        "filename": f"meeting_{i}.wav",
+        "upload_time": start + datetime.timedelta(minutes=i),
+        "status": models.MeetingStatus.COMPLETED,
+        "detected_language": "en",
+        "transcript": transcript,
+        "summary_en": transcript[:2000],
+        "action_items_en": [f"Follow up on {w}" for w in words],
+    } for i in range(count)]
+    with engine.begin() as conn:
+        conn.execute(models.Meeting.__table__.insert(), rows)
+
+
+def percentiles(latencies: list) -> dict:
+    if not latencies:
+        return {"count": 0}
+    latencies = sorted(latencies)
+    pick = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 1)
+    return {"count": len(latencies), "p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": pick(1.0)}
+
+
+async def run_phase(base_url: str, meeting_count: int, readers: int, writers: int, duration: float, audio: bytes) -> dict:
+    import httpx
+
+    latencies = {"get_meeting": [], "list_meetings": [], "upload": []}
+    errors = {}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=readers + writers, max_keepalive_connections=readers + writers)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        async def timed(kind: str, request):
+            t0 = time.perf_counter()
+            try:
+                response = await request
+                response.raise_for_status()
+                latencies[kind].append(time.perf_counter() - t0)
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+
+        async def reader(seed_value: int):
+            rng = random.Random(seed_value)
+            while time.perf_counter() < deadline:
+                if rng.random() < 0.7:
+                    await timed("get_meeting", client.get(f"/api/meetings/{rng.randint(1, meeting_count)}"))
+                else:
+                    await timed("list_meetings", client.get("/api/meetings/", params={"limit": 50}))
+
+        async def writer():
+            while time.perf_counter() < deadline:
+                files = {"file": ("load.wav", audio, "audio/wav")}
+                await timed("upload", client.post("/api/meetings/upload", files=files))
+
+        await asyncio.gather(*[reader(i) for i in range(readers)], *[writer() for _ in range(writers)])
+
+    result = {kind: {**percentiles(values), "rps": round(len(values) / duration, 1)} for kind, values in latencies.items() if values}
+    result["errors"] = errors
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with concurrent reads and writes.")
+    parser.add_argument("--meetings", type=int, default=2000)
+    parser.add_argument("--transcript-chars", type=int, default=50000)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per phase")
+    parser.add_argument("--audio-seconds", type=float, default=30.0, help="Length of each uploaded recording")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="api_load_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(tmp, "uploads")
+    os.environ["EMBEDDED_WORKERS"] = "0"
+    os.environ["PDF_PRERENDER"] = "false"
+
+    # Imported after the environment points the app at the temporary database
+    import uvicorn
+    from app import models
+    from app.database import create_database_tables, engine
+    from app.main import app
+
+    create_database_tables()
+    seed(engine, models, args.meetings, args.transcript_chars)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    audio = make_wav(args.audio_seconds)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        results = {
+            "meetings": args.meetings,
+            "readers": args.readers,
+            "writers": args.writers,
+            "upload_bytes": len(audio),
+            "reads_only": asyncio.run(run_phase(base_url, args.meetings, args.readers, 0, args.duration, audio)),
+            "reads_and_writes": asyncio.run(run_phase(base_url, args.meetings, args.readers, args.writers, args.duration, audio)),
+        }
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Wall-clock benchmark: single-pass vs chunked parallel Whisper transcription.
+
+A source recording is tiled to each requested length, then transcribed both ways.
+Reports wall time, real-time factor and speed-up per length.
+
+Usage (from the backend directory):
+    python -m benchmarks.asr_chunking --audio uploads/meeting_1.mp3 --minutes 5 15 30 --workers 4
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services import asr, decoded_audio
+from app.services.audio_chunking import SAMPLE_RATE
+
+
+def tile_audio(audio: np.ndarray, seconds: float, tmp_dir: str):
+    """
+    Tile the source to `seconds` and store it like the decode stage does (int16 PCM file).
+    Returns the memory-mapped samples and the PCM path.
+    """
+    target = int(seconds * SAMPLE_RATE)
+    repeats = -(-target // len(audio)) # Ceiling division
+    pcm_path = os.path.join(tmp_dir, f"tiled_{int(seconds)}.16k_s16.pcm")
+    np.tile(audio, repeats)[:target].tofile(pcm_path)
+    return np.memmap(pcm_path, dtype=np.int16, mode="c"), pcm_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-pass and chunked transcription wall-clock time.")
+    parser.add_argument("--audio", help="Source recording (defaults to the first file in UPLOAD_DIR)")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[5, 15, 30])
+    parser.add_argument("--workers", type=int, default=0, help="Chunked ASR processes (0 = one per core)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    audio_path = args.audio
+    if not audio_path:
+        candidates = sorted(glob.glob(os.path.join(settings.UPLOAD_DIR, "*")))
+        if not candidates:
+            parser.error(f"No --audio given and no files in {settings.UPLOAD_DIR}")
+        audio_path = candidates[0]
+
+    settings.DECODED_AUDIO_DTYPE = "int16"
+    source = np.array(decoded_audio.load(audio_path))
+    tmp_dir = tempfile.mkdtemp(prefix="asr_chunking_bench_")
+    model = asr.get_whisper_model()
+    settings.ASR_WORKERS = args.workers
+    workers = asr._asr_worker_count()
+
+    # Start the pool (and load its models) before timing anything
+    asr._transcribe_chunked(*tile_audio(source, 2 * settings.ASR_CHUNK_SECONDS, tmp_dir), workers)
+
+    results = []
+    for minutes in args.minutes:
+        audio, pcm_path = tile_audio(source, minutes * 60, tmp_dir)
+        t0 = time.perf_counter()
+        asr._transcribe_single(model, audio)
+        single_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        asr._transcribe_chunked(audio, pcm_path, workers)
+        chunked_s = time.perf_counter() - t0
+
+        row = {
+            "minutes": minutes,
+            "workers": workers,
+            "single_s": round(single_s, 2),
+            "chunked_s": round(chunked_s, 2),
+            "single_rtf": round(single_s / (minutes * 60), 4),
+            "chunked_rtf": round(chunked_s / (minutes * 60), 4),
+            "speedup": round(single_s / chunked_s, 2),
+        }
+        print(json.dumps(row))
+        results.append(row)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"audio": audio_path, "model": settings.WHISPER_MODEL, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
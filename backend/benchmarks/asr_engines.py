@@ -0,0 +1,124 @@
+"""
+Parity and speed benchmark of the ASR engines (settings.ASR_ENGINE) on the recordings in UPLOAD_DIR.
+
+Each engine runs in its own process, so peak memory (max RSS) covers only that engine: it loads
+`--model`, then transcribes every recording in one pass with the language detected.
+Reported per engine and recording: load time, transcription time, real-time factor and detected
+language; per engine: peak memory and word-level agreement with the first engine, i.e. the share
+of the reference transcript's words found in the same order (case and punctuation ignored).
+
+Usage (from the backend directory):
+    python -m benchmarks.asr_engines --engines whisper faster-whisper --model base --limit 5
+"""
+import argparse
+import difflib
+import glob
+import json
+import multiprocessing
+import os
+import re
+import resource
+import time
+
+ARCHIVE_SUFFIXES = (".pcm", ".tmp")
+
+
+def find_recordings(upload_dir: str, limit: int):
+    paths = glob.glob(os.path.join(upload_dir, "*")) + glob.glob(os.path.join(upload_dir, "blobs", "*"))
+    recordings = sorted(path for path in paths if os.path.isfile(path) and not path.endswith(ARCHIVE_SUFFIXES))
+    return recordings[:limit] if limit else recordings
+
+
+def words(text: str):
+    return re.findall(r"\w+", text.lower())
+
+
+def word_agreement(reference: str, hypothesis: str) -> float:
+    reference_words = words(reference)
+    if not reference_words:
+        return 1.0 if not words(hypothesis) else 0.0
+    matcher = difflib.SequenceMatcher(None, reference_words, words(hypothesis), autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / len(reference_words)
+
+
+def run_engine(engine_name: str, model_name: str, recordings, threads: int, queue):
+    """
+    Child process: load the model with one engine and transcribe every recording.
+    """
+    os.environ["ASR_ENGINE"] = engine_name
+    from app.services import asr_engines, decoded_audio
+    from app.services.audio_chunking import SAMPLE_RATE
+
+    engine = asr_engines.get_asr_engine(engine_name)
+    t0 = time.perf_counter()
+    model = engine.load_model(model_name, threads=threads)
+    load_s = time.perf_counter() - t0
+
+    rows = []
+    for path in recordings:
+        audio = decoded_audio.to_float32(decoded_audio.load(path))
+        t0 = time.perf_counter()
+        result = engine.transcribe(model, audio)
+        elapsed = time.perf_counter() - t0
+        duration = len(audio) / SAMPLE_RATE
+        rows.append({
+            "recording": os.path.basename(path),
+            "duration_s": round(duration, 1),
+            "transcribe_s": round(elapsed, 2),
+            "rtf": round(elapsed / duration, 4) if duration else None,
+            "language": result["language"],
+            "segments": len(result["segments"]),
+            "text": result["text"],
+        })
+    queue.put({
+        "engine": engine_name,
+        "device": engine.device(),
+        "load_s": round(load_s, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), # KiB on Linux
+        "recordings": rows,
+    })
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Compare ASR engines for speed, memory and transcript agreement.")
+    parser.add_argument("--engines", nargs="+", default=["whisper", "faster-whisper"], help="First engine is the reference")
+    parser.add_argument("--model", default=settings.WHISPER_MODEL)
+    parser.add_argument("--upload-dir", default=settings.UPLOAD_DIR)
+    parser.add_argument("--limit", type=int, default=0, help="Use at most this many recordings (0 = all)")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads per engine (0 = library default)")
+    parser.add_argument("--output", help="Write results (including transcripts) as JSON to this file")
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.upload_dir, args.limit)
+    if not recordings:
+        parser.error(f"No recordings in {args.upload_dir}")
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for engine_name in args.engines:
+        queue = context.Queue()
+        process = context.Process(target=run_engine, args=(engine_name, args.model, recordings, args.threads, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+
+    reference = results[0]
+    for result in results:
+        audio_s = sum(row["duration_s"] for row in result["recordings"])
+        transcribe_s = sum(row["transcribe_s"] for row in result["recordings"])
+        agreements = [word_agreement(ref["text"], row["text"]) for ref, row in zip(reference["recordings"], result["recordings"])]
+        for row, agreement in zip(result["recordings"], agreements):
+            row["word_agreement"] = round(agreement, 4)
+        result["rtf"] = round(transcribe_s / audio_s, 4) if audio_s else None
+        result["word_agreement"] = round(sum(agreements) / len(agreements), 4)
+        print(json.dumps({key: value for key, value in result.items() if key != "recordings"}))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "reference": reference["engine"], "engines": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: decoding a recording per consumer vs once to the memory-mapped PCM cache.
+
+Before the decode stage, every consumer of a recording (language detection, each ASR attempt,
+each reprocess) decoded the source with ffmpeg. Now the first consumer decodes it to
+<blob>.16k_*.pcm and later ones map the file. This times, for `--consumers` consumers:
+  per_consumer_decode - a full decode each time (the previous behaviour);
+  decode_once_mmap    - one decode, then each consumer maps the file and reads the first 30 s
+                        (language detection) and the whole recording as float32 (Whisper input).
+Without ffmpeg installed only 16 kHz 16-bit WAV can be decoded, so the default source is a
+generated WAV of `--minutes` minutes.
+
+Usage (from the backend directory):
+    python -m benchmarks.audio_decode --audio uploads/blobs/<sha256>.mp3 --consumers 4
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+
+def make_wav(path: str, seconds: float):
+    rng = np.random.default_rng(0)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        for _ in range(int(seconds // 60)):
+            wav.writeframes((rng.standard_normal(16000 * 60) * 3000).astype("<i2").tobytes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-consumer decoding with the decoded PCM cache.")
+    parser.add_argument("--audio", help="Source recording (default: a generated WAV)")
+    parser.add_argument("--minutes", type=float, default=30.0, help="Length of the generated WAV")
+    parser.add_argument("--consumers", type=int, default=4, help="Reads of the recording per meeting")
+    parser.add_argument("--dtype", choices=["int16", "float32"], default="int16")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="audio_decode_bench_")
+    os.environ["UPLOAD_DIR"] = tmp
+    os.environ["DECODED_AUDIO_DTYPE"] = args.dtype
+    from app.services import decoded_audio
+    from app.services.audio_chunking import SAMPLE_RATE
+
+    source = os.path.join(tmp, "source" + (os.path.splitext(args.audio)[1] if args.audio else ".wav"))
+    if args.audio:
+        shutil.copyfile(args.audio, source)
+    else:
+        make_wav(source, args.minutes * 60)
+
+    def decode_fresh() -> np.ndarray:
+        decoded_audio.remove(source)
+        return decoded_audio.to_float32(np.array(decoded_audio.load(source)))
+
+    try:
+        t0 = time.perf_counter()
+        for _ in range(args.consumers):
+            audio = decode_fresh()
+        per_consumer_s = time.perf_counter() - t0
+        duration = len(audio) / SAMPLE_RATE
+        del audio
+
+        decoded_audio.remove(source)
+        t0 = time.perf_counter()
+        decoded_audio.ensure_decoded(source)
+        decode_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(args.consumers):
+            samples = decoded_audio.load(source)
+            decoded_audio.to_float32(samples[:30 * SAMPLE_RATE])
+            decoded_audio.to_float32(samples)
+        reads_s = time.perf_counter() - t0
+
+        results = {
+            "source": args.audio or f"generated {args.minutes:g} min WAV",
+            "duration_s": round(duration, 1),
+            "dtype": args.dtype,
+            "consumers": args.consumers,
+            "pcm_bytes": os.path.getsize(decoded_audio.decoded_path(source)),
+            "per_consumer_decode_s": round(per_consumer_s, 3),
+            "decode_once_s": round(decode_s, 3),
+            "mmap_reads_s": round(reads_s, 3),
+            "decode_once_mmap_s": round(decode_s + reads_s, 3),
+            "speedup": round(per_consumer_s / (decode_s + reads_s), 2),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Throughput benchmark: one recording at a time vs cross-meeting batched Whisper inference.
+
+`--meetings` recordings of `--minutes` minutes (tiled from a source file) are transcribed with the
+same model three ways:
+  sequential        - one transcribe() call after another (one worker thread);
+  concurrent_single - one thread per recording, each calling transcribe() on the shared model
+                      (several worker threads before batching);
+  batched           - one thread per recording, windows decoded together by the inference scheduler.
+Reports wall time and aggregate throughput in audio hours per hour for each.
+
+Usage (from the backend directory):
+    python -m benchmarks.batched_asr --audio uploads/blobs/<sha256>.mp3 --meetings 10 --minutes 5 --batch-size 8
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.config import settings
+from app.services import asr, decoded_audio, inference_scheduler
+from app.services.audio_chunking import SAMPLE_RATE
+from benchmarks.asr_chunking import tile_audio
+
+
+def timed_run(label: str, fn, recordings, threads: int) -> dict:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(fn, recordings))
+    wall_s = time.perf_counter() - t0
+    audio_s = sum(len(audio) for audio in recordings) / SAMPLE_RATE
+    row = {
+        "mode": label,
+        "threads": threads,
+        "wall_s": round(wall_s, 2),
+        "audio_hours_per_hour": round(audio_s / wall_s, 2),
+        "words": sum(len(result["text"].split()) for result in results),
+    }
+    print(json.dumps(row))
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-at-a-time and batched Whisper throughput.")
+    parser.add_argument("--audio", help="Source recording (defaults to the first file in UPLOAD_DIR)")
+    parser.add_argument("--meetings", type=int, default=10, help="Recordings transcribed together")
+    parser.add_argument("--minutes", type=float, default=5.0, help="Length of each recording")
+    parser.add_argument("--model", default=settings.WHISPER_MODEL)
+    parser.add_argument("--batch-size", type=int, default=settings.ASR_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=settings.ASR_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--skip-concurrent", action="store_true", help="Skip the concurrent_single run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    audio_path = args.audio
+    if not audio_path:
+        candidates = sorted(glob.glob(os.path.join(settings.UPLOAD_DIR, "*")))
+        if not candidates:
+            parser.error(f"No --audio given and no files in {settings.UPLOAD_DIR}")
+        audio_path = candidates[0]
+
+    settings.DECODED_AUDIO_DTYPE = "int16"
+    source = np.array(decoded_audio.load(audio_path))
+    tmp_dir = tempfile.mkdtemp(prefix="batched_asr_bench_")
+    # Rotate each copy so the recordings differ (and no window is decoded from identical audio)
+    base, _ = tile_audio(source, args.minutes * 60, tmp_dir)
+    recordings = [np.roll(np.asarray(base), i * SAMPLE_RATE * 7) for i in range(args.meetings)]
+
+    model = asr.get_whisper_model(args.model)
+    scheduler = inference_scheduler.InferenceScheduler(asr.get_whisper_model, args.batch_size, args.max_wait_ms / 1000.0)
+    asr._batch_scheduler = scheduler
+    language, _ = asr.detect_language(recordings[0])
+
+    single = lambda audio: asr._transcribe_single(model, audio, language)
+    batched = lambda audio: asr._transcribe_batched(audio, model_name=args.model, language=language)
+    batched(recordings[0][:SAMPLE_RATE * 60]) # Warm up the scheduler thread and its first batch
+
+    results = [timed_run("sequential", single, recordings, threads=1)]
+    if not args.skip_concurrent:
+        results.append(timed_run("concurrent_single", single, recordings, threads=args.meetings))
+    results.append(timed_run("batched", batched, recordings, threads=args.meetings))
+    scheduler.stop()
+
+    summary = {
+        "audio": audio_path,
+        "model": args.model,
+        "language": language,
+        "meetings": args.meetings,
+        "minutes": args.minutes,
+        "batch_size": args.batch_size,
+        "max_wait_ms": args.max_wait_ms,
+        "scheduler": scheduler.stats(),
+        "speedup_vs_sequential": round(results[0]["wall_s"] / results[-1]["wall_s"], 2),
+        "results": results,
+    }
+    print(json.dumps({key: value for key, value in summary.items() if key != "results"}, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+End-to-end load test: the whole app (API, embedded workers, pipeline) under a mixed client workload,
+without GPUs or a live Ollama.
+
+Boots the API with uvicorn in-process (temporary SQLite database) with `--workers` embedded workers,
+a fake ASR engine and the stub Ollama server:
+  - the fake engine ("fake", registered for this run) sleeps `--asr-rtf` x the audio duration per
+    transcription and returns a synthetic transcript of about 150 words per minute;
+  - the stub server (benchmarks/stub_ollama.py) answers summaries and translations with its
+    simulated shared-accelerator latency.
+`--clients` async clients then run a weighted mix of uploads, list calls, detail reads, search and
+PDF exports against `--seed-meetings` completed meetings for `--duration` seconds. Every uploaded
+meeting is polled (GET /api/meetings/{id}) every `--poll-interval` seconds until it completes or fails;
+after the load phase the harness waits up to `--drain-timeout` for the remaining uploads to finish.
+
+Reports throughput and p50/p95/p99 latency per endpoint, queue depth over time (processing jobs by
+status from /api/system/stats, sampled every `--sample-interval`), time from upload to COMPLETED
+(to within one poll interval), and the stub server's load.
+
+Usage (from the backend directory):
+    python -m benchmarks.e2e_load --clients 50 --workers 4 --duration 60 --audio-seconds 30 120 --asr-rtf 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+from benchmarks.api_load import make_wav, percentiles, seed
+from benchmarks.stub_ollama import start_stub_server
+
+WORDS = ["budget", "roadmap", "release", "hiring", "customer", "latency", "review", "design",
+         "launch", "pricing", "support", "migration", "security", "onboarding", "quarterly"]
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+
+
+# --- Fake ASR Engine ---
+def make_fake_engine(rtf: float, detect_seconds: float):
+    """
+    Build the fake engine class (asr_engines is imported only once the app's environment is set).
+    """
+    from app.services.asr_engines import ASREngine
+    from app.services.audio_chunking import SAMPLE_RATE
+
+    class FakeASREngine(ASREngine):
+        """
+        Stands in for Whisper: latency proportional to the audio duration, synthetic English text.
+        """
+        name = "fake"
+
+        def device(self) -> str:
+            return "cpu"
+
+        def load_model(self, model_name: str, device=None, threads: int = 0):
+            return model_name
+
+        def detect_language(self, model, audio):
+            time.sleep(detect_seconds)
+            return "en", 0.99
+
+        def transcribe(self, model, audio, language=None) -> dict:
+            duration = len(audio) / SAMPLE_RATE
+            time.sleep(duration * rtf)
+            rng = random.Random(len(audio))
+            segments = []
+            for start in range(0, max(int(duration), 1), 10):
+                text = " ".join(rng.choice(WORDS) for _ in range(25)) # 10 s at about 150 words per minute
+                segments.append({"start": float(start), "end": float(min(start + 10, duration)), "text": text.capitalize() + "."})
+            return {
+                "text": " ".join(segment["text"] for segment in segments),
+                "language": language or "en",
+                "segments": segments,
+            }
+
+    return FakeASREngine
+
+
+# --- Workload ---
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, endpoint: str, seconds: float):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+
+    def error(self, endpoint: str, reason: str):
+        key = f"{endpoint}: {reason}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    async def timed(self, endpoint: str, request, ok=(200,)):
+        t0 = time.perf_counter()
+        try:
+            response = await request
+        except Exception as e:
+            self.error(endpoint, type(e).__name__)
+            return None
+        if response.status_code not in ok:
+            self.error(endpoint, str(response.status_code))
+            return None
+        self.add(endpoint, time.perf_counter() - t0)
+        return response
+
+
+async def run_load(base_url: str, args, seeded_ids) -> dict:
+    import httpx
+
+    recorder = Recorder()
+    meeting_ids = list(seeded_ids)
+    uploads = [] # {"meeting_id", "audio_seconds", "uploaded_at", "finished_at", "status"}
+    pollers = []
+    queue_samples = []
+    mix = {"upload": args.mix[0], "list": args.mix[1], "detail": args.mix[2], "search": args.mix[3], "pdf": args.mix[4]}
+    t_start = time.perf_counter()
+    deadline = t_start + args.duration
+    rng = random.Random(0)
+
+    limits = httpx.Limits(max_connections=args.clients + 20, max_keepalive_connections=args.clients + 20)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+
+        async def poll_until_done(record: dict):
+            while True:
+                await asyncio.sleep(args.poll_interval)
+                response = await recorder.timed("GET /meetings/{id} (poll)", client.get(f"/api/meetings/{record['meeting_id']}"))
+                if response is not None and response.json()["status"] in TERMINAL_STATUSES:
+                    record["finished_at"] = time.perf_counter()
+                    record["status"] = response.json()["status"]
+                    return
+
+        async def upload():
+            seconds = round(rng.uniform(*args.audio_seconds))
+            # Audio is random noise, so every upload is distinct (no deduplication)
+            audio = make_wav(seconds)
+            uploaded_at = time.perf_counter()
+            files = {"file": ("load.wav", audio, "audio/wav")}
+            response = await recorder.timed("POST /meetings/upload", client.post("/api/meetings/upload", files=files))
+            if response is None or not response.json().get("success"):
+                recorder.error("POST /meetings/upload", "rejected")
+                return
+            record = {"meeting_id": int(response.json()["meetingId"]), "audio_seconds": seconds,
+                      "uploaded_at": uploaded_at, "finished_at": None, "status": None}
+            uploads.append(record)
+            meeting_ids.append(record["meeting_id"])
+            pollers.append(asyncio.create_task(poll_until_done(record)))
+
+        async def client_loop(client_rng: random.Random):
+            while time.perf_counter() < deadline:
+                action = client_rng.choices(list(mix), weights=list(mix.values()))[0]
+                if action == "upload":
+                    await upload()
+                elif action == "list":
+                    await recorder.timed("GET /meetings/", client.get("/api/meetings/", params={"limit": 50}))
+                elif action == "detail":
+                    await recorder.timed("GET /meetings/{id}", client.get(f"/api/meetings/{client_rng.choice(meeting_ids)}"))
+                elif action == "search":
+                    query = client_rng.choice(WORDS)
+                    await recorder.timed("GET /meetings/search/", client.get("/api/meetings/search/", params={"query": query}))
+                else:
+                    await recorder.timed("GET /meetings/{id}/export/pdf",
+                                         client.get(f"/api/meetings/{client_rng.choice(seeded_ids)}/export/pdf"))
+                await asyncio.sleep(client_rng.expovariate(1.0 / args.think_time) if args.think_time > 0 else 0)
+
+        async def sample_queue(stop: asyncio.Event):
+            while not stop.is_set():
+                try:
+                    response = await client.get("/api/system/stats")
+                    jobs = response.json()["jobs"]
+                    queue_samples.append({"t": round(time.perf_counter() - t_start, 1), **jobs})
+                except Exception as e:
+                    recorder.error("GET /system/stats (sampler)", type(e).__name__)
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=args.sample_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        stop_sampling = asyncio.Event()
+        sampler = asyncio.create_task(sample_queue(stop_sampling))
+        await asyncio.gather(*(client_loop(random.Random(i)) for i in range(args.clients)))
+        load_s = time.perf_counter() - t_start
+
+        # Let the uploaded meetings finish (or give up after the drain timeout)
+        _, pending = await asyncio.wait(pollers, timeout=args.drain_timeout) if pollers else (None, [])
+        for task in pending:
+            task.cancel()
+        stop_sampling.set()
+        await sampler
+        total_s = time.perf_counter() - t_start
+
+    endpoints = {}
+    for endpoint, values in sorted(recorder.latencies.items()):
+        endpoints[endpoint] = {**percentiles(values), "rps": round(len(values) / load_s, 1)}
+    turnaround = [record["finished_at"] - record["uploaded_at"] for record in uploads if record["status"] == "COMPLETED"]
+    completed_audio_s = sum(record["audio_seconds"] for record in uploads if record["status"] == "COMPLETED")
+    last_completion = max((record["finished_at"] for record in uploads if record["status"] == "COMPLETED"), default=t_start)
+    return {
+        "load_s": round(load_s, 1),
+        "total_s": round(total_s, 1),
+        "requests_per_s": round(sum(len(values) for values in recorder.latencies.values()) / load_s, 1),
+        "endpoints": endpoints,
+        "errors": recorder.errors,
+        "uploads": {
+            "uploaded": len(uploads),
+            "completed": sum(1 for record in uploads if record["status"] == "COMPLETED"),
+            "failed": sum(1 for record in uploads if record["status"] == "FAILED"),
+            "unfinished": sum(1 for record in uploads if record["status"] is None),
+            "audio_hours_per_hour": round(completed_audio_s / (last_completion - t_start), 2) if completed_audio_s else 0.0,
+        },
+        "time_to_completed_s": {key.replace("_ms", "_s"): (round(value / 1000, 2) if key != "count" else value)
+                                for key, value in percentiles(turnaround).items()},
+        "queue_depth": {
+            "max_queued": max((sample["QUEUED"] for sample in queue_samples), default=0),
+            "max_running": max((sample["RUNNING"] for sample in queue_samples), default=0),
+            "samples": queue_samples,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the whole app with a fake ASR engine and a stub Ollama server.")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent async clients")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load")
+    parser.add_argument("--mix", type=float, nargs=5, default=[0.05, 0.3, 0.35, 0.2, 0.1],
+                        metavar=("UPLOAD", "LIST", "DETAIL", "SEARCH", "PDF"), help="Relative weights of client actions")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between a client's requests (seconds)")
+    parser.add_argument("--seed-meetings", type=int, default=1000, help="Completed meetings in the database at the start")
+    parser.add_argument("--workers", type=int, default=2, help="Embedded processing workers")
+    parser.add_argument("--audio-seconds", type=float, nargs=2, default=[30.0, 120.0], metavar=("MIN", "MAX"),
+                        help="Length range of uploaded recordings")
+    parser.add_argument("--asr-rtf", type=float, default=0.1, help="Fake ASR processing seconds per audio second")
+    parser.add_argument("--detect-seconds", type=float, default=0.05, help="Fake language detection latency")
+    parser.add_argument("--llm-tokens", type=int, default=60, help="Tokens per stub Ollama response")
+    parser.add_argument("--llm-token-delay", type=float, default=0.005)
+    parser.add_argument("--llm-parallel", type=int, default=2, help="Generations the stub server runs at full speed")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Status polling interval per upload")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Queue depth sampling interval")
+    parser.add_argument("--drain-timeout", type=float, default=300.0, help="Wait for uploads to finish after the load")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    stub, _ = start_stub_server(tokens=args.llm_tokens, token_delay=args.llm_token_delay, parallel=args.llm_parallel)
+
+    tmp = tempfile.mkdtemp(prefix="e2e_load_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(tmp, "uploads")
+    os.environ["EMBEDDED_WORKERS"] = str(args.workers)
+    os.environ["WORKER_POLL_INTERVAL_SECONDS"] = "0.2"
+    os.environ["OLLAMA_BASE_URL"] = stub.url
+    os.environ["ASR_ENGINE"] = "fake"
+    os.environ["ASR_WORKERS"] = "1" # No chunk process pool: the fake engine only exists in this process
+
+    # Imported after the environment points the app at the temporary database and the stubs
+    import uvicorn
+    from app import models
+    from app.database import create_database_tables, engine
+    from app.main import app
+    from app.services import asr_engines
+
+    asr_engines._ENGINES["fake"] = make_fake_engine(args.asr_rtf, args.detect_seconds)
+    create_database_tables()
+    seed(engine, models, args.seed_meetings, transcript_chars=20000)
+    seeded_ids = list(range(1, args.seed_meetings + 1))
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        results = asyncio.run(run_load(f"http://127.0.0.1:{port}", args, seeded_ids))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+        stub.shutdown()
+
+    results["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    results["stub_ollama"] = {"requests": stub.requests, "peak_active": stub.peak_active}
+    summary = {key: value for key, value in results.items() if key != "queue_depth"}
+    summary["queue_depth"] = {key: value for key, value in results["queue_depth"].items() if key != "samples"}
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
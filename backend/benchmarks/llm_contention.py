@@ -0,0 +1,80 @@
+"""
+Throughput benchmark: Ollama client concurrency cap under a burst of generations.
+
+Starts the stub Ollama server in-process, fires `--requests` generations at once through
+the pooled client for each concurrency cap, and reports wall time, throughput and latency
+percentiles. "uncapped" sets the cap to the number of requests (every call hits the server at once).
+
+Usage (from the backend directory):
+    python -m benchmarks.llm_contention --requests 32 --caps 1 2 4 8 0 --server-parallel 2
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.services.llm_client import OllamaClient
+from benchmarks.stub_ollama import start_stub_server
+
+
+async def run_burst(url: str, requests: int, cap: int, stream: bool) -> dict:
+    client = OllamaClient(base_url=url, model="stub", max_concurrency=cap, max_connections=cap,
+                          connect_timeout=5.0, request_timeout=600.0, max_retries=3, retry_backoff=0.2)
+    latencies = []
+
+    async def one(i: int):
+        t0 = time.perf_counter()
+        on_token = (lambda token: None) if stream else None
+        await client.generate(f"Transcript part {i}", on_token=on_token)
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(i) for i in range(requests)))
+    finally:
+        await client.aclose()
+    wall_s = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "cap": cap,
+        "requests": requests,
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(requests / wall_s, 2),
+        "latency_p50_s": round(statistics.median(latencies), 3),
+        "latency_p95_s": round(latencies[int(0.95 * (len(latencies) - 1))], 3),
+        "retries": client.stats()["retries"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Ollama client's concurrency cap against a stub server.")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--caps", type=int, nargs="+", default=[1, 2, 4, 8, 0], help="Concurrency caps (0 = uncapped)")
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--server-parallel", type=int, default=2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--stream", action="store_true", help="Stream tokens instead of waiting for whole responses")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    server, _ = start_stub_server(tokens=args.tokens, token_delay=args.token_delay,
+                                  parallel=args.server_parallel, fail_rate=args.fail_rate)
+    results = []
+    try:
+        for cap in args.caps:
+            row = asyncio.run(run_burst(server.url, args.requests, cap or args.requests, args.stream))
+            row["cap"] = cap or "uncapped"
+            print(json.dumps(row))
+            results.append(row)
+    finally:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Latency benchmark: meeting list endpoint on a large database.
+
+Seeds a temporary SQLite database with `--meetings` completed meetings (each with a transcript,
+summaries and action items of realistic size), then times GET /api/meetings/ page fetches:
+the first page, a page deep into the list reached via its cursor, and filtered pages. For
+comparison it also times the previous implementation (full rows, OFFSET paging) at the same depth.
+
+Usage (from the backend directory):
+    python -m benchmarks.meeting_list --meetings 50000 --depth 40000 --output meeting_list.json
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def seed(engine, models, count: int, transcript_chars: int):
+    rng = random.Random(0)
+    words = ["budget", "roadmap", "release", "hiring", "customer", "latency", "review", "design", "launch", "migration"]
+    statuses = [models.MeetingStatus.COMPLETED] * 8 + [models.MeetingStatus.FAILED, models.MeetingStatus.PENDING]
+    transcript = " ".join(rng.choice(words) for _ in range(transcript_chars // 8))
+    start = datetime.datetime(2023, 1, 1)
+    rows = []
+    for i in range(count):
+        status = rng.choice(statuses)
+        rows.append({
+            "filename": f"meeting_{i}.wav",
+            "upload_time": start + datetime.timedelta(minutes=17 * i + rng.randint(0, 5)),
+            "status": status,
+            "detected_language": rng.choice(["en", "en", "en", "zh", "es"]),
+            "transcript": transcript,
+            "summary_en": transcript[:1500],
+            "summary_zh": transcript[:1500],
+            "action_items_en": [f"Follow up on {w}" for w in words],
+            "action_items_zh": [f"Follow up on {w}" for w in words],
+            "duration": rng.uniform(300, 7200),
+        })
+    with engine.begin() as conn:
+        for i in range(0, len(rows), 5000):
+            conn.execute(models.Meeting.__table__.insert(), rows[i:i + 5000])
+
+
+def time_calls(fn, runs: int) -> dict:
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {"p50_ms": round(statistics.median(timings), 2), "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the meeting list endpoint on a large database.")
+    parser.add_argument("--meetings", type=int, default=50000)
+    parser.add_argument("--transcript-chars", type=int, default=20000)
+    parser.add_argument("--depth", type=int, default=40000, help="Rows to skip for the deep-page measurements")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="meeting_list_bench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(tmp, "uploads")
+    os.environ["EMBEDDED_WORKERS"] = "0"
+
+    # Imported after the environment points the app at the temporary database
+    from fastapi.testclient import TestClient
+    from app import crud, models, schemas
+    from app.database import SessionLocal, engine
+    from app.main import app
+
+    with TestClient(app) as client:
+        t0 = time.perf_counter()
+        seed(engine, models, args.meetings, args.transcript_chars)
+        print(f"Seeded {args.meetings} meetings in {time.perf_counter() - t0:.1f}s")
+
+        # Cursor for the deep page: the (upload_time, id) of the row just before it
+        db = SessionLocal()
+        try:
+            boundary = db.query(models.Meeting.upload_time, models.Meeting.id)\
+                         .order_by(models.Meeting.upload_time.desc(), models.Meeting.id.desc())\
+                         .offset(args.depth - 1).first()
+        finally:
+            db.close()
+        deep_cursor = crud.encode_meeting_cursor(boundary.upload_time, boundary.id)
+
+        def get(params):
+            response = client.get("/api/meetings/", params=params)
+            response.raise_for_status()
+            return response
+
+        def legacy_offset_page():
+            # The previous endpoint: full ORM rows (transcripts, summaries, JSON action items), OFFSET paging
+            db = SessionLocal()
+            try:
+                rows = db.query(models.Meeting).offset(args.depth).limit(args.limit).all()
+                return [schemas.Meeting.model_validate(row).model_dump_json() for row in rows]
+            finally:
+                db.close()
+
+        results = {
+            "meetings": args.meetings,
+            "limit": args.limit,
+            "depth": args.depth,
+            "first_page": time_calls(lambda: get({"limit": args.limit}), args.runs),
+            "deep_page_cursor": time_calls(lambda: get({"limit": args.limit, "cursor": deep_cursor}), args.runs),
+            "filter_status_failed": time_calls(lambda: get({"limit": args.limit, "status": "FAILED"}), args.runs),
+            "filter_language_zh_deep": time_calls(
+                lambda: get({"limit": args.limit, "language": "zh", "cursor": deep_cursor}), args.runs),
+            "legacy_offset_full_rows": time_calls(legacy_offset_page, args.runs),
+            "first_page_bytes": len(get({"limit": args.limit}).content),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Microbenchmark suite for the backend hot paths, runnable offline (no Whisper, no Ollama).
+
+Cases (run all, or those matching --filter):
+  db.get_meetings.*      - crud.get_meetings first page, deep keyset page and a status filter,
+                           on synthetic databases of each --sizes meetings;
+  db.search.*            - crud.search_transcripts for a common word, a rare word and a phrase;
+  json_list.*            - JsonEncodedList bind/result processing of action item lists;
+  summary.parse.*        - summarizer.parse_summary_response on a typical and a long LLM response;
+  pdf.clean_markdown.*   - pdf_generator._clean_markdown on a summary and on a multi-hour transcript;
+  pdf.generate.*         - pdf_generator.generate_meeting_pdf for a short and a multi-hour meeting;
+  upload.save_stream     - storage.save_stream_hashed (copy + SHA-256) of an upload, with MB/s.
+Each case reports min/median/p95 milliseconds over its runs. Databases are seeded with a fixed
+random seed and cached in --data-dir between runs, so results are comparable across commits.
+
+Results are written as JSON. With --compare, the run is checked against a stored baseline: a case
+regresses when its median is more than --threshold slower (and by at least --min-delta-ms);
+the process then exits with status 1.
+
+Usage (from the backend directory):
+    python -m benchmarks.microbench --output baseline.json
+    python -m benchmarks.microbench --compare baseline.json --output current.json
+    python -m benchmarks.microbench --quick --filter pdf.
+"""
+import argparse
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+VOCABULARY_SIZE = 400
+RARE_WORD = "zephyrine" # In about 1% of meetings
+PHRASE = "quarterly roadmap" # In about 10% of meetings
+
+
+# --- Synthetic Data ---
+def vocabulary():
+    rng = random.Random(1)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = {"budget", "roadmap", "release", "hiring", "customer", "latency", "review", "design", "launch", "quarterly"}
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 9))))
+    return sorted(words)
+
+def make_text(rng: random.Random, words, word_count: int) -> str:
+    # Zipf-like: a few words are very common, most are rare
+    picks = rng.choices(words, weights=[1.0 / (rank + 1) for rank in range(len(words))], k=word_count)
+    sentences = [" ".join(picks[i:i + 12]).capitalize() + "." for i in range(0, len(picks), 12)]
+    return " ".join(sentences)
+
+def make_summary(rng: random.Random, words) -> str:
+    lines = ["### Key points", ""]
+    lines += [f"- **{rng.choice(words).title()}**: {make_text(rng, words, 20)}" for _ in range(6)]
+    lines += ["", "---", "", make_text(rng, words, 80)]
+    return "\n".join(lines)
+
+def seed_database(engine, models, count: int, transcript_words: int):
+    """
+    Insert `count` meetings (with transcript segments) in bulk.
+    """
+    rng = random.Random(count)
+    words = vocabulary()
+    statuses = [models.MeetingStatus.COMPLETED] * 8 + [models.MeetingStatus.FAILED, models.MeetingStatus.PENDING]
+    start = datetime.datetime(2023, 1, 1)
+    batch_size = 2000
+    for first in range(0, count, batch_size):
+        meetings, segments = [], []
+        for i in range(first, min(first + batch_size, count)):
+            transcript = make_text(rng, words, transcript_words)
+            if rng.random() < 0.01:
+                transcript += f" {RARE_WORD.capitalize()} came up at the end."
+            if rng.random() < 0.1:
+                transcript = f"We reviewed the {PHRASE} first. " + transcript
+            meetings.append({
+                "id": i + 1,
+                "filename": f"meeting_{i}.wav",
+                "upload_time": start + datetime.timedelta(minutes=17 * i + rng.randint(0, 5)),
+                "status": rng.choice(statuses),
+                "detected_language": rng.choice(["en", "en", "en", "zh", "es"]),
+                "transcript": transcript,
+                "summary_en": make_text(rng, words, 60),
+                "action_items_en": [f"Follow up on {rng.choice(words)}" for _ in range(5)],
+                "duration": rng.uniform(300, 7200),
+            })
+            pieces = transcript.split(". ")
+            step = max(len(pieces) // 4, 1)
+            for index, offset in enumerate(range(0, len(pieces), step)):
+                segments.append({
+                    "meeting_id": i + 1, "segment_index": index,
+                    "start_time": index * 60.0, "end_time": index * 60.0 + 59.0,
+                    "text": ". ".join(pieces[offset:offset + step]),
+                })
+        with engine.begin() as conn:
+            conn.execute(models.Meeting.__table__.insert(), meetings)
+            conn.execute(models.TranscriptSegment.__table__.insert(), segments)
+
+
+# --- Timing ---
+def measure(fn, runs: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {
+        "runs": runs,
+        "min_ms": round(timings[0], 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 4),
+    }
+
+
+class Suite:
+    def __init__(self, pattern: str, scale: float):
+        self.pattern = pattern
+        self.scale = scale
+        self.results = {}
+
+    def wants(self, name: str) -> bool:
+        return not self.pattern or self.pattern in name
+
+    def run(self, name: str, fn, runs: int, **extra):
+        if not self.wants(name):
+            return
+        result = measure(fn, max(int(runs * self.scale), 3))
+        result.update(extra)
+        self.results[name] = result
+        print(f"{name:48s} median {result['median_ms']:>11.4f} ms   p95 {result['p95_ms']:>11.4f} ms", flush=True)
+        return result
+
+
+# --- Cases ---
+def bench_database(suite: Suite, data_dir: str, sizes, transcript_words: int):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app import crud, database, models, search_index
+
+    for size in sizes:
+        names = [f"db.get_meetings.{case}[{size}]" for case in ("first_page", "deep_page", "status_failed")]
+        names += [f"db.search.{case}[{size}]" for case in ("common", "rare", "phrase")]
+        if not any(suite.wants(name) for name in names):
+            continue
+
+        path = os.path.join(data_dir, f"meetings_{size}_{transcript_words}w.db")
+        url = f"sqlite:///{path}"
+        engine = create_engine(url, **database._engine_options(url))
+        database._configure_sqlite(engine, url)
+        if not os.path.exists(path):
+            t0 = time.perf_counter()
+            models.Base.metadata.create_all(bind=engine)
+            seed_database(engine, models, size, transcript_words)
+            print(f"Seeded {size} meetings in {time.perf_counter() - t0:.1f}s ({path})", flush=True)
+        search_index.ensure_search_index(engine) # Builds the index once, then only checks it
+        db = sessionmaker(bind=engine)()
+        try:
+            rows = db.query(models.Meeting.upload_time, models.Meeting.id)\
+                     .order_by(models.Meeting.upload_time.desc(), models.Meeting.id.desc())\
+                     .offset(int(size * 0.9)).first()
+            deep_cursor = (rows.upload_time, rows.id)
+            suite.run(names[0], lambda: crud.get_meetings(db, limit=50), runs=200)
+            suite.run(names[1], lambda: crud.get_meetings(db, limit=50, cursor=deep_cursor), runs=200)
+            suite.run(names[2], lambda: crud.get_meetings(db, limit=50, status=models.MeetingStatus.FAILED), runs=200)
+            suite.run(names[3], lambda: crud.search_transcripts(db, "budget", limit=10), runs=30)
+            suite.run(names[4], lambda: crud.search_transcripts(db, RARE_WORD, limit=10), runs=30)
+            suite.run(names[5], lambda: crud.search_transcripts(db, PHRASE, limit=10), runs=30)
+        finally:
+            db.close()
+            engine.dispose()
+
+def bench_json_list(suite: Suite):
+    from app.models import JsonEncodedList
+    column_type = JsonEncodedList()
+    items = [f"Follow up with team member {i} on the budget review and send the notes" for i in range(20)]
+    encoded = column_type.process_bind_param(items, None)
+    suite.run("json_list.encode[20 items]", lambda: column_type.process_bind_param(items, None), runs=20000)
+    suite.run("json_list.decode[20 items]", lambda: column_type.process_result_value(encoded, None), runs=20000)
+
+def bench_summary_parsing(suite: Suite):
+    from app.services import summarizer
+    rng = random.Random(2)
+    words = vocabulary()
+    items = [f"Follow up on {rng.choice(words)} with {rng.choice(words).title()}" for _ in range(8)]
+    typical = f"Summary:\n{make_summary(rng, words)}\n\nAction Items:\n{json.dumps(items)}\n"
+    long_items = [f"Follow up on {rng.choice(words)}" for _ in range(200)]
+    long = f"Summary:\n{make_summary(rng, words) * 20}\n\nAction Items:\n{json.dumps(long_items)}\n"
+    suite.run("summary.parse.typical", lambda: summarizer.parse_summary_response(typical, 0), runs=5000)
+    suite.run("summary.parse.long", lambda: summarizer.parse_summary_response(long, 0), runs=500)
+
+def transient_meeting(models, rng, words, transcript_words: int):
+    return models.Meeting(
+        id=1, filename="bench.wav", upload_time=datetime.datetime(2024, 1, 1), status=models.MeetingStatus.COMPLETED,
+        detected_language="en", transcript=make_text(rng, words, transcript_words),
+        summary_en=make_summary(rng, words), action_items_en=[f"Follow up on {w}" for w in words[:10]],
+    )
+
+def bench_pdf(suite: Suite):
+    from app import models
+    from app.services import pdf_generator
+    rng = random.Random(3)
+    words = vocabulary()
+    # Speech runs at about 150 words per minute
+    short = transient_meeting(models, rng, words, 150 * 5)
+    multi_hour = transient_meeting(models, rng, words, 150 * 180)
+    summary = make_summary(rng, words)
+    suite.run("pdf.clean_markdown.summary", lambda: pdf_generator._clean_markdown(summary), runs=5000)
+    suite.run("pdf.clean_markdown.transcript_3h", lambda: pdf_generator._clean_markdown(multi_hour.transcript), runs=100)
+    suite.run("pdf.generate.transcript_5min", lambda: pdf_generator.generate_meeting_pdf(short), runs=10)
+    suite.run("pdf.generate.transcript_3h", lambda: pdf_generator.generate_meeting_pdf(multi_hour), runs=3)
+
+def bench_upload(suite: Suite, upload_mb: int):
+    from app.services import storage
+    payload = os.urandom(upload_mb * 1024 * 1024)
+
+    def save():
+        tmp_path, _, _ = storage.save_stream_hashed(io.BytesIO(payload), suffix=".wav")
+        os.remove(tmp_path)
+
+    result = suite.run(f"upload.save_stream[{upload_mb}MB]", save, runs=10)
+    if result:
+        result["mb_per_s"] = round(upload_mb / (result["median_ms"] / 1000), 1)
+
+
+# --- Baseline Comparison ---
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list:
+    """
+    Print each case's change against the baseline and return the names of the regressions.
+    """
+    regressions = []
+    print(f"\n{'case':48s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:48s} {'-':>12s} {result['median_ms']:>12.4f}      new")
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        regressed = ratio > 1 + threshold and result["median_ms"] - before["median_ms"] >= min_delta_ms
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:48s} {before['median_ms']:>12.4f} {result['median_ms']:>12.4f} {ratio - 1:>+8.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend microbenchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Meetings per synthetic database")
+    parser.add_argument("--transcript-words", type=int, default=300, help="Words per seeded transcript")
+    parser.add_argument("--upload-mb", type=int, default=64)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="Smallest database and a tenth of the runs")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "fluent_microbench"),
+                        help="Where seeded databases are kept between runs")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown of the median (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.01, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="microbench_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'app.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(work_dir, "uploads")
+    os.environ["EMBEDDED_WORKERS"] = "0"
+    logging.disable(logging.WARNING) # Per-call INFO logs and xhtml2pdf font warnings would be timed too
+
+    sizes = args.sizes[:1] if args.quick else args.sizes
+    suite = Suite(args.filter, 0.1 if args.quick else 1.0)
+    bench_database(suite, args.data_dir, sizes, args.transcript_words)
+    bench_json_list(suite)
+    bench_summary_parsing(suite)
+    bench_pdf(suite)
+    bench_upload(suite, args.upload_mb)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "transcript_words": args.transcript_words,
+            "quick": args.quick,
+        },
+        "results": suite.results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(suite.results, baseline.get("results", {}), args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare} (commit {baseline.get('meta', {}).get('commit')}).")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}.")
+
+
+if __name__ == "__main__":
+    main()
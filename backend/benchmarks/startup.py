@@ -0,0 +1,91 @@
+"""
+Cold-start benchmark for the API process.
+
+Each run starts a fresh interpreter that imports `app.main`, serves one
+`GET /api/meetings/` request, and reports wall-clock latency, peak RSS and
+whether torch/whisper were imported. Compares API-only mode against the default.
+
+Usage (from the backend directory):
+    python -m benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Executed in a fresh interpreter per run so imports are measured cold
+_PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+from app.main import app
+t_import = time.perf_counter() - t0
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    response = client.get("/api/meetings/")
+t_first = time.perf_counter() - t0
+print(json.dumps({
+    "import_s": t_import,
+    "first_request_s": t_first,
+    "status_code": response.status_code,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_imported": "torch" in sys.modules,
+    "whisper_imported": "whisper" in sys.modules,
+}))
+"""
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_probe(env_overrides: dict) -> dict:
+    env = dict(os.environ)
+    env.update(env_overrides)
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    # The probe prints its JSON result as the last stdout line (after any app logging)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    def stats(key):
+        values = [s[key] for s in samples]
+        return {"min": min(values), "median": statistics.median(values), "max": max(values)}
+    return {
+        "runs": len(samples),
+        "import_s": stats("import_s"),
+        "first_request_s": stats("first_request_s"),
+        "peak_rss_mb": stats("peak_rss_mb"),
+        "torch_imported": any(s["torch_imported"] for s in samples),
+        "whisper_imported": any(s["whisper_imported"] for s in samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start latency and peak RSS.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_env = {
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "UPLOAD_DIR": os.path.join(tmp, "uploads"),
+        }
+        modes = {
+            "api_only": {**base_env, "API_ONLY": "true", "EMBEDDED_WORKERS": "0"},
+            "default": base_env,
+        }
+        results = {name: summarize([run_probe(env) for _ in range(args.runs)]) for name, env in modes.items()}
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
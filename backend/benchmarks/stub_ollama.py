@@ -0,0 +1,181 @@
+"""
+Local stand-in for an Ollama server, for tests and load benchmarks without a GPU.
+
+Implements POST /api/generate (streaming and non-streaming) and GET /api/tags. Generation
+time models a shared accelerator: each token takes `token_delay` seconds multiplied by the
+number of generations running concurrently, and beyond `parallel` concurrent generations each
+extra one adds `overload_penalty` of overhead (context swapping), so overloading the server
+lowers total throughput and slows every request down, like the real thing.
+Responses follow the summarizer's "Summary: / Action Items:" format; structured requests (with a
+"format") for translation get {"translations": [...]}, one "[translated] <text>" per input text.
+
+Usage (from the backend directory):
+    python -m benchmarks.stub_ollama --port 11500 --tokens 60 --token-delay 0.005
+then point the app at it with OLLAMA_BASE_URL=http://127.0.0.1:11500
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, tokens: int = 60, token_delay: float = 0.005, parallel: int = 2,
+                 overload_penalty: float = 0.25, fail_rate: float = 0.0, load_delay: float = 0.0):
+        super().__init__(address, StubOllamaHandler)
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.parallel = parallel
+        self.overload_penalty = overload_penalty
+        self.fail_rate = fail_rate
+        self.load_delay = load_delay
+        self.active = 0
+        self.peak_active = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, so client connection pooling is exercised
+
+    def log_message(self, format, *args):
+        pass # Quiet: benchmarks print their own results
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "stub"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server: StubOllamaServer = self.server
+        with server.lock:
+            server.requests += 1
+
+        if not request.get("prompt"):
+            # Model load request
+            time.sleep(server.load_delay)
+            self._send_json(200, {"model": request.get("model"), "response": "", "done": True})
+            return
+        if server.fail_rate and random.random() < server.fail_rate:
+            self._send_json(503, {"error": "server busy"})
+            return
+
+        if request.get("format"):
+            tokens = _structured_tokens(request["prompt"])
+        else:
+            tokens = _response_tokens(request["prompt"], server.tokens)
+        if request.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in _generate(server, tokens):
+                self._write_chunk({"model": request.get("model"), "response": token, "done": False})
+            self._write_chunk({"model": request.get("model"), "response": "", "done": True})
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            text = "".join(_generate(server, tokens))
+            self._send_json(200, {"model": request.get("model"), "response": text, "done": True})
+
+    def _write_chunk(self, body: dict):
+        data = (json.dumps(body) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def _response_tokens(prompt: str, count: int):
+    """
+    Deterministic response for a prompt, split into `count` tokens.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    words = [f"point{digest}-{i}" for i in range(max(count - 8, 1))]
+    text = f"Summary:\n{' '.join(words)}\n\nAction Items:\n[\"Follow up on {digest}\"]"
+    pieces = text.split(" ")
+    return [piece + (" " if i < len(pieces) - 1 else "") for i, piece in enumerate(pieces)]
+
+
+def _structured_tokens(prompt: str):
+    """
+    JSON reply to a translation prompt: the texts follow its last "Texts:" line as a JSON list.
+    """
+    try:
+        texts = json.loads(prompt.rsplit("Texts:", 1)[1])
+    except (IndexError, ValueError):
+        texts = []
+    text = json.dumps({"translations": [f"[translated] {item}" for item in texts]}, ensure_ascii=False)
+    pieces = text.split(" ")
+    return [piece + (" " if i < len(pieces) - 1 else "") for i, piece in enumerate(pieces)]
+
+
+def _generate(server: StubOllamaServer, tokens):
+    with server.lock:
+        server.active += 1
+        server.peak_active = max(server.peak_active, server.active)
+    try:
+        for token in tokens:
+            with server.lock:
+                active = server.active
+            overload = 1.0 + server.overload_penalty * max(active - server.parallel, 0)
+            time.sleep(server.token_delay * active * overload)
+            yield token
+    finally:
+        with server.lock:
+            server.active -= 1
+
+
+def start_stub_server(port: int = 0, **kwargs) -> Tuple[StubOllamaServer, threading.Thread]:
+    """
+    Start a stub server on a background thread (port 0 picks a free port; see `server.url`).
+    Stop it with `server.shutdown()`.
+    """
+    server = StubOllamaServer(("127.0.0.1", port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, name="stub-ollama", daemon=True)
+    thread.start()
+    return server, thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub Ollama server.")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens per response")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Seconds per token with one active generation")
+    parser.add_argument("--parallel", type=int, default=2, help="Generations the server runs without overload overhead")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of generations answered with HTTP 503")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(("127.0.0.1", args.port), tokens=args.tokens,
+                              token_delay=args.token_delay, parallel=args.parallel, fail_rate=args.fail_rate)
+    print(f"Stub Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import pytest
+
+# --- Test Environment ---
+# The app reads its settings and creates its database engines on import, so the environment is
+# set before any test module imports it: a throwaway SQLite database and upload directory, no
+# embedded workers, the fake ASR engine of the load harness (no Whisper needed) and the stub
+# Ollama server (no LLM needed). Run from backend/: python -m pytest -q
+from benchmarks.stub_ollama import start_stub_server
+
+_test_dir = tempfile.mkdtemp(prefix="fluent-notes-tests-")
+_stub_ollama, _ = start_stub_server(token_delay=0.0)
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_test_dir, 'test.db')}",
+    "UPLOAD_DIR": os.path.join(_test_dir, "uploads"),
+    "EMBEDDED_WORKERS": "0",
+    "ASR_ENGINE": "fake",
+    "ASR_WORKERS": "1",
+    "OLLAMA_BASE_URL": _stub_ollama.url,
+})
+
+from benchmarks.api_load import make_wav # noqa: E402
+from benchmarks.e2e_load import make_fake_engine # noqa: E402
+from app import crud, schemas, search_index # noqa: E402
+from app.database import Base, SessionLocal, create_database_tables, engine # noqa: E402
+from app.services import asr_engines # noqa: E402
+
+asr_engines._ENGINES["fake"] = make_fake_engine(rtf=0.0, detect_seconds=0.0)
+create_database_tables()
+search_index.ensure_search_index(engine)
+
+
+@pytest.fixture
+def db():
+    """
+    A session on an empty database. Rows are deleted rather than tables dropped, so the
+    full-text index triggers stay in place and keep the index in sync.
+    """
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def stored_meeting(db):
+    """
+    Factory for PENDING meetings with a stored recording of `seconds` of audio (no job queued).
+    """
+    def create(seconds: float = 3.0) -> int:
+        os.makedirs(os.environ["UPLOAD_DIR"], exist_ok=True)
+        audio_path = os.path.join(os.environ["UPLOAD_DIR"], f"{os.urandom(8).hex()}.wav")
+        with open(audio_path, "wb") as f:
+            f.write(make_wav(seconds))
+        db_meeting = crud.create_meeting(db, schemas.MeetingCreate(filename="meeting.wav"))
+        crud.update_meeting(db, db_meeting.id, schemas.MeetingUpdate(audio_file_path=audio_path, duration=seconds))
+        return db_meeting.id
+    return create
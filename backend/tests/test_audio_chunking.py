@@ -0,0 +1,18 @@
+import numpy as np
+
+from app.services import audio_chunking
+
+
+def test_frame_energies_are_the_same_across_block_boundaries(monkeypatch):
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(16000 * 5 + 123) * np.linspace(0.01, 0.5, 16000 * 5 + 123)).astype(np.float32)
+    whole = audio_chunking.frame_energies_db(audio)
+
+    monkeypatch.setattr(audio_chunking, "ENERGY_BLOCK_SECONDS", 0.7) # Blocks that don't divide the recording
+    blocked = audio_chunking.frame_energies_db(audio)
+
+    assert len(whole) == len(audio) // 480
+    np.testing.assert_allclose(blocked, whole, atol=1e-4)
+
+def test_recording_shorter_than_a_frame_has_no_energies():
+    assert len(audio_chunking.frame_energies_db(np.zeros(100, dtype=np.float32))) == 0
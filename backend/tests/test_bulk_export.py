@@ -0,0 +1,94 @@
+import io
+import json
+import zipfile
+from concurrent.futures import Future
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.config import settings
+from app.main import app
+from app.services import bulk_export, pdf_cache
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _meeting(db, filename: str, status=models.MeetingStatus.COMPLETED, language: str = "en") -> int:
+    meeting_id = crud.create_meeting(db, schemas.MeetingCreate(filename=filename)).id
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(
+        status=status, transcript=f"Transcript of {filename}.", detected_language=language,
+        summary_en=f"Summary of {filename}.", summary_zh=f"{filename} 的摘要。",
+        action_items_en=["Follow up"], action_items_zh=["跟进"]))
+    return meeting_id
+
+def _archive(response) -> zipfile.ZipFile:
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    return zipfile.ZipFile(io.BytesIO(response.content))
+
+
+def test_archive_holds_every_format_and_a_manifest(client, db):
+    first, second = _meeting(db, "planning.wav"), _meeting(db, "retro.wav")
+
+    archive = _archive(client.post("/api/meetings/export/bulk", json={"formats": ["pdf", "json", "markdown"]}))
+
+    assert archive.testzip() is None
+    for meeting_id in (first, second):
+        assert archive.read(f"meeting_{meeting_id}/meeting_{meeting_id}_notes.pdf").startswith(b"%PDF")
+        assert json.loads(archive.read(f"meeting_{meeting_id}/meeting_{meeting_id}.json"))["id"] == meeting_id
+        assert archive.read(f"meeting_{meeting_id}/meeting_{meeting_id}.md").decode().startswith("# ")
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [entry["meeting_id"] for entry in manifest["meetings"]] == [first, second]
+    assert manifest["failed"] == []
+
+def test_filter_selects_the_exported_meetings(client, db):
+    _meeting(db, "done.wav")
+    failed = _meeting(db, "broken.wav", status=models.MeetingStatus.FAILED)
+
+    archive = _archive(client.post("/api/meetings/export/bulk", json={"status": "FAILED", "formats": ["json"]}))
+
+    assert sorted(archive.namelist()) == ["manifest.json", f"meeting_{failed}/meeting_{failed}.json"]
+
+def test_empty_and_oversized_selections_are_rejected(client, db, monkeypatch):
+    assert client.post("/api/meetings/export/bulk", json={"meeting_ids": [12345]}).status_code == 404
+
+    _meeting(db, "one.wav")
+    _meeting(db, "two.wav")
+    monkeypatch.setattr(settings, "BULK_EXPORT_MAX_MEETINGS", 1)
+    assert client.post("/api/meetings/export/bulk", json={"formats": ["json"]}).status_code == 400
+
+def test_failed_render_is_listed_in_the_manifest(client, db, monkeypatch):
+    meeting_id = _meeting(db, "crash.wav")
+    def broken_render(context, version):
+        future = Future()
+        future.set_exception(RuntimeError("renderer crashed"))
+        return future
+    monkeypatch.setattr(pdf_cache, "submit_render", broken_render)
+
+    archive = _archive(client.post("/api/meetings/export/bulk", json={"formats": ["pdf", "json"]}))
+
+    assert f"meeting_{meeting_id}/meeting_{meeting_id}_notes.pdf" not in archive.namelist()
+    assert f"meeting_{meeting_id}/meeting_{meeting_id}.json" in archive.namelist()
+    failed = json.loads(archive.read("manifest.json"))["failed"]
+    assert failed == [{"meeting_id": meeting_id, "file": "pdf", "error": "renderer crashed"}]
+
+def test_meeting_deleted_after_selection_is_reported(db):
+    meeting_id = _meeting(db, "kept.wav")
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(bulk_export.stream_export([meeting_id, 999], ["markdown"]))))
+
+    manifest = json.loads(archive.read("manifest.json"))
+    assert [entry["meeting_id"] for entry in manifest["meetings"]] == [meeting_id]
+    assert manifest["failed"] == [{"meeting_id": 999, "file": None, "error": "Meeting not found"}]
+
+def test_markdown_follows_the_detected_language(db):
+    meeting = schemas.Meeting.model_validate(crud.get_meeting(db, _meeting(db, "周会.wav", language="zh")))
+
+    markdown = bulk_export.render_markdown(meeting)
+
+    assert "周会.wav 的摘要。" in markdown and "- 跟进" in markdown
+    assert "Summary of" not in markdown
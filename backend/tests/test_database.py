@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app import crud, models, schemas
+from app.config import settings
+from app.database import SessionLocal, engine, write_transaction
+
+
+def _meeting(db) -> int:
+    return crud.create_meeting(db, schemas.MeetingCreate(filename="standup.wav")).id
+
+def _filename(meeting_id: int) -> str:
+    with SessionLocal() as db:
+        return crud.get_meeting(db, meeting_id).filename
+
+
+def test_connections_use_the_sqlite_profile():
+    with engine.connect() as conn:
+        pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("journal_mode").lower() == settings.SQLITE_JOURNAL_MODE.lower()
+        assert pragma("busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert pragma("cache_size") == -settings.SQLITE_CACHE_SIZE_KB
+
+def test_unflushed_changes_on_a_read_snapshot_are_refused(db):
+    meeting_id = _meeting(db)
+    db_meeting = crud.get_meeting(db, meeting_id) # Opens a read transaction
+    db_meeting.filename = "renamed.wav"
+
+    with pytest.raises(RuntimeError, match="unflushed changes"):
+        with write_transaction(db):
+            pass
+
+    assert not db.in_transaction() # Rolled back, so SQLite's write lock isn't held
+    assert _filename(meeting_id) == "standup.wav"
+
+def test_write_after_a_stale_read_starts_from_a_fresh_snapshot(db):
+    meeting_id = _meeting(db)
+    assert crud.get_meeting(db, meeting_id).status == models.MeetingStatus.PENDING # Read snapshot stays open
+    with SessionLocal() as other:
+        crud.update_meeting(other, meeting_id, schemas.MeetingUpdate(status=models.MeetingStatus.PROCESSING))
+
+    # Upgrading the old snapshot to a write would fail with SQLITE_BUSY_SNAPSHOT
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(filename="renamed.wav"))
+
+    with SessionLocal() as check:
+        db_meeting = crud.get_meeting(check, meeting_id)
+        assert (db_meeting.filename, db_meeting.status) == ("renamed.wav", models.MeetingStatus.PROCESSING)
+
+def test_uncommitted_write_is_committed_and_failed_write_rolled_back(db):
+    meeting_id = _meeting(db)
+
+    with write_transaction(db):
+        db.execute(text("UPDATE meetings SET filename = 'kept.wav' WHERE id = :id"), {"id": meeting_id})
+    assert not db.in_transaction()
+
+    with pytest.raises(ValueError):
+        with write_transaction(db):
+            db.execute(text("UPDATE meetings SET filename = 'lost.wav' WHERE id = :id"), {"id": meeting_id})
+            raise ValueError("write failed")
+    assert not db.in_transaction()
+
+    assert _filename(meeting_id) == "kept.wav"
+
+def test_nested_writes_share_one_transaction(db):
+    meeting_id = _meeting(db)
+
+    with pytest.raises(ValueError):
+        with write_transaction(db):
+            db.execute(text("UPDATE meetings SET filename = 'outer.wav' WHERE id = :id"), {"id": meeting_id})
+            with write_transaction(db):
+                db.execute(text("UPDATE meetings SET error_message = 'inner' WHERE id = :id"), {"id": meeting_id})
+            raise ValueError("write failed")
+
+    with SessionLocal() as check:
+        db_meeting = crud.get_meeting(check, meeting_id)
+        assert (db_meeting.filename, db_meeting.error_message) == ("standup.wav", None)
+
+def test_concurrent_writers_all_succeed(db):
+    meeting_ids = [_meeting(db) for _ in range(8)]
+    barrier = threading.Barrier(len(meeting_ids))
+    errors = []
+    def write(meeting_id: int):
+        with SessionLocal() as session:
+            crud.get_meeting(session, meeting_id) # Every writer holds a read snapshot first
+            barrier.wait()
+            try:
+                crud.update_meeting(session, meeting_id, schemas.MeetingUpdate(status=models.MeetingStatus.COMPLETED))
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(meeting_id,)) for meeting_id in meeting_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db.rollback()
+    assert all(crud.get_meeting(db, meeting_id).status == models.MeetingStatus.COMPLETED for meeting_id in meeting_ids)
@@ -0,0 +1,106 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import decoded_audio
+
+
+@pytest.fixture(autouse=True)
+def no_ffmpeg(monkeypatch):
+    """
+    Decode through the WAV fallback, as on a machine without ffmpeg.
+    """
+    def run(cmd, **kwargs):
+        raise FileNotFoundError(cmd[0])
+    monkeypatch.setattr(decoded_audio.subprocess, "run", run)
+
+def _write_wav(path: str, samples: np.ndarray, rate: int = 16000) -> str:
+    samples = samples if samples.ndim == 2 else samples[:, np.newaxis]
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return path
+
+def _tone(seconds: float, amplitude: float) -> np.ndarray:
+    t = np.arange(int(16000 * seconds)) / 16000
+    return np.round(amplitude * 32767 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+def test_recording_is_decoded_once(tmp_path, monkeypatch):
+    samples = _tone(2.5, 0.5)
+    audio_path = _write_wav(str(tmp_path / "meeting.wav"), samples)
+
+    pcm_path = decoded_audio.ensure_decoded(audio_path)
+
+    assert pcm_path == str(tmp_path / "meeting.16k_s16.pcm")
+    assert np.array_equal(np.fromfile(pcm_path, dtype="<i2"), samples)
+    assert sorted(os.listdir(tmp_path)) == ["meeting.16k_s16.pcm", "meeting.wav"] # No temporary files left
+
+    def decode_again(*args):
+        raise AssertionError("decoded twice")
+    monkeypatch.setattr(decoded_audio, "_decode_wav", decode_again)
+    assert np.array_equal(decoded_audio.load(audio_path), samples)
+
+def test_float32_cache_holds_whisper_samples(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DECODED_AUDIO_DTYPE", "float32")
+    samples = _tone(1.0, 0.25)
+    audio_path = _write_wav(str(tmp_path / "meeting.wav"), samples)
+
+    audio = decoded_audio.load(audio_path)
+
+    assert decoded_audio.decoded_path(audio_path).endswith(".16k_f32.pcm")
+    assert audio.dtype == np.float32 and np.allclose(audio, samples / 32768.0)
+    assert decoded_audio.to_float32(audio) is audio
+
+def test_slices_match_the_whole_recording(tmp_path):
+    audio_path = _write_wav(str(tmp_path / "meeting.wav"), _tone(3.0, 0.5))
+    whole = decoded_audio.to_float32(decoded_audio.load(audio_path))
+
+    chunk = decoded_audio.read_slice(decoded_audio.decoded_path(audio_path), 16000, 40000)
+
+    assert chunk.dtype == np.float32 and np.array_equal(chunk, whole[16000:40000])
+
+def test_stereo_is_mixed_down(tmp_path):
+    left, right = np.full(1600, 1000, dtype=np.int16), np.full(1600, 3000, dtype=np.int16)
+    audio_path = _write_wav(str(tmp_path / "stereo.wav"), np.stack([left, right], axis=1))
+
+    assert np.all(decoded_audio.load(audio_path) == 2000)
+
+def test_unsupported_wav_needs_ffmpeg(tmp_path):
+    audio_path = _write_wav(str(tmp_path / "meeting.wav"), _tone(1.0, 0.5), rate=44100)
+
+    with pytest.raises(RuntimeError, match="ffmpeg is required"):
+        decoded_audio.ensure_decoded(audio_path)
+
+    assert os.listdir(tmp_path) == ["meeting.wav"] # Neither a partial decode nor a temporary file
+
+def test_levels_are_measured_in_dbfs(tmp_path):
+    audio_path = _write_wav(str(tmp_path / "meeting.wav"), _tone(90.0, 0.5)) # Longer than one read block
+
+    stats = decoded_audio.measure(decoded_audio.load(audio_path))
+
+    assert stats.duration == pytest.approx(90.0)
+    assert stats.peak_dbfs == pytest.approx(-6.02, abs=0.01)
+    assert stats.rms_dbfs == pytest.approx(-9.03, abs=0.01) # Sine RMS is 3 dB below its peak
+
+def test_silence_and_empty_audio_have_no_level(tmp_path):
+    silent = decoded_audio.measure(decoded_audio.load(_write_wav(str(tmp_path / "silent.wav"), np.zeros(16000))))
+    empty = decoded_audio.measure(decoded_audio.load(_write_wav(str(tmp_path / "empty.wav"), np.zeros(0))))
+
+    assert (silent.duration, silent.rms_dbfs, silent.peak_dbfs) == (1.0, None, None)
+    assert (empty.duration, empty.rms_dbfs, empty.peak_dbfs) == (0.0, None, None)
+
+def test_remove_deletes_every_sample_format(tmp_path, monkeypatch):
+    audio_path = _write_wav(str(tmp_path / "meeting.wav"), _tone(1.0, 0.5))
+    decoded_audio.ensure_decoded(audio_path)
+    monkeypatch.setattr(settings, "DECODED_AUDIO_DTYPE", "float32")
+    decoded_audio.ensure_decoded(audio_path)
+
+    decoded_audio.remove(audio_path)
+
+    assert os.listdir(tmp_path) == ["meeting.wav"]
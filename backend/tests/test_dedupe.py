@@ -0,0 +1,62 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.api_load import make_wav
+from app import crud, models
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.services import asr_engines
+from app.worker import Worker
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture(autouse=True)
+def no_quality_upgrades(monkeypatch):
+    monkeypatch.setattr(settings, "ASR_UPGRADE_ENABLED", False)
+
+def _upload(client, data: bytes) -> int:
+    response = client.post("/api/meetings/upload", files={"file": ("standup.wav", data, "audio/wav")}).json()
+    assert response["success"]
+    return int(response["meetingId"])
+
+
+def test_reference_count_follows_uploads_and_deletes(client, db):
+    data = make_wav(1)
+    first, second = _upload(client, data), _upload(client, data)
+    db.rollback()
+    content_hash = crud.get_meeting(db, first).content_hash
+    blob_path = crud.get_audio_blob(db, content_hash).file_path
+    assert crud.get_audio_blob(db, content_hash).ref_count == 2
+
+    assert client.delete(f"/api/meetings/{first}").status_code == 204
+    db.rollback()
+    assert crud.get_audio_blob(db, content_hash).ref_count == 1
+    assert os.path.exists(blob_path) # Still used by the second meeting
+
+    assert client.delete(f"/api/meetings/{second}").status_code == 204
+    db.rollback()
+    assert crud.get_audio_blob(db, content_hash) is None
+    assert not os.path.exists(blob_path)
+
+def test_identical_audio_skips_transcription(client, db, monkeypatch):
+    data = make_wav(2)
+    first = _upload(client, data)
+    assert Worker(SessionLocal, "test-worker").run_once()
+
+    second = _upload(client, data)
+    def no_transcription(*args, **kwargs):
+        raise AssertionError("identical audio was transcribed again")
+    monkeypatch.setattr(asr_engines.get_asr_engine(), "transcribe", no_transcription)
+    assert Worker(SessionLocal, "test-worker").run_once()
+
+    db.rollback()
+    original, copy = crud.get_meeting(db, first), crud.get_meeting(db, second)
+    assert copy.status == models.MeetingStatus.COMPLETED
+    assert copy.transcript == original.transcript and copy.summary_en == original.summary_en
@@ -0,0 +1,55 @@
+import json
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.services import events
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _events(lines):
+    for line in lines:
+        if line.startswith("data: "):
+            yield json.loads(line[len("data: "):])
+
+
+def test_permanently_failed_meeting_ends_the_stream(client, db, stored_meeting):
+    meeting_id = stored_meeting()
+    crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="boom")
+
+    with client.stream("GET", f"/api/meetings/{meeting_id}/events") as response:
+        received = list(_events(response.iter_lines()))
+
+    assert [event["stage"] for event in received] == [events.STAGE_FAILED]
+
+def test_failed_attempt_with_retries_left_keeps_the_stream_open(client, db, stored_meeting, monkeypatch):
+    monkeypatch.setattr(settings, "SSE_KEEPALIVE_SECONDS", 0.05)
+    meeting_id = stored_meeting()
+    job_id = crud.enqueue_processing_job(db, meeting_id).id
+    crud.update_meeting_status(db, meeting_id, models.MeetingStatus.FAILED, error_message="first attempt failed")
+
+    def drop_job():
+        # The job runs out of attempts while the stream is open
+        with SessionLocal() as session:
+            session.query(models.ProcessingJob).filter(models.ProcessingJob.id == job_id)\
+                   .update({"status": models.JobStatus.FAILED})
+            session.commit()
+    timer = threading.Timer(0.3, drop_job)
+    timer.start()
+    with client.stream("GET", f"/api/meetings/{meeting_id}/events") as response:
+        received = list(_events(response.iter_lines()))
+    timer.join()
+
+    assert [(event["stage"], event["status"]) for event in received] == [
+        ("status", models.MeetingStatus.FAILED.value), # Not the end: the job will be retried
+        (events.STAGE_FAILED, models.MeetingStatus.FAILED.value),
+    ]
@@ -0,0 +1,133 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import inference_scheduler
+from app.services.inference_scheduler import InferenceScheduler
+
+
+class _Decoder:
+    """
+    Stands in for decode_windows: records each batch and can hold the first one until released.
+    Windows are tagged by their first sample, so batches can be compared by tag.
+    """
+    def __init__(self):
+        self.batches = []
+        self.entered, self.release = threading.Event(), threading.Event()
+        self.error = None
+
+    def __call__(self, model, windows, language):
+        self.batches.append((model, language, [int(window[0]) for window in windows]))
+        if len(self.batches) == 1:
+            self.entered.set()
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return [{"language": language or "en", "segments": [{"start": 0.0, "end": 1.0, "text": str(int(window[0]))}]}
+                for window in windows]
+
+@pytest.fixture
+def decoder(monkeypatch):
+    decoder = _Decoder()
+    monkeypatch.setattr(inference_scheduler, "decode_windows", decoder)
+    return decoder
+
+@pytest.fixture
+def scheduler():
+    scheduler = InferenceScheduler(lambda name: f"model:{name}", batch_size=4, max_wait_seconds=0.01)
+    yield scheduler
+    scheduler.stop()
+
+def _windows(*tags):
+    return [np.full(160, tag, dtype=np.int16) for tag in tags]
+
+def _hold_first_batch(scheduler, decoder):
+    # A batch in progress, so the windows queued next are all waiting when the following batch is formed
+    held = scheduler.submit("base", None, _windows(0))
+    assert decoder.entered.wait(5)
+    return held
+
+def _texts(futures):
+    return [future.result(5)["segments"][0]["text"] for future in futures]
+
+
+def test_windows_of_concurrent_recordings_share_batches_in_turn(scheduler, decoder):
+    _hold_first_batch(scheduler, decoder)
+    long_recording = scheduler.submit("base", None, _windows(10, 11, 12, 13, 14, 15))
+    short_recording = scheduler.submit("base", None, _windows(20, 21))
+    decoder.release.set()
+
+    assert _texts(long_recording) == ["10", "11", "12", "13", "14", "15"]
+    assert _texts(short_recording) == ["20", "21"]
+    assert [tags for _, _, tags in decoder.batches] == [[0], [10, 20, 11, 21], [12, 13, 14, 15]]
+    stats = scheduler.stats()
+    assert (stats["batches"], stats["windows"], stats["mean_batch_size"]) == (3, 9, 3.0)
+    assert (stats["queued_windows"], stats["queued_recordings"]) == (0, 0)
+
+def test_batches_never_mix_models_or_languages(scheduler, decoder):
+    _hold_first_batch(scheduler, decoder)
+    english = scheduler.submit("small", "en", _windows(10, 11))
+    detected = scheduler.submit("base", None, _windows(20, 21))
+    more_english = scheduler.submit("small", "en", _windows(30))
+    decoder.release.set()
+
+    assert [result["language"] for result in (f.result(5) for f in english + more_english)] == ["en"] * 3
+    _texts(detected)
+    assert decoder.batches[1:] == [("model:small", "en", [10, 30, 11]), ("model:base", None, [20, 21])]
+
+def test_full_batch_starts_without_waiting(decoder):
+    decoder.release.set()
+    scheduler = InferenceScheduler(lambda name: name, batch_size=2, max_wait_seconds=60.0)
+    try:
+        assert _texts(scheduler.submit("base", None, _windows(1, 2))) == ["1", "2"]
+    finally:
+        scheduler.stop()
+
+def test_failed_batch_fails_its_windows_only(scheduler, decoder):
+    decoder.release.set()
+    decoder.error = RuntimeError("out of memory")
+    failed = scheduler.submit("base", None, _windows(1, 2))
+    for future in failed:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(5)
+
+    decoder.error = None
+    assert _texts(scheduler.submit("base", None, _windows(3))) == ["3"]
+    assert scheduler.stats()["batches"] == 1
+
+def test_stop_fails_queued_windows(scheduler, decoder):
+    held = _hold_first_batch(scheduler, decoder)
+    queued = scheduler.submit("base", None, _windows(1, 2))
+
+    scheduler.stop()
+    decoder.release.set()
+
+    assert _texts(held) == ["0"] # The batch in progress still completes
+    for future in queued:
+        with pytest.raises(RuntimeError, match="stopped"):
+            future.result(5)
+    assert scheduler.submit("base", None, []) == []
+
+def test_windows_fit_whisper_input():
+    audio = (np.random.default_rng(0).standard_normal(16000 * 95) * 3000).astype(np.int16)
+
+    windows = inference_scheduler.plan_windows(audio)
+
+    assert windows[0].start == 0.0 and windows[-1].end == pytest.approx(95.0)
+    assert all(window.end - window.start <= inference_scheduler.WINDOW_SECONDS for window in windows)
+    assert all(later.start < earlier.end for earlier, later in zip(windows, windows[1:])) # Overlapping
+
+def test_tokens_are_split_into_timestamped_segments():
+    tokenizer = SimpleNamespace(timestamp_begin=1000, decode=lambda tokens: " " + " ".join(f"w{t}" for t in tokens))
+    at = lambda seconds: 1000 + round(seconds / inference_scheduler.TIME_PRECISION)
+
+    segments = inference_scheduler._segments_from_tokens(
+        [at(0.0), 1, 2, at(2.4), at(2.4), 3, at(5.0), at(5.0), 4], tokenizer, window_seconds=8.0)
+
+    assert segments == [
+        {"start": 0.0, "end": pytest.approx(2.4), "text": "w1 w2"},
+        {"start": pytest.approx(2.4), "end": pytest.approx(5.0), "text": "w3"},
+        {"start": pytest.approx(5.0), "end": 8.0, "text": "w4"}, # Unclosed: runs to the window end
+    ]
@@ -0,0 +1,116 @@
+import datetime
+
+from app import crud, models
+
+WORKER = "worker-a"
+OTHER_WORKER = "worker-b"
+
+
+def _set_job(db, job_id: int, **values):
+    db.query(models.ProcessingJob).filter(models.ProcessingJob.id == job_id).update(values, synchronize_session=False)
+    db.commit()
+
+def _job(db, job_id: int) -> models.ProcessingJob:
+    db.rollback() # Read the committed row, not this session's cached copy
+    return crud.get_processing_job(db, job_id)
+
+def _past() -> datetime.datetime:
+    return datetime.datetime.utcnow() - datetime.timedelta(minutes=5)
+
+
+def test_claim_takes_a_lease_and_is_exclusive(db, stored_meeting):
+    db_job = crud.enqueue_processing_job(db, stored_meeting(), max_attempts=3)
+
+    claimed = crud.claim_next_job(db, WORKER, lease_seconds=60)
+    assert claimed.id == db_job.id
+    assert claimed.status == models.JobStatus.RUNNING
+    assert claimed.lease_owner == WORKER
+    assert claimed.attempts == 1
+    assert claimed.lease_expires_at > datetime.datetime.utcnow()
+    assert crud.claim_next_job(db, OTHER_WORKER, lease_seconds=60) is None
+
+def test_claim_order_is_priority_then_age(db, stored_meeting):
+    low = crud.enqueue_processing_job(db, stored_meeting(), priority=-1)
+    first = crud.enqueue_processing_job(db, stored_meeting())
+    second = crud.enqueue_processing_job(db, stored_meeting())
+
+    claimed = [crud.claim_next_job(db, WORKER, lease_seconds=60).id for _ in range(3)]
+    assert claimed == [first.id, second.id, low.id]
+
+def test_low_priority_jobs_never_take_every_worker(db, stored_meeting):
+    crud.enqueue_processing_job(db, stored_meeting(), priority=-1)
+    crud.enqueue_processing_job(db, stored_meeting(), priority=-1)
+
+    assert crud.claim_next_job(db, WORKER, lease_seconds=60, max_running_low_priority=1) is not None
+    assert crud.claim_next_job(db, OTHER_WORKER, lease_seconds=60, max_running_low_priority=1) is None
+    normal = crud.enqueue_processing_job(db, stored_meeting())
+    assert crud.claim_next_job(db, OTHER_WORKER, lease_seconds=60, max_running_low_priority=1).id == normal.id
+
+def test_heartbeat_extends_the_lease_of_its_owner_only(db, stored_meeting):
+    db_job = crud.enqueue_processing_job(db, stored_meeting())
+    crud.claim_next_job(db, WORKER, lease_seconds=60)
+    soon = datetime.datetime.utcnow() + datetime.timedelta(seconds=5)
+    _set_job(db, db_job.id, lease_expires_at=soon)
+
+    assert crud.heartbeat_job(db, db_job.id, OTHER_WORKER, lease_seconds=600) is False
+    assert _job(db, db_job.id).lease_expires_at == soon
+    assert crud.heartbeat_job(db, db_job.id, WORKER, lease_seconds=600) is True
+    assert _job(db, db_job.id).lease_expires_at > soon + datetime.timedelta(seconds=60)
+
+def test_fail_job_retries_with_backoff_then_fails(db, stored_meeting):
+    db_job = crud.enqueue_processing_job(db, stored_meeting(), max_attempts=2)
+    crud.claim_next_job(db, WORKER, lease_seconds=60)
+
+    assert crud.fail_job(db, db_job.id, WORKER, "boom", retry_backoff_seconds=30) == models.JobStatus.QUEUED
+    retried = _job(db, db_job.id)
+    assert retried.lease_owner is None
+    assert retried.last_error == "boom"
+    assert retried.available_at > datetime.datetime.utcnow() + datetime.timedelta(seconds=20)
+    assert crud.claim_next_job(db, WORKER, lease_seconds=60) is None # Still backing off
+
+    _set_job(db, db_job.id, available_at=_past())
+    assert crud.claim_next_job(db, WORKER, lease_seconds=60).attempts == 2
+    assert crud.fail_job(db, db_job.id, WORKER, "boom again", retry_backoff_seconds=30) == models.JobStatus.FAILED
+    assert _job(db, db_job.id).status == models.JobStatus.FAILED
+    assert crud.claim_next_job(db, WORKER, lease_seconds=60) is None
+
+def test_fail_job_ignores_a_worker_without_the_lease(db, stored_meeting):
+    db_job = crud.enqueue_processing_job(db, stored_meeting())
+    crud.claim_next_job(db, WORKER, lease_seconds=60)
+
+    assert crud.fail_job(db, db_job.id, OTHER_WORKER, "not mine", retry_backoff_seconds=30) is None
+    assert _job(db, db_job.id).status == models.JobStatus.RUNNING
+
+def test_expired_lease_is_requeued_and_the_old_owner_loses_it(db, stored_meeting):
+    db_job = crud.enqueue_processing_job(db, stored_meeting(), max_attempts=3)
+    crud.claim_next_job(db, WORKER, lease_seconds=60)
+    assert crud.recover_expired_jobs(db) == 0 # Lease still valid
+
+    _set_job(db, db_job.id, lease_expires_at=_past())
+    assert crud.recover_expired_jobs(db) == 1
+    recovered = _job(db, db_job.id)
+    assert recovered.status == models.JobStatus.QUEUED
+    assert recovered.lease_owner is None
+    assert "Lease expired" in recovered.last_error
+
+    # The stalled worker comes back: it can neither extend, complete nor fail the job
+    assert crud.heartbeat_job(db, db_job.id, WORKER, lease_seconds=60) is False
+    assert crud.complete_job(db, db_job.id, WORKER) is False
+    assert crud.fail_job(db, db_job.id, WORKER, "late", retry_backoff_seconds=30) is None
+
+    reclaimed = crud.claim_next_job(db, OTHER_WORKER, lease_seconds=60)
+    assert reclaimed.id == db_job.id and reclaimed.attempts == 2
+    assert crud.complete_job(db, db_job.id, OTHER_WORKER) is True
+    assert _job(db, db_job.id).status == models.JobStatus.SUCCEEDED
+
+def test_expired_lease_out_of_attempts_fails_the_meeting(db, stored_meeting):
+    meeting_id = stored_meeting()
+    db_job = crud.enqueue_processing_job(db, meeting_id, max_attempts=1)
+    crud.claim_next_job(db, WORKER, lease_seconds=60)
+    _set_job(db, db_job.id, lease_expires_at=_past())
+
+    assert crud.recover_expired_jobs(db) == 1
+    assert _job(db, db_job.id).status == models.JobStatus.FAILED
+    db_meeting = crud.get_meeting(db, meeting_id)
+    assert db_meeting.status == models.MeetingStatus.FAILED
+    assert db_meeting.error_message
@@ -0,0 +1,80 @@
+import time
+
+from app import models
+from app.config import settings
+from app.services import llm_cache
+
+
+class Computations:
+    """
+    A compute function that returns a response derived from its input and counts calls.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text: str = "") -> str:
+        self.calls.append(text)
+        return f"response to {text}"
+
+def _call(db, compute: Computations, text: str, namespace: str = "summary", model: str = "llama3",
+          prompt: str = "Summarize: {text}") -> str:
+    return llm_cache.cached_call(db, namespace, {"text": text}, lambda: compute(text), model=model, prompt_template=prompt)
+
+def _cached_texts(db) -> set:
+    return {value for (value,) in db.query(models.LLMCacheEntry.value).all()}
+
+
+def test_repeated_call_is_served_from_the_cache(db):
+    compute = Computations()
+    assert _call(db, compute, "standup") == _call(db, compute, "standup") == "response to standup"
+    assert compute.calls == ["standup"]
+
+def test_model_or_prompt_change_invalidates_entries(db):
+    compute = Computations()
+    _call(db, compute, "standup", namespace="invalidation")
+    _call(db, compute, "standup", namespace="invalidation", model="qwen2")
+    _call(db, compute, "standup", namespace="invalidation", model="qwen2", prompt="Summarize briefly: {text}")
+
+    assert compute.calls == ["standup"] * 3
+    # Entries written under an older model or prompt are purged, not left to be evicted
+    assert db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.namespace == "invalidation").count() == 1
+
+def test_least_recently_used_entries_are_evicted_past_the_entry_limit(db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_MAX_ENTRIES", 2)
+    compute = Computations()
+    for text in ("a", "b"):
+        _call(db, compute, text)
+        time.sleep(0.002)
+    _call(db, compute, "a") # Hit: "b" is now the least recently used
+    time.sleep(0.002)
+    _call(db, compute, "c")
+
+    assert _cached_texts(db) == {"response to a", "response to c"}
+
+def test_entries_are_evicted_past_the_byte_limit(db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_MAX_BYTES", 2 * len("response to x"))
+    compute = Computations()
+    for text in ("x", "y", "z"):
+        _call(db, compute, text)
+        time.sleep(0.002)
+
+    assert _cached_texts(db) == {"response to y", "response to z"}
+
+def test_batches_compute_only_the_misses(db):
+    batches = []
+    def compute_batch(payloads):
+        batches.append([payload["text"] for payload in payloads])
+        return [None if payload["text"] == "unparsable" else payload["text"].upper() for payload in payloads]
+    call = lambda texts: llm_cache.cached_batch(db, "batch", [{"text": text} for text in texts], compute_batch,
+                                                model="llama3", prompt_template="Translate: {text}")
+
+    assert call(["one", "unparsable"]) == ["ONE", None]
+    assert call(["one", "two", "unparsable"]) == ["ONE", "TWO", None]
+    assert batches == [["one", "unparsable"], ["two", "unparsable"]] # Failed results are not cached
+
+def test_disabled_cache_always_computes(db, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    compute = Computations()
+    _call(db, compute, "standup")
+    _call(db, compute, "standup")
+    assert compute.calls == ["standup", "standup"]
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import pytest
+
+from benchmarks.stub_ollama import start_stub_server
+from app.services import llm_client
+
+
+@pytest.fixture
+def stub_server():
+    server, _ = start_stub_server(tokens=10, token_delay=0.002)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _client(url: str, **overrides) -> llm_client.OllamaClient:
+    options = dict(base_url=url, model="stub", max_concurrency=2, max_connections=4, connect_timeout=1.0,
+                   request_timeout=5.0, max_retries=2, retry_backoff=0.01)
+    options.update(overrides)
+    return llm_client.OllamaClient(**options)
+
+
+def test_concurrency_cap_limits_generations_in_flight(stub_server):
+    async def run():
+        client = _client(stub_server.url, max_concurrency=2)
+        try:
+            return await asyncio.gather(*(client.generate(f"prompt {i}") for i in range(6)))
+        finally:
+            await client.aclose()
+
+    responses = asyncio.run(run())
+    assert len(set(responses)) == 6
+    assert stub_server.peak_active <= 2
+
+def test_streamed_tokens_add_up_to_the_response(stub_server):
+    async def run():
+        client = _client(stub_server.url)
+        try:
+            tokens = []
+            text = await client.generate("stream me", on_token=tokens.append)
+            return tokens, text
+        finally:
+            await client.aclose()
+
+    tokens, text = asyncio.run(run())
+    assert len(tokens) > 1 and "".join(tokens) == text
+
+def test_overloaded_server_is_retried(stub_server):
+    stub_server.fail_rate = 1.0
+    async def run():
+        client = _client(stub_server.url, max_retries=2)
+        try:
+            with pytest.raises(llm_client.OllamaError):
+                await client.generate("busy")
+            return client.stats()
+        finally:
+            await client.aclose()
+
+    stats = asyncio.run(run())
+    assert stats["requests"] == 3 and stats["retries"] == 2 and stats["failures"] == 1
+
+def test_unreachable_server_raises_unavailable():
+    async def run():
+        client = _client("http://127.0.0.1:9", max_retries=1)
+        try:
+            await client.generate("anyone there?")
+        finally:
+            await client.aclose()
+
+    with pytest.raises(llm_client.OllamaUnavailableError):
+        asyncio.run(run())
+
+def test_first_use_from_many_threads_shares_one_client():
+    llm_client.close()
+    barrier = threading.Barrier(8)
+    results, errors = [], []
+    def call(i: int):
+        barrier.wait()
+        try:
+            results.append(llm_client.generate(f"thread {i}"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == [] and len(results) == 8
+    assert llm_client.stats()["requests"] == 8
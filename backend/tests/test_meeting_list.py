@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.main import app
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _meetings(db, upload_times) -> list:
+    ids = []
+    for i, upload_time in enumerate(upload_times):
+        db_meeting = crud.create_meeting(db, schemas.MeetingCreate(filename=f"meeting_{i}.wav"))
+        db_meeting.upload_time = upload_time
+        db.commit()
+        ids.append(db_meeting.id)
+    return ids
+
+def _all_pages(client, limit: int, **params) -> list:
+    pages, cursor = [], None
+    while True:
+        query = dict(params, limit=limit, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/api/meetings/", params=query)
+        assert response.status_code == 200
+        page = response.json()
+        pages.append([item["id"] for item in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trips():
+    upload_time = datetime.datetime(2024, 5, 17, 9, 30, 15, 123456)
+
+    cursor = crud.encode_meeting_cursor(upload_time, 42)
+
+    assert "=" not in cursor and "|" not in cursor
+    assert crud.decode_meeting_cursor(cursor) == (upload_time, 42)
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "bm9waXBl", "MjAyNC0wNS0xN3xhYmM"])
+def test_malformed_cursor_is_rejected(client, cursor):
+    with pytest.raises(ValueError):
+        crud.decode_meeting_cursor(cursor)
+    if cursor:
+        assert client.get("/api/meetings/", params={"cursor": cursor}).status_code == 400
+
+def test_pages_are_stable_when_upload_times_are_equal(client, db):
+    same = datetime.datetime(2024, 5, 17, 9, 0)
+    earlier = datetime.datetime(2024, 5, 16, 9, 0)
+    upload_times = [earlier, same, same, same, same, earlier, same]
+    ids = _meetings(db, upload_times)
+
+    pages = _all_pages(client, limit=2)
+
+    expected = [meeting_id for _, meeting_id in sorted(zip(upload_times, ids), reverse=True)]
+    assert [meeting_id for page in pages for meeting_id in page] == expected
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+def test_new_upload_does_not_shift_later_pages(client, db):
+    ids = _meetings(db, [datetime.datetime(2024, 5, 1 + i) for i in range(4)])
+    first = client.get("/api/meetings/", params={"limit": 2}).json()
+
+    _meetings(db, [datetime.datetime(2024, 6, 1)])
+    second = client.get("/api/meetings/", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    assert [item["id"] for item in first["items"]] == [ids[3], ids[2]]
+    assert [item["id"] for item in second["items"]] == [ids[1], ids[0]]
+
+def test_filters_apply_across_pages(client, db):
+    ids = _meetings(db, [datetime.datetime(2024, 5, 1 + i) for i in range(5)])
+    for meeting_id in ids[1::2]:
+        crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(status=models.MeetingStatus.FAILED))
+
+    pages = _all_pages(client, limit=1, status="FAILED")
+
+    assert pages == [[ids[3]], [ids[1]], []]
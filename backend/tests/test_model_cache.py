@@ -0,0 +1,87 @@
+import threading
+import time
+import weakref
+
+from app.services.model_cache import ModelCache
+
+
+class FakeModel:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class CountingLoader:
+    """
+    Loads FakeModels slowly, recording the most models held at once: cached ones plus loads in flight.
+    """
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.cache = None
+        self.loads = []
+        self.loading = 0
+        self.peak_held = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str) -> FakeModel:
+        with self._lock:
+            self.loads.append(name)
+            self.loading += 1
+            self.peak_held = max(self.peak_held, self.loading + len(self.cache.loaded()))
+        time.sleep(self.delay)
+        with self._lock:
+            self.loading -= 1
+        return FakeModel(name)
+
+
+def test_least_recently_used_model_is_evicted():
+    loader = CountingLoader()
+    cache = loader.cache = ModelCache(loader, max_models=2)
+    cache.get("tiny")
+    cache.get("base")
+    cache.get("tiny") # Now the most recently used
+    cache.get("small")
+
+    assert cache.loaded() == ["tiny", "small"]
+    assert loader.loads == ["tiny", "base", "small"]
+
+def test_unloader_runs_once_the_cache_has_dropped_the_model():
+    references = {}
+    def loader(name):
+        model = FakeModel(name)
+        references[name] = weakref.ref(model)
+        return model
+    freed_before_unload = []
+    cache = ModelCache(loader, max_models=1, unloader=lambda name: freed_before_unload.append(references[name]() is None))
+
+    cache.get("tiny")
+    cache.get("base")
+    cache.clear()
+
+    assert freed_before_unload == [True, True]
+    assert cache.loaded() == []
+
+def test_concurrent_loads_never_exceed_max_models():
+    loader = CountingLoader(delay=0.02)
+    cache = loader.cache = ModelCache(loader, max_models=2)
+    names = ["tiny", "base", "small", "medium"] * 4
+    threads = [threading.Thread(target=lambda name=name: cache.get(name)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.peak_held <= 2
+    assert len(cache.loaded()) <= 2
+
+def test_concurrent_requests_for_one_model_load_it_once():
+    loader = CountingLoader(delay=0.05)
+    cache = loader.cache = ModelCache(loader, max_models=2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("base"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.loads == ["base"]
+    assert len({id(model) for model in results}) == 1
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, models, schemas
+from app.main import app
+from app.services import pdf_cache
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def completed_meeting(db) -> int:
+    meeting_id = crud.create_meeting(db, schemas.MeetingCreate(filename="standup.wav")).id
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(
+        status=models.MeetingStatus.COMPLETED, transcript="We agreed on the budget.", detected_language="en",
+        summary_en="Budget agreed.", summary_zh="预算已达成一致。", action_items_en=["Send the budget"],
+        action_items_zh=["发送预算"]))
+    return meeting_id
+
+@pytest.fixture
+def renders(monkeypatch):
+    submitted = []
+    submit_render = pdf_cache.submit_render
+    def recording_submit(context, version):
+        submitted.append(version)
+        return submit_render(context, version)
+    monkeypatch.setattr(pdf_cache, "submit_render", recording_submit)
+    return submitted
+
+def _export(client, meeting_id: int, etag: str = None):
+    headers = {"If-None-Match": etag} if etag else {}
+    return client.get(f"/api/meetings/{meeting_id}/export/pdf", headers=headers)
+
+
+def test_pdf_is_rendered_once_and_then_served_from_the_cache(client, completed_meeting, renders):
+    first = _export(client, completed_meeting)
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "application/pdf" and first.content.startswith(b"%PDF")
+
+    second = _export(client, completed_meeting)
+    assert second.status_code == 200 and second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(renders) == 1
+
+@pytest.mark.parametrize("header", ['{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_matching_etag_is_answered_with_not_modified(client, completed_meeting, renders, header):
+    etag = _export(client, completed_meeting).headers["ETag"]
+
+    response = _export(client, completed_meeting, header.format(etag=etag))
+
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(renders) == 1
+
+def test_edited_meeting_gets_a_new_version(client, db, completed_meeting, renders):
+    old = _export(client, completed_meeting)
+    crud.update_meeting(db, completed_meeting, schemas.MeetingUpdate(summary_en="Budget agreed, hiring postponed."))
+
+    new = _export(client, completed_meeting, old.headers["ETag"])
+
+    assert new.status_code == 200 and new.headers["ETag"] != old.headers["ETag"]
+    assert len(renders) == 2
+    version = new.headers["ETag"].strip('"')
+    cached = [name for name in os.listdir(pdf_cache.cache_dir()) if name.startswith(f"{completed_meeting}-")]
+    assert cached == [f"{completed_meeting}-{version}.pdf"] # The old version is dropped
+
+def test_deleting_a_meeting_removes_its_cached_pdfs(client, completed_meeting):
+    assert _export(client, completed_meeting).status_code == 200
+    assert client.delete(f"/api/meetings/{completed_meeting}").status_code == 204
+    assert not [name for name in os.listdir(pdf_cache.cache_dir()) if name.startswith(f"{completed_meeting}-")]
+    assert _export(client, completed_meeting).status_code == 404
@@ -0,0 +1,43 @@
+from app import crud, models
+from app.database import SessionLocal
+from app.services import pdf_cache, pipeline
+
+
+def _process(db, meeting_id: int) -> bool:
+    result = pipeline.process_meeting_audio(SessionLocal, meeting_id)
+    db.rollback()
+    return result
+
+def _stage_status(db, meeting_id: int, stage: models.PipelineStage) -> models.StageStatus:
+    return {db_stage.stage: db_stage.status for db_stage in crud.get_meeting_stages(db, meeting_id)}[stage]
+
+
+def test_pdf_is_rendered_once_after_translation_and_completion(db, stored_meeting, monkeypatch):
+    rendered = []
+    submit_render = pdf_cache.submit_render
+    def recording_submit(context, version):
+        rendered.append(context)
+        return submit_render(context, version)
+    monkeypatch.setattr(pdf_cache, "submit_render", recording_submit)
+    meeting_id = stored_meeting()
+
+    assert _process(db, meeting_id)
+
+    assert len(rendered) == 1
+    db_meeting = crud.get_meeting(db, meeting_id)
+    assert db_meeting.status == models.MeetingStatus.COMPLETED
+    context, version = pdf_cache.prepare(db_meeting)
+    assert pdf_cache.get_cached(meeting_id, version) is not None # The cached PDF is the current one
+    assert _stage_status(db, meeting_id, models.PipelineStage.RENDER) == models.StageStatus.COMPLETED
+
+def test_failed_render_is_recorded_without_failing_the_meeting(db, stored_meeting, monkeypatch):
+    def broken_render(context, version):
+        raise RuntimeError("renderer crashed")
+    monkeypatch.setattr(pdf_cache, "submit_render", broken_render)
+    meeting_id = stored_meeting()
+
+    assert _process(db, meeting_id)
+
+    assert crud.get_meeting(db, meeting_id).status == models.MeetingStatus.COMPLETED
+    assert _stage_status(db, meeting_id, models.PipelineStage.TRANSLATE) == models.StageStatus.COMPLETED
+    assert _stage_status(db, meeting_id, models.PipelineStage.RENDER) == models.StageStatus.FAILED
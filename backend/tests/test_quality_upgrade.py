@@ -0,0 +1,134 @@
+import pytest
+
+from app import crud, models, schemas
+from app.config import settings
+from app.database import SessionLocal
+from app.services import asr, asr_engines, asr_tiering, summarizer
+from app.worker import Worker
+
+DRAFT_MODEL = "tiny"
+
+
+def _run_job() -> bool:
+    return Worker(SessionLocal, "test-worker").run_once()
+
+def _snapshot(db, meeting_id: int) -> dict:
+    db.rollback()
+    db_meeting = crud.get_meeting(db, meeting_id)
+    return {
+        "meeting": {column: getattr(db_meeting, column) for column in
+                    ("status", "error_message", "asr_model", "transcript", "summary_en", "summary_zh",
+                     "action_items_en", "action_items_zh")},
+        "segments": [segment.text for segment in crud.get_transcript_segments(db, meeting_id)],
+        "stages": {db_stage.stage: (db_stage.status, db_stage.completed_at) for db_stage in crud.get_meeting_stages(db, meeting_id)},
+    }
+
+@pytest.fixture
+def draft_meeting(db, stored_meeting):
+    """
+    A COMPLETED meeting transcribed with a smaller model than its target, and its queued upgrade job.
+    """
+    meeting_id = stored_meeting()
+    crud.enqueue_processing_job(db, meeting_id)
+    assert _run_job()
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(asr_model=DRAFT_MODEL))
+    db.rollback()
+    assert crud.get_meeting(db, meeting_id).status == models.MeetingStatus.COMPLETED
+
+    target = asr.model_for_language(crud.get_meeting(db, meeting_id).detected_language)
+    assert target != DRAFT_MODEL
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "ASR_ADAPTIVE_TIERING", True)
+        db_job = asr_tiering.schedule_upgrade(db, meeting_id, target)
+    assert db_job.asr_model == target and db_job.priority < 0
+    return meeting_id, db_job.id, target
+
+@pytest.fixture
+def tagged_transcripts(monkeypatch):
+    # The fake engine's text depends on the audio only; tag it with the model to tell the results apart
+    engine = asr_engines.get_asr_engine()
+    transcribe = engine.transcribe
+    def tagged(model, audio, language=None):
+        result = transcribe(model, audio, language)
+        for segment in result["segments"]:
+            segment["text"] = f"[{model}] {segment['text']}"
+        return {**result, "text": " ".join(segment["text"] for segment in result["segments"])}
+    monkeypatch.setattr(engine, "transcribe", tagged)
+
+
+def test_successful_upgrade_swaps_in_the_new_results(db, draft_meeting, tagged_transcripts):
+    meeting_id, job_id, target = draft_meeting
+    before = _snapshot(db, meeting_id)
+
+    assert _run_job()
+
+    after = _snapshot(db, meeting_id)
+    assert after["meeting"]["status"] == models.MeetingStatus.COMPLETED
+    assert after["meeting"]["asr_model"] == target
+    assert after["meeting"]["transcript"].startswith(f"[{target}]")
+    assert after["segments"] and all(text.startswith(f"[{target}]") for text in after["segments"])
+    assert after["meeting"]["summary_en"] and after["meeting"]["summary_zh"]
+    assert after["stages"] == before["stages"] # Checkpoints are never reset by an upgrade
+    assert crud.get_processing_job(db, job_id).status == models.JobStatus.SUCCEEDED
+
+def test_failed_transcription_leaves_the_meeting_untouched(db, draft_meeting, monkeypatch):
+    meeting_id, job_id, target = draft_meeting
+    before = _snapshot(db, meeting_id)
+    engine = asr_engines.get_asr_engine()
+    def broken(model, audio, language=None):
+        raise RuntimeError(f"model {model} crashed")
+    monkeypatch.setattr(engine, "transcribe", broken)
+
+    assert _run_job()
+
+    assert _snapshot(db, meeting_id) == before
+    db_job = crud.get_processing_job(db, job_id)
+    assert db_job.status == models.JobStatus.QUEUED # Retried later, with the meeting still COMPLETED
+    assert db_job.last_error == "Quality upgrade failed"
+
+def test_failed_notes_leave_the_meeting_untouched(db, draft_meeting, tagged_transcripts, monkeypatch):
+    meeting_id, job_id, target = draft_meeting
+    before = _snapshot(db, meeting_id)
+    def llm_down(*args, **kwargs):
+        raise RuntimeError("LLM unavailable")
+    monkeypatch.setattr(summarizer, "translate_notes", llm_down)
+
+    assert _run_job()
+
+    assert _snapshot(db, meeting_id) == before
+    assert crud.get_processing_job(db, job_id).status == models.JobStatus.QUEUED
+
+def test_last_failed_attempt_drops_the_upgrade(db, draft_meeting, monkeypatch):
+    meeting_id, job_id, target = draft_meeting
+    before = _snapshot(db, meeting_id)
+    db.query(models.ProcessingJob).filter(models.ProcessingJob.id == job_id).update({"max_attempts": 1})
+    db.commit()
+    monkeypatch.setattr(asr_engines.get_asr_engine(), "transcribe", lambda *args, **kwargs: {"text": "", "language": "en", "segments": []})
+
+    assert _run_job() # An empty transcript counts as a failure
+
+    assert _snapshot(db, meeting_id) == before
+    assert crud.get_processing_job(db, job_id).status == models.JobStatus.FAILED
+
+def test_upgrade_of_a_meeting_that_changed_meanwhile_is_discarded(db, draft_meeting, tagged_transcripts):
+    meeting_id, job_id, target = draft_meeting
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(status=models.MeetingStatus.PROCESSING))
+    before = _snapshot(db, meeting_id)
+
+    assert _run_job()
+
+    assert _snapshot(db, meeting_id) == before
+    assert crud.get_processing_job(db, job_id).status == models.JobStatus.SUCCEEDED
+
+def test_no_upgrade_is_queued_beside_an_active_job(db, stored_meeting, monkeypatch):
+    meeting_id = stored_meeting()
+    crud.enqueue_processing_job(db, meeting_id)
+    assert _run_job()
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(asr_model=DRAFT_MODEL))
+    crud.enqueue_processing_job(db, meeting_id, from_stage=models.PipelineStage.SUMMARIZE)
+    monkeypatch.setattr(settings, "ASR_ADAPTIVE_TIERING", True)
+
+    assert asr_tiering.schedule_upgrade(db, meeting_id, "large") is None
+    db.rollback()
+    assert db.query(models.ProcessingJob).filter(models.ProcessingJob.meeting_id == meeting_id,
+                                                 models.ProcessingJob.asr_model.isnot(None)).count() == 0
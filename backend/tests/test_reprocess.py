@@ -0,0 +1,116 @@
+import pytest
+
+from app import crud, models, schemas
+from app.config import settings
+from app.database import SessionLocal
+from app.services import stages
+from app.worker import Worker
+
+
+@pytest.fixture(autouse=True)
+def no_quality_upgrades(monkeypatch):
+    # Keep the queue to the jobs each test enqueues
+    monkeypatch.setattr(settings, "ASR_UPGRADE_ENABLED", False)
+
+def _run_job() -> bool:
+    return Worker(SessionLocal, "test-worker").run_once()
+
+def _checkpoints(db, meeting_id: int) -> dict:
+    db.rollback()
+    return {db_stage.stage: (db_stage.status, db_stage.completed_at) for db_stage in crud.get_meeting_stages(db, meeting_id)}
+
+def _processed_meeting(db, stored_meeting) -> int:
+    meeting_id = stored_meeting()
+    crud.enqueue_processing_job(db, meeting_id)
+    assert _run_job()
+    db.rollback()
+    assert crud.get_meeting(db, meeting_id).status == models.MeetingStatus.COMPLETED
+    return meeting_id
+
+
+@pytest.mark.parametrize("from_stage", stages.STAGE_ORDER, ids=lambda stage: stage.value)
+def test_reprocess_reruns_the_stage_and_later_ones_only(db, stored_meeting, from_stage):
+    meeting_id = _processed_meeting(db, stored_meeting)
+    before = _checkpoints(db, meeting_id)
+    assert set(before) == set(stages.STAGE_ORDER)
+
+    db_job = stages.schedule_reprocess(db, meeting_id, from_stage)
+    assert db_job.from_stage == from_stage.value
+    assert crud.get_meeting(db, meeting_id).status == models.MeetingStatus.PENDING
+    assert _run_job()
+
+    after = _checkpoints(db, meeting_id)
+    db_meeting = crud.get_meeting(db, meeting_id)
+    assert db_meeting.status == models.MeetingStatus.COMPLETED
+    assert db_meeting.transcript and db_meeting.summary_en and db_meeting.summary_zh
+    position = stages.STAGE_ORDER.index(from_stage)
+    for stage in stages.STAGE_ORDER[:position]:
+        assert after[stage] == before[stage], f"{stage.value} was rerun"
+    for stage in stages.STAGE_ORDER[position:]:
+        assert after[stage][0] in stages.DONE_STATUSES
+        assert after[stage][1] > before[stage][1], f"{stage.value} was not rerun"
+
+def test_reprocess_refuses_a_meeting_with_an_active_job(db, stored_meeting):
+    meeting_id = _processed_meeting(db, stored_meeting)
+    stages.schedule_reprocess(db, meeting_id, models.PipelineStage.SUMMARIZE)
+    with pytest.raises(stages.ReprocessConflict):
+        stages.schedule_reprocess(db, meeting_id, models.PipelineStage.SUMMARIZE)
+
+def test_reprocess_resumes_at_an_earlier_incomplete_stage(db, stored_meeting):
+    meeting_id = _processed_meeting(db, stored_meeting)
+    crud.set_stage_status(db, meeting_id, models.PipelineStage.SUMMARIZE, models.StageStatus.FAILED, error_message="LLM down")
+
+    with pytest.raises(stages.ReprocessConflict):
+        stages.schedule_reprocess(db, meeting_id, models.PipelineStage.RENDER, strict=True)
+    db_job = stages.schedule_reprocess(db, meeting_id, models.PipelineStage.RENDER)
+    assert db_job.from_stage == models.PipelineStage.SUMMARIZE.value
+
+def test_reset_marks_failed_checkpoints_completed_and_keeps_skipped_ones(db, stored_meeting):
+    meeting_id = stored_meeting()
+    crud.set_stage_status(db, meeting_id, models.PipelineStage.DECODE, models.StageStatus.COMPLETED)
+    crud.set_stage_status(db, meeting_id, models.PipelineStage.ASR, models.StageStatus.FAILED, error_message="boom")
+    crud.set_stage_status(db, meeting_id, models.PipelineStage.SUMMARIZE, models.StageStatus.SKIPPED)
+    crud.set_stage_status(db, meeting_id, models.PipelineStage.TRANSLATE, models.StageStatus.COMPLETED)
+
+    crud.reset_meeting_stages(db, meeting_id, completed=stages.STAGE_ORDER[:3], cleared=stages.STAGE_ORDER[3:])
+
+    after = _checkpoints(db, meeting_id)
+    assert {stage: status for stage, (status, _) in after.items()} == {
+        models.PipelineStage.DECODE: models.StageStatus.COMPLETED,
+        models.PipelineStage.ASR: models.StageStatus.COMPLETED,
+        models.PipelineStage.SUMMARIZE: models.StageStatus.SKIPPED,
+    }
+
+def test_identical_audio_reuses_results_and_decode_measurements(db, stored_meeting):
+    source_id = stored_meeting()
+    source = crud.get_meeting(db, source_id)
+    crud.update_meeting(db, source_id, schemas.MeetingUpdate(content_hash="a" * 64))
+    crud.enqueue_processing_job(db, source_id)
+    assert _run_job()
+
+    copy_id = crud.create_meeting(db, schemas.MeetingCreate(filename="copy.wav")).id
+    crud.update_meeting(db, copy_id, schemas.MeetingUpdate(audio_file_path=source.audio_file_path, content_hash="a" * 64))
+    crud.enqueue_processing_job(db, copy_id)
+    assert _run_job()
+
+    db.rollback()
+    source, copy = crud.get_meeting(db, source_id), crud.get_meeting(db, copy_id)
+    assert copy.status == models.MeetingStatus.COMPLETED
+    assert copy.transcript == source.transcript and copy.summary_zh == source.summary_zh
+    assert (copy.duration, copy.loudness_dbfs, copy.peak_dbfs) == (source.duration, source.loudness_dbfs, source.peak_dbfs)
+    assert copy.loudness_dbfs is not None
+    assert len(crud.get_transcript_segments(db, copy_id)) == len(crud.get_transcript_segments(db, source_id))
+
+def test_failed_enqueue_leaves_the_checkpoints_and_status_untouched(db, stored_meeting, monkeypatch):
+    meeting_id = _processed_meeting(db, stored_meeting)
+    before = _checkpoints(db, meeting_id)
+    def fail_enqueue(*args, **kwargs):
+        raise RuntimeError("queue unavailable")
+    monkeypatch.setattr(crud, "_new_processing_job", fail_enqueue)
+
+    with pytest.raises(RuntimeError):
+        stages.schedule_reprocess(db, meeting_id, models.PipelineStage.ASR)
+
+    assert _checkpoints(db, meeting_id) == before
+    assert crud.get_meeting(db, meeting_id).status == models.MeetingStatus.COMPLETED
+    assert not crud.has_active_job(db, meeting_id)
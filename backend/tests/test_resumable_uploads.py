@@ -0,0 +1,156 @@
+import base64
+import datetime
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.api_load import make_wav
+from app import crud, models
+from app.config import settings
+from app.main import app
+from app.services import uploads
+
+TUS_HEADERS = {"Tus-Resumable": "1.0.0"}
+PATCH_HEADERS = {**TUS_HEADERS, "Content-Type": "application/offset+octet-stream"}
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _start(client, length: int, filename: str = "standup.wav"):
+    metadata = "filename " + base64.b64encode(filename.encode()).decode()
+    return client.post("/api/meetings/uploads", headers={**TUS_HEADERS, "Upload-Length": str(length),
+                                                         "Upload-Metadata": metadata})
+
+def _patch(client, location: str, offset: int, body: bytes):
+    return client.patch(location, content=body, headers={**PATCH_HEADERS, "Upload-Offset": str(offset)})
+
+def _upload_id(location: str) -> str:
+    return location.rsplit("/", 1)[-1]
+
+
+def test_upload_resumes_from_the_server_offset(client, db):
+    data = make_wav(2)
+    location = _start(client, len(data)).headers["Location"]
+
+    response = _patch(client, location, 0, data[:10000])
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == "10000"
+
+    # A client that lost track of the offset is refused, then asks the server where to resume
+    assert _patch(client, location, 0, data[10000:]).status_code == 409
+    assert client.head(location, headers=TUS_HEADERS).headers["Upload-Offset"] == "10000"
+    assert db.query(models.Meeting).count() == 0
+
+    response = _patch(client, location, 10000, data[10000:])
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == str(len(data))
+    assert _patch(client, location, len(data), b"").status_code == 409 # Already complete
+
+    db.rollback() # End the read snapshot taken before the upload finished
+    db_upload = crud.get_upload_session(db, _upload_id(location))
+    db_meeting = crud.get_meeting(db, db_upload.meeting_id)
+    assert db_meeting.status == models.MeetingStatus.PENDING
+    assert db_meeting.duration == pytest.approx(2.0)
+    with open(db_meeting.audio_file_path, "rb") as f:
+        assert f.read() == data
+    assert crud.has_active_job(db, db_meeting.id)
+    assert crud.get_audio_blob(db, db_meeting.content_hash).ref_count == 1
+    assert _upload_id(location) not in uploads._hashers
+
+def test_identical_uploads_share_one_blob(client, db):
+    data = make_wav(1)
+    for _ in range(2):
+        location = _start(client, len(data)).headers["Location"]
+        assert _patch(client, location, 0, data).status_code == 204
+
+    meetings = db.query(models.Meeting).all()
+    assert len(meetings) == 2
+    assert meetings[0].audio_file_path == meetings[1].audio_file_path
+    assert crud.get_audio_blob(db, meetings[0].content_hash).ref_count == 2
+    assert os.listdir(os.path.join(settings.UPLOAD_DIR, "incoming")) == []
+
+def test_declared_length_over_the_limit_is_refused(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1000)
+    assert _start(client, 1001).status_code == 413
+    assert _start(client, 1000).status_code == 201
+
+def test_body_past_the_declared_length_is_refused(client, db):
+    data = make_wav(1)
+    location = _start(client, len(data)).headers["Location"]
+
+    assert _patch(client, location, 0, data + b"extra").status_code == 413
+    assert int(client.head(location, headers=TUS_HEADERS).headers["Upload-Offset"]) < len(data)
+    assert db.query(models.Meeting).count() == 0
+
+def test_failed_registration_leaves_nothing_behind_and_can_be_finished(client, db, monkeypatch):
+    data = make_wav(1)
+    location = _start(client, len(data)).headers["Location"]
+
+    def fail_enqueue(*args, **kwargs):
+        raise RuntimeError("queue unavailable")
+    with monkeypatch.context() as patch:
+        patch.setattr(crud, "_new_processing_job", fail_enqueue)
+        assert _patch(client, location, 0, data).status_code == 500
+
+    db.rollback()
+    assert db.query(models.Meeting).count() == 0
+    assert db.query(models.AudioBlob).count() == 0
+    db_upload = crud.get_upload_session(db, _upload_id(location))
+    assert db_upload.meeting_id is None
+    assert os.path.getsize(db_upload.file_path) == len(data) # Partial file put back
+
+    # Every byte is there; an empty PATCH at the final offset finishes the upload
+    assert _patch(client, location, len(data), b"").status_code == 204
+    db.rollback()
+    assert db.query(models.Meeting).count() == 1
+    assert db.query(models.AudioBlob).one().ref_count == 1
+
+def test_expired_uploads_are_swept_with_their_hashers(client, db):
+    data = make_wav(1)
+    location = _start(client, len(data)).headers["Location"]
+    upload_id = _upload_id(location)
+    assert _patch(client, location, 0, data[:5000]).status_code == 204
+    partial_path = crud.get_upload_session(db, upload_id).file_path
+    assert upload_id in uploads._hashers
+
+    db.query(models.UploadSession).filter(models.UploadSession.id == upload_id)\
+      .update({"expires_at": datetime.datetime.utcnow() - datetime.timedelta(minutes=1)}, synchronize_session=False)
+    db.commit()
+    assert _start(client, len(data)).status_code == 201 # Starting an upload sweeps expired ones
+
+    assert upload_id not in uploads._hashers
+    assert not os.path.exists(partial_path)
+    assert client.head(location, headers=TUS_HEADERS).status_code == 404
+
+def _upload(client, data: bytes):
+    return client.post("/api/meetings/upload", files={"file": ("standup.wav", data, "audio/wav")}).json()
+
+def test_single_request_uploads_share_one_blob(client, db):
+    data = make_wav(1)
+    first, second = _upload(client, data), _upload(client, data)
+    assert first["success"] and second["success"]
+
+    db.rollback()
+    meetings = db.query(models.Meeting).all()
+    assert len(meetings) == 2 and all(crud.has_active_job(db, meeting.id) for meeting in meetings)
+    assert meetings[0].duration == pytest.approx(1.0)
+    assert crud.get_audio_blob(db, meetings[0].content_hash).ref_count == 2
+    assert os.listdir(os.path.join(settings.UPLOAD_DIR, "tmp")) == []
+
+def test_failed_single_request_upload_leaves_nothing_behind(client, db, monkeypatch):
+    def fail_enqueue(*args, **kwargs):
+        raise RuntimeError("queue unavailable")
+    monkeypatch.setattr(crud, "_new_processing_job", fail_enqueue)
+    stored = set(os.listdir(os.path.join(settings.UPLOAD_DIR, "blobs")))
+
+    assert not _upload(client, make_wav(3))["success"]
+
+    db.rollback()
+    assert db.query(models.Meeting).count() == 0
+    assert db.query(models.AudioBlob).count() == 0
+    assert os.listdir(os.path.join(settings.UPLOAD_DIR, "tmp")) == []
+    assert set(os.listdir(os.path.join(settings.UPLOAD_DIR, "blobs"))) == stored
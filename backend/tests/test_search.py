@@ -0,0 +1,59 @@
+from app import crud, schemas, search_index
+
+
+def _meeting(db, transcript: str, **fields) -> int:
+    meeting_id = crud.create_meeting(db, schemas.MeetingCreate(filename="meeting.wav")).id
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(transcript=transcript, **fields))
+    return meeting_id
+
+def _hit_ids(db, query: str) -> list:
+    total, hits = crud.search_transcripts(db, query, limit=50)
+    assert total == len(hits)
+    return [hit["meeting_id"] for hit in hits]
+
+
+def test_index_follows_inserts_updates_and_deletes(db):
+    assert search_index.is_enabled()
+    meeting_id = _meeting(db, "We agreed on the quarterly budget.")
+    assert _hit_ids(db, "budget") == [meeting_id]
+
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(transcript="We discussed the hiring plan."))
+    assert _hit_ids(db, "budget") == []
+    assert _hit_ids(db, "hiring") == [meeting_id]
+
+    crud.delete_meeting(db, meeting_id)
+    assert _hit_ids(db, "hiring") == []
+
+def test_hits_are_ranked_by_weighted_bm25(db):
+    passing = _meeting(db, "Someone mentioned the roadmap once among many other unrelated topics of the week.")
+    focused = _meeting(db, "Roadmap review.", summary_en="Roadmap priorities and the roadmap timeline.")
+
+    total, hits = crud.search_transcripts(db, "roadmap")
+
+    assert total == 2
+    assert [hit["meeting_id"] for hit in hits] == [focused, passing]
+    assert hits[0]["score"] > hits[1]["score"]
+    assert "<mark>" in hits[0]["snippet"]
+
+def test_all_terms_must_match_and_operators_are_literal(db):
+    both = _meeting(db, "The launch date moved to March.")
+    _meeting(db, "The launch was a success.")
+
+    assert _hit_ids(db, "launch march") == [both]
+    assert _hit_ids(db, 'launch OR "success') == [] # Treated as three terms, not FTS5 syntax
+
+def test_cjk_terms_fall_back_to_like(db):
+    meeting_id = _meeting(db, "今天我们讨论了预算和招聘计划", summary_en="Budget and hiring.")
+    assert not search_index.can_match("预算")
+
+    total, hits = crud.search_transcripts(db, "预算")
+
+    assert total == 1 and hits[0]["meeting_id"] == meeting_id
+    assert "<mark>预算</mark>" in hits[0]["snippet"]
+
+def test_short_terms_fall_back_to_like_with_the_trigram_tokenizer(db, monkeypatch):
+    meeting_id = _meeting(db, "Follow up on QA staffing.")
+    monkeypatch.setattr(search_index.settings, "SEARCH_TOKENIZER", "trigram")
+    assert not search_index.can_match("QA")
+
+    assert _hit_ids(db, "qa") == [meeting_id]
@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, schemas, search_index
+from app.main import app
+from app.database import SessionLocal
+from app.worker import Worker
+
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _meeting_with_segments(db, count: int) -> int:
+    meeting_id = crud.create_meeting(db, schemas.MeetingCreate(filename="meeting.wav")).id
+    crud.replace_transcript_segments(db, meeting_id, [
+        {"start": 2.0 * i, "end": 2.0 * i + 2.0, "text": f"Segment {i}."} for i in range(count)
+    ])
+    return meeting_id
+
+
+def test_processing_stores_timestamped_segments(db, stored_meeting):
+    meeting_id = stored_meeting(seconds=3.0)
+    crud.enqueue_processing_job(db, meeting_id)
+    assert Worker(SessionLocal, "test-worker").run_once()
+
+    db.rollback()
+    segments = crud.get_transcript_segments(db, meeting_id)
+    assert segments
+    assert [segment.segment_index for segment in segments] == list(range(len(segments)))
+    assert all(segment.start_time < segment.end_time for segment in segments)
+    assert " ".join(segment.text.strip() for segment in segments) == crud.get_meeting(db, meeting_id).transcript.strip()
+
+def test_replacing_segments_drops_the_old_ones(db):
+    meeting_id = _meeting_with_segments(db, 5)
+    crud.replace_transcript_segments(db, meeting_id, [{"start": 0.0, "end": 1.0, "text": "Only one."}])
+
+    assert [segment.text for segment in crud.get_transcript_segments(db, meeting_id)] == ["Only one."]
+
+def test_window_returns_the_overlapping_segments(db):
+    meeting_id = _meeting_with_segments(db, 10) # [0, 2), [2, 4), ... [18, 20)
+
+    segments = crud.get_transcript_segments(db, meeting_id, start=3.0, end=7.0)
+
+    assert [segment.segment_index for segment in segments] == [1, 2, 3]
+
+def test_pages_follow_next_after_to_the_end(client, db):
+    meeting_id = _meeting_with_segments(db, 7)
+    seen, after = [], None
+    while True:
+        params = {"limit": 3, **({"after": after} if after is not None else {})}
+        page = client.get(f"/api/meetings/{meeting_id}/segments", params=params).json()
+        seen += [segment["segment_index"] for segment in page["segments"]]
+        after = page["next_after"]
+        if after is None:
+            break
+
+    assert seen == list(range(7))
+    assert client.get("/api/meetings/999999/segments").status_code == 404
+
+def test_segments_are_copied_and_deleted_with_their_meeting(db):
+    source_id = _meeting_with_segments(db, 4)
+    copy_id = crud.create_meeting(db, schemas.MeetingCreate(filename="copy.wav")).id
+
+    assert crud.copy_transcript_segments(db, source_id, copy_id) == 4
+    assert [s.text for s in crud.get_transcript_segments(db, copy_id)] == [s.text for s in crud.get_transcript_segments(db, source_id)]
+
+    crud.delete_meeting(db, source_id)
+    assert crud.get_transcript_segments(db, source_id) == []
+    assert len(crud.get_transcript_segments(db, copy_id)) == 4
+
+def test_search_hits_point_at_the_first_matching_segment(db, monkeypatch):
+    meeting_id = crud.create_meeting(db, schemas.MeetingCreate(filename="meeting.wav")).id
+    crud.update_meeting(db, meeting_id, schemas.MeetingUpdate(transcript="Intro. Budget talk. More budget."))
+    crud.replace_transcript_segments(db, meeting_id, [
+        {"start": 0.0, "end": 2.0, "text": "Intro."},
+        {"start": 2.0, "end": 5.0, "text": "Budget talk."},
+        {"start": 5.0, "end": 9.0, "text": "More budget."},
+    ])
+
+    _, hits = crud.search_transcripts(db, "budget")
+    assert (hits[0]["segment_start"], hits[0]["segment_end"]) == (2.0, 5.0)
+    monkeypatch.setattr(search_index, "can_match", lambda query: False) # Same answer from the LIKE path
+    _, hits = crud.search_transcripts(db, "budget")
+    assert (hits[0]["segment_start"], hits[0]["segment_end"]) == (2.0, 5.0)
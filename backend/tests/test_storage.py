@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from benchmarks.api_load import make_wav
+from app import crud, models
+from app.config import settings
+from app.database import SessionLocal
+from app.services import storage
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    """
+    Stands in for ffmpeg: writes a small "archive" to the output path and records each call.
+    """
+    calls = []
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"archived")
+    monkeypatch.setattr(storage.subprocess, "run", run)
+    monkeypatch.setattr(settings, "AUDIO_ARCHIVE_CODEC", "flac")
+    return calls
+
+def _uploaded_meeting(db, data: bytes, content_hash: str) -> models.Meeting:
+    os.makedirs(storage.blob_dir(), exist_ok=True)
+    file_path = storage.blob_path(content_hash, ".wav")
+    if not os.path.exists(file_path):
+        with open(file_path, "wb") as f:
+            f.write(data)
+    return crud.create_uploaded_meeting(db, None, "meeting.wav", file_path, content_hash, len(data), 1.0,
+                                        settings.JOB_MAX_ATTEMPTS)
+
+
+def test_sole_reference_is_archived_and_repointed(db, fake_ffmpeg):
+    db_meeting = _uploaded_meeting(db, make_wav(1), "a" * 64)
+    original_path = db_meeting.audio_file_path
+
+    final_path = storage.archive_blob(db, "a" * 64, db_meeting.id) # Its own running job doesn't count
+
+    assert final_path.endswith(".flac") and final_path != original_path
+    assert not os.path.exists(original_path)
+    db.rollback()
+    assert crud.get_audio_blob(db, "a" * 64).file_path == final_path
+    assert crud.get_meeting(db, db_meeting.id).audio_file_path == final_path
+
+def test_shared_blob_keeps_its_original(db, fake_ffmpeg):
+    data = make_wav(1)
+    first = _uploaded_meeting(db, data, "b" * 64)
+    _uploaded_meeting(db, data, "b" * 64)
+
+    assert storage.archive_blob(db, "b" * 64, first.id) == first.audio_file_path
+    assert fake_ffmpeg == [] and os.path.exists(first.audio_file_path)
+
+def test_reference_taken_while_transcoding_keeps_the_original(db, monkeypatch, fake_ffmpeg):
+    data = make_wav(1)
+    db_meeting = _uploaded_meeting(db, data, "c" * 64)
+    original_path = db_meeting.audio_file_path
+    run = storage.subprocess.run
+    def run_and_upload_a_copy(cmd, **kwargs):
+        run(cmd, **kwargs)
+        with SessionLocal() as session: # An identical upload lands during the transcode
+            _uploaded_meeting(session, data, "c" * 64)
+    monkeypatch.setattr(storage.subprocess, "run", run_and_upload_a_copy)
+
+    assert storage.archive_blob(db, "c" * 64, db_meeting.id) == original_path
+
+    assert os.path.exists(original_path)
+    assert not os.path.exists(storage.blob_path("c" * 64, ".flac"))
+    assert not [name for name in os.listdir(storage.blob_dir()) if name.startswith("tmp")] # Transcode removed
+    db.rollback()
+    assert crud.get_audio_blob(db, "c" * 64).file_path == original_path
@@ -0,0 +1,59 @@
+import random
+
+from app.config import settings
+from app.services import summarizer, text_chunking
+
+WORDS = "budget hiring roadmap launch review customer pricing design release support metrics".split()
+
+
+def _transcript(sentences: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [f"Sentence {i} about the {rng.choice(WORDS)} and the {rng.choice(WORDS)}." for i in range(sentences)]
+
+
+def test_chunks_stay_within_the_budget_and_keep_every_sentence():
+    sentences = _transcript(300)
+    chunks = text_chunking.chunk_text(" ".join(sentences), max_tokens=120)
+
+    assert len(chunks) > 5
+    assert all(text_chunking.estimate_tokens(chunk) <= 120 for chunk in chunks)
+    assert " ".join(chunks) == " ".join(sentences)
+
+def test_an_edit_only_changes_the_chunks_around_it():
+    sentences = _transcript(300)
+    before = text_chunking.chunk_text(" ".join(sentences), max_tokens=120)
+    sentences[150] = "This sentence was corrected by hand after the meeting."
+    after = text_chunking.chunk_text(" ".join(sentences), max_tokens=120)
+
+    changed = set(after) - set(before)
+    assert 1 <= len(changed) <= 2
+    assert len(set(after) & set(before)) >= len(before) - 2
+
+def test_long_sentences_are_split_on_words_or_characters():
+    long_sentence = " ".join(["word"] * 400) + "."
+    chunks = text_chunking.chunk_text(long_sentence, max_tokens=50)
+    assert len(chunks) > 1 and all(text_chunking.estimate_tokens(chunk) <= 50 for chunk in chunks)
+
+    cjk = "我们讨论了预算" * 60 # No spaces or punctuation
+    chunks = text_chunking.chunk_text(cjk, max_tokens=40)
+    assert "".join(chunks) == cjk and all(text_chunking.estimate_tokens(chunk) <= 40 for chunk in chunks)
+
+def test_long_transcript_is_summarized_map_reduce_and_reuses_unchanged_parts(db, monkeypatch):
+    monkeypatch.setattr(settings, "SUMMARY_SINGLE_CALL_MAX_TOKENS", 300)
+    monkeypatch.setattr(settings, "SUMMARY_CHUNK_TOKENS", 120)
+    prompts = []
+    def fake_invoke(template_text, input_variable, value):
+        prompts.append(input_variable)
+        return f'Summary: notes on {len(value)} characters\nAction Items: ["Follow up {len(prompts)}"]'
+    monkeypatch.setattr(summarizer, "_invoke", fake_invoke)
+    sentences = _transcript(300)
+
+    summary, action_items = summarizer.generate_notes(db, 1, " ".join(sentences))
+    map_calls = prompts.count("transcript")
+    assert map_calls > 5 and prompts.count("notes") >= 1
+    assert summary and action_items
+
+    prompts.clear()
+    sentences[150] = "This sentence was corrected by hand after the meeting."
+    summarizer.generate_notes(db, 1, " ".join(sentences))
+    assert 1 <= prompts.count("transcript") <= 2 # Only the edited chunks go back to the LLM
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from app.config import settings
+from app.services import llm_client, translation
+
+
+class _Recorder:
+    """
+    Wraps llm_client.generate and records the texts of every translation request.
+    With `corrupt_batches` set, replies to more than one text lose their last translation.
+    """
+    def __init__(self, generate):
+        self.generate = generate
+        self.requests = []
+        self.corrupt_batches = False
+
+    def __call__(self, prompt, **kwargs):
+        texts = json.loads(prompt.rsplit("Texts:", 1)[1])
+        self.requests.append(texts)
+        raw = self.generate(prompt, **kwargs)
+        if self.corrupt_batches and len(texts) > 1:
+            return json.dumps({"translations": json.loads(raw)["translations"][:-1]})
+        return raw
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = _Recorder(llm_client.generate)
+    monkeypatch.setattr(llm_client, "generate", recorder)
+    return recorder
+
+
+def test_all_texts_go_into_one_request(db, recorder):
+    texts = ["Budget agreed.", "", "Send the minutes", "Send the minutes", "Book the room"]
+
+    translated = translation.translate_texts(db, texts, "zh")
+
+    assert translated == ["[translated] Budget agreed.", "", "[translated] Send the minutes",
+                          "[translated] Send the minutes", "[translated] Book the room"]
+    assert recorder.requests == [["Budget agreed.", "Send the minutes", "Book the room"]]
+
+def test_cached_translations_skip_the_llm(db, recorder):
+    translation.translate_texts(db, ["Budget agreed.", "Send the minutes"], "zh")
+
+    translated = translation.translate_texts(db, ["Send the minutes", "Hire a designer"], "zh")
+
+    assert translated == ["[translated] Send the minutes", "[translated] Hire a designer"]
+    assert recorder.requests[1:] == [["Hire a designer"]]
+    translation.translate_texts(db, ["Send the minutes"], "en") # Another target language is another entry
+    assert recorder.requests[2:] == [["Send the minutes"]]
+
+def test_batches_follow_the_token_budget(db, recorder, monkeypatch):
+    monkeypatch.setattr(settings, "TRANSLATION_BATCH_MAX_TOKENS", 12)
+    texts = [f"Action item number {i} for the team" for i in range(4)]
+
+    assert translation.translate_texts(db, texts, "zh") == [f"[translated] {text}" for text in texts]
+    assert len(recorder.requests) > 1 and [text for batch in recorder.requests for text in batch] == texts
+
+def test_unusable_batch_reply_falls_back_to_one_request_per_text(db, recorder):
+    recorder.corrupt_batches = True
+    texts = ["Budget agreed.", "Send the minutes", "Book the room"]
+
+    assert translation.translate_texts(db, texts, "zh") == [f"[translated] {text}" for text in texts]
+    assert recorder.requests == [texts] + [[text] for text in texts]
+
+def test_text_without_a_usable_translation_raises(db, monkeypatch):
+    monkeypatch.setattr(llm_client, "generate", lambda prompt, **kwargs: "not json")
+
+    with pytest.raises(translation.TranslationError):
+        translation.translate_texts(db, ["Budget agreed.", "Send the minutes"], "zh")
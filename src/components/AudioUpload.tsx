@@ -29,26 +29,17 @@ const AudioUpload: React.FC<AudioUploadProps> = ({ onUploadSuccess }) => {
 
     try {
       setIsUploading(true);
-      setMessage({ text: 'Processing audio...', type: 'info' });
+      setMessage({ text: 'Uploading audio...', type: 'info' });
       
-      // Simulate progress updates
-      const progressInterval = setInterval(() => {
-        setUploadProgress(prev => {
-          if (prev >= 95) {
-            clearInterval(progressInterval);
-            return 95;
-          }
-          return prev + 5;
-        });
-      }, 300);
+      // Real progress: the file is uploaded in chunks and the server confirms each one
+      const result = await api.uploadAudioResumable(selectedFile, fraction => {
+        setUploadProgress(Math.round(fraction * 100));
+      });
       
-      const result = await api.uploadAudio(selectedFile);
-      
-      clearInterval(progressInterval);
       setUploadProgress(100);
       
       if (result.success && result.meetingId) {
-        setMessage({ text: 'Audio processed successfully!', type: 'success' });
+        setMessage({ text: 'Audio uploaded; processing has started.', type: 'success' });
         if (onUploadSuccess) {
           onUploadSuccess(result.meetingId);
         }
@@ -115,7 +106,7 @@ const AudioUpload: React.FC<AudioUploadProps> = ({ onUploadSuccess }) => {
             <div className="mt-2">
               {/* Use muted foreground for progress text */}
               <div className="flex justify-between text-xs text-muted-foreground mb-1">
-                <span>Processing audio</span>
+                <span>Uploading audio</span>
                 <span>{uploadProgress}%</span>
               </div>
               {/* Use muted background for progress bar track */}
@@ -136,7 +127,7 @@ const AudioUpload: React.FC<AudioUploadProps> = ({ onUploadSuccess }) => {
                 : 'bg-primary hover:bg-primary/90 text-primary-foreground' // Enabled state
             }`}
           >
-            {isUploading ? 'Processing...' : 'Upload & Process Audio'}
+            {isUploading ? 'Uploading...' : 'Upload & Process Audio'}
           </button>
           
           {message.text && (
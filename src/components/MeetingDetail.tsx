@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { api, Meeting, MeetingStatus } from '../utils/api'; // Import Meeting and MeetingStatus from api.ts
+import { api, Meeting, MeetingStatus, ProcessingEvent } from '../utils/api'; // Import Meeting and MeetingStatus from api.ts
 import SearchTranscript from './SearchTranscript';
 import ExportOptions from './ExportOptions';
 import { Alert, AlertDescription, AlertTitle } from "@/components/ui/alert"; // Import Alert components
@@ -33,7 +33,8 @@ const MeetingDetail: React.FC<MeetingDetailProps> = ({ meetingId, onBack }) => {
   const [error, setError] = useState('');
   const [activeTab, setActiveTab] = useState<'summary' | 'transcript'>('summary');
   // const [displayLanguage, setDisplayLanguage] = useState<'en' | 'zh'>('en'); // Removed state for language selection
-  const pollingIntervalRef = React.useRef<NodeJS.Timeout | null>(null); 
+  const [progressMessage, setProgressMessage] = useState<string | null>(null);
+  const eventStreamCloseRef = React.useRef<(() => void) | null>(null); 
   const navigate = useNavigate(); 
 
   // --- Delete Handler ---
@@ -58,56 +59,81 @@ const MeetingDetail: React.FC<MeetingDetailProps> = ({ meetingId, onBack }) => {
   };
   // --- End Delete Handler ---
 
+  // --- Retry Handler ---
+  // Resumes from the stage that failed; completed stages (e.g. the transcript) are not redone
+  const handleRetry = async () => {
+    if (!meeting) return;
+    try {
+      await api.reprocessMeeting(meeting.id);
+      toast({ title: "Retrying", description: "The meeting was queued for processing again." });
+      fetchMeetingDetails(true);
+    } catch (error) {
+      console.error("Failed to reprocess meeting:", error);
+      toast({
+        title: "Error",
+        description: `Failed to retry processing. ${error instanceof Error ? error.message : 'Please try again.'}`,
+        variant: "destructive",
+      });
+    }
+  };
+  // --- End Retry Handler ---
+
+
+  const stopEventStream = () => {
+    if (eventStreamCloseRef.current) {
+      eventStreamCloseRef.current();
+      eventStreamCloseRef.current = null;
+    }
+  };
 
-  const fetchMeetingDetails = async (isPolling = false) => {
-      if (!isPolling) {
+  const fetchMeetingDetails = async (isRefresh = false) => {
+      if (!isRefresh) {
           setLoading(true);
       }
       try {
-         setLoading(true); // Keep loading true until fetch completes
          const data = await api.getMeeting(meetingId);
          setMeeting(data);
          setError('');
-         // Removed setDisplayLanguage call
 
-        // --- Polling Logic ---
+        // --- Progress Stream ---
+        // While processing, the server pushes stage transitions; the full meeting is
+        // only re-fetched when new content is ready instead of polling every few seconds.
         if (data.status === MeetingStatus.PENDING || data.status === MeetingStatus.PROCESSING) {
-          if (!pollingIntervalRef.current) { 
-            console.log(`Meeting ${meetingId} is processing, starting polling...`);
-            pollingIntervalRef.current = setInterval(() => fetchMeetingDetails(true), 5000); 
+          if (!eventStreamCloseRef.current) {
+            eventStreamCloseRef.current = api.subscribeToMeetingEvents(meetingId, handleProcessingEvent);
           }
         } else {
-          if (pollingIntervalRef.current) {
-            console.log(`Meeting ${meetingId} processing finished (status: ${data.status}), stopping polling.`);
-            clearInterval(pollingIntervalRef.current);
-            pollingIntervalRef.current = null;
-          }
+          stopEventStream();
+          setProgressMessage(null);
         }
-        // --- End Polling Logic ---
+        // --- End Progress Stream ---
 
       } catch (err) {
         console.error('Error fetching meeting details:', err);
         setError('Failed to load meeting details');
-        if (pollingIntervalRef.current) {
-            clearInterval(pollingIntervalRef.current);
-            pollingIntervalRef.current = null;
-        }
+        stopEventStream();
       } finally {
-         // Stop initial loading indicator only if not polling or if fetch failed
-         if (!isPolling || error) { 
-             setLoading(false);
-         }
+         setLoading(false);
       }
     };
 
+  const handleProcessingEvent = (event: ProcessingEvent) => {
+    if (event.message) {
+      setProgressMessage(event.message);
+    }
+    if (event.status) {
+      setMeeting(prev => (prev ? { ...prev, status: event.status as MeetingStatus } : prev));
+    }
+    if (event.stage === 'completed' || event.stage === 'failed') {
+      eventStreamCloseRef.current = null; // api closes the stream after terminal events
+      fetchMeetingDetails(true);
+    }
+  };
+
   useEffect(() => {
     fetchMeetingDetails(); 
     return () => {
-      if (pollingIntervalRef.current) {
-        console.log(`Unmounting MeetingDetail for ${meetingId}, stopping polling.`);
-        clearInterval(pollingIntervalRef.current);
-        pollingIntervalRef.current = null;
-      }
+      stopEventStream();
     };
   }, [meetingId]); 
 
@@ -166,7 +192,8 @@ const MeetingDetail: React.FC<MeetingDetailProps> = ({ meetingId, onBack }) => {
             <Terminal className="h-4 w-4" /> 
             <AlertTitle>Processing</AlertTitle> 
             <AlertDescription> 
-              This meeting is currently being processed (transcription and summary). Please check back later.
+              This meeting is currently being processed (transcription and summary). This page updates automatically.
+              {progressMessage && <span className="block mt-1 font-medium">{progressMessage}</span>}
             </AlertDescription>
           </Alert>
         );
@@ -177,6 +204,7 @@ const MeetingDetail: React.FC<MeetingDetailProps> = ({ meetingId, onBack }) => {
             <AlertTitle>Processing Failed</AlertTitle>
             <AlertDescription>
               {meeting.error_message || 'An error occurred during processing.'}
+              <Button variant="outline" size="sm" className="block mt-2" onClick={handleRetry}>Retry</Button>
             </AlertDescription>
           </Alert>
         );
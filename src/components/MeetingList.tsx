@@ -11,13 +11,16 @@ const MeetingList: React.FC<MeetingListProps> = ({ refreshTrigger }) => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [searchTerm, setSearchTerm] = useState('');
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchMeetings = async () => {
       try {
         setLoading(true);
-        const data = await api.getMeetings();
-        setMeetings(data);
+        const page = await api.getMeetings();
+        setMeetings(page.items);
+        setNextCursor(page.next_cursor ?? null);
         setError('');
       } catch (err) {
         console.error('Error fetching meetings:', err);
@@ -30,6 +33,22 @@ const MeetingList: React.FC<MeetingListProps> = ({ refreshTrigger }) => {
     fetchMeetings();
   }, [refreshTrigger]);
 
+  // Append the next page (keyset cursor from the previous page)
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await api.getMeetings({ cursor: nextCursor });
+      setMeetings(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor ?? null);
+    } catch (err) {
+      console.error('Error fetching more meetings:', err);
+      setError('Failed to load meetings');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Filter based on filename now
   const filteredMeetings = meetings.filter(meeting => 
     meeting.filename.toLowerCase().includes(searchTerm.toLowerCase())
@@ -139,6 +158,17 @@ const MeetingList: React.FC<MeetingListProps> = ({ refreshTrigger }) => {
           ))}
         </ul>
       )}
+
+      {/* Next page */}
+      {nextCursor && (
+        <button
+          onClick={loadMore}
+          disabled={loadingMore}
+          className="w-full mt-2 py-2 text-sm text-primary hover:bg-accent rounded-lg transition-colors disabled:text-muted-foreground"
+        >
+          {loadingMore ? 'Loading...' : 'Load more'}
+        </button>
+      )}
     </div>
   );
 };
@@ -20,6 +20,7 @@ export interface Meeting {
   action_items_zh?: string[]; // Will be parsed from JSON string
   status: MeetingStatus;
   error_message?: string | null;
+  duration?: number | null; // Audio length in seconds (read from the file header on upload)
   // Remove old generic fields
   // summary?: string | null;
   // actionItems?: string[]; 
@@ -33,6 +34,68 @@ export interface UploadResponse {
 }
 
 
+// Ranked search hit from GET /meetings/search/ (snippet is escaped HTML with <mark> highlights)
+export interface SearchHit {
+  meeting_id: number;
+  filename?: string | null;
+  upload_time?: string | null;
+  status: MeetingStatus;
+  detected_language?: string | null;
+  score: number;
+  snippet: string;
+  segment_id?: number | null; // First transcript segment containing the query
+  segment_start?: number | null; // Seconds from the start of the recording
+  segment_end?: number | null;
+}
+
+// Timestamped transcript segment from GET /meetings/{id}/segments
+export interface TranscriptSegment {
+  id: number;
+  segment_index: number;
+  start_time: number;
+  end_time: number;
+  text: string;
+  speaker?: string | null;
+}
+
+export interface TranscriptSegmentPage {
+  meeting_id: number;
+  segments: TranscriptSegment[];
+  next_after?: number | null; // Pass as `after` to load the next page
+}
+
+// One page of GET /meetings/ (list fields only: no transcript, summaries or action items)
+export interface MeetingPage {
+  items: Meeting[];
+  next_cursor?: string | null; // Pass as `cursor` to load the next page
+}
+
+export interface SearchResults {
+  query: string;
+  total: number;
+  limit: number;
+  offset: number;
+  hits: SearchHit[];
+}
+
+// Progress event pushed by GET /meetings/{id}/events (server-sent events)
+export interface ProcessingEvent {
+  meeting_id: number;
+  stage: string; // e.g. 'status', 'queued', 'asr', 'transcript_ready', 'summarizing', 'summary_ready', 'completed', 'failed'
+  status?: MeetingStatus | null;
+  progress?: number | null; // 0..1 for stages that report partial progress
+  message?: string | null;
+  timestamp?: string | null;
+}
+
+export type PipelineStage = 'decode' | 'asr' | 'summarize' | 'translate' | 'render';
+
+export interface ReprocessResponse {
+  meeting_id: number;
+  job_id: number;
+  from_stage: PipelineStage;
+}
+
 // Base URL for the API (assuming backend runs on the same origin or is proxied)
 const API_BASE_URL = '/api'; // Adjust if your backend API is hosted elsewhere
 
@@ -82,12 +145,17 @@ const transformMeetingData = (backendMeeting: any): Meeting => {
 
 // Actual API functions
 export const api = {
-  // Get all meetings
-  getMeetings: async (): Promise<Meeting[]> => {
-    const response = await fetch(`${API_BASE_URL}/meetings/`);
+  // Get a page of meetings, newest first, optionally filtered by status or detected language
+  getMeetings: async (
+    options: { cursor?: string | null; limit?: number; status?: MeetingStatus; language?: string } = {}
+  ): Promise<MeetingPage> => {
+    const params = new URLSearchParams();
+    Object.entries(options).forEach(([key, value]) => {
+      if (value !== undefined && value !== null) params.append(key, String(value));
+    });
+    const response = await fetch(`${API_BASE_URL}/meetings/?${params.toString()}`);
     const data = await handleResponse(response);
-    // Assuming the backend returns a list of meetings matching its schema
-    return data.map(transformMeetingData);
+    return { items: data.items.map(transformMeetingData), next_cursor: data.next_cursor };
   },
 
   // Get a specific meeting by ID
@@ -98,6 +166,44 @@ export const api = {
     return transformMeetingData(data);
   },
 
+  // Get the transcript segments overlapping a time window (seconds), one page at a time
+  getMeetingSegments: async (
+    id: string,
+    options: { from?: number; to?: number; after?: number; limit?: number } = {}
+  ): Promise<TranscriptSegmentPage> => {
+    const params = new URLSearchParams();
+    Object.entries(options).forEach(([key, value]) => {
+      if (value !== undefined) params.set(key, String(value));
+    });
+    const response = await fetch(`${API_BASE_URL}/meetings/${id}/segments?${params.toString()}`);
+    return handleResponse(response);
+  },
+
+  // Subscribe to processing progress events. Returns a function that closes the stream.
+  subscribeToMeetingEvents: (
+    id: string,
+    onEvent: (event: ProcessingEvent) => void,
+    onError?: () => void
+  ): (() => void) => {
+    const source = new EventSource(`${API_BASE_URL}/meetings/${id}/events`);
+    source.onmessage = (message) => {
+      try {
+        const event: ProcessingEvent = JSON.parse(message.data);
+        onEvent(event);
+        if (event.stage === 'completed' || event.stage === 'failed') {
+          source.close(); // Server ends the stream after a terminal event; don't reconnect
+        }
+      } catch (e) {
+        console.error("Failed to parse processing event:", e);
+      }
+    };
+    source.onerror = () => {
+      // The browser retries automatically unless the stream was closed
+      if (onError) onError();
+    };
+    return () => source.close();
+  },
+
   // Upload audio file
   uploadAudio: async (file: File): Promise<UploadResponse> => {
     const formData = new FormData();
@@ -118,6 +224,70 @@ export const api = {
     }
   },
 
+  // Resumable upload (tus protocol): the file is sent in chunks and an interrupted chunk is
+  // resumed from the offset the server reports, instead of restarting the whole upload.
+  uploadAudioResumable: async (
+    file: File,
+    onProgress?: (fraction: number) => void,
+  ): Promise<UploadResponse> => {
+    const CHUNK_SIZE = 8 * 1024 * 1024;
+    const MAX_RETRIES = 5;
+    const tusHeaders = { 'Tus-Resumable': '1.0.0' };
+    const encode = (value: string) => btoa(unescape(encodeURIComponent(value)));
+    // tus responses have no body on success; errors carry the usual JSON detail
+    const ensureOk = async (response: Response) => {
+      if (!response.ok) {
+        const errorData = await response.json().catch(() => ({ detail: response.statusText }));
+        throw new Error(errorData.detail || `HTTP error! status: ${response.status}`);
+      }
+    };
+
+    try {
+      const metadata = [`filename ${encode(file.name)}`];
+      if (file.type) metadata.push(`filetype ${encode(file.type)}`);
+      const created = await fetch(`${API_BASE_URL}/meetings/uploads`, {
+        method: 'POST',
+        headers: { ...tusHeaders, 'Upload-Length': String(file.size), 'Upload-Metadata': metadata.join(',') },
+      });
+      await ensureOk(created);
+      const uploadUrl = created.headers.get('Location') || ''; // Path on the API origin
+
+      let offset = 0;
+      let retries = 0;
+      let meetingId: string | null = null;
+      while (meetingId === null) {
+        try {
+          const response = await fetch(uploadUrl, {
+            method: 'PATCH',
+            headers: {
+              ...tusHeaders,
+              'Upload-Offset': String(offset),
+              'Content-Type': 'application/offset+octet-stream',
+            },
+            body: file.slice(offset, offset + CHUNK_SIZE),
+          });
+          await ensureOk(response);
+          offset = Number(response.headers.get('Upload-Offset'));
+          meetingId = response.headers.get('Meeting-Id');
+          retries = 0;
+        } catch (error) {
+          if (++retries > MAX_RETRIES) throw error;
+          await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+          // Ask the server how much it kept, then continue from there
+          const status = await fetch(uploadUrl, { method: 'HEAD', headers: tusHeaders });
+          if (!status.ok) throw error;
+          offset = Number(status.headers.get('Upload-Offset'));
+          meetingId = status.headers.get('Meeting-Id');
+        }
+        onProgress?.(file.size ? offset / file.size : 1);
+      }
+      return { success: true, meetingId };
+    } catch (error: any) {
+      console.error("Resumable upload failed:", error);
+      return { success: false, error: error.message || 'Upload failed due to an unknown error.' };
+    }
+  },
+
   // Get PDF export URL (or trigger download if backend handles it differently)
   exportPDF: (meetingId: string): string => {
     // This simply returns the URL. The actual download should be handled
@@ -125,11 +295,18 @@ export const api = {
     return `${API_BASE_URL}/meetings/${meetingId}/export/pdf`;
   },
 
-  // Search meeting transcripts
-  searchMeetings: async (query: string): Promise<Meeting[]> => {
-    const response = await fetch(`${API_BASE_URL}/meetings/search/?query=${encodeURIComponent(query)}`);
-    const data = await handleResponse(response);
-    return data.map(transformMeetingData);
+  // Search meeting transcripts, summaries and action items (ranked, paginated)
+  searchMeetings: async (query: string, limit = 10, offset = 0): Promise<SearchResults> => {
+    const params = new URLSearchParams({ query, limit: String(limit), offset: String(offset) });
+    const response = await fetch(`${API_BASE_URL}/meetings/search/?${params.toString()}`);
+    return handleResponse(response);
+  },
+
+  // Queue a meeting for reprocessing from a stage (default: its first incomplete stage, e.g. after a failed summary)
+  reprocessMeeting: async (id: string, fromStage?: PipelineStage): Promise<ReprocessResponse> => {
+    const params = fromStage ? `?${new URLSearchParams({ from_stage: fromStage }).toString()}` : '';
+    const response = await fetch(`${API_BASE_URL}/meetings/${id}/reprocess${params}`, { method: 'POST' });
+    return handleResponse(response);
   },
 
   // Delete a meeting by ID